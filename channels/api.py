@@ -1,16 +1,22 @@
 """Channels APIs"""
 # pylint: disable=too-many-public-methods, too-many-lines
+from collections import namedtuple, OrderedDict
+from contextlib import contextmanager
 import logging
 import operator
+import os
+import threading
 from datetime import datetime, timedelta, timezone
 from functools import reduce, partialmethod
 from urllib.parse import urljoin
 
 import pytz
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser, Group
+from django.core.cache import caches
 from django.db import transaction
 from django.db.models.functions import Coalesce
 from django.http.response import Http404
@@ -28,9 +34,10 @@ from prawcore.exceptions import (
     NotFound as PrawNotFound,
     ResponseException,
 )
+from redis.exceptions import LockError
 from rest_framework.exceptions import PermissionDenied, NotFound
 
-from channels import task_helpers as channel_task_helpers
+from channels import listing_cache, task_helpers as channel_task_helpers
 from channels.constants import (
     DELETED_COMMENT_OR_POST_TEXT,
     CHANNEL_TYPE_PUBLIC,
@@ -80,6 +87,7 @@ from channels.utils import (
 
 from open_discussions.utils import now_in_utc
 from search import task_helpers as search_task_helpers
+from search.api import invalidate_searchable_channel_names
 from search.task_helpers import reddit_object_persist
 from widgets.models import WidgetList
 
@@ -100,6 +108,14 @@ CHANNEL_SETTINGS = (
 # this comes from https://github.com/mitodl/reddit/blob/master/r2/r2/models/token.py#L270
 FULL_ACCESS_SCOPE = "*"
 EXPIRES_IN_OFFSET = 30  # offsets the reddit refresh_token expirations by 30 seconds
+# access tokens which expire sooner than this are not used
+ACCESS_TOKEN_EXPIRY_THRESHOLD = timedelta(minutes=2)
+AUTH_TOKENS_CACHE_KEY = "channels:auth_tokens:{user_id}"
+AUTH_TOKENS_LOCK_KEY = "channels:auth_tokens_lock:{user_id}"
+AUTH_TOKENS_LOCK_TIMEOUT = (
+    30
+)  # seconds before a lock held by a crashed process is released
+AUTH_TOKENS_LOCK_WAIT = 10  # seconds to wait for another process to fetch the tokens
 
 User = get_user_model()
 
@@ -108,6 +124,21 @@ prawcore.rate_limit.RateLimiter.delay = lambda *args: None
 
 log = logging.getLogger()
 
+# Sessions shared by every client in a process, keyed by process id and session settings
+_sessions = {}
+_sessions_lock = threading.Lock()
+# Configured clients are cached per thread since praw clients aren't thread-safe. Each thread has
+# a map of user id (None for anonymous users) to ClientCacheEntry, least recently used first.
+_thread_clients = threading.local()
+# Invalidating clients increments a generation, so clients cached by other threads are replaced too
+_client_generations = {}
+_all_clients_generation = 0
+_client_generations_lock = threading.Lock()
+
+ClientCacheEntry = namedtuple(
+    "ClientCacheEntry", ["client", "expires_at", "generation"]
+)
+
 
 def _get_refresh_token(username):
     """
@@ -131,17 +162,146 @@ def _get_refresh_token(username):
     return session.get(refresh_token_url, params={"username": username}).json()
 
 
+def _get_cached_auth_tokens(cache, user):
+    """
+    Get a user's tokens from the shared cache
+
+    Args:
+        cache (django.core.cache.backends.base.BaseCache): The cache
+        user (User): the authenticated user
+
+    Returns:
+        (channels.models.RedditRefreshToken, channels.models.RedditAccessToken):
+            the tokens, or None if there is no cached access token which is still valid
+    """
+    cached = cache.get(AUTH_TOKENS_CACHE_KEY.format(user_id=user.id))
+    if cached is None:
+        return None
+    return (
+        RedditRefreshToken(
+            id=cached["refresh_token_id"],
+            user=user,
+            token_value=cached["refresh_token"],
+        ),
+        RedditAccessToken(
+            id=cached["access_token_id"],
+            user=user,
+            token_value=cached["access_token"],
+            token_expires_at=cached["access_token_expires_at"],
+        ),
+    )
+
+
+def _cache_auth_tokens(cache, user, refresh_token, access_token):
+    """
+    Store a user's tokens in the shared cache until the access token is no longer valid
+
+    Args:
+        cache (django.core.cache.backends.base.BaseCache): The cache
+        user (User): the authenticated user
+        refresh_token (channels.models.RedditRefreshToken): the stored refresh token
+        access_token (channels.models.RedditAccessToken): the stored access token
+    """
+    timeout = (
+        access_token.token_expires_at - now_in_utc() - ACCESS_TOKEN_EXPIRY_THRESHOLD
+    ).total_seconds()
+    if timeout < 1:
+        return
+    cache.set(
+        AUTH_TOKENS_CACHE_KEY.format(user_id=user.id),
+        {
+            "refresh_token_id": refresh_token.id,
+            "refresh_token": refresh_token.token_value,
+            "access_token_id": access_token.id,
+            "access_token": access_token.token_value,
+            "access_token_expires_at": access_token.token_expires_at,
+        },
+        int(timeout),
+    )
+
+
+def _delete_cached_auth_tokens(user_ids):
+    """
+    Remove users' tokens from the shared cache, so they are read from the database again
+
+    Args:
+        user_ids (iterable of int): the ids of the users
+    """
+    keys = [AUTH_TOKENS_CACHE_KEY.format(user_id=user_id) for user_id in user_ids]
+    if keys:
+        caches["redis"].delete_many(keys)
+
+
+@contextmanager
+def _auth_tokens_lock(cache, user):
+    """
+    Context manager which lets one request at a time fetch tokens for a user, so concurrent requests
+    don't all ask reddit for new tokens. If the lock isn't acquired within AUTH_TOKENS_LOCK_WAIT
+    seconds the tokens are fetched anyway.
+
+    Args:
+        cache (django.core.cache.backends.base.BaseCache): The cache
+        user (User): the authenticated user
+    """
+    lock = cache.lock(
+        AUTH_TOKENS_LOCK_KEY.format(user_id=user.id),
+        timeout=AUTH_TOKENS_LOCK_TIMEOUT,
+        blocking_timeout=AUTH_TOKENS_LOCK_WAIT,
+    )
+    acquired = lock.acquire()
+    try:
+        yield
+    finally:
+        if acquired:
+            try:
+                lock.release()
+            except LockError:
+                # the lock timed out and may be held by another request now
+                log.warning("Auth tokens lock for user %s had expired", user.id)
+
+
 def get_or_create_auth_tokens(user):
     """
     Gets the stored refresh token or generates a new one
 
+    The tokens are cached in redis until the access token is about to expire, the database is only
+    queried when the cache doesn't have a valid access token.
+
+    Args:
+        user (User): the authenticated user
+
+    Returns:
+        (channels.models.RedditRefreshToken, channels.models.RedditAccessToken): the stored tokens
+    """
+    cache = caches["redis"]
+    tokens = _get_cached_auth_tokens(cache, user)
+    if tokens is not None:
+        return tokens
+
+    with _auth_tokens_lock(cache, user):
+        # another request may have stored the tokens while this one waited for the lock
+        tokens = _get_cached_auth_tokens(cache, user)
+        if tokens is not None:
+            return tokens
+
+        refresh_token, access_token = _get_or_create_stored_auth_tokens(user)
+        if access_token is not None:
+            _cache_auth_tokens(cache, user, refresh_token, access_token)
+        return refresh_token, access_token
+
+
+def _get_or_create_stored_auth_tokens(user):
+    """
+    Gets the refresh token and a valid access token from the database, generating a new refresh
+    token if the user doesn't have one
+
     Args:
         user (User): the authenticated user
 
     Returns:
         (channels.models.RedditRefreshToken, channels.models.RedditAccessToken): the stored tokens
     """
-    threshold_date = now_in_utc() + timedelta(minutes=2)
+    threshold_date = now_in_utc() + ACCESS_TOKEN_EXPIRY_THRESHOLD
     refresh_token, _ = RedditRefreshToken.objects.get_or_create(user=user)
     access_token = None
 
@@ -187,7 +347,7 @@ def _configure_access_token(client, access_token, user):
         user (User): the authenticated user
 
     Returns:
-        client (praw.Reddit): the configured client
+        (praw.Reddit, channels.models.RedditAccessToken): the configured client and its access token
     """
     # pylint: disable=protected-access
 
@@ -195,22 +355,31 @@ def _configure_access_token(client, access_token, user):
     # otherwise force a fetch for a new one and persist it
     authorizer = client._core._authorizer
 
-    if access_token:
-        # "hydrate" the authorizer from our stored access token
-        authorizer.access_token = access_token.token_value
-        authorizer._expiration_timestamp = access_token.token_expires_at.timestamp()
-        authorizer.scopes = set([FULL_ACCESS_SCOPE])
-    else:
-        authorizer = client._core._authorizer
-        authorizer.refresh()
-        expires_at = datetime.fromtimestamp(authorizer._expiration_timestamp)
-        RedditAccessToken.objects.create(
-            user=user,
-            token_value=authorizer.access_token,
-            token_expires_at=expires_at.replace(tzinfo=pytz.utc),
-        )
+    if not access_token:
+        cache = caches["redis"]
+        with _auth_tokens_lock(cache, user):
+            # another request may have refreshed the access token while this one waited
+            tokens = _get_cached_auth_tokens(cache, user)
+            if tokens is None:
+                authorizer.refresh()
+                expires_at = datetime.fromtimestamp(authorizer._expiration_timestamp)
+                access_token = RedditAccessToken.objects.create(
+                    user=user,
+                    token_value=authorizer.access_token,
+                    token_expires_at=expires_at.replace(tzinfo=pytz.utc),
+                )
+                _cache_auth_tokens(
+                    cache, user, RedditRefreshToken.objects.get(user=user), access_token
+                )
+                return client, access_token
+            access_token = tokens[1]
 
-    return client
+    # "hydrate" the authorizer from our stored access token
+    authorizer.access_token = access_token.token_value
+    authorizer._expiration_timestamp = access_token.token_expires_at.timestamp()
+    authorizer.scopes = set([FULL_ACCESS_SCOPE])
+
+    return client, access_token
 
 
 def _get_client_base_kwargs():
@@ -234,17 +403,37 @@ def _get_client_base_kwargs():
 
 def _get_session():
     """
-    Get a session to be used for communicating with reddit
+    Get a session to be used for communicating with reddit. The session is shared by every client
+    in the process so that connections to reddit are pooled and kept alive between requests.
 
     Returns:
         requests.Session: A session
     """
-    session = requests.Session()
-    session.verify = settings.OPEN_DISCUSSIONS_REDDIT_VALIDATE_SSL
-    session.headers.update(
-        {ACCESS_TOKEN_HEADER_NAME: settings.OPEN_DISCUSSIONS_REDDIT_ACCESS_TOKEN}
+    key = (
+        os.getpid(),
+        settings.OPEN_DISCUSSIONS_REDDIT_VALIDATE_SSL,
+        settings.OPEN_DISCUSSIONS_REDDIT_ACCESS_TOKEN,
+        settings.OPEN_DISCUSSIONS_REDDIT_POOL_MAXSIZE,
     )
-    return session
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_maxsize=settings.OPEN_DISCUSSIONS_REDDIT_POOL_MAXSIZE
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.verify = settings.OPEN_DISCUSSIONS_REDDIT_VALIDATE_SSL
+            session.headers.update(
+                {
+                    ACCESS_TOKEN_HEADER_NAME: settings.OPEN_DISCUSSIONS_REDDIT_ACCESS_TOKEN
+                }
+            )
+            # sessions from a parent process or with old settings are no longer used
+            _sessions.clear()
+            _sessions[key] = session
+        return session
 
 
 def _get_requester_kwargs():
@@ -257,9 +446,119 @@ def _get_requester_kwargs():
     return {"session": _get_session()}
 
 
+def _get_client_generation(user_id):
+    """
+    Get the current generation of the clients for a user
+
+    Args:
+        user_id (int): The id of the user, or None for the anonymous client
+
+    Returns:
+        tuple of int: The generation of every client and of the user's clients
+    """
+    with _client_generations_lock:
+        return _all_clients_generation, _client_generations.get(user_id, 0)
+
+
+def _get_thread_clients():
+    """
+    Get the clients cached by the current thread
+
+    Returns:
+        OrderedDict: A map of user id to ClientCacheEntry, least recently used first
+    """
+    clients = getattr(_thread_clients, "clients", None)
+    if clients is None:
+        clients = _thread_clients.clients = OrderedDict()
+    return clients
+
+
+def _is_client_usable(entry, user_id):
+    """
+    Determine if a cached client can still be used
+
+    Args:
+        entry (ClientCacheEntry): A cached client
+        user_id (int): The id of the client's user, or None for the anonymous client
+
+    Returns:
+        bool: True if the client can be used
+    """
+    if entry.generation != _get_client_generation(user_id):
+        return False
+    # the anonymous client fetches a new application token by itself when needed
+    return entry.expires_at is None or (
+        entry.expires_at > now_in_utc() + ACCESS_TOKEN_EXPIRY_THRESHOLD
+    )
+
+
+def _get_cached_client(user_id):
+    """
+    Get a client from the current thread's client cache
+
+    Args:
+        user_id (int): The id of the client's user, or None for the anonymous client
+
+    Returns:
+        praw.Reddit: The cached client, or None if there is no usable client in the cache
+    """
+    clients = _get_thread_clients()
+    entry = clients.get(user_id)
+    if entry is None:
+        return None
+    if not _is_client_usable(entry, user_id):
+        # the client was invalidated or its access token is about to expire, so get a new
+        # client with a stored or newly generated token instead
+        del clients[user_id]
+        return None
+    clients.move_to_end(user_id)
+    return entry.client
+
+
+def _cache_client(user_id, client, expires_at, generation):
+    """
+    Add a client to the current thread's client cache, evicting the least recently used clients
+
+    Args:
+        user_id (int): The id of the client's user, or None for the anonymous client
+        client (praw.Reddit): The client
+        expires_at (datetime.datetime): When the client's access token expires, or None
+        generation (tuple of int): The client generation from before the client was created
+    """
+    max_size = settings.OPEN_DISCUSSIONS_REDDIT_CLIENT_CACHE_SIZE
+    if max_size <= 0:
+        return
+    clients = _get_thread_clients()
+    clients[user_id] = ClientCacheEntry(client, expires_at, generation)
+    clients.move_to_end(user_id)
+    while len(clients) > max_size:
+        clients.popitem(last=False)
+
+
+def invalidate_client_cache(user=None):
+    """
+    Stop using a user's cached clients, or every cached client if no user is given, in every thread
+
+    Args:
+        user (User): The user, or None to invalidate every client
+    """
+    global _all_clients_generation  # pylint: disable=global-statement
+    # clients cached by the current thread are removed right away
+    thread_clients = _get_thread_clients()
+    with _client_generations_lock:
+        if user is None:
+            _all_clients_generation += 1
+            thread_clients.clear()
+        else:
+            user_id = None if user.is_anonymous else user.id
+            _client_generations[user_id] = _client_generations.get(user_id, 0) + 1
+            thread_clients.pop(user_id, None)
+
+
 def _get_client(user):
     """
-    Get a configured Reddit client_id
+    Get a configured Reddit client_id. Clients are cached per thread and user until their access
+    token is about to expire, and they share the process' pooled session.
 
     Args:
         user (User): the authenticated user, or None for anonymous user
@@ -267,18 +566,39 @@ def _get_client(user):
     Returns:
         praw.Reddit: configured reddit client
     """
+    user_id = None if user.is_anonymous else user.id
+    client = _get_cached_client(user_id)
+    if client is None:
+        generation = _get_client_generation(user_id)
+        client, expires_at = _create_client(user)
+        _cache_client(user_id, client, expires_at, generation)
+    return client
+
+
+def _create_client(user):
+    """
+    Create a configured Reddit client
+
+    Args:
+        user (User): the authenticated user, or None for anonymous user
+
+    Returns:
+        (praw.Reddit, datetime.datetime):
+            configured reddit client, and when its access token expires or None for anonymous users
+    """
     if user.is_anonymous:
-        return praw.Reddit(**_get_client_base_kwargs())
+        return praw.Reddit(**_get_client_base_kwargs()), None
 
     refresh_token, access_token = get_or_create_auth_tokens(user)
 
-    return _configure_access_token(
+    client, access_token = _configure_access_token(
         praw.Reddit(
             refresh_token=refresh_token.token_value, **_get_client_base_kwargs()
         ),
         access_token,
         user,
     )
+    return client, access_token.token_expires_at
 
 
 def _get_user_agent():
@@ -290,7 +610,11 @@ def evict_expired_access_tokens():
     """Evicts expired access tokens"""
     # give a 5-minute buffer
     now = now_in_utc() - timedelta(minutes=5)
-    RedditAccessToken.objects.filter(token_expires_at__lt=now).delete()
+    expired_tokens = RedditAccessToken.objects.filter(token_expires_at__lt=now)
+    _delete_cached_auth_tokens(
+        set(expired_tokens.values_list("user_id", flat=True).distinct())
+    )
+    expired_tokens.delete()
 
 
 def replace_load_comment(original_load_comment):
@@ -359,6 +683,7 @@ def add_user_role(channel, role, user):
         user(django.contrib.auth.models.User): The user
     """
     get_role_model(channel, role).group.user_set.add(user)
+    invalidate_searchable_channel_names(user)
 
 
 def remove_user_role(channel, role, user):
@@ -371,6 +696,7 @@ def remove_user_role(channel, role, user):
         user(django.contrib.auth.models.User): The user
     """
     get_role_model(channel, role).group.user_set.remove(user)
+    invalidate_searchable_channel_names(user)
 
 
 def get_post_type(*, text, url, article_content):
@@ -581,8 +907,10 @@ class Api:
             self.reddit = _get_client(user=user)
         except ResponseException as ex:
             if not user.is_anonymous and ex.response.status_code == 401:
+                invalidate_client_cache(user)
                 RedditAccessToken.objects.filter(user=user).delete()
                 RedditRefreshToken.objects.filter(user=user).delete()
+                _delete_cached_auth_tokens([user.id])
 
                 self.reddit = _get_client(user=user)
             else:
@@ -684,7 +1012,9 @@ class Api:
 
         return ChannelProxy(subreddit, channel)
 
-    @reddit_object_persist(search_task_helpers.update_channel_index)
+    @reddit_object_persist(
+        search_task_helpers.update_channel_index, listing_cache.invalidate_channel
+    )
     def update_channel(self, name, title=None, channel_type=None, **other_settings):
         """
         Updates a channel
@@ -884,6 +1214,7 @@ class Api:
     @reddit_object_persist(
         search_task_helpers.index_new_post,
         channel_task_helpers.maybe_repair_post_in_host_listing,
+        listing_cache.invalidate_post_listings,
     )
     def create_post(
         self,
@@ -948,6 +1279,7 @@ class Api:
                     "edited": False,
                     "removed": False,
                     "deleted": False,
+                    "stickied": False,
                     "created_on": datetime.fromtimestamp(
                         submission.created, tz=timezone.utc
                     ),
@@ -1076,7 +1408,9 @@ class Api:
         """
         return proxy_post(self.get_submission(post_id))
 
-    @reddit_object_persist(search_task_helpers.update_post_text)
+    @reddit_object_persist(
+        search_task_helpers.update_post_text, listing_cache.invalidate_post_listings
+    )
     def update_post(
         self, post_id, *, text=None, article_content=None, cover_image=None
     ):
@@ -1156,9 +1490,14 @@ class Api:
             pinned(bool): the value for the 'stickied' field
         """
         post = self.get_post(post_id)
-        post.mod.sticky(pinned)
+        with transaction.atomic():
+            Post.objects.filter(post_id=post_id).update(stickied=pinned)
+            post.mod.sticky(pinned)
 
-    @reddit_object_persist(search_task_helpers.update_post_removal_status)
+    @reddit_object_persist(
+        search_task_helpers.update_post_removal_status,
+        listing_cache.invalidate_post_listings,
+    )
     def remove_post(self, post_id):
         """
         Removes the post, opposite of approve_post
@@ -1172,7 +1511,10 @@ class Api:
             post.mod.remove()
         return post
 
-    @reddit_object_persist(search_task_helpers.update_post_removal_status)
+    @reddit_object_persist(
+        search_task_helpers.update_post_removal_status,
+        listing_cache.invalidate_post_listings,
+    )
     def approve_post(self, post_id):
         """
         Approves the post, opposite of remove_post
@@ -1186,7 +1528,9 @@ class Api:
             post.mod.approve()
         return post
 
-    @reddit_object_persist(search_task_helpers.set_post_to_deleted)
+    @reddit_object_persist(
+        search_task_helpers.set_post_to_deleted, listing_cache.invalidate_post_listings
+    )
     def delete_post(self, post_id):
         """
         Deletes the post
@@ -1203,7 +1547,9 @@ class Api:
             post.delete()
         return post
 
-    @reddit_object_persist(search_task_helpers.index_new_comment)
+    @reddit_object_persist(
+        search_task_helpers.index_new_comment, listing_cache.invalidate_comment_tree
+    )
     def create_comment(self, text, post_id=None, comment_id=None):
         """
         Create a new comment in reply to a post or comment
@@ -1242,7 +1588,9 @@ class Api:
 
         return comment
 
-    @reddit_object_persist(search_task_helpers.update_comment_text)
+    @reddit_object_persist(
+        search_task_helpers.update_comment_text, listing_cache.invalidate_comment_tree
+    )
     def update_comment(self, comment_id, text):
         """
         Updates a existing comment
@@ -1261,7 +1609,10 @@ class Api:
             comment = comment.edit(text)
         return comment
 
-    @reddit_object_persist(search_task_helpers.update_comment_removal_status)
+    @reddit_object_persist(
+        search_task_helpers.update_comment_removal_status,
+        listing_cache.invalidate_comment_tree,
+    )
     def remove_comment(self, comment_id):
         """
         Removes a comment
@@ -1275,7 +1626,10 @@ class Api:
             comment.mod.remove()
         return comment
 
-    @reddit_object_persist(search_task_helpers.update_comment_removal_status)
+    @reddit_object_persist(
+        search_task_helpers.update_comment_removal_status,
+        listing_cache.invalidate_comment_tree,
+    )
     def approve_comment(self, comment_id):
         """
         Approves a comment
@@ -1289,7 +1643,10 @@ class Api:
             comment.mod.approve()
         return comment
 
-    @reddit_object_persist(search_task_helpers.set_comment_to_deleted)
+    @reddit_object_persist(
+        search_task_helpers.set_comment_to_deleted,
+        listing_cache.invalidate_comment_tree,
+    )
     def delete_comment(self, comment_id):
         """
         Deletes the comment
@@ -1300,7 +1657,7 @@ class Api:
         """
         comment = self.get_comment(comment_id)
         with transaction.atomic():
-            Comment.objects.filter(comment_id=comment_id).update(deleted=False)
+            Comment.objects.filter(comment_id=comment_id).update(deleted=True)
             comment.delete()
         return comment
 
@@ -1342,6 +1699,11 @@ class Api:
         Fetches data for a comment and its children and returns a list of comments
         (which might include another MoreComment)
 
+        The children are requested from reddit in batches of
+        OPEN_DISCUSSIONS_REDDIT_MORE_COMMENTS_BATCH_SIZE, which defaults to the maximum number of
+        ids reddit accepts in one call. Children which reddit didn't return are left in a
+        MoreComments which the user can expand later.
+
         Args:
             parent_id (str): the fullname for the comment
             post_id (str): the id of the post
@@ -1352,31 +1714,86 @@ class Api:
         Returns:
             list: A list of comments, might include a MoreComment at the end if more fetching required
         """
-        more_comments = self.init_more_comments(
-            parent_id=parent_id, post_id=post_id, children=children, sort=sort
+        if not children:
+            # <MoreComments count=0, children=[]> continues a thread which is too deep,
+            # praw loads it from the parent comment's permalink instead
+            return self.expand_more_comments(
+                [
+                    self.init_more_comments(
+                        parent_id=parent_id,
+                        post_id=post_id,
+                        children=children,
+                        sort=sort,
+                        load=False,
+                    )
+                ]
+            )
+
+        batch_size = max(settings.OPEN_DISCUSSIONS_REDDIT_MORE_COMMENTS_BATCH_SIZE, 1)
+        comments = self.expand_more_comments(
+            [
+                self.init_more_comments(
+                    parent_id=parent_id,
+                    post_id=post_id,
+                    children=children[index : index + batch_size],
+                    sort=sort,
+                    load=False,
+                )
+                for index in range(0, len(children), batch_size)
+            ]
         )
 
-        # more_comments.comments() can return either a list of comments or a CommentForest object
-        comments = more_comments.comments()
-        if isinstance(comments, CommentForest):
-            comments = comments.list()
-
-        # if the number of comments is less than the number of children, it means that the morecomments
-        # object did not return all the comments, so we need to manually add another morecomments
-        # object with the remaining children; not sure why praw does not do it automatically
-        # anyway this seems to happen only with objects that do NOT look like this one:
-        # <MoreComments count=0, children=[]>
-        if len(comments) < len(children):
-            remaining_morecomments = self.init_more_comments(
-                parent_id=parent_id,
-                post_id=post_id,
-                children=children[len(comments) :],
-                sort=sort,
+        # reddit may not return every child it was asked for, in that case the remaining ones
+        # are returned as a MoreComments object which the user can expand later
+        returned_ids = set()
+        for comment in comments:
+            if isinstance(comment, more.MoreComments):
+                returned_ids.update(comment.children)
+            else:
+                returned_ids.add(comment.id)
+        remaining = [child for child in children if child not in returned_ids]
+        if remaining:
+            comments.append(
+                self.init_more_comments(
+                    parent_id=parent_id,
+                    post_id=post_id,
+                    children=remaining,
+                    sort=sort,
+                    load=False,
+                )
             )
-            comments.append(remaining_morecomments)
         return comments
 
-    def init_more_comments(self, parent_id, post_id, children, sort):
+    @staticmethod
+    def expand_more_comments(more_comments_list):
+        """
+        Loads a set of MoreComments objects one after another and merges them into one list
+
+        Args:
+            more_comments_list (list of praw.models.MoreComments): MoreComments which aren't loaded
+
+        Returns:
+            list: The comments and MoreComments, in the order of the MoreComments they were
+                loaded from, without duplicates
+        """
+        merged = []
+        seen_ids = set()
+        for more_comments in more_comments_list:
+            # more_comments.comments() can return either a list of comments or a CommentForest object
+            comments = more_comments.comments()
+            if isinstance(comments, CommentForest):
+                comments = comments.list()
+            for comment in comments:
+                if isinstance(comment, more.MoreComments):
+                    merged.append(comment)
+                elif comment.id not in seen_ids:
+                    seen_ids.add(comment.id)
+                    merged.append(comment)
+        return merged
+
+    def init_more_comments(
+        self, parent_id, post_id, children, sort, load=True
+    ):  # pylint: disable=too-many-arguments
         """
         Initializes a MoreComments instance from the passed data and fetches channel
 
@@ -1386,6 +1803,7 @@ class Api:
             children(list(str)):
                 a list of comment ids
             sort(str): the sort method for comments
+            load(bool): if true, the comments are loaded from reddit
 
         Returns:
             praw.models.MoreComments: the set of more comments
@@ -1421,7 +1839,8 @@ class Api:
         more_comments._load_comment = replace_load_comment(  # pylint: disable=protected-access
             more_comments._load_comment  # pylint: disable=protected-access
         )
-        more_comments.comments()  # load the comments
+        if load:
+            more_comments.comments()  # load the comments
         return more_comments
 
     def add_contributor(self, contributor_name, channel_name):
@@ -1,5 +1,9 @@
 """API tests"""
 # pylint: disable=redefined-outer-name,too-many-lines
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import threading
+import time
 from unittest.mock import Mock, MagicMock
 from urllib.parse import urljoin
 from types import SimpleNamespace
@@ -8,11 +12,13 @@ from django.contrib.auth.models import AnonymousUser
 import pytest
 from praw.models import Comment as RedditComment
 from praw.models.comment_forest import CommentForest
+from praw.models.reddit import more
 from praw.models.reddit.redditor import Redditor
 from prawcore.exceptions import ResponseException
+from redis.exceptions import LockError
 from rest_framework.exceptions import NotFound
 
-from channels import api
+from channels import api, listing_cache
 from channels.constants import (
     COMMENTS_SORT_BEST,
     CHANNEL_TYPE_PUBLIC,
@@ -30,7 +36,12 @@ from channels.constants import (
     EXTENDED_POST_TYPE_ARTICLE,
     POSTS_SORT_HOT,
 )
-from channels.factories.models import ArticleFactory, ChannelFactory, PostFactory
+from channels.factories.models import (
+    ArticleFactory,
+    ChannelFactory,
+    CommentFactory,
+    PostFactory,
+)
 from channels.models import (
     Article,
     Channel,
@@ -46,6 +57,7 @@ from channels.utils import DEFAULT_LISTING_PARAMS, ListingParams
 from channels.test_utils import assert_properties_eq
 from search import task_helpers as search_task_helpers
 from open_discussions.factories import UserFactory
+from open_discussions.utils import now_in_utc
 
 pytestmark = pytest.mark.django_db
 
@@ -235,6 +247,12 @@ def test_vote_indexing(
     patched_vote_indexer = mocker.patch(
         "channels.api.search_task_helpers.update_indexed_score"
     )
+    invalidate_mock = mocker.patch(
+        "channels.api.listing_cache.invalidate_post_listings", autospec=True
+    )
+    invalidate_comments_mock = mocker.patch(
+        "channels.api.listing_cache.invalidate_comment_tree", autospec=True
+    )
     # Test upvote
     mock_reddit_obj = Mock()
     mock_reddit_obj.id = post.post_id
@@ -243,6 +261,9 @@ def test_vote_indexing(
     patched_vote_indexer.assert_called_once_with(
         mock_reddit_obj, expected_instance_type, VoteActions.UPVOTE
     )
+    # votes don't invalidate cached listings
+    assert invalidate_mock.called is False
+    assert invalidate_comments_mock.called is False
     # Test downvote (which may not be allowed)
     patched_vote_indexer.reset_mock()
     mock_reddit_obj.likes = True
@@ -266,6 +287,117 @@ def test_get_session(settings):
     assert api._get_session().headers[api.ACCESS_TOKEN_HEADER_NAME] == "ACCESS_TOKEN"
 
 
+def test_get_session_shared(settings):
+    """_get_session should return the same pooled session until the settings change"""
+    settings.OPEN_DISCUSSIONS_REDDIT_POOL_MAXSIZE = 7
+    # pylint: disable=protected-access
+    session = api._get_session()
+    assert api._get_session() is session
+    assert session.get_adapter("https://reddit.local")._pool_maxsize == 7
+
+    settings.OPEN_DISCUSSIONS_REDDIT_VALIDATE_SSL = (
+        not settings.OPEN_DISCUSSIONS_REDDIT_VALIDATE_SSL
+    )
+    new_session = api._get_session()
+    assert new_session is not session
+    assert new_session.verify is settings.OPEN_DISCUSSIONS_REDDIT_VALIDATE_SSL
+
+
+def _mock_client(expires_in):
+    """Make a mock reddit client with an access token expiring in some number of seconds"""
+    return (
+        Mock(),
+        None if expires_in is None else now_in_utc() + timedelta(seconds=expires_in),
+    )
+
+
+def test_get_client_cached(mocker, settings):
+    """_get_client should reuse clients per user until their access token is about to expire"""
+    settings.OPEN_DISCUSSIONS_REDDIT_CLIENT_CACHE_SIZE = 2
+    users = UserFactory.build_batch(3)
+    for index, user in enumerate(users):
+        user.id = index + 1
+    anonymous = AnonymousUser()
+    create_mock = mocker.patch(
+        "channels.api._create_client",
+        autospec=True,
+        side_effect=lambda user: _mock_client(3600),
+    )
+    # pylint: disable=protected-access
+    client = api._get_client(users[0])
+    assert api._get_client(users[0]) is client
+    anonymous_client = api._get_client(anonymous)
+    assert api._get_client(anonymous) is anonymous_client
+    assert create_mock.call_count == 2
+
+    # the least recently used client is evicted
+    api._get_client(users[0])
+    api._get_client(users[1])
+    assert api._get_client(users[0]) is client
+    assert api._get_client(anonymous) is not anonymous_client
+
+    # clients are evicted once their access token is about to expire
+    create_mock.side_effect = lambda user: _mock_client(60)
+    expiring_client = api._get_client(users[2])
+    assert api._get_client(users[2]) is not expiring_client
+
+    # the anonymous client refreshes its own token
+    create_mock.side_effect = lambda user: _mock_client(None)
+    anonymous_client = api._get_client(anonymous)
+    assert api._get_client(anonymous) is anonymous_client
+
+    create_mock.side_effect = lambda user: _mock_client(3600)
+    client = api._get_client(users[2])
+    api.invalidate_client_cache(users[2])
+    assert api._get_client(users[2]) is not client
+
+
+def test_get_client_cache_disabled(mocker, settings):
+    """_get_client should create a new client each time if the cache size is zero"""
+    settings.OPEN_DISCUSSIONS_REDDIT_CLIENT_CACHE_SIZE = 0
+    mocker.patch(
+        "channels.api._create_client",
+        autospec=True,
+        side_effect=lambda user: _mock_client(3600),
+    )
+    user = UserFactory.build(id=1)
+    # pylint: disable=protected-access
+    assert api._get_client(user) is not api._get_client(user)
+
+
+def test_get_client_per_thread(mocker):
+    """Each thread should use its own clients, which are invalidated by any thread"""
+    create_mock = mocker.patch(
+        "channels.api._create_client",
+        autospec=True,
+        side_effect=lambda user: _mock_client(3600),
+    )
+    user = UserFactory.build(id=1)
+    num_threads = 4
+    barrier = threading.Barrier(num_threads)
+
+    def _get_clients(_):
+        """Get a client twice on a thread which runs at the same time as the others"""
+        barrier.wait(timeout=5)
+        # pylint: disable=protected-access
+        first = api._get_client(user)
+        assert api._get_client(user) is first
+        return first
+
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        clients = list(executor.map(_get_clients, range(num_threads)))
+        assert len({id(client) for client in clients}) == num_threads
+        assert create_mock.call_count == num_threads
+
+        # invalidating the user's clients in this thread replaces them in the other threads too
+        api.invalidate_client_cache(user)
+        new_clients = list(executor.map(_get_clients, range(num_threads)))
+    assert not {id(client) for client in clients} & {
+        id(client) for client in new_clients
+    }
+    assert create_mock.call_count == num_threads * 2
+
+
 def test_get_channel_user(mock_get_client):
     """Test get_channels for logged-in user"""
     user = UserFactory.create()
@@ -425,11 +557,15 @@ def test_update_channel_type(mock_client, channel_type, indexing_decorator):
     mock_client.subreddit.return_value.mod.update.assert_called_once_with(
         subreddit_type=channel_type
     )
-    assert indexing_decorator.mock_persist_func.call_count == 1
+    assert indexing_decorator.mock_persist_func.call_count == 2
     assert (
         search_task_helpers.update_channel_index
         in indexing_decorator.mock_persist_func.original
     )
+    assert (
+        listing_cache.invalidate_channel
+        in indexing_decorator.mock_persist_func.original
+    )
 
 
 @pytest.mark.parametrize("channel_setting", api.CHANNEL_SETTINGS + ("title",))
@@ -442,11 +578,15 @@ def test_update_channel_setting(mock_client, channel_setting, indexing_decorator
     mock_client.subreddit.assert_called_with("name")
     assert mock_client.subreddit.call_count == 2
     mock_client.subreddit.return_value.mod.update.assert_called_once_with(**kwargs)
-    assert indexing_decorator.mock_persist_func.call_count == 1
+    assert indexing_decorator.mock_persist_func.call_count == 2
     assert (
         search_task_helpers.update_channel_index
         in indexing_decorator.mock_persist_func.original
     )
+    assert (
+        listing_cache.invalidate_channel
+        in indexing_decorator.mock_persist_func.original
+    )
 
 
 @pytest.mark.parametrize(
@@ -677,11 +817,15 @@ def test_update_post_text(mock_client, indexing_decorator):
     mock_client.submission.assert_called_once_with(id="abc")
     mock_client.submission.return_value.edit.assert_called_once_with("Text")
     # This API function should be wrapped with the indexing decorator and pass in a specific indexer function
-    assert indexing_decorator.mock_persist_func.call_count == 1
+    assert indexing_decorator.mock_persist_func.call_count == 2
     assert (
         search_task_helpers.update_post_text
         in indexing_decorator.mock_persist_func.original
     )
+    assert (
+        listing_cache.invalidate_post_listings
+        in indexing_decorator.mock_persist_func.original
+    )
 
 
 def test_update_post_article(mock_client, indexing_decorator):
@@ -701,11 +845,15 @@ def test_update_post_article(mock_client, indexing_decorator):
     article.refresh_from_db()
     assert article.content == updated_content
     # This API function should be wrapped with the indexing decorator and pass in a specific indexer function
-    assert indexing_decorator.mock_persist_func.call_count == 1
+    assert indexing_decorator.mock_persist_func.call_count == 2
     assert (
         search_task_helpers.update_post_text
         in indexing_decorator.mock_persist_func.original
     )
+    assert (
+        listing_cache.invalidate_post_listings
+        in indexing_decorator.mock_persist_func.original
+    )
 
 
 @pytest.mark.parametrize(
@@ -749,11 +897,15 @@ def test_approve_post(mock_client, indexing_decorator):
     mock_client.submission.assert_called_once_with(id="abc")
     mock_client.submission.return_value.mod.approve.assert_called_once_with()
     # This API function should be wrapped with the indexing decorator and pass in a specific indexer function
-    assert indexing_decorator.mock_persist_func.call_count == 1
+    assert indexing_decorator.mock_persist_func.call_count == 2
     assert (
         search_task_helpers.update_post_removal_status
         in indexing_decorator.mock_persist_func.original
     )
+    assert (
+        listing_cache.invalidate_post_listings
+        in indexing_decorator.mock_persist_func.original
+    )
 
 
 def test_remove_post(mock_client, indexing_decorator):
@@ -764,11 +916,27 @@ def test_remove_post(mock_client, indexing_decorator):
     mock_client.submission.assert_called_once_with(id="abc")
     mock_client.submission.return_value.mod.remove.assert_called_once_with()
     # This API function should be wrapped with the indexing decorator and pass in a specific indexer function
-    assert indexing_decorator.mock_persist_func.call_count == 1
+    assert indexing_decorator.mock_persist_func.call_count == 2
     assert (
         search_task_helpers.update_post_removal_status
         in indexing_decorator.mock_persist_func.original
     )
+    assert (
+        listing_cache.invalidate_post_listings
+        in indexing_decorator.mock_persist_func.original
+    )
+
+
+@pytest.mark.parametrize("pinned", [True, False])
+def test_pin_post(mock_client, pinned):
+    """Test pin_post"""
+    post = PostFactory.create(stickied=not pinned)
+    client = api.Api(UserFactory.create())
+    client.pin_post(post.post_id, pinned)
+    mock_client.submission.assert_called_once_with(id=post.post_id)
+    mock_client.submission.return_value.mod.sticky.assert_called_once_with(pinned)
+    post.refresh_from_db()
+    assert post.stickied is pinned
 
 
 def test_create_comment_on_post(mock_client, indexing_decorator):
@@ -784,11 +952,15 @@ def test_create_comment_on_post(mock_client, indexing_decorator):
     mock_client.submission.assert_called_once_with(id="abc")
     mock_client.submission.return_value.reply.assert_called_once_with("text")
     # This API function should be wrapped with the indexing decorator and pass in a specific indexer function
-    assert indexing_decorator.mock_persist_func.call_count == 1
+    assert indexing_decorator.mock_persist_func.call_count == 2
     assert (
         search_task_helpers.index_new_comment
         in indexing_decorator.mock_persist_func.original
     )
+    assert (
+        listing_cache.invalidate_comment_tree
+        in indexing_decorator.mock_persist_func.original
+    )
     assert Comment.objects.filter(
         comment_id=mock_client.submission.return_value.reply.return_value.id,
         parent_id=mock_client.submission.return_value.id,
@@ -809,11 +981,15 @@ def test_create_comment_on_comment(mock_client, indexing_decorator):
     mock_client.comment.assert_called_once_with("567")
     mock_client.comment.return_value.reply.assert_called_once_with("text")
     # This API function should be wrapped with the indexing decorator and pass in a specific indexer function
-    assert indexing_decorator.mock_persist_func.call_count == 1
+    assert indexing_decorator.mock_persist_func.call_count == 2
     assert (
         search_task_helpers.index_new_comment
         in indexing_decorator.mock_persist_func.original
     )
+    assert (
+        listing_cache.invalidate_comment_tree
+        in indexing_decorator.mock_persist_func.original
+    )
     assert Comment.objects.filter(
         comment_id=mock_client.comment.return_value.reply.return_value.id,
         parent_id=mock_client.comment.return_value.id,
@@ -859,16 +1035,23 @@ def test_get_comment(mock_client):
 
 def test_delete_comment(mock_client, indexing_decorator):
     """Test delete_comment"""
+    comment = CommentFactory.create(deleted=False)
     client = api.Api(UserFactory.create())
-    client.delete_comment("id")
-    mock_client.comment.assert_called_once_with("id")
+    client.delete_comment(comment.comment_id)
+    mock_client.comment.assert_called_once_with(comment.comment_id)
     mock_client.comment.return_value.delete.assert_called_once_with()
+    comment.refresh_from_db()
+    assert comment.deleted is True
     # This API function should be wrapped with the indexing decorator and pass in a specific indexer function
-    assert indexing_decorator.mock_persist_func.call_count == 1
+    assert indexing_decorator.mock_persist_func.call_count == 2
     assert (
         search_task_helpers.set_comment_to_deleted
         in indexing_decorator.mock_persist_func.original
     )
+    assert (
+        listing_cache.invalidate_comment_tree
+        in indexing_decorator.mock_persist_func.original
+    )
 
 
 def test_update_comment(mock_client, indexing_decorator):
@@ -879,11 +1062,15 @@ def test_update_comment(mock_client, indexing_decorator):
     mock_client.comment.assert_called_once_with("id")
     mock_client.comment.return_value.edit.assert_called_once_with("Text")
     # This API function should be wrapped with the indexing decorator and pass in a specific indexer function
-    assert indexing_decorator.mock_persist_func.call_count == 1
+    assert indexing_decorator.mock_persist_func.call_count == 2
     assert (
         search_task_helpers.update_comment_text
         in indexing_decorator.mock_persist_func.original
     )
+    assert (
+        listing_cache.invalidate_comment_tree
+        in indexing_decorator.mock_persist_func.original
+    )
 
 
 def test_approve_comment(mock_client, indexing_decorator):
@@ -894,11 +1081,15 @@ def test_approve_comment(mock_client, indexing_decorator):
     mock_client.comment.assert_called_once_with("id")
     mock_client.comment.return_value.mod.approve.assert_called_once_with()
     # This API function should be wrapped with the indexing decorator and pass in a specific indexer function
-    assert indexing_decorator.mock_persist_func.call_count == 1
+    assert indexing_decorator.mock_persist_func.call_count == 2
     assert (
         search_task_helpers.update_comment_removal_status
         in indexing_decorator.mock_persist_func.original
     )
+    assert (
+        listing_cache.invalidate_comment_tree
+        in indexing_decorator.mock_persist_func.original
+    )
 
 
 def test_remove_comment(mock_client, indexing_decorator):
@@ -909,11 +1100,15 @@ def test_remove_comment(mock_client, indexing_decorator):
     mock_client.comment.assert_called_once_with("id")
     mock_client.comment.return_value.mod.remove.assert_called_once_with()
     # This API function should be wrapped with the indexing decorator and pass in a specific indexer function
-    assert indexing_decorator.mock_persist_func.call_count == 1
+    assert indexing_decorator.mock_persist_func.call_count == 2
     assert (
         search_task_helpers.update_comment_removal_status
         in indexing_decorator.mock_persist_func.original
     )
+    assert (
+        listing_cache.invalidate_comment_tree
+        in indexing_decorator.mock_persist_func.original
+    )
 
 
 def test_init_more_comments(mock_client, mocker):
@@ -969,6 +1164,19 @@ def test_init_more_comments_invalid_sort(
     assert more_patch.call_count == 0
 
 
+def test_init_more_comments_no_load(
+    mock_client, mocker
+):  # pylint: disable=unused-argument
+    """init_more_comments should not load the comments if load is false"""
+    client = api.Api(UserFactory.create())
+    more_patch = mocker.patch("praw.models.reddit.more.MoreComments")
+    result = client.init_more_comments(
+        None, "post_i2", ["t1_itmt"], COMMENTS_SORT_BEST, load=False
+    )
+    assert result == more_patch.return_value
+    result.comments.assert_not_called()
+
+
 def test_more_comments(mock_client, mocker):  # pylint: disable=unused-argument
     """Test more_comments without any extra comments"""
     client = api.Api(UserFactory.create())
@@ -993,14 +1201,16 @@ def test_more_comments(mock_client, mocker):  # pylint: disable=unused-argument
         post_id="post_i2",
         children=children,
         sort=COMMENTS_SORT_BEST,
+        load=False,
     )
+    init_more_mock.return_value.comments.assert_called_once_with()
     assert result == comments
 
 
 def test_more_comments_with_more_comments(
     mock_client, mocker
 ):  # pylint: disable=unused-argument
-    """Test more_comments with an extra MoreComments"""
+    """Children which reddit didn't return should be added as a MoreComments which isn't loaded"""
     client = api.Api(UserFactory.create())
     children = ["1", "2", "3"]
     extra_children = ["4", "5", "6"]
@@ -1031,17 +1241,92 @@ def test_more_comments_with_more_comments(
         post_id="post_i2",
         children=children + extra_children,
         sort=COMMENTS_SORT_BEST,
+        load=False,
     )
     init_more_mock.assert_any_call(
         parent_id="parent_3i",
         post_id="post_i2",
         children=extra_children,
         sort=COMMENTS_SORT_BEST,
+        load=False,
     )
 
     assert result[:-1] == first_comments
     more_comments = result[-1]
     assert side_effects[1] == more_comments
+    more_comments.comments.assert_not_called()
+
+
+def test_more_comments_batches(
+    mock_client, mocker, settings
+):  # pylint: disable=unused-argument
+    """more_comments should load batches of children one after another and merge them in order"""
+    settings.OPEN_DISCUSSIONS_REDDIT_MORE_COMMENTS_BATCH_SIZE = 2
+    client = api.Api(UserFactory.create())
+    children = ["1", "2", "3", "4", "5"]
+    post_id = "post_i2"
+    mocker.patch.object(RedditComment, "replies", [])
+    nested_more = more.MoreComments(
+        client.reddit, {"children": ["6"], "count": 1, "parent_id": "t1_5"}
+    )
+
+    def _make_comments(comment_ids):
+        """Helper to make comments with a valid list of replies"""
+        return [
+            RedditComment(client.reddit, id=comment_id) for comment_id in comment_ids
+        ]
+
+    batches = {
+        ("1", "2"): _make_comments(["1", "2"]),
+        # reddit can return a comment which was already returned for another batch
+        ("3", "4"): _make_comments(["3", "2", "4"]),
+        ("5",): _make_comments(["5"]) + [nested_more],
+    }
+    loaded = []
+
+    def _init_more_comments(**kwargs):
+        """Return a MoreComments for a batch"""
+        assert kwargs["load"] is False
+        children = tuple(kwargs["children"])
+        return Mock(
+            comments=Mock(
+                side_effect=lambda: loaded.append(children) or batches[children]
+            )
+        )
+
+    mocker.patch("channels.api.Api.init_more_comments", side_effect=_init_more_comments)
+
+    result = client.more_comments("parent_3i", post_id, children, COMMENTS_SORT_BEST)
+
+    assert loaded == [("1", "2"), ("3", "4"), ("5",)]
+    assert [getattr(comment, "id", None) for comment in result] == [
+        "1",
+        "2",
+        "3",
+        "4",
+        "5",
+        None,
+    ]
+    assert result[-1] is nested_more
+
+
+def test_more_comments_continue_thread(
+    mock_client, mocker
+):  # pylint: disable=unused-argument
+    """A MoreComments without children should be loaded once"""
+    client = api.Api(UserFactory.create())
+    init_more_mock = mocker.patch("channels.api.Api.init_more_comments")
+    init_more_mock.return_value.comments.return_value = []
+
+    assert client.more_comments("parent_3i", "post_i2", [], COMMENTS_SORT_BEST) == []
+    init_more_mock.assert_called_once_with(
+        parent_id="parent_3i",
+        post_id="post_i2",
+        children=[],
+        sort=COMMENTS_SORT_BEST,
+        load=False,
+    )
+    init_more_mock.return_value.comments.assert_called_once_with()
 
 
 def test_list_user_contributions(
@@ -1283,11 +1568,15 @@ def test_api_constructor_401_once(mocker):
     mocked_client = Mock()
     effect = [ResponseException(response=Mock(status_code=401)), mocked_client]
     mocker.patch("channels.api._get_client", autospec=True, side_effect=effect)
+    invalidate_mock = mocker.patch(
+        "channels.api.invalidate_client_cache", autospec=True
+    )
 
     RedditAccessToken.objects.create(user=client_user, token_value="token")
     RedditRefreshToken.objects.create(user=client_user, token_value="token")
 
     assert api.Api(client_user).reddit == mocked_client
+    invalidate_mock.assert_called_once_with(client_user)
 
     assert RedditAccessToken.objects.count() == 0
     assert RedditRefreshToken.objects.count() == 0
@@ -1316,6 +1605,46 @@ def test_api_constructor_401_twice(mocker):
     assert RedditRefreshToken.objects.count() == 0
 
 
+def test_api_constructor_401_cached_tokens(mocker):
+    """
+    If a 401 response is received, the cached tokens should be deleted too so the retry doesn't
+    use the revoked tokens again
+    """
+    client_user = UserFactory.create()
+    RedditRefreshToken.objects.create(user=client_user, token_value="revoked")
+    RedditAccessToken.objects.create(
+        user=client_user,
+        token_value="revoked",
+        token_expires_at=now_in_utc() + timedelta(minutes=10),
+    )
+    # warm the cache with the revoked tokens
+    api.get_or_create_auth_tokens(client_user)
+    mocker.patch(
+        "channels.api._get_refresh_token",
+        autospec=True,
+        return_value={
+            "refresh_token": "new_refresh",
+            "access_token": "new_access",
+            "expires_in": 3600,
+        },
+    )
+    used_tokens = []
+
+    def _create_client(user):
+        """Fail for the revoked tokens like reddit would"""
+        refresh_token, access_token = api.get_or_create_auth_tokens(user)
+        used_tokens.append((refresh_token.token_value, access_token.token_value))
+        if refresh_token.token_value == "revoked":
+            raise ResponseException(response=Mock(status_code=401))
+        return Mock(), access_token.token_expires_at
+
+    mocker.patch("channels.api._create_client", side_effect=_create_client)
+
+    api.Api(client_user)
+
+    assert used_tokens == [("revoked", "revoked"), ("new_refresh", "new_access")]
+
+
 @pytest.mark.parametrize("is_none", [True, False])
 def test_api_constructor_none(is_none):
     """Api(None) should initialize for an anonymous user"""
@@ -1352,6 +1681,130 @@ def test_get_or_create_auth_tokens(mocker, settings, user):
     assert RedditRefreshToken.objects.filter(user=user).count() == 1
 
 
+def test_get_or_create_auth_tokens_cached(
+    mocker, user, django_assert_num_queries
+):  # pylint: disable=unused-argument
+    """get_or_create_auth_tokens should read the tokens from the cache until the access token expires"""
+    refresh_token = RedditRefreshToken.objects.create(user=user, token_value="refresh")
+    access_token = RedditAccessToken.objects.create(
+        user=user,
+        token_value="access",
+        token_expires_at=now_in_utc() + timedelta(minutes=10),
+    )
+    api.get_or_create_auth_tokens(user)
+
+    with django_assert_num_queries(0):
+        cached_refresh_token, cached_access_token = api.get_or_create_auth_tokens(user)
+    assert (
+        cached_refresh_token.id,
+        cached_refresh_token.user,
+        cached_refresh_token.token_value,
+    ) == (refresh_token.id, user, "refresh")
+    assert (
+        cached_access_token.id,
+        cached_access_token.user,
+        cached_access_token.token_value,
+        cached_access_token.token_expires_at,
+    ) == (access_token.id, user, "access", access_token.token_expires_at)
+
+
+def test_get_or_create_auth_tokens_expiring(user, redis_cache):
+    """Access tokens which are about to expire should not be cached"""
+    RedditRefreshToken.objects.create(user=user, token_value="refresh")
+    RedditAccessToken.objects.create(
+        user=user,
+        token_value="access",
+        token_expires_at=now_in_utc() + api.ACCESS_TOKEN_EXPIRY_THRESHOLD,
+    )
+    _, access_token = api.get_or_create_auth_tokens(user)
+    assert access_token is None
+    assert redis_cache.get(api.AUTH_TOKENS_CACHE_KEY.format(user_id=user.id)) is None
+
+
+def test_get_or_create_auth_tokens_single_flight(mocker, user, redis_cache):
+    """A request which waits for another one to fetch the tokens should use the cached tokens"""
+    refresh_token = RedditRefreshToken.objects.create(user=user, token_value="refresh")
+    access_token = RedditAccessToken.objects.create(
+        user=user,
+        token_value="access",
+        token_expires_at=now_in_utc() + timedelta(minutes=10),
+    )
+    lock_mock = mocker.patch.object(redis_cache, "lock")
+
+    def _finish_other_request():
+        """Store the tokens like the request holding the lock would, before it's released"""
+        # pylint: disable=protected-access
+        api._cache_auth_tokens(redis_cache, user, refresh_token, access_token)
+        return True
+
+    lock_mock.return_value.acquire.side_effect = _finish_other_request
+    stored_tokens_mock = mocker.patch("channels.api._get_or_create_stored_auth_tokens")
+
+    _, cached_access_token = api.get_or_create_auth_tokens(user)
+    assert cached_access_token.token_value == "access"
+    lock_mock.assert_called_once_with(
+        api.AUTH_TOKENS_LOCK_KEY.format(user_id=user.id),
+        timeout=api.AUTH_TOKENS_LOCK_TIMEOUT,
+        blocking_timeout=api.AUTH_TOKENS_LOCK_WAIT,
+    )
+    lock_mock.return_value.release.assert_called_once_with()
+    stored_tokens_mock.assert_not_called()
+
+
+@pytest.mark.parametrize("acquired", [True, False])
+def test_auth_tokens_lock(mocker, user, redis_cache, acquired):
+    """The lock should only be released if it was acquired, and an expired lock should be ignored"""
+    lock_mock = mocker.patch.object(redis_cache, "lock")
+    lock_mock.return_value.acquire.return_value = acquired
+    lock_mock.return_value.release.side_effect = LockError
+
+    with api._auth_tokens_lock(redis_cache, user):  # pylint: disable=protected-access
+        pass
+    assert lock_mock.return_value.release.called is acquired
+
+
+def test_auth_tokens_lock_blocks(user, redis_cache):
+    """A second request should wait for the lock and give up after the timeout"""
+    lock_key = api.AUTH_TOKENS_LOCK_KEY.format(user_id=user.id)
+    redis_cache.add(lock_key, 1)
+    lock = redis_cache.lock(lock_key, timeout=1, sleep=0.01, blocking_timeout=0.05)
+    assert lock.acquire() is False
+    redis_cache.delete(lock_key)
+    assert lock.acquire() is True
+
+
+def test_configure_access_token_refresh(mocker, user, redis_cache):
+    """If there is no valid access token a new one should be fetched, stored and cached"""
+    RedditRefreshToken.objects.create(user=user, token_value="refresh")
+    client = mocker.Mock()
+    authorizer = client._core._authorizer  # pylint: disable=protected-access
+    expires_at = time.time() + 3600
+
+    def _refresh():
+        """Set a new access token like praw does"""
+        authorizer.access_token = "new_access"
+        authorizer._expiration_timestamp = (  # pylint: disable=protected-access
+            expires_at
+        )
+
+    authorizer.refresh.side_effect = _refresh
+
+    # pylint: disable=protected-access
+    configured_client, access_token = api._configure_access_token(client, None, user)
+    assert configured_client == client
+    assert access_token == RedditAccessToken.objects.get(user=user)
+    authorizer.refresh.assert_called_once_with()
+    assert RedditAccessToken.objects.get(user=user).token_value == "new_access"
+    _, cached_access_token = api._get_cached_auth_tokens(redis_cache, user)
+    assert cached_access_token.token_value == "new_access"
+
+    # another client for the user should use the token refreshed by the first one
+    other_client = mocker.Mock()
+    api._configure_access_token(other_client, None, user)
+    other_client._core._authorizer.refresh.assert_not_called()
+    assert other_client._core._authorizer.access_token == "new_access"
+
+
 def test_add_subscriber(mock_client, mock_upsert_profile):
     """Test add subscriber"""
     client = api.Api(UserFactory.create())
@@ -52,6 +52,7 @@ def backpopulate_post(*, post, submission):
     post.num_comments = submission.num_comments
     post.edited = submission.edited if submission.edited is False else True
     post.removed = submission.banned_by is not None
+    post.stickied = submission.stickied
     # this already has a values, but it's incorrect for records prior to the creation of the Post model
     post.created_on = datetime.fromtimestamp(submission.created, tz=timezone.utc)
     post.deleted = submission.selftext == DELETED_COMMENT_OR_POST_TEXT
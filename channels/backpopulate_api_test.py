@@ -29,6 +29,7 @@ CREATED_ON_DATETIME = datetime(2019, 1, 17, 18, 23, 24, tzinfo=timezone.utc)
 @pytest.mark.parametrize("is_removed", [True, False])
 @pytest.mark.parametrize("is_deleted", [True, False])
 @pytest.mark.parametrize("is_edited", [True, False])
+@pytest.mark.parametrize("is_stickied", [True, False])
 def test_backpopulate_post(
     mocker,
     settings,
@@ -38,6 +39,7 @@ def test_backpopulate_post(
     is_removed,
     is_deleted,
     is_edited,
+    is_stickied,
 ):  # pylint: disable=too-many-arguments,too-many-locals
     """Tests backpopulate_post"""
 
@@ -77,6 +79,7 @@ def test_backpopulate_post(
         num_comments=123,
         edited=is_edited,
         banned_by="abc" if is_removed else None,
+        stickied=is_stickied,
         created=CREATED_TIMESTAMP,
     )
     backpopulate_api.backpopulate_post(post=post, submission=submission)
@@ -102,6 +105,7 @@ def test_backpopulate_post(
             created_on=CREATED_ON_DATETIME,
             removed=is_removed,
             deleted=is_deleted,
+            stickied=is_stickied,
             post_type=post_type,
         ),
     )
@@ -184,6 +184,7 @@ class PostFactory(DjangoModelFactory):
     edited = False
     removed = False
     deleted = False
+    stickied = False
     num_comments = 0
 
     class Meta:
@@ -199,6 +200,7 @@ class PostFactory(DjangoModelFactory):
             edited=None,
             removed=None,
             deleted=None,
+            stickied=None,
         )
         is_link = factory.Trait(post_type=LINK_TYPE_LINK)
         is_text = factory.Trait(post_type=LINK_TYPE_SELF)
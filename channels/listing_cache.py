@@ -0,0 +1,307 @@
+"""
+Shared cache for serialized post listings
+
+Anonymous users all get the same front page and channel listings from reddit, so serialized
+listings for them are cached in redis for OPEN_DISCUSSIONS_LISTING_CACHE_TTL seconds. Cached posts
+don't include the fields which depend on the user, which are added to each response instead.
+
+Listings of logged in users aren't cached, since reddit personalizes them: the front page only
+includes subscribed channels, moderators also see removed posts and votes are per user.
+
+Each listing has a version which is incremented when a post in it changes, so cached pages are
+invalidated when posts are created, edited, removed or deleted. Votes don't invalidate listings,
+since they're frequent, so scores in cached pages are at most OPEN_DISCUSSIONS_LISTING_CACHE_TTL
+seconds old.
+
+Expanded more comments are cached the same way per post and sort, with a version per post which is
+incremented when a comment on the post is created, edited, removed, approved or deleted.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+from channels.models import Comment
+from channels.proxies import proxy_posts
+from channels.utils import (
+    get_pagination_and_reddit_obj_list,
+    lookup_subscriptions_for_posts,
+    lookup_users_for_posts,
+)
+
+FRONT_PAGE_LISTING = "frontpage"
+LISTING_CACHE_KEY = "channels:listing:{listing}:{sort}:{before}:{after}:{count}"
+LISTING_VERSION_KEY = "channels:listing_version:{listing}"
+MORE_COMMENTS_CACHE_KEY = "channels:more_comments:{post_id}:{sort}:{digest}"
+USER_FIELDS = ("upvoted", "subscribed")
+COMMENT_USER_FIELDS = ("upvoted", "downvoted", "subscribed")
+
+
+def channel_listing_name(channel_name):
+    """
+    Get the name of the listing for a channel
+
+    Channel names are case insensitive in reddit, so the listing name is lowercased. Listings are
+    read with the channel name from the URL, but invalidated with reddit's display name.
+
+    Args:
+        channel_name (str): The channel name
+
+    Returns:
+        str: The listing name
+    """
+    return f"channel:{channel_name.lower()}"
+
+
+def comments_listing_name(post_id):
+    """
+    Get the name of the listing for the comments of a post
+
+    Args:
+        post_id (str): The base36 id of the post
+
+    Returns:
+        str: The listing name
+    """
+    return f"comments:{post_id}"
+
+
+def _get_cache():
+    """
+    Get the cache used for listings
+
+    Returns:
+        django.core.cache.backends.base.BaseCache: The cache
+    """
+    return caches["redis"]
+
+
+def _increment_version(cache, listing):
+    """
+    Increment the version of a listing, so pages cached for previous versions are no longer read
+
+    Args:
+        cache (django.core.cache.backends.base.BaseCache): The cache
+        listing (str): The listing name
+    """
+    version_key = LISTING_VERSION_KEY.format(listing=listing)
+    # the version doesn't expire, otherwise it could go back to a version which is still cached
+    if not cache.add(version_key, 2, timeout=None):
+        cache.incr(version_key)
+
+
+def invalidate_channel_listings(channel_name):
+    """
+    Invalidate the cached listings for a channel and the front page
+
+    Args:
+        channel_name (str): The channel name
+    """
+    cache = _get_cache()
+    _increment_version(cache, channel_listing_name(channel_name))
+    _increment_version(cache, FRONT_PAGE_LISTING)
+
+
+def invalidate_post_listings(post_obj):
+    """
+    Invalidate the cached listings which include a post
+
+    Args:
+        post_obj (praw.models.reddit.submission.Submission): A PRAW post ('submission') object
+    """
+    invalidate_channel_listings(post_obj.subreddit.display_name)
+
+
+def invalidate_channel(channel_obj):
+    """
+    Invalidate the cached listings for a channel after it was updated
+
+    Args:
+        channel_obj (praw.models.Subreddit): A PRAW channel ('subreddit') object
+    """
+    invalidate_channel_listings(channel_obj.display_name)
+
+
+def invalidate_comment_tree(comment_obj):
+    """
+    Invalidate the cached more comments of the post a comment belongs to
+
+    Args:
+        comment_obj (praw.models.Comment): A PRAW comment object
+    """
+    # the post is looked up locally since reading it from a lazy comment would query reddit
+    post_id = (
+        Comment.objects.filter(comment_id=comment_obj.id)
+        .values_list("post__post_id", flat=True)
+        .first()
+    )
+    if post_id is not None:
+        _increment_version(_get_cache(), comments_listing_name(post_id))
+
+
+def _apply_anonymous_user_fields(posts):
+    """
+    Add the fields which depend on the user to cached posts, for an anonymous user who can't
+    vote on or subscribe to posts
+
+    Args:
+        posts (list of dict): Serialized posts without user fields
+
+    Returns:
+        list of dict: Serialized posts
+    """
+    return [{**post, "upvoted": False, "subscribed": False} for post in posts]
+
+
+def _serialize_listing(listing_generator, listing_params, user, serializer_context):
+    """
+    Fetch and serialize a page of a listing
+
+    Args:
+        listing_generator (praw.models.listing.generator.ListingGenerator): The listing from reddit
+        listing_params (channels.utils.ListingParams): the pagination/sorting params requested
+        user (User): The user requesting the listing
+        serializer_context (dict): Context for PostSerializer
+
+    Returns:
+        (dict, list of dict): The pagination and serialized posts
+    """
+    # channels.api imports this module for the invalidation hooks
+    from channels.serializers.posts import PostSerializer
+
+    pagination, posts = get_pagination_and_reddit_obj_list(
+        listing_generator, listing_params
+    )
+    users = lookup_users_for_posts(posts)
+    posts = proxy_posts(
+        [post for post in posts if post.author and post.author.name in users]
+    )
+    subscriptions = lookup_subscriptions_for_posts(posts, user)
+    serialized_posts = PostSerializer(
+        posts,
+        many=True,
+        context={
+            **serializer_context,
+            "users": users,
+            "post_subscriptions": subscriptions,
+        },
+    ).data
+    return pagination, serialized_posts
+
+
+def get_serialized_listing(
+    *, user, listing, listing_params, get_listing, serializer_context
+):
+    """
+    Get the pagination and serialized posts for a listing, from the cache if possible
+
+    Args:
+        user (User): The user requesting the listing
+        listing (str): The listing name, FRONT_PAGE_LISTING or from channel_listing_name
+        listing_params (channels.utils.ListingParams): the pagination/sorting params requested
+        get_listing (callable): A function returning the listing generator from reddit
+        serializer_context (dict): Context for PostSerializer
+
+    Returns:
+        (dict, list of dict): The pagination and serialized posts
+    """
+    ttl = settings.OPEN_DISCUSSIONS_LISTING_CACHE_TTL
+    cacheable = user.is_anonymous and ttl > 0
+    if cacheable:
+        cache = _get_cache()
+        cache_key = LISTING_CACHE_KEY.format(
+            listing=listing, **listing_params._asdict()
+        )
+        # the version is read before reddit is queried, so that if the listing changes in
+        # the meantime the page is cached for the old version
+        version = cache.get(LISTING_VERSION_KEY.format(listing=listing), 1)
+        cached = cache.get(cache_key, version=version)
+        if cached is not None:
+            return cached["pagination"], _apply_anonymous_user_fields(cached["posts"])
+
+    pagination, serialized_posts = _serialize_listing(
+        get_listing(), listing_params, user, serializer_context
+    )
+
+    if cacheable:
+        cache.set(
+            cache_key,
+            {
+                "pagination": pagination,
+                "posts": [
+                    {
+                        key: value
+                        for key, value in post.items()
+                        if key not in USER_FIELDS
+                    }
+                    for post in serialized_posts
+                ],
+            },
+            ttl,
+            version=version,
+        )
+    return pagination, serialized_posts
+
+
+def get_serialized_more_comments(
+    *, user, post_id, sort, parent_id, children, get_serialized_comments
+):  # pylint: disable=too-many-arguments
+    """
+    Get the serialized comments for an expanded MoreComments, from the cache if possible
+
+    Args:
+        user (User): The user expanding the comments
+        post_id (str): The base36 id of the post
+        sort (str): The comment sort
+        parent_id (str): The base36 id of the parent comment, or None for the post
+        children (list of str): The comment ids to expand
+        get_serialized_comments (callable): A function returning the serialized comments
+
+    Returns:
+        list of dict: The serialized comments
+    """
+    ttl = settings.OPEN_DISCUSSIONS_LISTING_CACHE_TTL
+    cacheable = user.is_anonymous and ttl > 0
+    if cacheable:
+        cache = _get_cache()
+        digest = hashlib.sha256(
+            json.dumps([parent_id, children]).encode("utf-8")
+        ).hexdigest()
+        cache_key = MORE_COMMENTS_CACHE_KEY.format(
+            post_id=post_id, sort=sort, digest=digest
+        )
+        version = cache.get(
+            LISTING_VERSION_KEY.format(listing=comments_listing_name(post_id)), 1
+        )
+        cached = cache.get(cache_key, version=version)
+        if cached is not None:
+            return [
+                comment
+                if comment["comment_type"] == "more_comments"
+                else {
+                    **comment,
+                    "upvoted": False,
+                    "downvoted": False,
+                    "subscribed": False,
+                }
+                for comment in cached
+            ]
+
+    serialized_comments = get_serialized_comments()
+
+    if cacheable:
+        cache.set(
+            cache_key,
+            [
+                {
+                    key: value
+                    for key, value in comment.items()
+                    if key not in COMMENT_USER_FIELDS
+                }
+                for comment in serialized_comments
+            ],
+            ttl,
+            version=version,
+        )
+    return serialized_comments
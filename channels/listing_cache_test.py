@@ -0,0 +1,184 @@
+"""Tests for the post listing cache"""
+# pylint: disable=redefined-outer-name,unused-argument
+from types import SimpleNamespace
+
+from django.contrib.auth.models import AnonymousUser
+import pytest
+
+from channels.listing_cache import (
+    FRONT_PAGE_LISTING,
+    channel_listing_name,
+    get_serialized_listing,
+    get_serialized_more_comments,
+    invalidate_channel,
+    invalidate_comment_tree,
+    invalidate_post_listings,
+)
+from channels.factories.models import CommentFactory
+from channels.utils import ListingParams
+from open_discussions.factories import UserFactory
+
+LISTING_PARAMS = ListingParams(None, "t3_a", 25, "hot")
+PAGINATION = {"sort": "hot", "after": "t3_b"}
+SERIALIZED_POSTS = [
+    {"id": "a", "title": "first", "upvoted": False, "subscribed": False},
+    {"id": "b", "title": "second", "upvoted": False, "subscribed": False},
+]
+
+
+@pytest.fixture()
+def listing_mocks(mocker, settings):
+    """Mock the reddit listing, the user and subscription lookups and the serializer"""
+    settings.OPEN_DISCUSSIONS_LISTING_CACHE_TTL = 60
+    return SimpleNamespace(
+        get_listing=mocker.Mock(),
+        get_pagination=mocker.patch(
+            "channels.listing_cache.get_pagination_and_reddit_obj_list",
+            return_value=(PAGINATION, []),
+        ),
+        lookup_users=mocker.patch(
+            "channels.listing_cache.lookup_users_for_posts", return_value={}
+        ),
+        serializer=mocker.patch(
+            "channels.serializers.posts.PostSerializer",
+            return_value=mocker.Mock(data=SERIALIZED_POSTS),
+        ),
+    )
+
+
+def _get_listing(listing_mocks, user, listing=FRONT_PAGE_LISTING, **kwargs):
+    """Call get_serialized_listing with the mocked listing"""
+    return get_serialized_listing(
+        user=user,
+        listing=listing,
+        listing_params=ListingParams(**{**LISTING_PARAMS._asdict(), **kwargs}),
+        get_listing=listing_mocks.get_listing,
+        serializer_context={"current_user": user},
+    )
+
+
+def test_get_serialized_listing_anonymous(listing_mocks):
+    """Listings for anonymous users should be cached per listing and listing params"""
+    user = AnonymousUser()
+    expected = (PAGINATION, SERIALIZED_POSTS)
+    assert _get_listing(listing_mocks, user) == expected
+    assert _get_listing(listing_mocks, user) == expected
+    assert listing_mocks.get_listing.call_count == 1
+    listing_mocks.get_pagination.assert_called_once_with(
+        listing_mocks.get_listing.return_value, LISTING_PARAMS
+    )
+    assert listing_mocks.serializer.call_args[1]["context"]["current_user"] == user
+
+    _get_listing(listing_mocks, user, sort="new")
+    _get_listing(listing_mocks, user, after="t3_c")
+    _get_listing(listing_mocks, user, listing=channel_listing_name("channel"))
+    assert listing_mocks.get_listing.call_count == 4
+
+
+@pytest.mark.django_db
+def test_get_serialized_listing_logged_in(listing_mocks):
+    """Listings for logged in users should not be cached, since reddit personalizes them"""
+    user = UserFactory.create()
+    assert _get_listing(listing_mocks, user) == (PAGINATION, SERIALIZED_POSTS)
+    _get_listing(listing_mocks, user)
+    assert listing_mocks.get_listing.call_count == 2
+
+
+def test_get_serialized_listing_disabled(settings, listing_mocks):
+    """Listings should not be cached if the TTL is zero"""
+    settings.OPEN_DISCUSSIONS_LISTING_CACHE_TTL = 0
+    _get_listing(listing_mocks, AnonymousUser())
+    _get_listing(listing_mocks, AnonymousUser())
+    assert listing_mocks.get_listing.call_count == 2
+
+
+def test_invalidate_post_listings(mocker, listing_mocks):
+    """Changing a post should invalidate its channel's listings and the front page"""
+    user = AnonymousUser()
+    channel_listing = channel_listing_name("channel")
+    other_listing = channel_listing_name("other")
+    for listing in [FRONT_PAGE_LISTING, channel_listing, other_listing]:
+        _get_listing(listing_mocks, user, listing=listing)
+    assert listing_mocks.get_listing.call_count == 3
+
+    invalidate_post_listings(mocker.Mock(subreddit=mocker.Mock(display_name="channel")))
+    for listing in [FRONT_PAGE_LISTING, channel_listing, other_listing]:
+        _get_listing(listing_mocks, user, listing=listing)
+    assert listing_mocks.get_listing.call_count == 5
+
+    invalidate_channel(mocker.Mock(display_name="other"))
+    _get_listing(listing_mocks, user, listing=other_listing)
+    assert listing_mocks.get_listing.call_count == 6
+
+
+def test_invalidate_channel_listing_case(mocker, listing_mocks):
+    """Channel listings should be invalidated whatever the case of the channel name"""
+    user = AnonymousUser()
+    url_listing = channel_listing_name("mychannel")
+    assert url_listing == channel_listing_name("MyChannel")
+    _get_listing(listing_mocks, user, listing=url_listing)
+
+    invalidate_channel(mocker.Mock(display_name="MyChannel"))
+    _get_listing(listing_mocks, user, listing=url_listing)
+    assert listing_mocks.get_listing.call_count == 2
+
+
+def _get_more_comments(user, get_serialized_comments, post_id="post", **kwargs):
+    """Call get_serialized_more_comments with default arguments"""
+    return get_serialized_more_comments(
+        **{
+            "user": user,
+            "post_id": post_id,
+            "sort": "best",
+            "parent_id": "parent",
+            "children": ["a", "b"],
+            "get_serialized_comments": get_serialized_comments,
+            **kwargs,
+        }
+    )
+
+
+@pytest.mark.django_db
+def test_get_serialized_more_comments(mocker, settings):
+    """Expanded comments should be cached for anonymous users until a comment on the post changes"""
+    settings.OPEN_DISCUSSIONS_LISTING_CACHE_TTL = 60
+    comment = CommentFactory.create()
+    post_id = comment.post.post_id
+    serialized = [
+        {
+            "id": "a",
+            "comment_type": "comment",
+            "upvoted": False,
+            "downvoted": False,
+            "subscribed": False,
+        },
+        {"children": ["b"], "comment_type": "more_comments"},
+    ]
+    get_serialized_comments = mocker.Mock(return_value=serialized)
+    user = AnonymousUser()
+
+    for _ in range(2):
+        assert (
+            _get_more_comments(user, get_serialized_comments, post_id=post_id)
+            == serialized
+        )
+    assert get_serialized_comments.call_count == 1
+
+    _get_more_comments(user, get_serialized_comments, post_id=post_id, sort="new")
+    _get_more_comments(user, get_serialized_comments, post_id=post_id, children=["a"])
+    _get_more_comments(user, get_serialized_comments, post_id=post_id, parent_id=None)
+    assert get_serialized_comments.call_count == 4
+
+    invalidate_comment_tree(mocker.Mock(id=comment.comment_id))
+    _get_more_comments(user, get_serialized_comments, post_id=post_id)
+    assert get_serialized_comments.call_count == 5
+
+    _get_more_comments(UserFactory.create(), get_serialized_comments, post_id=post_id)
+    _get_more_comments(UserFactory.create(), get_serialized_comments, post_id=post_id)
+    assert get_serialized_comments.call_count == 7
+
+
+@pytest.mark.django_db
+def test_invalidate_comment_tree_missing(mocker):
+    """invalidate_comment_tree should ignore comments which aren't in the database"""
+    invalidate_comment_tree(mocker.Mock(id="missing"))
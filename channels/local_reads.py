@@ -0,0 +1,430 @@
+"""
+Serialize posts and comment trees from the local Post and Comment tables
+
+The Post and Comment tables mirror the reddit data which the post and comment APIs return, so when
+the LOCAL_READS feature is enabled those are read from the database instead of reddit. Only the
+user's votes still come from reddit, in batches, and anonymous users don't need them at all.
+
+Reddit returns different data to moderators (reports, removed posts and comments) and restricts
+private channels to their contributors, so reads for those, and for posts or comments which are
+removed, deleted or haven't been populated from reddit, still go to reddit. The functions here
+return None in those cases.
+"""
+from collections import defaultdict, deque
+from urllib.parse import urljoin, urlparse
+
+from django.conf import settings
+
+from channels.api import Api
+from channels.constants import (
+    CHANNEL_TYPE_PUBLIC,
+    CHANNEL_TYPE_RESTRICTED,
+    COMMENTS_SORT_BEST,
+    COMMENTS_SORT_NEW,
+    COMMENTS_SORT_OLD,
+    LINK_TYPE_LINK,
+    EXTENDED_POST_TYPE_ARTICLE,
+    ROLE_MODERATORS,
+)
+from channels.models import ChannelGroupRole, Comment, Post, Subscription
+from channels.utils import get_kind_mapping
+from profiles.utils import image_uri
+
+DELETED_AUTHOR_NAME = "[deleted]"
+
+
+def _can_read_channel(user, channel):
+    """
+    Determine if reddit would return the same data for a channel's posts and comments to the user
+    as is stored locally
+
+    Args:
+        user (User): The user reading the post or comments
+        channel (channels.models.Channel): The channel of the post
+
+    Returns:
+        bool: True if the post and comments can be read locally
+    """
+    if channel.channel_type not in (CHANNEL_TYPE_PUBLIC, CHANNEL_TYPE_RESTRICTED):
+        return False
+    return (
+        user.is_anonymous
+        or not ChannelGroupRole.objects.filter(
+            channel=channel, role=ROLE_MODERATORS, group__user=user
+        ).exists()
+    )
+
+
+def _is_populated(obj):
+    """
+    Determine if a post or comment has been populated from reddit, and is neither removed nor
+    deleted
+
+    Args:
+        obj (channels.models.Post or channels.models.Comment): A post or comment
+
+    Returns:
+        bool: True if the post or comment can be serialized from the database
+    """
+    return (
+        obj.author is not None
+        and obj.score is not None
+        and obj.edited is not None
+        and obj.removed is False
+        and obj.deleted is False
+    )
+
+
+def _get_votes(user, fullnames):
+    """
+    Get the user's votes from reddit
+
+    Args:
+        user (User): The user
+        fullnames (list of str): The fullnames of the posts and comments
+
+    Returns:
+        dict: A map of fullname to True for upvotes, False for downvotes and None for no vote
+    """
+    if user.is_anonymous or not fullnames:
+        return {}
+    return {
+        thing.fullname: thing.likes for thing in Api(user=user).reddit.info(fullnames)
+    }
+
+
+def _get_profile(user):
+    """
+    Get the profile of an author
+
+    Args:
+        user (User): The author, with profile already loaded
+
+    Returns:
+        profiles.models.Profile: The profile, or None if the user doesn't have one
+    """
+    return getattr(user, "profile", None)
+
+
+def _created(obj):
+    """
+    Format the creation time like the serializers do for reddit's creation timestamp
+
+    Args:
+        obj (channels.models.Post or channels.models.Comment): A post or comment
+
+    Returns:
+        str: The ISO-8601 formatted creation time
+    """
+    return obj.created_on.replace(microsecond=0).isoformat()
+
+
+def _serialize_post(post, *, upvoted, subscribed):
+    """
+    Serialize a post. Equivalent to PostSerializer for a user who isn't a moderator
+
+    Args:
+        post (channels.models.Post): A post, with channel, article, link_meta and author profile
+            already loaded
+        upvoted (bool): True if the user upvoted the post
+        subscribed (bool): True if the user is subscribed to the post
+
+    Returns:
+        dict: The serialized post
+    """
+    is_self = post.post_type != LINK_TYPE_LINK
+    article = getattr(post, "article", None)
+    profile = _get_profile(post.author)
+    channel = post.channel
+    if post.post_type == EXTENDED_POST_TYPE_ARTICLE:
+        # article posts are submitted to reddit with empty text
+        text = ""
+    else:
+        text = post.text if is_self else None
+    return {
+        "url": None if is_self else post.url,
+        "url_domain": None if is_self else urlparse(post.url).hostname,
+        "thumbnail": post.thumbnail_url,
+        "text": text,
+        "article_content": article.content if article is not None else None,
+        "plain_text": post.plain_text,
+        "title": post.title,
+        "post_type": post.post_type,
+        "slug": post.slug.replace("_", "-"),
+        "upvoted": upvoted,
+        "removed": False,
+        "stickied": post.stickied,
+        "score": post.score,
+        "author_id": post.author.username,
+        "id": post.post_id,
+        "created": _created(post),
+        "num_comments": post.num_comments,
+        "channel_name": channel.name,
+        "channel_title": channel.title,
+        "channel_type": channel.channel_type,
+        "profile_image": image_uri(profile),
+        "author_name": profile.name
+        if profile is not None and profile.name
+        else DELETED_AUTHOR_NAME,
+        "author_headline": profile.headline if profile is not None else None,
+        "edited": post.edited,
+        "num_reports": None,
+        "deleted": False,
+        "cover_image": urljoin(settings.SITE_BASE_URL, article.cover_image.url)
+        if article is not None and article.cover_image
+        else None,
+        "subscribed": subscribed,
+    }
+
+
+def serialize_post(user, post_id):
+    """
+    Serialize a post from the database
+
+    Args:
+        user (User): The user reading the post
+        post_id (str): The base36 id of the post
+
+    Returns:
+        dict: The serialized post, or None if it has to be read from reddit
+    """
+    post = (
+        Post.objects.select_related(
+            "channel", "article", "link_meta", "author__profile"
+        )
+        .filter(post_id=post_id)
+        .first()
+    )
+    if (
+        post is None
+        or not _is_populated(post)
+        or None in (post.title, post.num_comments, post.stickied)
+        or not _can_read_channel(user, post.channel)
+    ):
+        return None
+
+    fullname = f"{get_kind_mapping()['submission']}_{post_id}"
+    votes = _get_votes(user, [fullname])
+    subscribed = (
+        not user.is_anonymous
+        and Subscription.objects.filter(
+            user=user, post_id=post_id, comment_id__isnull=True
+        ).exists()
+    )
+    return _serialize_post(
+        post, upvoted=votes.get(fullname) is True, subscribed=subscribed
+    )
+
+
+def _serialize_comment(comment, *, post_id, parent_id, likes, subscribed):
+    """
+    Serialize a comment. Equivalent to CommentSerializer for a user who isn't a moderator
+
+    Args:
+        comment (channels.models.Comment): A comment, with author profile already loaded
+        post_id (str): The base36 id of the post
+        parent_id (str): The base36 id of the parent comment, or None for a top level comment
+        likes (bool): True if the user upvoted the comment, False if they downvoted it
+        subscribed (bool): True if the user is subscribed to the comment
+
+    Returns:
+        dict: The serialized comment
+    """
+    profile = _get_profile(comment.author)
+    return {
+        "id": comment.comment_id,
+        "parent_id": parent_id,
+        "post_id": post_id,
+        "text": comment.text,
+        "author_id": comment.author.username,
+        "score": comment.score,
+        "upvoted": likes is True,
+        "removed": False,
+        "downvoted": likes is False,
+        "created": _created(comment),
+        "profile_image": image_uri(profile),
+        "author_name": profile.name
+        if profile is not None and profile.name
+        else DELETED_AUTHOR_NAME,
+        "author_headline": profile.headline if profile is not None else None,
+        "edited": comment.edited,
+        "comment_type": "comment",
+        "num_reports": None,
+        "deleted": False,
+        "subscribed": subscribed,
+    }
+
+
+def _sort_comments(comments, sort):
+    """
+    Sort sibling comments
+
+    Reddit's best sort ranks comments by a confidence interval on their upvotes and downvotes.
+    Only the score is stored locally, so best is approximated by the highest score first.
+
+    Args:
+        comments (list of channels.models.Comment): Comments with the same parent
+        sort (str): The comment sort
+
+    Returns:
+        list of channels.models.Comment: The sorted comments
+    """
+    if sort == COMMENTS_SORT_BEST:
+        return sorted(
+            comments,
+            key=lambda comment: (comment.score, comment.created_on),
+            reverse=True,
+        )
+    return sorted(
+        comments,
+        key=lambda comment: comment.created_on,
+        reverse=sort == COMMENTS_SORT_NEW,
+    )
+
+
+def _build_tree(comments, post_id, sort):
+    """
+    Group comments by their parent
+
+    Args:
+        comments (list of channels.models.Comment): All comments of a post
+        post_id (str): The base36 id of the post
+        sort (str): The comment sort
+
+    Returns:
+        dict:
+            A map of parent comment id (None for the post) to sorted child comments, or None if
+            the parent of a comment is missing from the database
+    """
+    comment_ids = {comment.comment_id for comment in comments}
+    children = defaultdict(list)
+    for comment in comments:
+        # top level comments have the post id as their parent id
+        if comment.parent_id is None or comment.parent_id == post_id:
+            parent_id = None
+        elif comment.parent_id in comment_ids:
+            parent_id = comment.parent_id
+        else:
+            return None
+        children[parent_id].append(comment)
+    for parent_id in list(children):
+        children[parent_id] = _sort_comments(children[parent_id], sort)
+    return children
+
+
+def _select_comments(children, limit):
+    """
+    Select comments in depth first order until the limit is reached, like reddit does
+
+    Args:
+        children (dict): A map of parent comment id (None for the post) to sorted child comments
+        limit (int): The maximum number of comments to select
+
+    Returns:
+        set of str: The ids of the selected comments
+    """
+    selected = set()
+    stack = list(reversed(children[None]))
+    while stack and len(selected) < limit:
+        comment = stack.pop()
+        selected.add(comment.comment_id)
+        stack.extend(reversed(children[comment.comment_id]))
+    return selected
+
+
+def _descendant_ids(children, comments):
+    """
+    List the ids of comments and all their descendants in depth first order
+
+    Args:
+        children (dict): A map of parent comment id (None for the post) to sorted child comments
+        comments (list of channels.models.Comment): The comments
+
+    Returns:
+        list of str: The comment ids
+    """
+    ids = []
+    stack = list(reversed(comments))
+    while stack:
+        comment = stack.pop()
+        ids.append(comment.comment_id)
+        stack.extend(reversed(children[comment.comment_id]))
+    return ids
+
+
+def serialize_comments(user, post_id, sort):
+    """
+    Serialize the comment tree of a post from the database
+
+    The comments are listed breadth first, and the comments past
+    OPEN_DISCUSSIONS_REDDIT_COMMENTS_LIMIT are collapsed into more_comments entries which can be
+    expanded through reddit, the same as when the comment tree is read from reddit.
+
+    Args:
+        user (User): The user reading the comments
+        post_id (str): The base36 id of the post
+        sort (str): The comment sort
+
+    Returns:
+        list of dict: The serialized comments, or None if they have to be read from reddit
+    """
+    if sort not in (COMMENTS_SORT_BEST, COMMENTS_SORT_NEW, COMMENTS_SORT_OLD):
+        return None
+    post = Post.objects.select_related("channel").filter(post_id=post_id).first()
+    if post is None or not _can_read_channel(user, post.channel):
+        return None
+    comments = list(Comment.objects.filter(post=post).select_related("author__profile"))
+    if not all(
+        _is_populated(comment) and comment.text is not None for comment in comments
+    ):
+        return None
+
+    children = _build_tree(comments, post_id, sort)
+    if children is None:
+        return None
+    selected = _select_comments(
+        children, settings.OPEN_DISCUSSIONS_REDDIT_COMMENTS_LIMIT
+    )
+    comment_kind = get_kind_mapping()["comment"]
+    votes = _get_votes(
+        user, [f"{comment_kind}_{comment_id}" for comment_id in sorted(selected)]
+    )
+    subscriptions = (
+        set()
+        if user.is_anonymous
+        else set(
+            Subscription.objects.filter(
+                user=user, post_id=post_id, comment_id__in=selected
+            ).values_list("comment_id", flat=True)
+        )
+    )
+
+    serialized = []
+    queue = deque([None])
+    while queue:
+        parent_id = queue.popleft()
+        hidden = []
+        for comment in children[parent_id]:
+            if comment.comment_id not in selected:
+                hidden.append(comment)
+                continue
+            serialized.append(
+                _serialize_comment(
+                    comment,
+                    post_id=post_id,
+                    parent_id=parent_id,
+                    likes=votes.get(f"{comment_kind}_{comment.comment_id}"),
+                    subscribed=comment.comment_id in subscriptions,
+                )
+            )
+            queue.append(comment.comment_id)
+        if hidden:
+            serialized.append(
+                {
+                    "parent_id": parent_id,
+                    "post_id": post_id,
+                    "children": _descendant_ids(children, hidden),
+                    "comment_type": "more_comments",
+                }
+            )
+    return serialized
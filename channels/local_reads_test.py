@@ -0,0 +1,301 @@
+"""Tests for serializing posts and comments from the database"""
+# pylint: disable=redefined-outer-name,unused-argument
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth.models import AnonymousUser
+from praw.models.reddit.redditor import Redditor
+import pytest
+
+from channels import local_reads
+from channels.api import add_user_role
+from channels.constants import (
+    CHANNEL_TYPE_PRIVATE,
+    CHANNEL_TYPE_PUBLIC,
+    COMMENTS_SORT_BEST,
+    COMMENTS_SORT_NEW,
+    COMMENTS_SORT_OLD,
+    EXTENDED_POST_TYPE_ARTICLE,
+    LINK_TYPE_LINK,
+    LINK_TYPE_SELF,
+    ROLE_MODERATORS,
+)
+from channels.factories.models import CommentFactory, PostFactory
+from channels.proxies import PostProxy
+from channels.serializers.posts import PostSerializer
+from channels.utils import reddit_slugify
+from open_discussions.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+CREATED_ON = datetime(2020, 3, 2, 12, 30, 15, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def mock_votes(mocker):
+    """Mock the vote lookup on reddit"""
+    return mocker.patch("channels.local_reads._get_votes", return_value={})
+
+
+def _create_post(**kwargs):
+    """Create a post in a public channel"""
+    post = PostFactory.create(
+        channel__channel_type=CHANNEL_TYPE_PUBLIC, score=5, num_comments=3, **kwargs
+    )
+    post.created_on = CREATED_ON
+    post.save()
+    return post
+
+
+def _create_comment(post, parent_id=None, **kwargs):
+    """Create a comment on a post"""
+    kwargs.setdefault("score", 1)
+    comment = CommentFactory.create(
+        post=post,
+        parent_id=parent_id if parent_id is not None else post.post_id,
+        **kwargs,
+    )
+    comment.created_on = kwargs.get("created_on", CREATED_ON)
+    comment.save()
+    return comment
+
+
+@pytest.mark.parametrize(
+    "post_type", [LINK_TYPE_SELF, LINK_TYPE_LINK, EXTENDED_POST_TYPE_ARTICLE]
+)
+@pytest.mark.parametrize("is_anonymous", [True, False])
+@pytest.mark.parametrize("upvoted", [True, False])
+@pytest.mark.parametrize("subscribed", [True, False])
+def test_serialize_post(
+    mocker, mock_votes, post_type, is_anonymous, upvoted, subscribed
+):  # pylint: disable=too-many-arguments
+    """serialize_post should match PostSerializer for the same post from reddit"""
+    post = _create_post(post_type=post_type, stickied=True)
+    user = AnonymousUser() if is_anonymous else UserFactory.create()
+    fullname = f"t3_{post.post_id}"
+    mock_votes.return_value = {} if is_anonymous else {fullname: upvoted or None}
+    upvoted = upvoted and not is_anonymous
+    subscribed = subscribed and not is_anonymous
+    if subscribed:
+        user.content_subscriptions.create(post_id=post.post_id)
+
+    submission = mocker.Mock(
+        id=post.post_id,
+        title=post.title,
+        url=post.url,
+        is_self=post_type != LINK_TYPE_LINK,
+        selftext=post.text or "",
+        permalink=f"/r/{post.channel.name}/comments/{post.post_id}/{reddit_slugify(post.title)}/",
+        likes=True if upvoted else None,
+        ups=post.score,
+        created=CREATED_ON.timestamp(),
+        num_comments=post.num_comments,
+        edited=False,
+        banned_by=None,
+        num_reports=None,
+        stickied=True,
+        author=Redditor(None, name=post.author.username),
+    )
+    expected = PostSerializer(
+        PostProxy(submission, post),
+        context={
+            "current_user": user,
+            "users": {post.author.username: post.author},
+            "post_subscriptions": [post.post_id] if subscribed else [],
+        },
+    ).data
+
+    assert local_reads.serialize_post(user, post.post_id) == expected
+    mock_votes.assert_called_once_with(user, [fullname])
+
+
+@pytest.mark.parametrize(
+    "post_kwargs",
+    [
+        {"removed": True},
+        {"deleted": True},
+        {"unpopulated": True},
+        {"stickied": None},
+        {"channel__channel_type": CHANNEL_TYPE_PRIVATE},
+    ],
+)
+def test_serialize_post_from_reddit(mock_votes, post_kwargs):
+    """serialize_post should return None for posts which have to be read from reddit"""
+    post = PostFactory.create(
+        **{"channel__channel_type": CHANNEL_TYPE_PUBLIC, "score": 1, **post_kwargs}
+    )
+    assert local_reads.serialize_post(UserFactory.create(), post.post_id) is None
+    mock_votes.assert_not_called()
+
+
+def test_serialize_post_moderator(mock_votes):
+    """serialize_post should return None for moderators, who see reports"""
+    post = _create_post()
+    moderator = UserFactory.create()
+    add_user_role(post.channel, ROLE_MODERATORS, moderator)
+    assert local_reads.serialize_post(moderator, post.post_id) is None
+    assert local_reads.serialize_post(UserFactory.create(), post.post_id) is not None
+
+
+def test_serialize_post_missing(mock_votes):
+    """serialize_post should return None if the post isn't in the database"""
+    assert local_reads.serialize_post(AnonymousUser(), "missing") is None
+
+
+@pytest.mark.parametrize(
+    "sort,expected_order",
+    [
+        (COMMENTS_SORT_BEST, ["high", "low", "old"]),
+        (COMMENTS_SORT_NEW, ["low", "high", "old"]),
+        (COMMENTS_SORT_OLD, ["old", "high", "low"]),
+    ],
+)
+def test_serialize_comments(mock_votes, sort, expected_order):
+    """serialize_comments should list the comment tree breadth first in sort order"""
+    post = _create_post()
+    comments = {
+        "old": _create_comment(
+            post, score=0, created_on=CREATED_ON - timedelta(days=1)
+        ),
+        "high": _create_comment(post, score=10),
+        "low": _create_comment(post, score=2, created_on=CREATED_ON + timedelta(1)),
+    }
+    reply = _create_comment(post, parent_id=comments["old"].comment_id)
+
+    serialized = local_reads.serialize_comments(AnonymousUser(), post.post_id, sort)
+
+    assert [comment["id"] for comment in serialized] == [
+        comments[key].comment_id for key in expected_order
+    ] + [reply.comment_id]
+    assert [comment["parent_id"] for comment in serialized] == [None] * 3 + [
+        comments["old"].comment_id
+    ]
+    assert serialized[-1] == {
+        "id": reply.comment_id,
+        "parent_id": comments["old"].comment_id,
+        "post_id": post.post_id,
+        "text": reply.text,
+        "author_id": reply.author.username,
+        "score": 1,
+        "upvoted": False,
+        "removed": False,
+        "downvoted": False,
+        "created": "2020-03-02T12:30:15+00:00",
+        "profile_image": local_reads.image_uri(reply.author.profile),
+        "author_name": reply.author.profile.name,
+        "author_headline": reply.author.profile.headline,
+        "edited": False,
+        "comment_type": "comment",
+        "num_reports": None,
+        "deleted": False,
+        "subscribed": False,
+    }
+
+
+def test_serialize_comments_limit(settings, mock_votes):
+    """Comments past the limit should be collapsed into more_comments entries"""
+    settings.OPEN_DISCUSSIONS_REDDIT_COMMENTS_LIMIT = 2
+    post = _create_post()
+    first = _create_comment(post, score=3)
+    first_reply = _create_comment(post, parent_id=first.comment_id, score=2)
+    second_reply = _create_comment(post, parent_id=first.comment_id, score=1)
+    nested_reply = _create_comment(post, parent_id=second_reply.comment_id)
+    second = _create_comment(post, score=0)
+
+    serialized = local_reads.serialize_comments(
+        AnonymousUser(), post.post_id, COMMENTS_SORT_BEST
+    )
+
+    assert [comment.get("id") for comment in serialized] == [
+        first.comment_id,
+        None,
+        first_reply.comment_id,
+        None,
+    ]
+    assert serialized[1] == {
+        "parent_id": None,
+        "post_id": post.post_id,
+        "children": [second.comment_id],
+        "comment_type": "more_comments",
+    }
+    assert serialized[3] == {
+        "parent_id": first.comment_id,
+        "post_id": post.post_id,
+        "children": [second_reply.comment_id, nested_reply.comment_id],
+        "comment_type": "more_comments",
+    }
+
+
+def test_serialize_comments_user(mock_votes):
+    """serialize_comments should include the user's votes and subscriptions"""
+    post = _create_post()
+    upvoted, downvoted, subscribed = [_create_comment(post) for _ in range(3)]
+    user = UserFactory.create()
+    user.content_subscriptions.create(
+        post_id=post.post_id, comment_id=subscribed.comment_id
+    )
+    mock_votes.return_value = {
+        f"t1_{upvoted.comment_id}": True,
+        f"t1_{downvoted.comment_id}": False,
+    }
+
+    serialized = {
+        comment["id"]: comment
+        for comment in local_reads.serialize_comments(
+            user, post.post_id, COMMENTS_SORT_BEST
+        )
+    }
+
+    assert mock_votes.call_args[0][0] == user
+    assert sorted(mock_votes.call_args[0][1]) == sorted(
+        f"t1_{comment.comment_id}" for comment in (upvoted, downvoted, subscribed)
+    )
+    assert [
+        (comment["upvoted"], comment["downvoted"], comment["subscribed"])
+        for comment in (
+            serialized[upvoted.comment_id],
+            serialized[downvoted.comment_id],
+            serialized[subscribed.comment_id],
+        )
+    ] == [(True, False, False), (False, True, False), (False, False, True)]
+
+
+@pytest.mark.parametrize(
+    "comment_kwargs", [{"removed": True}, {"deleted": True}, {"unpopulated": True}]
+)
+def test_serialize_comments_from_reddit(mock_votes, comment_kwargs):
+    """serialize_comments should return None if any comment has to be read from reddit"""
+    post = _create_post()
+    _create_comment(post)
+    _create_comment(post, **comment_kwargs)
+    assert (
+        local_reads.serialize_comments(
+            AnonymousUser(), post.post_id, COMMENTS_SORT_BEST
+        )
+        is None
+    )
+
+
+def test_serialize_comments_missing_parent(mock_votes):
+    """serialize_comments should return None if the parent of a comment is missing"""
+    post = _create_post()
+    _create_comment(post)
+    _create_comment(post, parent_id="zzzzz")
+    assert (
+        local_reads.serialize_comments(
+            AnonymousUser(), post.post_id, COMMENTS_SORT_BEST
+        )
+        is None
+    )
+
+
+def test_serialize_comments_moderator(mock_votes):
+    """serialize_comments should return None for moderators and unknown sorts"""
+    post = _create_post()
+    _create_comment(post)
+    moderator = UserFactory.create()
+    add_user_role(post.channel, ROLE_MODERATORS, moderator)
+    assert (
+        local_reads.serialize_comments(moderator, post.post_id, COMMENTS_SORT_BEST)
+        is None
+    )
+    assert local_reads.serialize_comments(AnonymousUser(), post.post_id, "top") is None
@@ -1,7 +1,8 @@
 """Update managed channel memberships"""
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
-from channels import tasks
+from channels import membership_api, tasks
+from channels.models import Channel
 from open_discussions.utils import now_in_utc
 
 
@@ -12,10 +13,57 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("channel_names", metavar="CHANNEL_NAME", nargs="+")
+        parser.add_argument(
+            "--remove",
+            dest="remove",
+            action="store_true",
+            help="Also remove members who no longer match the membership configs",
+        )
+        parser.add_argument(
+            "--dry-run",
+            dest="dry_run",
+            action="store_true",
+            help="Only report the membership changes, without applying them",
+        )
+        parser.add_argument(
+            "--full",
+            dest="full",
+            action="store_true",
+            help="Add every matching user again, even if they're already a member",
+        )
 
     def handle(self, *args, **options):
+        channel_ids = list(
+            Channel.objects.filter(name__in=options["channel_names"]).values_list(
+                "id", flat=True
+            )
+        )
+        # an empty list of channel ids would update every managed channel
+        if not channel_ids:
+            raise CommandError("No channels found")
+
+        if options["dry_run"]:
+            changes_by_channel = membership_api.update_memberships_for_managed_channels(
+                channel_ids=channel_ids,
+                remove=options["remove"],
+                dry_run=True,
+                full=options["full"],
+            )
+            for channel_name, changes in sorted(changes_by_channel.items()):
+                if changes is None:
+                    self.stdout.write(f"{channel_name}: not updated")
+                    continue
+                self.stdout.write(f"{channel_name}:")
+                for field, usernames in changes._asdict().items():
+                    self.stdout.write(
+                        "  {}: {}".format(
+                            field.replace("_", " "), ", ".join(usernames) or "none"
+                        )
+                    )
+            return
+
         task = tasks.update_memberships_for_managed_channels.delay(
-            channel_names=options["channel_names"]
+            channel_ids=channel_ids, remove=options["remove"], full=options["full"]
         )
 
         self.stdout.write("Waiting on task...")
@@ -1,4 +1,5 @@
 """API for managing channel memberships"""
+from collections import namedtuple
 import logging
 import operator
 from functools import reduce
@@ -6,15 +7,50 @@ from functools import reduce
 from django.contrib.auth import get_user_model
 
 from channels.api import get_admin_api
-from channels.models import Channel
+from channels.constants import ROLE_CONTRIBUTORS, ROLE_MODERATORS
+from channels.models import Channel, ChannelGroupRole, ChannelSubscription
 from profiles.filters import UserFilter
 from profiles.models import Profile
 
 log = logging.getLogger()
 User = get_user_model()
 
+# the number of users each celery task updates with one admin api client
+MEMBERSHIP_CHUNK_SIZE = 50
 
-def update_memberships_for_managed_channels(*, channel_ids=None, user_ids=None):
+MembershipChanges = namedtuple(
+    "MembershipChanges",
+    [
+        "add_contributors",
+        "add_subscribers",
+        "remove_contributors",
+        "remove_subscribers",
+    ],
+)
+
+
+def get_managed_channels(channel_ids=None):
+    """
+    Get the channels that are managed and have channel membership configs
+
+    Args:
+        channel_ids (list of int):
+            optional list of channel ids to filter to
+
+    Returns:
+        django.db.models.query.QuerySet: the managed channels
+    """
+    channels = Channel.objects.filter(
+        membership_is_managed=True, channel_membership_configs__isnull=False
+    ).distinct()
+    if channel_ids:
+        channels = channels.filter(id__in=channel_ids)
+    return channels
+
+
+def update_memberships_for_managed_channels(
+    *, channel_ids=None, user_ids=None, remove=False, dry_run=False, full=False
+):
     """
     Update channels that are managed and have channel memberhip configs
 
@@ -23,28 +59,165 @@ def update_memberships_for_managed_channels(*, channel_ids=None, user_ids=None):
             optional list of channel ids to generate memberships for
         user_ids (list of int):
             optional list of user ids to filter to
+        remove (bool):
+            if true, also remove members who no longer match the membership configs
+        dry_run (bool):
+            if true, only report the changes without applying them
+        full (bool):
+            if true, add every matching user again, even if they're already a member
+
+    Returns:
+        dict: a map of channel name to the MembershipChanges for the channel
     """
-    # channels with a membership config
-    channels = Channel.objects.filter(
-        membership_is_managed=True, channel_membership_configs__isnull=False
+    return {
+        channel.name: update_memberships_for_managed_channel(
+            channel, user_ids=user_ids, remove=remove, dry_run=dry_run, full=full
+        )
+        for channel in get_managed_channels(channel_ids=channel_ids)
+    }
+
+
+def _get_role_user_ids(channel, role):
+    """
+    Get the ids of the users who have a role in a channel
+
+    Args:
+        channel (Channel): the channel
+        role (str): the role name (moderators, contributors)
+
+    Returns:
+        set of int: the user ids
+    """
+    return set(
+        ChannelGroupRole.objects.filter(
+            channel=channel, role=role, group__user__isnull=False
+        ).values_list("group__user", flat=True)
     )
 
-    if channel_ids:
-        channels = channels.filter(id__in=channel_ids)
-    for channel in channels:
-        update_memberships_for_managed_channel(channel, user_ids=user_ids)
 
+def _get_membership_changes(channel, users_in_channel, *, user_ids, remove, full):
+    """
+    Diff the current members of a channel against the users who match its membership configs
 
-def update_memberships_for_managed_channel(channel, *, user_ids=None):
+    The contributors and subscribers of a channel are mirrored in the ChannelGroupRole and
+    ChannelSubscription tables, so the current members are loaded from those.
+
+    Args:
+        channel (Channel): the channel
+        users_in_channel (django.db.models.query.QuerySet): the users matching the membership configs
+        user_ids (list of int): optional list of user ids to filter to
+        remove (bool): if true, include members who don't match the membership configs anymore
+        full (bool):
+            if true, include every matching user in the additions, to repair members missing
+            on reddit but present in the local tables
+
+    Returns:
+        MembershipChanges: the usernames to add and remove, sorted
     """
-    Update the channel memberships for a given channel.
-    If the channel is not managed, nothing happens.
+    matching = dict(users_in_channel.values_list("id", "username").distinct())
+    contributors = _get_role_user_ids(channel, ROLE_CONTRIBUTORS)
+    subscribers = set(
+        ChannelSubscription.objects.filter(channel=channel).values_list(
+            "user_id", flat=True
+        )
+    )
+    if user_ids:
+        contributors &= set(user_ids)
+        subscribers &= set(user_ids)
+
+    stale_contributors, stale_subscribers = set(), set()
+    if remove:
+        # moderators keep access to the channel regardless
+        moderators = _get_role_user_ids(channel, ROLE_MODERATORS)
+        stale_contributors = contributors - matching.keys() - moderators
+        stale_subscribers = subscribers - matching.keys() - moderators
+    stale_usernames = dict(
+        User.objects.filter(id__in=stale_contributors | stale_subscribers).values_list(
+            "id", "username"
+        )
+    )
+
+    return MembershipChanges(
+        add_contributors=sorted(
+            matching[user_id]
+            for user_id in (matching.keys() if full else matching.keys() - contributors)
+        ),
+        add_subscribers=sorted(
+            matching[user_id]
+            for user_id in (matching.keys() if full else matching.keys() - subscribers)
+        ),
+        remove_contributors=sorted(
+            stale_usernames[user_id] for user_id in stale_contributors
+        ),
+        remove_subscribers=sorted(
+            stale_usernames[user_id] for user_id in stale_subscribers
+        ),
+    )
+
+
+def get_membership_calls(changes):
+    """
+    Get the admin api calls which apply membership changes, grouped by user
+
+    Args:
+        changes (MembershipChanges): the changes to apply
+
+    Returns:
+        list of (str, list of str): the username and the admin api methods to call for each user
+    """
+    method_names_by_username = {}
+    # contributors are added first, so that users can subscribe to private channels
+    for method_name, usernames in (
+        ("add_contributor", changes.add_contributors),
+        ("add_subscriber", changes.add_subscribers),
+        ("remove_subscriber", changes.remove_subscribers),
+        ("remove_contributor", changes.remove_contributors),
+    ):
+        for username in usernames:
+            method_names_by_username.setdefault(username, []).append(method_name)
+    return sorted(method_names_by_username.items())
+
+
+def apply_membership_calls(channel_name, calls):
+    """
+    Make the admin api calls for a list of users
+
+    Args:
+        channel_name (str): the channel name
+        calls (list of (str, list of str)): the username and the admin api methods to call for each user
+    """
+    admin_api = get_admin_api()
+    for username, method_names in calls:
+        try:
+            for method_name in method_names:
+                getattr(admin_api, method_name)(username, channel_name)
+        except Profile.DoesNotExist:
+            log.exception(
+                "Channel %s membership update failed due to missing user profile: %s",
+                channel_name,
+                username,
+            )
+
+
+def get_membership_changes_for_managed_channel(
+    channel, *, user_ids=None, remove=False, full=False
+):
+    """
+    Get the changes to the channel memberships for a given channel.
+    If the channel is not managed, there are no changes.
 
     Args:
         channel (Channel):
             the channel to generate memberships for
         user_ids (list of int):
             optional list of user ids to filter to
+        remove (bool):
+            if true, also remove members who no longer match the membership configs
+        full (bool):
+            if true, add every matching user again, even if they're already a member
+
+    Returns:
+        MembershipChanges: the changes to the channel's members, or None if nothing should be updated
     """
     if (
         not channel.membership_is_managed
@@ -55,9 +228,8 @@ def update_memberships_for_managed_channel(channel, *, user_ids=None):
             "that is not managed and/or has no channel membership configs: %s",
             channel.name,
         )
-        return
+        return None
 
-    admin_api = get_admin_api()
     active_users = User.objects.filter(is_active=True)
 
     # create a list of user queries as generated by UserFilter
@@ -82,20 +254,56 @@ def update_memberships_for_managed_channel(channel, *, user_ids=None):
             "Membership query configs for channel '%s' result in all active users being added, this is likely not desired",
             channel.name,
         )
-        return
+        return None
 
     # filter here, rather than earlier
     # this ensure the check above works in all cases
     if user_ids:
         users_in_channel = users_in_channel.filter(id__in=user_ids)
 
-    for user in users_in_channel.only("username").distinct():
-        try:
-            admin_api.add_contributor(user.username, channel.name)
-            admin_api.add_subscriber(user.username, channel.name)
-        except Profile.DoesNotExist:
-            log.exception(
-                "Channel %s membership update failed due to missing user profile: %s",
-                channel.name,
-                user.username,
-            )
+    changes = _get_membership_changes(
+        channel, users_in_channel, user_ids=user_ids, remove=remove, full=full
+    )
+    log.info(
+        "Channel %s membership changes: %d contributors and %d subscribers to add, "
+        "%d contributors and %d subscribers to remove",
+        channel.name,
+        len(changes.add_contributors),
+        len(changes.add_subscribers),
+        len(changes.remove_contributors),
+        len(changes.remove_subscribers),
+    )
+    return changes
+
+
+def update_memberships_for_managed_channel(
+    channel, *, user_ids=None, remove=False, dry_run=False, full=False
+):
+    """
+    Update the channel memberships for a given channel.
+    If the channel is not managed, nothing happens.
+
+    Only the users who aren't members yet are added, unless full is true, and if remove is true,
+    only the members who don't match the membership configs anymore are removed.
+
+    Args:
+        channel (Channel):
+            the channel to generate memberships for
+        user_ids (list of int):
+            optional list of user ids to filter to
+        remove (bool):
+            if true, also remove members who no longer match the membership configs
+        dry_run (bool):
+            if true, only report the changes without applying them
+        full (bool):
+            if true, add every matching user again, even if they're already a member
+
+    Returns:
+        MembershipChanges: the changes to the channel's members, or None if nothing was updated
+    """
+    changes = get_membership_changes_for_managed_channel(
+        channel, user_ids=user_ids, remove=remove, full=full
+    )
+    if changes is not None and not dry_run:
+        apply_membership_calls(channel.name, get_membership_calls(changes))
+    return changes
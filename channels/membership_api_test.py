@@ -1,11 +1,17 @@
 """Tests for membership api"""
+import factory
 import pytest
 
+from channels.api import add_user_role
+from channels.constants import ROLE_CONTRIBUTORS, ROLE_MODERATORS
 from channels.factories.models import ChannelFactory, ChannelMembershipConfigFactory
 from channels.membership_api import (
+    MembershipChanges,
+    get_membership_calls,
     update_memberships_for_managed_channels,
     update_memberships_for_managed_channel,
 )
+from channels.models import ChannelSubscription
 from open_discussions.factories import UserFactory
 from profiles.models import Profile
 
@@ -44,7 +50,7 @@ def test_update_memberships_for_managed_channels(mocker):
     )
 
     mock_update_memberships_for_managed_channel.assert_called_once_with(
-        managed_channel1, user_ids=[1, 2, 3]
+        managed_channel1, user_ids=[1, 2, 3], remove=False, dry_run=False, full=False
     )
 
 
@@ -117,3 +123,128 @@ def test_update_memberships_for_managed_channel_empty_queries(mocker):
 
     mock_api.add_subscriber.assert_not_called()
     mock_api.add_contributor.assert_not_called()
+
+
+def _make_managed_channel():
+    """Create a managed channel for users with a matching email"""
+    channel = ChannelFactory.create(membership_is_managed=True)
+    channel.channel_membership_configs.add(
+        ChannelMembershipConfigFactory.create(
+            query={"email__endswith": "@matching.email"}
+        )
+    )
+    return channel
+
+
+@pytest.mark.usefixtures("indexing_user")
+@pytest.mark.parametrize("remove", [True, False])
+@pytest.mark.parametrize("dry_run", [True, False])
+def test_update_memberships_for_managed_channel_diff(mocker, remove, dry_run):
+    """Only the missing members should be added, and the stale ones removed if remove is true"""
+    mock_api = mocker.patch("channels.api.Api", autospec=True).return_value
+    channel = _make_managed_channel()
+    member = UserFactory.create(username="member", email="member@matching.email")
+    add_user_role(channel, ROLE_CONTRIBUTORS, member)
+    ChannelSubscription.objects.create(channel=channel, user=member)
+    contributor = UserFactory.create(
+        username="contributor", email="contributor@matching.email"
+    )
+    add_user_role(channel, ROLE_CONTRIBUTORS, contributor)
+    new_user = UserFactory.create(username="new", email="new@matching.email")
+    stale = UserFactory.create(username="stale", email="stale@other.email")
+    add_user_role(channel, ROLE_CONTRIBUTORS, stale)
+    ChannelSubscription.objects.create(channel=channel, user=stale)
+    moderator = UserFactory.create(username="moderator", email="mod@other.email")
+    add_user_role(channel, ROLE_MODERATORS, moderator)
+    ChannelSubscription.objects.create(channel=channel, user=moderator)
+
+    changes = update_memberships_for_managed_channel(
+        channel, remove=remove, dry_run=dry_run
+    )
+
+    assert changes == MembershipChanges(
+        add_contributors=[new_user.username],
+        add_subscribers=[contributor.username, new_user.username],
+        remove_contributors=[stale.username] if remove else [],
+        remove_subscribers=[stale.username] if remove else [],
+    )
+    if dry_run:
+        assert mock_api.mock_calls == []
+        return
+    assert sorted(mock_api.add_contributor.call_args_list) == [
+        mocker.call(new_user.username, channel.name)
+    ]
+    assert sorted(mock_api.add_subscriber.call_args_list) == [
+        mocker.call(contributor.username, channel.name),
+        mocker.call(new_user.username, channel.name),
+    ]
+    if remove:
+        mock_api.remove_contributor.assert_called_once_with(
+            stale.username, channel.name
+        )
+        mock_api.remove_subscriber.assert_called_once_with(stale.username, channel.name)
+    else:
+        mock_api.remove_contributor.assert_not_called()
+        mock_api.remove_subscriber.assert_not_called()
+
+
+def test_update_memberships_for_managed_channel_single_client(mocker):
+    """All the members should be updated serially with one admin api client"""
+    mock_get_admin_api = mocker.patch("channels.membership_api.get_admin_api")
+    channel = _make_managed_channel()
+    users = UserFactory.create_batch(
+        5, email=factory.Sequence(lambda n: f"user{n}@matching.email")
+    )
+
+    update_memberships_for_managed_channel(channel)
+
+    admin_api = mock_get_admin_api.return_value
+    mock_get_admin_api.assert_called_once_with()
+    assert admin_api.add_contributor.call_args_list == [
+        mocker.call(user.username, channel.name)
+        for user in sorted(users, key=lambda user: user.username)
+    ]
+    assert admin_api.add_subscriber.call_count == len(users)
+
+
+@pytest.mark.usefixtures("indexing_user")
+def test_update_memberships_for_managed_channel_full(mocker):
+    """Every matching user should be added again on a full update, to repair drift with reddit"""
+    mock_api = mocker.patch("channels.api.Api", autospec=True).return_value
+    channel = _make_managed_channel()
+    member = UserFactory.create(username="member", email="member@matching.email")
+    add_user_role(channel, ROLE_CONTRIBUTORS, member)
+    ChannelSubscription.objects.create(channel=channel, user=member)
+    new_user = UserFactory.create(username="new", email="new@matching.email")
+
+    changes = update_memberships_for_managed_channel(channel, full=True)
+
+    assert changes == MembershipChanges(
+        add_contributors=[member.username, new_user.username],
+        add_subscribers=[member.username, new_user.username],
+        remove_contributors=[],
+        remove_subscribers=[],
+    )
+    assert mock_api.add_contributor.call_args_list == [
+        mocker.call(member.username, channel.name),
+        mocker.call(new_user.username, channel.name),
+    ]
+    assert mock_api.add_subscriber.call_args_list == [
+        mocker.call(member.username, channel.name),
+        mocker.call(new_user.username, channel.name),
+    ]
+
+
+def test_get_membership_calls():
+    """The admin api calls should be grouped by user, adding contributors before subscribers"""
+    changes = MembershipChanges(
+        add_contributors=["b"],
+        add_subscribers=["a", "b"],
+        remove_contributors=["c"],
+        remove_subscribers=["c"],
+    )
+    assert get_membership_calls(changes) == [
+        ("a", ["add_subscriber"]),
+        ("b", ["add_contributor", "add_subscriber"]),
+        ("c", ["remove_subscriber", "remove_contributor"]),
+    ]
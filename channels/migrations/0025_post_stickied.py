@@ -0,0 +1,14 @@
+# Generated by Django 2.2.10 on 2020-04-06 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("channels", "0024_channel_membership_config")]
+
+    operations = [
+        migrations.AddField(
+            model_name="post", name="stickied", field=models.BooleanField(null=True)
+        )
+    ]
@@ -256,6 +256,7 @@ class Post(TimestampedModel):
     edited = models.BooleanField(null=True)
     removed = models.BooleanField(null=True)
     deleted = models.BooleanField(null=True)
+    stickied = models.BooleanField(null=True)
 
     @property
     def plain_text(self):
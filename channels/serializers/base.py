@@ -1,16 +1,28 @@
 """Base serializers"""
-from django.contrib.auth import get_user_model
-
 from rest_framework import serializers
 
+from channels.utils import UserLoader
 from profiles.models import Profile
 
-User = get_user_model()
-
 
 class RedditObjectSerializer(serializers.Serializer):
     """Serializer class for reddit objects (posts, comments)"""
 
+    def _get_users(self):
+        """
+        Get the users in the context, adding a UserLoader for the authors of everything the root
+        serializer serializes if there aren't any
+
+        Returns:
+            dict or channels.utils.UserLoader: A map of username to User
+        """
+        if "users" not in self.context:
+            instance = self.root.instance
+            self.context["users"] = UserLoader(
+                instance if isinstance(instance, (list, tuple)) else [instance]
+            )
+        return self.context["users"]
+
     def _get_user(self, instance):
         """
         Look up user in the context from the post author
@@ -21,14 +33,7 @@ class RedditObjectSerializer(serializers.Serializer):
         """
         if instance.author is None:
             return None
-        if "users" in self.context:
-            return self.context["users"].get(instance.author.name)
-        else:
-            return (
-                User.objects.filter(username=instance.author.name)
-                .select_related("profile")
-                .first()
-            )
+        return self._get_users().get(instance.author.name)
 
     def _get_profile(self, instance):
         """ Return a user profile if it exists, else None
@@ -1,12 +1,14 @@
 """
 Tests for serializers for comment REST APIS
 """
+from types import SimpleNamespace
 from unittest.mock import Mock
 
 import pytest
 from rest_framework.exceptions import ValidationError
 
 from channels.serializers.comments import BaseCommentSerializer, CommentSerializer
+from open_discussions.factories import UserFactory
 
 
 def test_comment_update_with_comment_id():
@@ -63,3 +65,32 @@ def test_comment_including_permalink_data(mocker, reddit_comment_obj, user):
     assert patched_slug_helper.call_count == 1
     assert data["post_slug"] == mock_slug_value
     assert data["channel_name"] == reddit_comment_obj.submission.subreddit.display_name
+
+
+@pytest.mark.django_db
+def test_comment_authors_loaded_once(
+    mocker, reddit_comment_obj, django_assert_num_queries
+):
+    """The authors of all comments should be loaded in one query when they aren't in the context"""
+    users = UserFactory.create_batch(3)
+    comments = [
+        SimpleNamespace(
+            **{
+                **vars(reddit_comment_obj),
+                "id": str(idx),
+                "author": SimpleNamespace(name=user.username),
+            }
+        )
+        for idx, user in enumerate(users * 2)
+    ]
+    mocker.patch("profiles.utils.generate_gravatar_image", return_value="image")
+
+    with django_assert_num_queries(1):
+        data = BaseCommentSerializer(comments, many=True).data
+
+    assert [comment["author_id"] for comment in data] == [
+        user.username for user in users * 2
+    ]
+    assert [comment["author_name"] for comment in data] == [
+        user.profile.name for user in users * 2
+    ]
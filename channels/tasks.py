@@ -22,7 +22,13 @@ from channels.api import (
     allowed_post_types_bitmask,
 )
 from channels.constants import ROLE_MODERATORS, ROLE_CONTRIBUTORS
-from channels.models import Channel, Post, ChannelGroupRole, ChannelInvitation
+from channels.models import (
+    Channel,
+    Post,
+    ChannelGroupRole,
+    ChannelInvitation,
+    ChannelSubscription,
+)
 from channels.utils import SORT_NEW_LISTING_PARAMS, SORT_HOT_LISTING_PARAMS
 from mail import api as mail_api
 from open_discussions.celery import app
@@ -76,10 +82,18 @@ def subscribe_user_range_to_channels(*, channel_names, usernames):
         channel_names (list of str): the names of the channels to subscribe to
         usernames (list of str): list of user usernames
     """
+    # skip the users who are already subscribed, so only the missing subscriptions go to reddit
+    existing = set(
+        ChannelSubscription.objects.filter(
+            user__username__in=usernames, channel__name__in=channel_names
+        ).values_list("user__username", "channel__name")
+    )
     admin_api = get_admin_api()
     # walk the usernames and add them as subscribers
     for username in usernames:
         for channel_name in channel_names:
+            if (username, channel_name) in existing:
+                continue
             try:
                 admin_api.add_subscriber(username, channel_name)
             except Exception:  # pylint: disable=broad-except
@@ -447,9 +461,45 @@ def maybe_repair_post_in_host_listing(channel_name, reddit_post_id):
         )
 
 
+@app.task(bind=True, acks_late=True)
+def update_memberships_for_managed_channels(
+    self, *, channel_ids=None, user_ids=None, remove=False, full=False
+):
+    """
+    Cron task to update managed channel memberships, applying the changes in chunks on subtasks
+
+    Args:
+        channel_ids (list of int): optional list of channel ids to update
+        user_ids (list of int): optional list of user ids to filter to
+        remove (bool): if true, also remove members who no longer match the membership configs
+        full (bool): if true, add every matching user again, even if they're already a member
+    """
+    membership_tasks = []
+    for channel in membership_api.get_managed_channels(channel_ids=channel_ids):
+        changes = membership_api.get_membership_changes_for_managed_channel(
+            channel, user_ids=user_ids, remove=remove, full=full
+        )
+        if changes is None:
+            continue
+        membership_tasks.extend(
+            apply_membership_calls.si(channel.name, calls)
+            for calls in chunks(
+                membership_api.get_membership_calls(changes),
+                chunk_size=membership_api.MEMBERSHIP_CHUNK_SIZE,
+            )
+        )
+
+    if membership_tasks:
+        raise self.replace(celery.group(membership_tasks))
+
+
 @app.task(acks_late=True)
-def update_memberships_for_managed_channels(*, channel_ids=None, user_ids=None):
-    """Cron task to update managed channel memberships"""
-    membership_api.update_memberships_for_managed_channels(
-        channel_ids=channel_ids, user_ids=user_ids
-    )
+def apply_membership_calls(channel_name, calls):
+    """
+    Make the admin api calls for a chunk of users in a managed channel
+
+    Args:
+        channel_name (str): the channel name
+        calls (list of (str, list of str)): the username and the admin api methods to call for each user
+    """
+    membership_api.apply_membership_calls(channel_name, calls)
@@ -9,7 +9,7 @@ from praw.models import Redditor
 from prawcore.exceptions import ResponseException
 
 from channels import tasks
-from channels import api
+from channels import api, membership_api
 from channels.constants import (
     CHANNEL_TYPE_PUBLIC,
     ROLE_MODERATORS,
@@ -41,16 +41,29 @@ def channels_and_users():
     )
 
 
-def test_evict_expired_access_tokens():
+def test_evict_expired_access_tokens(redis_cache):
     """Test that the task evicts expired tokens"""
     from channels.factories.models import RedditAccessTokenFactory
     from channels.models import RedditAccessToken
 
     future = RedditAccessTokenFactory.create()
     expired = RedditAccessTokenFactory.create(expired=True)
+    for token in (future, expired):
+        redis_cache.set(
+            api.AUTH_TOKENS_CACHE_KEY.format(user_id=token.user_id), "tokens"
+        )
 
     tasks.evict_expired_access_tokens.delay()
 
+    assert (
+        redis_cache.get(api.AUTH_TOKENS_CACHE_KEY.format(user_id=future.user_id))
+        == "tokens"
+    )
+    assert (
+        redis_cache.get(api.AUTH_TOKENS_CACHE_KEY.format(user_id=expired.user_id))
+        is None
+    )
+
     assert RedditAccessToken.objects.count() == 1
     assert RedditAccessToken.objects.filter(id=future.id).exists()
     assert not RedditAccessToken.objects.filter(id=expired.id).exists()
@@ -98,6 +111,22 @@ def test_subscribe_user_range_to_channels(mocker):
             mock_add_subscriber.assert_any_call(username, channel_name)
 
 
+def test_subscribe_user_range_to_channels_existing(mocker):
+    """Users who are already subscribed to a channel shouldn't be subscribed again"""
+    mock_add_subscriber = mocker.patch("channels.api.Api.add_subscriber")
+    mocker.patch("channels.api._get_client", autospec=True)
+    channel = ChannelFactory.create()
+    subscribed_user, other_user = UserFactory.create_batch(2)
+    ChannelSubscription.objects.create(channel=channel, user=subscribed_user)
+
+    tasks.subscribe_user_range_to_channels.delay(
+        usernames=[subscribed_user.username, other_user.username],
+        channel_names=[channel.name],
+    )
+
+    mock_add_subscriber.assert_called_once_with(other_user.username, channel.name)
+
+
 def test_populate_subscriptions_and_roles(
     mocker, mocked_celery, settings, channels_and_users
 ):
@@ -455,16 +484,71 @@ def test_maybe_repair_post_in_host_listing(
             )
 
 
-def test_update_memberships_for_managed_channels(mocker):
-    """Test that update_memberships_for_managed_channels task calls the matching API"""
-    mock_update_memberships_for_managed_channels_api = mocker.patch(
-        "channels.membership_api.update_memberships_for_managed_channels", autospec=True
+@pytest.mark.parametrize("full", [True, False])
+def test_update_memberships_for_managed_channels(mocker, mocked_celery, full):
+    """Test that update_memberships_for_managed_channels fans out the membership changes in chunks"""
+    mocker.patch("channels.membership_api.MEMBERSHIP_CHUNK_SIZE", 2)
+    channels = ChannelFactory.create_batch(2)
+    mock_get_managed_channels = mocker.patch(
+        "channels.membership_api.get_managed_channels", return_value=channels
+    )
+    changes = membership_api.MembershipChanges(
+        add_contributors=["a", "b", "c"],
+        add_subscribers=[],
+        remove_contributors=[],
+        remove_subscribers=[],
+    )
+    mock_get_changes = mocker.patch(
+        "channels.membership_api.get_membership_changes_for_managed_channel",
+        side_effect=[changes, None],
+    )
+    mock_apply_membership_calls = mocker.patch(
+        "channels.tasks.apply_membership_calls", autospec=True
     )
 
-    tasks.update_memberships_for_managed_channels.delay(
-        channel_ids=[1, 2, 3], user_ids=[4, 5, 6]
+    with pytest.raises(mocked_celery.replace_exception_class):
+        tasks.update_memberships_for_managed_channels.delay(
+            channel_ids=[1, 2, 3], user_ids=[4, 5, 6], remove=True, full=full
+        )
+
+    mock_get_managed_channels.assert_called_once_with(channel_ids=[1, 2, 3])
+    for channel in channels:
+        mock_get_changes.assert_any_call(
+            channel, user_ids=[4, 5, 6], remove=True, full=full
+        )
+    assert mocked_celery.group.call_count == 1
+    assert mock_apply_membership_calls.si.call_args_list == [
+        mocker.call(
+            channels[0].name, [("a", ["add_contributor"]), ("b", ["add_contributor"])]
+        ),
+        mocker.call(channels[0].name, [("c", ["add_contributor"])]),
+    ]
+
+
+def test_update_memberships_for_managed_channels_no_changes(mocker, mocked_celery):
+    """Test that update_memberships_for_managed_channels doesn't replace itself if nothing changes"""
+    mocker.patch(
+        "channels.membership_api.get_managed_channels",
+        return_value=ChannelFactory.create_batch(1),
     )
+    mocker.patch(
+        "channels.membership_api.get_membership_changes_for_managed_channel",
+        return_value=None,
+    )
+
+    tasks.update_memberships_for_managed_channels.delay()
+
+    mocked_celery.replace.assert_not_called()
+
+
+def test_apply_membership_calls(mocker):
+    """Test that apply_membership_calls calls the matching API"""
+    mock_apply_membership_calls = mocker.patch(
+        "channels.membership_api.apply_membership_calls", autospec=True
+    )
+
+    tasks.apply_membership_calls.delay("channel", [["a", ["add_contributor"]]])
 
-    mock_update_memberships_for_managed_channels_api.assert_called_once_with(
-        channel_ids=[1, 2, 3], user_ids=[4, 5, 6]
+    mock_apply_membership_calls.assert_called_once_with(
+        "channel", [["a", ["add_contributor"]]]
     )
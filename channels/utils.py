@@ -142,6 +142,80 @@ def lookup_users_for_posts(posts):
     return {user.username: user for user in users}
 
 
+class UserLoader:
+    """
+    Identity map of users by username, for serializing the authors of posts and comments
+
+    The authors of the objects being serialized are collected up front, and loaded together with
+    their profiles in one query the first time a user is looked up. Each user is only loaded once,
+    so one loader can be shared by all the serializers for a request.
+    """
+
+    def __init__(self, objects=None):
+        """
+        Args:
+            objects (iterable of praw.models.Submission or praw.models.Comment):
+                Posts or comments whose authors will be looked up
+        """
+        self._users = {}
+        self._pending = set()
+        if objects is not None:
+            self.add_authors(objects)
+
+    def add_authors(self, objects):
+        """
+        Add the authors of posts or comments to the next batch of users to load
+
+        Args:
+            objects (iterable of praw.models.Submission or praw.models.Comment):
+                Posts or comments, MoreComments objects are skipped
+        """
+        for obj in objects:
+            author = getattr(obj, "author", None)
+            if author:
+                self.add(author.name)
+
+    def add(self, username):
+        """
+        Add a username to the next batch of users to load
+
+        Args:
+            username (str): The username
+        """
+        if username not in self._users:
+            self._pending.add(username)
+
+    def _load(self):
+        """Load the pending users in one query"""
+        users = User.objects.filter(username__in=self._pending).select_related(
+            "profile"
+        )
+        loaded = {user.username: user for user in users}
+        for username in self._pending:
+            self._users[username] = loaded.get(username)
+        self._pending = set()
+
+    def get(self, username, default=None):
+        """
+        Get a user, loading it along with any pending users if it hasn't been loaded yet
+
+        Args:
+            username (str): The username
+            default (User): The value returned if the user doesn't exist
+
+        Returns:
+            User: The user with its profile
+        """
+        if username not in self._users:
+            self.add(username)
+            self._load()
+        user = self._users[username]
+        return default if user is None else user
+
+    def __contains__(self, username):
+        return self.get(username) is not None
+
+
 def _lookup_subscriptions_for_posts(posts, user):
     """
     Helper function to look up the user's subscriptions among a set of posts
@@ -1,5 +1,6 @@
 """Tests for utils"""
 # pylint: disable=protected-access
+from types import SimpleNamespace
 from unittest.mock import Mock
 
 import pytest
@@ -19,7 +20,9 @@ from channels.utils import (
     get_kind_and_id,
     num_items_not_none,
     render_article_text,
+    UserLoader,
 )
+from open_discussions.factories import UserFactory
 
 
 def test_get_listing_params_none(mocker):
@@ -237,3 +240,28 @@ def test_num_items_not_none():
 def test_render_article_text(input_node, output_text):
     """render_article_text should extract the text from any arbitrary article node tree"""
     assert render_article_text(input_node) == output_text
+
+
+@pytest.mark.django_db
+def test_user_loader(django_assert_num_queries):
+    """UserLoader should load the authors of all objects in one query and cache them"""
+    users = UserFactory.create_batch(3)
+    objects = [
+        SimpleNamespace(author=SimpleNamespace(name=user.username)) for user in users
+    ]
+    objects += [SimpleNamespace(author=None), SimpleNamespace(children=[])]
+    loader = UserLoader(objects)
+
+    with django_assert_num_queries(1):
+        for user in users:
+            assert loader.get(user.username) == user
+            assert loader.get(user.username).profile == user.profile
+            assert user.username in loader
+
+    other_user = UserFactory.create()
+    with django_assert_num_queries(2):
+        assert loader.get("missing") is None
+        assert loader.get("missing", default="default") == "default"
+        assert "missing" not in loader
+        assert loader.get(other_user.username) == other_user
+        assert loader.get(users[0].username) == users[0]
@@ -1,57 +1,23 @@
 """Views for REST APIs for comments"""
 
-from django.contrib.auth import get_user_model
-from praw.models import MoreComments
 from praw.exceptions import PRAWException
 from rest_framework import status
 from rest_framework.exceptions import ValidationError, NotFound
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from channels import listing_cache, local_reads
 from channels.api import Api
 from channels.constants import COMMENTS_SORT_BEST
 from channels.serializers.comments import CommentSerializer, GenericCommentSerializer
-from channels.utils import translate_praw_exceptions, lookup_subscriptions_for_comments
+from channels.utils import (
+    lookup_subscriptions_for_comments,
+    translate_praw_exceptions,
+    UserLoader,
+)
+from open_discussions import features
 from open_discussions.permissions import AnonymousAccessReadonlyPermission
 
-User = get_user_model()
-
-
-def _populate_authors_for_comments(comments, author_set):
-    """
-    Helper function to look up user for each instance and attach it to instance.user
-
-    Args:
-        comments (list of praw.models.Comment):
-            A list of comments
-        author_set (set): This is modified to populate with the authors found in comments
-    """
-    for comment in comments:
-        if isinstance(comment, MoreComments):
-            continue
-        if comment.author:
-            author_set.add(comment.author.name)
-
-        _populate_authors_for_comments(comment.replies, author_set)
-
-
-def _lookup_users_for_comments(comments):
-    """
-    Helper function to look up user for each instance and attach it to instance.user
-
-    Args:
-        comments (list of praw.models.Comment):
-            A list of comments
-
-    Returns:
-        dict: A map of username to User
-    """
-    author_set = set()
-    _populate_authors_for_comments(comments, author_set)
-
-    users = User.objects.filter(username__in=author_set).select_related("profile")
-    return {user.username: user for user in users}
-
 
 class CommentListView(APIView):
     """
@@ -73,10 +39,17 @@ class CommentListView(APIView):
         """Get list for comments and attach User objects to them"""
         with translate_praw_exceptions(request.user):
             post_id = self.kwargs["post_id"]
-            api = Api(user=self.request.user)
             sort = request.query_params.get("sort", COMMENTS_SORT_BEST)
+            if features.is_enabled(features.LOCAL_READS):
+                serialized_comments_list = local_reads.serialize_comments(
+                    request.user, post_id, sort
+                )
+                if serialized_comments_list is not None:
+                    return Response(serialized_comments_list)
+
+            api = Api(user=self.request.user)
             comments = api.list_comments(post_id, sort).list()
-            users = _lookup_users_for_comments(comments)
+            users = UserLoader(comments)
             subscriptions = lookup_subscriptions_for_comments(
                 comments, self.request.user
             )
@@ -134,24 +107,35 @@ class MoreCommentsView(APIView):
 
             parent_id = request.query_params.get("parent_id")
 
-            api = Api(user=self.request.user)
-            comments = api.more_comments(parent_id, post_id, children, sort)
-
-            users = _lookup_users_for_comments(comments)
-            subscriptions = lookup_subscriptions_for_comments(
-                comments, self.request.user
+            def get_serialized_comments():
+                """Expand the comments on reddit and serialize them"""
+                api = Api(user=self.request.user)
+                comments = api.more_comments(parent_id, post_id, children, sort)
+
+                users = UserLoader(comments)
+                subscriptions = lookup_subscriptions_for_comments(
+                    comments, self.request.user
+                )
+
+                return GenericCommentSerializer(
+                    comments,
+                    context={
+                        **self.get_serializer_context(),
+                        "users": users,
+                        "comment_subscriptions": subscriptions,
+                    },
+                    many=True,
+                ).data
+
+            serialized_comments_list = listing_cache.get_serialized_more_comments(
+                user=self.request.user,
+                post_id=post_id,
+                sort=sort,
+                parent_id=parent_id,
+                children=children,
+                get_serialized_comments=get_serialized_comments,
             )
 
-            serialized_comments_list = GenericCommentSerializer(
-                comments,
-                context={
-                    **self.get_serializer_context(),
-                    "users": users,
-                    "comment_subscriptions": subscriptions,
-                },
-                many=True,
-            ).data
-
             return Response(serialized_comments_list)
 
 
@@ -192,12 +176,13 @@ class CommentDetailView(APIView):
             except PRAWException:
                 raise NotFound()
 
-            users = _lookup_users_for_comments([comment])
+            comments = [comment] + comment.replies.list()
+            users = UserLoader(comments)
             subscriptions = lookup_subscriptions_for_comments(
                 [comment], self.request.user
             )
             serialized_comment_tree = GenericCommentSerializer(
-                [comment] + comment.replies.list(),
+                comments,
                 context={
                     **self.get_serializer_context(),
                     "users": users,
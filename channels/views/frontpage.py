@@ -3,14 +3,8 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from channels.api import Api
-from channels.proxies import proxy_posts
-from channels.serializers.posts import PostSerializer
-from channels.utils import (
-    get_pagination_and_reddit_obj_list,
-    get_listing_params,
-    lookup_users_for_posts,
-    lookup_subscriptions_for_posts,
-)
+from channels.listing_cache import FRONT_PAGE_LISTING, get_serialized_listing
+from channels.utils import get_listing_params
 from open_discussions.permissions import AnonymousAccessReadonlyPermission
 
 
@@ -32,28 +26,11 @@ class FrontPageView(APIView):
     def get(self, request, *args, **kwargs):  # pylint: disable=unused-argument
         """Get front page posts"""
         listing_params = get_listing_params(self.request)
-        api = Api(user=self.request.user)
-        paginated_posts = api.front_page(listing_params)
-        pagination, posts = get_pagination_and_reddit_obj_list(
-            paginated_posts, listing_params
-        )
-        users = lookup_users_for_posts(posts)
-        posts = proxy_posts(
-            [post for post in posts if post.author and post.author.name in users]
-        )
-        subscriptions = lookup_subscriptions_for_posts(posts, self.request.user)
-
-        return Response(
-            {
-                "posts": PostSerializer(
-                    posts,
-                    context={
-                        **self.get_serializer_context(),
-                        "users": users,
-                        "post_subscriptions": subscriptions,
-                    },
-                    many=True,
-                ).data,
-                "pagination": pagination,
-            }
+        pagination, posts = get_serialized_listing(
+            user=self.request.user,
+            listing=FRONT_PAGE_LISTING,
+            listing_params=listing_params,
+            get_listing=lambda: Api(user=self.request.user).front_page(listing_params),
+            serializer_context=self.get_serializer_context(),
         )
+        return Response({"posts": posts, "pagination": pagination})
@@ -5,16 +5,17 @@ from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from channels import local_reads
 from channels.api import Api
-from channels.proxies import proxy_posts
+from channels.listing_cache import channel_listing_name, get_serialized_listing
 from channels.serializers.posts import PostSerializer
 from channels.utils import (
-    get_pagination_and_reddit_obj_list,
     get_listing_params,
-    lookup_users_for_posts,
     lookup_subscriptions_for_posts,
     translate_praw_exceptions,
+    UserLoader,
 )
+from open_discussions import features
 from open_discussions.permissions import AnonymousAccessReadonlyPermission
 
 
@@ -38,33 +39,17 @@ class PostListView(APIView):
         """Get list for posts and attach User objects to them"""
         with translate_praw_exceptions(request.user):
             listing_params = get_listing_params(self.request)
-            api = Api(user=request.user)
-            paginated_posts = api.list_posts(
-                self.kwargs["channel_name"], listing_params
-            )
-            pagination, posts = get_pagination_and_reddit_obj_list(
-                paginated_posts, listing_params
-            )
-            users = lookup_users_for_posts(posts)
-            posts = proxy_posts(
-                [post for post in posts if post.author and post.author.name in users]
-            )
-            subscriptions = lookup_subscriptions_for_posts(posts, request.user)
-
-            return Response(
-                {
-                    "posts": PostSerializer(
-                        posts,
-                        many=True,
-                        context={
-                            **self.get_serializer_context(),
-                            "users": users,
-                            "post_subscriptions": subscriptions,
-                        },
-                    ).data,
-                    "pagination": pagination,
-                }
+            channel_name = self.kwargs["channel_name"]
+            pagination, posts = get_serialized_listing(
+                user=request.user,
+                listing=channel_listing_name(channel_name),
+                listing_params=listing_params,
+                get_listing=lambda: Api(user=request.user).list_posts(
+                    channel_name, listing_params
+                ),
+                serializer_context=self.get_serializer_context(),
             )
+            return Response({"posts": posts, "pagination": pagination})
 
     def post(self, request, *args, **kwargs):
         """Create a new post"""
@@ -105,8 +90,15 @@ class PostDetailView(APIView):
     def get(self, request, *args, **kwargs):
         """Get post"""
         with translate_praw_exceptions(request.user):
+            if features.is_enabled(features.LOCAL_READS):
+                serialized_post = local_reads.serialize_post(
+                    request.user, self.kwargs["post_id"]
+                )
+                if serialized_post is not None:
+                    return Response(serialized_post)
+
             post = self.get_object()
-            users = lookup_users_for_posts([post])
+            users = UserLoader([post])
             if not post.author or post.author.name not in users:
                 raise NotFound()
             subscriptions = lookup_subscriptions_for_posts([post], request.user)
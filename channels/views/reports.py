@@ -8,7 +8,7 @@ from rest_framework.views import APIView
 from open_discussions.permissions import IsStaffOrModeratorPermission
 from channels.api import Api
 from channels.serializers.reports import ReportSerializer, ReportedContentSerializer
-from channels.utils import translate_praw_exceptions
+from channels.utils import translate_praw_exceptions, UserLoader
 
 
 class ReportContentView(APIView):
@@ -58,9 +58,11 @@ class ChannelReportListView(APIView):
         """List of reports"""
         with translate_praw_exceptions(request.user):
             api = Api(user=request.user)
-            reports = api.list_reports(self.kwargs["channel_name"])
+            reports = list(api.list_reports(self.kwargs["channel_name"]))
             serializer = ReportedContentSerializer(
-                reports, many=True, context=self.get_serializer_context()
+                reports,
+                many=True,
+                context={**self.get_serializer_context(), "users": UserLoader(reports)},
             )
 
             return Response(serializer.data)
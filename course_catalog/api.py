@@ -1,6 +1,7 @@
 """
 course_catalog api functions
 """
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
 import os
@@ -9,6 +10,7 @@ from subprocess import check_call, CalledProcessError
 from tempfile import TemporaryDirectory
 
 import boto3
+from botocore.config import Config
 import rapidjson
 from django.db import transaction
 from django.conf import settings
@@ -38,6 +40,7 @@ from course_catalog.serializers import (
     LearningResourceRunSerializer,
 )
 from course_catalog.utils import get_course_url
+from open_discussions.utils import chunks
 from search.task_helpers import (
     delete_course,
     upsert_course,
@@ -189,6 +192,66 @@ def get_s3_object_and_read(obj, iteration=0):
             raise
 
 
+def get_s3_object_and_load_json(obj, iteration=0):
+    """
+    Streams a JSON file from S3 and parses it while it is read, retrying like get_s3_object_and_read.
+    Malformed JSON is not retried.
+
+    Args:
+        obj (s3.ObjectSummary or s3.Object): The S3 object we are trying to read
+        iteration (int): A number tracking how many times this function has been run
+
+    Returns:
+        dict: The parsed contents of the JSON file
+
+    Raises:
+        rapidjson.JSONDecodeError: If the file is not valid JSON
+    """
+    try:
+        return rapidjson.load(obj.get()["Body"])
+    except Exception as exc:  # pylint: disable=broad-except
+        if (
+            isinstance(exc, rapidjson.JSONDecodeError)
+            or iteration >= settings.MAX_S3_GET_ITERATIONS
+        ):
+            raise
+        return get_s3_object_and_load_json(obj, iteration + 1)
+
+
+def safe_load_s3_json(obj):
+    """
+    Streams and parses a JSON file from S3, like safe_load_json does for a string
+
+    Args:
+        obj (s3.ObjectSummary): The S3 object to read
+
+    Returns:
+        dict: The parsed contents, or an empty dict if the file is not valid JSON
+    """
+    try:
+        return get_s3_object_and_load_json(obj)
+    except rapidjson.JSONDecodeError:
+        log.exception("%s has a corrupted JSON", obj.key)
+        return {}
+
+
+def load_s3_jsons(objects):
+    """
+    Fetch and parse JSON files from S3 with up to OCW_S3_FETCH_WORKERS concurrent requests
+
+    Args:
+        objects (list of s3.ObjectSummary): The S3 objects to read
+
+    Returns:
+        list of dict: The parsed contents of each file, in the same order as the objects
+    """
+    workers = min(settings.OCW_S3_FETCH_WORKERS, len(objects))
+    if workers <= 1:
+        return [safe_load_s3_json(obj) for obj in objects]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(safe_load_s3_json, objects))
+
+
 def format_date(date_str):
     """
     Coverts date from 2016/02/02 20:28:06 US/Eastern to 2016-02-02 20:28:06-05:00
@@ -357,20 +420,37 @@ def sync_ocw_course_files(ids=None):
     courses = Course.objects.filter(platform="ocw").filter(published=True)
     if ids:
         courses = courses.filter(id__in=ids)
-    for course in courses.iterator():
-        runs = course.runs.exclude(url="").exclude(published=False)
-        for run in runs.iterator():
-            try:
-                s3_master_json = rapidjson.loads(
-                    bucket.Object(
-                        "{}/{}_master.json".format(run.url.split("/")[-1], run.run_id)
-                    )
-                    .get()["Body"]
-                    .read()
+    runs = LearningResourceRun.objects.filter(
+        content_type=ContentType.objects.get_for_model(Course),
+        object_id__in=courses.values_list("id", flat=True),
+        published=True,
+    ).exclude(url="")
+
+    with ThreadPoolExecutor(max_workers=settings.OCW_S3_FETCH_WORKERS) as executor:
+        # fetch the master json files of a chunk of runs concurrently, and only keep that many
+        # in memory at once
+        for runs_chunk in chunks(
+            runs.iterator(), chunk_size=settings.OCW_S3_FETCH_WORKERS
+        ):
+            futures = [
+                (
+                    run,
+                    executor.submit(
+                        get_s3_object_and_load_json,
+                        bucket.Object(
+                            "{}/{}_master.json".format(
+                                run.url.split("/")[-1], run.run_id
+                            )
+                        ),
+                    ),
                 )
-                load_content_files(run, transform_content_files(s3_master_json))
-            except:  # pylint: disable=bare-except
-                log.exception("Error syncing files for course run %d", run.id)
+                for run in runs_chunk
+            ]
+            for run, future in futures:
+                try:
+                    load_content_files(run, transform_content_files(future.result()))
+                except:  # pylint: disable=bare-except
+                    log.exception("Error syncing files for course run %d", run.id)
 
 
 # pylint: disable=too-many-locals, too-many-branches, too-many-statements
@@ -391,18 +471,22 @@ def sync_ocw_course(
         str:
             The UID, or None if the run_id is not found, or if it was found but not synced
     """
-    loaded_raw_jsons_for_course = []
     last_modified_dates = []
     uid = None
     is_published = True
     log.info("Syncing: %s ...", course_prefix)
 
+    # list the course files once, for both their last modified timestamps and their contents
+    course_objects = list(raw_data_bucket.objects.filter(Prefix=course_prefix))
+    loaded_jsons_by_key = {}
+
     # Collect last modified timestamps for all course files of the course
-    for obj in raw_data_bucket.objects.filter(Prefix=course_prefix):
+    for obj in course_objects:
         # the "1.json" metadata file contains a course's uid
         if obj.key == course_prefix + "0/1.json":
             try:
-                first_json = safe_load_json(get_s3_object_and_read(obj), obj.key)
+                first_json = get_s3_object_and_load_json(obj)
+                loaded_jsons_by_key[obj.key] = first_json
                 uid = first_json.get("_uid")
                 last_published_to_production = format_date(
                     first_json.get("last_published_to_production", None)
@@ -440,15 +524,20 @@ def sync_ocw_course(
         log.info("Already synced. No changes found for %s", course_prefix)
         return None
 
-    # fetch JSON contents for each course file in memory (slow)
+    # fetch JSON contents for each course file in memory, concurrently
     log.info("Loading JSON for %s...", course_prefix)
-    for obj in sorted(
-        raw_data_bucket.objects.filter(Prefix=course_prefix),
-        key=lambda x: int(x.key.split("/")[-1].split(".")[0]),
-    ):
-        loaded_raw_jsons_for_course.append(
-            safe_load_json(get_s3_object_and_read(obj), obj.key)
-        )
+    course_objects = sorted(
+        course_objects, key=lambda x: int(x.key.split("/")[-1].split(".")[0])
+    )
+    unloaded_objects = [
+        obj for obj in course_objects if obj.key not in loaded_jsons_by_key
+    ]
+    loaded_jsons_by_key.update(
+        zip([obj.key for obj in unloaded_objects], load_s3_jsons(unloaded_objects))
+    )
+    loaded_raw_jsons_for_course = [
+        loaded_jsons_by_key[obj.key] for obj in course_objects
+    ]
 
     log.info("Parsing for %s...", course_prefix)
     # pass course contents into parser
@@ -516,10 +605,12 @@ def sync_ocw_courses(*, course_prefixes, blacklist, force_overwrite, upload_to_s
     Returns:
         set[str]: All LearningResourceRun.run_id values for course runs which were synced
     """
+    # the bucket and its connection pool are shared by every course prefix of the batch
     raw_data_bucket = boto3.resource(
         "s3",
         aws_access_key_id=settings.OCW_CONTENT_ACCESS_KEY,
         aws_secret_access_key=settings.OCW_CONTENT_SECRET_ACCESS_KEY,
+        config=Config(max_pool_connections=settings.OCW_S3_FETCH_WORKERS),
     ).Bucket(name=settings.OCW_CONTENT_BUCKET_NAME)
 
     for course_prefix in course_prefixes:
@@ -1,11 +1,13 @@
 """
 Test course_catalog.api
 """
+import io
 import json
 from datetime import timedelta, datetime
 from subprocess import CalledProcessError
 
 import pytest
+import rapidjson
 from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
 from mock import ANY
@@ -26,11 +28,15 @@ from course_catalog.models import (
     Bootcamp,
 )
 from course_catalog.utils import get_ocw_topic
+from course_catalog import api
 from course_catalog.api import (
     digest_ocw_course,
+    get_s3_object_and_load_json,
+    load_s3_jsons,
     safe_load_json,
     get_course_availability,
     parse_bootcamp_json_data,
+    sync_ocw_course,
     sync_ocw_course_files,
     sync_xpro_course_files,
 )
@@ -301,6 +307,83 @@ def test_safe_load_bad_json(mocker):
     mock_logger.assert_called_with("%s has a corrupted JSON", "key")
 
 
+@pytest.mark.parametrize("num_failures", [0, 3, 4])
+def test_get_s3_object_and_load_json(mocker, settings, num_failures):
+    """get_s3_object_and_load_json should parse the streamed body and retry failed reads"""
+    settings.MAX_S3_GET_ITERATIONS = 3
+    obj = mocker.Mock()
+    obj.get.side_effect = [Exception] * num_failures + [
+        {"Body": io.BytesIO(b'{"key": "data"}')}
+    ]
+    if num_failures > settings.MAX_S3_GET_ITERATIONS:
+        with pytest.raises(Exception):
+            get_s3_object_and_load_json(obj)
+    else:
+        assert get_s3_object_and_load_json(obj) == {"key": "data"}
+    assert obj.get.call_count == min(num_failures + 1, 4)
+
+
+def test_get_s3_object_and_load_json_bad_json(mocker):
+    """get_s3_object_and_load_json should not retry malformed JSON"""
+    obj = mocker.Mock()
+    obj.get.return_value = {"Body": io.BytesIO(b"badjson")}
+    with pytest.raises(rapidjson.JSONDecodeError):
+        get_s3_object_and_load_json(obj)
+    obj.get.assert_called_once_with()
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_load_s3_jsons(mock_ocw_learning_bucket, mocker, settings, workers):
+    """load_s3_jsons should load the JSON files in order, with an empty dict for bad JSON"""
+    settings.OCW_S3_FETCH_WORKERS = workers
+    mock_log = mocker.patch("course_catalog.api.log.exception")
+    bodies = ['{"index": 0}', "badjson", '{"index": 2}', '{"index": 3}']
+    for index, body in enumerate(bodies):
+        mock_ocw_learning_bucket.bucket.put_object(Key=f"{index}.json", Body=body)
+    objects = sorted(
+        mock_ocw_learning_bucket.bucket.objects.all(), key=lambda obj: obj.key
+    )
+
+    assert load_s3_jsons(objects) == [{"index": 0}, {}, {"index": 2}, {"index": 3}]
+    mock_log.assert_called_once_with("%s has a corrupted JSON", "1.json")
+
+
+def test_sync_ocw_course_fetch(mock_ocw_learning_bucket, mocker, settings):
+    """sync_ocw_course should list the course once and load each JSON file once, in order"""
+    settings.OCW_S3_FETCH_WORKERS = 3
+    course_prefix = "PROD/course/"
+    bucket = mock_ocw_learning_bucket.bucket
+    bucket.put_object(
+        Key=f"{course_prefix}0/1.json",
+        Body=json.dumps(
+            {"_uid": "uid", "last_published_to_production": "2020/01/01 10:00:00 GMT"}
+        ),
+    )
+    for index in (2, 10, 3):
+        bucket.put_object(
+            Key=f"{course_prefix}0/{index}.json", Body=json.dumps({"index": index})
+        )
+    mock_filter = mocker.spy(type(bucket.objects), "filter")
+    mock_load = mocker.spy(api, "get_s3_object_and_load_json")
+    mock_parser = mocker.patch("course_catalog.api.OCWParser", autospec=True)
+    mock_parser.return_value.get_master_json.return_value = {}
+    mocker.patch("course_catalog.api.digest_ocw_course", return_value=None)
+
+    sync_ocw_course(
+        course_prefix=course_prefix,
+        raw_data_bucket=bucket,
+        force_overwrite=False,
+        upload_to_s3=False,
+        blacklist=[],
+    )
+
+    mock_filter.assert_called_once_with(ANY, Prefix=course_prefix)
+    assert mock_load.call_count == 4
+    loaded_jsons = mock_parser.call_args[1]["loaded_jsons"]
+    assert loaded_jsons[0]["_uid"] == "uid"
+    assert loaded_jsons[1:] == [{"index": 2}, {"index": 3}, {"index": 10}]
+
+
 def test_get_course_availability(mitx_valid_data):
     """ Test that availability is calculated as expected """
     ocw_course = CourseFactory.create(platform=PlatformType.ocw.value)
@@ -0,0 +1,425 @@
+"""
+Bulk loaders for course catalog data
+
+The loaders in loaders.py save one course at a time, and look up every topic, price, instructor
+and offeror of every course and run with its own get_or_create query. When the BULK_ETL_LOADERS
+feature is enabled, load_courses uses the loader here instead, which resolves those for the whole
+batch with a few queries, upserts the courses and runs in bulk and only writes the many-to-many
+links which changed.
+"""
+from datetime import datetime
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+from django.utils.timezone import is_naive, make_aware
+
+from course_catalog.models import (
+    Course,
+    CourseInstructor,
+    CoursePrice,
+    CourseTopic,
+    LearningResourceOfferor,
+    LearningResourceRun,
+)
+from open_discussions.utils import chunks, now_in_utc
+from search import task_helpers as search_task_helpers
+
+QUERY_CHUNK_SIZE = 500
+
+
+def _lookup_key(lookup):
+    """
+    Make a hashable key for a lookup
+
+    Args:
+        lookup (dict): Field values identifying an object
+
+    Returns:
+        tuple: The sorted field names and values
+    """
+    return tuple(sorted(lookup.items()))
+
+
+def _matches(obj, lookup):
+    """
+    Determine if an object has the field values of a lookup
+
+    Args:
+        obj (django.db.models.Model): A model object
+        lookup (dict): Field values identifying an object
+
+    Returns:
+        bool: True if every field of the object has the value in the lookup
+    """
+    return all(getattr(obj, field) == value for field, value in lookup.items())
+
+
+def _find_existing(model, lookups):
+    """
+    Find existing objects for lookups, the same object get_or_create would get for each of them
+
+    Args:
+        model (type): The model class
+        lookups (list of dict): Unique lookups
+
+    Returns:
+        dict: A map of lookup key to object for the lookups which have an object
+    """
+    existing = {}
+    for lookups_chunk in chunks(lookups, chunk_size=QUERY_CHUNK_SIZE):
+        candidates = list(
+            model.objects.filter(
+                reduce(or_, [Q(**lookup) for lookup in lookups_chunk])
+            ).order_by("id")
+        )
+        for lookup in lookups_chunk:
+            # the database compares values like 10 and Decimal("10.00") as equal, so the lookup
+            # values are converted the same way as the values loaded from the database
+            loaded_lookup = _loaded(model, lookup)
+            match = next(
+                (obj for obj in candidates if _matches(obj, loaded_lookup)), None
+            )
+            if match is not None:
+                existing[_lookup_key(lookup)] = match
+    return existing
+
+
+def _loaded(model, lookup):
+    """
+    Convert lookup values to the python values the model fields load from the database
+
+    Args:
+        model (type): The model class
+        lookup (dict): Field values identifying an object
+
+    Returns:
+        dict: The converted field values
+    """
+    loaded = {}
+    for field_name, value in lookup.items():
+        field = model._meta.get_field(field_name)  # pylint: disable=protected-access
+        value = field.to_python(value)
+        if isinstance(value, datetime) and settings.USE_TZ and is_naive(value):
+            value = make_aware(value)
+        loaded[field_name] = value
+    return loaded
+
+
+def bulk_get_or_create(model, lookups):
+    """
+    Get or create an object for each lookup, with a query per QUERY_CHUNK_SIZE lookups instead of a
+    query per lookup
+
+    Args:
+        model (type): The model class
+        lookups (iterable of dict): Field values identifying each object, which are also used to
+            create the missing objects
+
+    Returns:
+        dict: A map of lookup key (from _lookup_key) to object
+    """
+    unique_lookups = list({_lookup_key(lookup): lookup for lookup in lookups}.values())
+    if not unique_lookups:
+        return {}
+    objects = _find_existing(model, unique_lookups)
+    missing = [
+        lookup for lookup in unique_lookups if _lookup_key(lookup) not in objects
+    ]
+    if missing:
+        # with ignore_conflicts the primary keys aren't set, so the new objects are queried again,
+        # which also picks up objects with a unique name created by a concurrent load
+        model.objects.bulk_create(
+            [model(**lookup) for lookup in missing], ignore_conflicts=True
+        )
+        objects.update(_find_existing(model, missing))
+    return objects
+
+
+def _topic_lookup(topic_data):
+    """Lookup for a topic, same as load_topics"""
+    return {"name": topic_data["name"]}
+
+
+def _offered_by_lookup(offered_by_data):
+    """Lookup for an offeror, same as load_offered_bys"""
+    return {"name": offered_by_data["name"]}
+
+
+def _price_lookup(price_data):
+    """Lookup for a price, same as load_prices"""
+    return {
+        "price": price_data.get("price", ""),
+        "mode": price_data.get("mode", ""),
+        "upgrade_deadline": price_data.get("upgrade_deadline", None),
+    }
+
+
+def _instructor_lookup(instructor_data):
+    """Lookup for an instructor, same as load_instructors"""
+    return dict(instructor_data)
+
+
+def _diff_m2m_links(model, field_name, related_by_id, *, additive=False):
+    """
+    Update many-to-many links for a batch of objects, writing only the links which changed
+
+    Args:
+        model (type): The model class of the objects
+        field_name (str): The name of the many-to-many field
+        related_by_id (dict): A map of object id to the list of related objects it should have
+        additive (bool): If true, links which aren't in related_by_id are kept
+    """
+    field = model._meta.get_field(field_name)  # pylint: disable=protected-access
+    through = field.remote_field.through
+    source = f"{field.m2m_field_name()}_id"
+    target = f"{field.m2m_reverse_field_name()}_id"
+
+    existing = set()
+    for ids_chunk in chunks(list(related_by_id), chunk_size=QUERY_CHUNK_SIZE):
+        existing.update(
+            through.objects.filter(**{f"{source}__in": ids_chunk}).values_list(
+                source, target
+            )
+        )
+    wanted = {
+        (obj_id, related.id)
+        for obj_id, related_objects in related_by_id.items()
+        for related in related_objects
+    }
+
+    through.objects.bulk_create(
+        [
+            through(**{source: obj_id, target: related_id})
+            for obj_id, related_id in sorted(wanted - existing)
+        ],
+        ignore_conflicts=True,
+    )
+    if not additive:
+        stale_by_id = {}
+        for obj_id, related_id in existing - wanted:
+            stale_by_id.setdefault(obj_id, []).append(related_id)
+        if stale_by_id:
+            through.objects.filter(
+                reduce(
+                    or_,
+                    [
+                        Q(**{source: obj_id, f"{target}__in": related_ids})
+                        for obj_id, related_ids in stale_by_id.items()
+                    ],
+                )
+            ).delete()
+
+
+def _bulk_upsert(model, key_fields, rows):
+    """
+    Create or update objects for rows of field values, like update_or_create does for each row
+
+    Args:
+        model (type): The model class
+        key_fields (tuple of str): The fields identifying an object
+        rows (list of dict): Field values for each object
+
+    Returns:
+        (list, set): The objects in the same order as the rows, and the ids of the created objects
+    """
+    by_key = {tuple(row[field] for field in key_fields): row for row in rows}
+    existing = {}
+    for keys_chunk in chunks(list(by_key), chunk_size=QUERY_CHUNK_SIZE):
+        for obj in model.objects.filter(
+            reduce(or_, [Q(**dict(zip(key_fields, key))) for key in keys_chunk])
+        ):
+            existing[tuple(getattr(obj, field) for field in key_fields)] = obj
+
+    to_create = []
+    to_update = []
+    update_fields = {"updated_on"}
+    now = now_in_utc()
+    for key, row in by_key.items():
+        obj = existing.get(key)
+        if obj is None:
+            obj = model(**row)
+            to_create.append(obj)
+            existing[key] = obj
+        else:
+            for field, value in row.items():
+                setattr(obj, field, value)
+            # bulk_update doesn't set auto_now fields
+            obj.updated_on = now
+            update_fields.update(row)
+            to_update.append(obj)
+
+    # postgres returns the primary keys of created objects
+    model.objects.bulk_create(to_create, batch_size=QUERY_CHUNK_SIZE)
+    if to_update:
+        model.objects.bulk_update(
+            to_update,
+            sorted(update_fields - set(key_fields)),
+            batch_size=QUERY_CHUNK_SIZE,
+        )
+    return (
+        [existing[tuple(row[field] for field in key_fields)] for row in rows],
+        {obj.id for obj in to_create},
+    )
+
+
+def load_courses(courses_data, blacklist):
+    """
+    Load a batch of courses and their runs into the database
+
+    Courses are loaded the same way as load_course loads them one at a time, except for
+    courses which are listed as duplicates, which the caller still has to load with load_course.
+
+    Args:
+        courses_data (list of dict): The courses, without any listed as duplicates
+        blacklist (list of str): Blacklisted course ids
+
+    Returns:
+        list of Course: The loaded courses, in the same order as the data
+    """
+    # pylint: disable=too-many-locals
+    from course_catalog.etl.loaders import (
+        get_content_file_run_values,
+        load_content_files,
+    )
+
+    course_rows = []
+    course_relations = []
+    for course_data in courses_data:
+        course_data = dict(course_data)
+        course_relations.append(
+            {
+                "runs": course_data.pop("runs", []),
+                "topics": course_data.pop("topics", []),
+                "offered_by": course_data.pop("offered_by", []),
+            }
+        )
+        if course_data["course_id"] in blacklist:
+            course_data["published"] = False
+        course_rows.append(course_data)
+
+    courses, created_ids = _bulk_upsert(Course, ("platform", "course_id"), course_rows)
+
+    course_content_type = ContentType.objects.get_for_model(Course)
+    run_rows = []
+    run_relations = []
+    for course, relations in zip(courses, course_relations):
+        for run_data in relations["runs"]:
+            run_data = dict(run_data)
+            run_relations.append(
+                {
+                    "instructors": run_data.pop("instructors", []),
+                    "prices": run_data.pop("prices", []),
+                    "topics": run_data.pop("topics", []),
+                    "offered_by": run_data.pop("offered_by", []),
+                    "content_files": run_data.pop("content_files", []),
+                }
+            )
+            run_rows.append(
+                {
+                    **run_data,
+                    "object_id": course.id,
+                    "content_type": course_content_type,
+                }
+            )
+    run_keys = [(run_data["platform"], run_data["run_id"]) for run_data in run_rows]
+    run_values = get_content_file_run_values(run_keys)
+    runs, _ = _bulk_upsert(LearningResourceRun, ("platform", "run_id"), run_rows)
+
+    all_relations = course_relations + run_relations
+    topics = bulk_get_or_create(
+        CourseTopic,
+        [
+            _topic_lookup(topic_data)
+            for relations in all_relations
+            for topic_data in relations["topics"]
+        ],
+    )
+    offered_bys = bulk_get_or_create(
+        LearningResourceOfferor,
+        [
+            _offered_by_lookup(offered_by_data)
+            for relations in all_relations
+            for offered_by_data in relations["offered_by"]
+        ],
+    )
+    prices = bulk_get_or_create(
+        CoursePrice,
+        [
+            _price_lookup(price_data)
+            for relations in run_relations
+            for price_data in relations["prices"]
+        ],
+    )
+    instructors = bulk_get_or_create(
+        CourseInstructor,
+        [
+            _instructor_lookup(instructor_data)
+            for relations in run_relations
+            for instructor_data in relations["instructors"]
+        ],
+    )
+
+    def _related(lookup_func, objects, items_data):
+        """Get the objects for the data of related items"""
+        return [objects[_lookup_key(lookup_func(data))] for data in items_data]
+
+    for model, objects, relations_list in (
+        (Course, courses, course_relations),
+        (LearningResourceRun, runs, run_relations),
+    ):
+        # later data for the same object replaces earlier data, as with load_course
+        _diff_m2m_links(
+            model,
+            "topics",
+            {
+                obj.id: _related(_topic_lookup, topics, relations["topics"])
+                for obj, relations in zip(objects, relations_list)
+            },
+        )
+        _diff_m2m_links(
+            model,
+            "offered_by",
+            {
+                obj.id: _related(
+                    _offered_by_lookup, offered_bys, relations["offered_by"]
+                )
+                for obj, relations in zip(objects, relations_list)
+            },
+            additive=True,
+        )
+    _diff_m2m_links(
+        LearningResourceRun,
+        "prices",
+        {
+            run.id: _related(_price_lookup, prices, relations["prices"])
+            for run, relations in zip(runs, run_relations)
+        },
+    )
+    _diff_m2m_links(
+        LearningResourceRun,
+        "instructors",
+        {
+            run.id: _related(_instructor_lookup, instructors, relations["instructors"])
+            for run, relations in zip(runs, run_relations)
+        },
+    )
+
+    new_run_values = get_content_file_run_values(run_keys)
+    for run, relations in zip(runs, run_relations):
+        run_key = (run.platform, run.run_id)
+        load_content_files(
+            run,
+            relations["content_files"],
+            run_changed=run_values.get(run_key) != new_run_values.get(run_key),
+        )
+
+    for course in {course.id: course for course in courses}.values():
+        if course.id not in created_ids and not course.published:
+            search_task_helpers.delete_course(course)
+        elif course.published:
+            search_task_helpers.upsert_course(course.id)
+
+    return courses
@@ -0,0 +1,315 @@
+"""Tests for the bulk ETL loaders"""
+# pylint: disable=redefined-outer-name,unused-argument
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.forms.models import model_to_dict
+import pytest
+import pytz
+
+from course_catalog.constants import PlatformType
+from course_catalog.etl import loaders
+from course_catalog.etl.bulk_loaders import bulk_get_or_create, load_courses
+from course_catalog.factories import (
+    CourseFactory,
+    CourseInstructorFactory,
+    CoursePriceFactory,
+    CourseTopicFactory,
+    LearningResourceOfferorFactory,
+    LearningResourceRunFactory,
+)
+from course_catalog.models import (
+    Course,
+    CourseInstructor,
+    CoursePrice,
+    CourseTopic,
+    LearningResourceOfferor,
+    LearningResourceRun,
+)
+from open_discussions import features
+
+pytestmark = pytest.mark.django_db
+
+UPGRADE_DEADLINE = datetime(2020, 5, 1, tzinfo=pytz.utc)
+
+
+@pytest.fixture(autouse=True)
+def mock_upsert_tasks(mocker):
+    """Mock out the search task helpers"""
+    return SimpleNamespace(
+        upsert_course=mocker.patch("search.task_helpers.upsert_course"),
+        delete_course=mocker.patch("search.task_helpers.delete_course"),
+        index_run_content_files=mocker.patch(
+            "search.task_helpers.index_run_content_files"
+        ),
+        delete_run_content_files=mocker.patch(
+            "search.task_helpers.delete_run_content_files"
+        ),
+    )
+
+
+def _run_data(run_id, *, topics, prices, instructors, offered_by):
+    """Make the normalized data for a run"""
+    data = model_to_dict(
+        LearningResourceRunFactory.build(
+            run_id=run_id, platform=PlatformType.mitx.value
+        )
+    )
+    for key in ("id", "content_type", "object_id", "course"):
+        del data[key]
+    return {
+        **data,
+        "topics": [{"name": name} for name in topics],
+        "prices": [
+            {"price": price, "mode": "verified", "upgrade_deadline": UPGRADE_DEADLINE}
+            for price in prices
+        ],
+        "instructors": [{"full_name": name} for name in instructors],
+        "offered_by": [{"name": name} for name in offered_by],
+        "content_files": [],
+    }
+
+
+def _course_data(course_id, *, topics=(), offered_by=(), runs=()):
+    """Make the normalized data for a course"""
+    data = model_to_dict(
+        CourseFactory.build(course_id=course_id, platform=PlatformType.mitx.value)
+    )
+    del data["id"]
+    return {
+        **data,
+        "topics": [{"name": name} for name in topics],
+        "offered_by": [{"name": name} for name in offered_by],
+        "runs": list(runs),
+    }
+
+
+def _names(objects):
+    """Get the sorted names of topics or offerors"""
+    return sorted(obj.name for obj in objects.all())
+
+
+def test_load_courses(mock_upsert_tasks):
+    """load_courses should create the courses, runs and their related objects"""
+    courses_data = [
+        _course_data(
+            "course-1",
+            topics=["Math", "Physics"],
+            offered_by=["MITx"],
+            runs=[
+                _run_data(
+                    "run-1",
+                    topics=["Math"],
+                    prices=[Decimal("10.00"), Decimal("0.00")],
+                    instructors=["Ada Lovelace", "Alan Turing"],
+                    offered_by=["MITx"],
+                )
+            ],
+        ),
+        _course_data(
+            "course-2",
+            topics=["Math"],
+            runs=[
+                _run_data(
+                    "run-2",
+                    topics=[],
+                    prices=[Decimal("10.00")],
+                    instructors=["Ada Lovelace"],
+                    offered_by=[],
+                )
+            ],
+        ),
+    ]
+    courses = load_courses(courses_data, [])
+
+    assert [course.course_id for course in courses] == ["course-1", "course-2"]
+    assert CourseTopic.objects.count() == 2
+    assert CoursePrice.objects.count() == 2
+    assert CourseInstructor.objects.count() == 2
+    assert LearningResourceOfferor.objects.count() == 1
+
+    course = Course.objects.get(course_id="course-1")
+    assert course.title == courses_data[0]["title"]
+    assert _names(course.topics) == ["Math", "Physics"]
+    assert _names(course.offered_by) == ["MITx"]
+    run = course.runs.get()
+    assert run.run_id == "run-1"
+    assert run.title == courses_data[0]["runs"][0]["title"]
+    assert _names(run.topics) == ["Math"]
+    assert sorted(price.price for price in run.prices.all()) == [
+        Decimal("0.00"),
+        Decimal("10.00"),
+    ]
+    assert sorted(instructor.full_name for instructor in run.instructors.all()) == [
+        "Ada Lovelace",
+        "Alan Turing",
+    ]
+    assert Course.objects.get(course_id="course-2").runs.get().run_id == "run-2"
+    assert mock_upsert_tasks.upsert_course.call_count == 2
+
+
+def test_load_courses_update(mock_upsert_tasks):
+    """load_courses should update existing courses and runs and diff their links"""
+    course = CourseFactory.create(
+        course_id="course-1", platform=PlatformType.mitx.value, runs=None
+    )
+    run = LearningResourceRunFactory.create(
+        run_id="run-1", platform=PlatformType.mitx.value, content_object=course
+    )
+    stale_topic, kept_topic = CourseTopicFactory.create_batch(2)
+    course.topics.set([stale_topic, kept_topic])
+    other_offeror = LearningResourceOfferorFactory.create(name="Other")
+    course.offered_by.set([other_offeror])
+    price = CoursePriceFactory.create(
+        price=Decimal("10.00"), mode="verified", upgrade_deadline=UPGRADE_DEADLINE
+    )
+    instructor = CourseInstructorFactory.create(full_name="Ada Lovelace")
+    run.prices.set([price, CoursePriceFactory.create()])
+
+    courses_data = [
+        _course_data(
+            "course-1",
+            topics=[kept_topic.name, "New"],
+            offered_by=["MITx"],
+            runs=[
+                _run_data(
+                    "run-1",
+                    topics=[],
+                    prices=[10],
+                    instructors=["Ada Lovelace"],
+                    offered_by=[],
+                )
+            ],
+        )
+    ]
+    courses_data[0]["published"] = False
+
+    [loaded_course] = load_courses(courses_data, [])
+
+    assert loaded_course.id == course.id
+    course.refresh_from_db()
+    assert course.title == courses_data[0]["title"]
+    assert course.published is False
+    assert _names(course.topics) == sorted([kept_topic.name, "New"])
+    # offerors are only ever added
+    assert _names(course.offered_by) == ["MITx", "Other"]
+    run.refresh_from_db()
+    assert run.title == courses_data[0]["runs"][0]["title"]
+    assert list(run.prices.all()) == [price]
+    assert list(run.instructors.all()) == [instructor]
+    assert LearningResourceRun.objects.count() == 1
+    mock_upsert_tasks.delete_course.assert_called_once_with(loaded_course)
+    mock_upsert_tasks.upsert_course.assert_not_called()
+
+
+def test_load_courses_blacklist(mock_upsert_tasks):
+    """Blacklisted courses should be unpublished"""
+    [course] = load_courses([_course_data("course-1")], ["course-1"])
+    assert course.published is False
+    mock_upsert_tasks.upsert_course.assert_not_called()
+    mock_upsert_tasks.delete_course.assert_not_called()
+
+
+def test_load_courses_run_changed(mocker):
+    """load_courses should tell load_content_files which runs changed"""
+    mock_load_content_files = mocker.patch(
+        "course_catalog.etl.loaders.load_content_files", autospec=True
+    )
+    runs_data = [
+        _run_data(
+            f"run-{index}", topics=["Math"], prices=[], instructors=[], offered_by=[]
+        )
+        for index in range(3)
+    ]
+    load_courses([_course_data("course", runs=runs_data)], [])
+    assert [
+        call[1]["run_changed"] for call in mock_load_content_files.call_args_list
+    ] == [True, True, True]
+    mock_load_content_files.reset_mock()
+
+    runs_data[1] = {**runs_data[1], "title": "New title"}
+    runs_data[2] = {**runs_data[2], "topics": [{"name": "Physics"}]}
+    load_courses([_course_data("course", runs=runs_data)], [])
+    assert [
+        call[1]["run_changed"] for call in mock_load_content_files.call_args_list
+    ] == [False, True, True]
+
+
+def test_load_courses_num_queries(django_assert_max_num_queries):
+    """The number of queries should not depend on the number of courses"""
+    courses_data = [
+        _course_data(
+            f"course-{index}",
+            topics=[f"Topic {index}"],
+            offered_by=["MITx"],
+            runs=[
+                _run_data(
+                    f"run-{index}",
+                    topics=["Math"],
+                    prices=[index],
+                    instructors=[f"Instructor {index}"],
+                    offered_by=["MITx"],
+                )
+            ],
+        )
+        for index in range(20)
+    ]
+    load_courses(courses_data[:10], [])
+    with django_assert_max_num_queries(34):
+        load_courses(courses_data, [])
+    assert Course.objects.count() == 20
+
+
+def test_bulk_get_or_create():
+    """bulk_get_or_create should reuse existing objects and create the missing ones"""
+    existing = CourseTopicFactory.create(name="existing")
+    topics = bulk_get_or_create(
+        CourseTopic, [{"name": "existing"}, {"name": "new"}, {"name": "new"}]
+    )
+    assert topics[(("name", "existing"),)] == existing
+    assert topics[(("name", "new"),)].name == "new"
+    assert CourseTopic.objects.count() == 2
+
+
+@pytest.mark.parametrize("is_enabled", [True, False])
+def test_loaders_load_courses(mocker, settings, is_enabled):
+    """loaders.load_courses should use the bulk loader if the feature is enabled"""
+    settings.FEATURES[features.BULK_ETL_LOADERS] = is_enabled
+    mocker.patch("course_catalog.etl.loaders.load_course_blacklist", return_value=[])
+    mocker.patch(
+        "course_catalog.etl.loaders.load_course_duplicates",
+        return_value=[
+            {"course_id": "course-2", "duplicate_course_ids": ["course-2", "course-3"]}
+        ],
+    )
+    mock_load_course = mocker.patch(
+        "course_catalog.etl.loaders.load_course", autospec=True
+    )
+    mock_bulk_load_courses = mocker.patch(
+        "course_catalog.etl.bulk_loaders.load_courses",
+        return_value=["bulk course 1", "bulk course 4"],
+    )
+    courses_data = [
+        {"course_id": "course-1", "platform": "mitx"},
+        {"course_id": "course-2", "platform": "mitx"},
+        {"course_id": "course-3", "platform": "mitx"},
+        {"course_id": "course-4", "platform": "mitx"},
+    ]
+
+    result = loaders.load_courses(courses_data)
+
+    if is_enabled:
+        mock_bulk_load_courses.assert_called_once_with(
+            [courses_data[0], courses_data[3]], []
+        )
+        assert mock_load_course.call_count == 2
+        assert result == [
+            "bulk course 1",
+            mock_load_course.return_value,
+            mock_load_course.return_value,
+            "bulk course 4",
+        ]
+    else:
+        mock_bulk_load_courses.assert_not_called()
+        assert mock_load_course.call_count == 4
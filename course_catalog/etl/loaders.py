@@ -29,11 +29,15 @@ from course_catalog.models import (
 )
 from course_catalog.utils import load_course_blacklist, load_course_duplicates
 from course_catalog.etl.deduplication import get_most_relevant_run
+from open_discussions import features
+from open_discussions.utils import now_in_utc
 from search import task_helpers as search_task_helpers
 from search.constants import COURSE_TYPE
 
 log = logging.getLogger()
 
+CONTENT_FILE_BATCH_SIZE = 500
+
 User = get_user_model()
 
 
@@ -94,10 +98,52 @@ def load_offered_bys(resource, offered_bys_data):
     return offered_bys
 
 
+def _get_content_file_run_values(run):
+    """
+    Get the values of a run which are copied into the documents of its content files
+
+    Args:
+        run (LearningResourceRun): a course run, with its topics prefetched
+
+    Returns:
+        tuple: the values, including whether the run is published
+    """
+    return (
+        run.title,
+        run.semester,
+        run.year,
+        run.published,
+        frozenset(topic.name for topic in run.topics.all()),
+    )
+
+
+def get_content_file_run_values(run_keys):
+    """
+    Get the values of runs which are copied into the documents of their content files, so that
+    the whole run can be reindexed if they change when the run is loaded
+
+    Args:
+        run_keys (iterable of (str, str)): the platform and run id of each run
+
+    Returns:
+        dict: a map of (platform, run id) to the values of each run which exists
+    """
+    run_keys = set(run_keys)
+    return {
+        (run.platform, run.run_id): _get_content_file_run_values(run)
+        for run in LearningResourceRun.objects.filter(
+            run_id__in={run_id for _, run_id in run_keys}
+        ).prefetch_related("topics")
+        if (run.platform, run.run_id) in run_keys
+    }
+
+
 def load_run(learning_resource, course_run_data):
     """Load the course run into the database"""
     run_id = course_run_data.pop("run_id")
     platform = course_run_data.get("platform")
+    run_key = (platform, run_id)
+    run_values = get_content_file_run_values([run_key]).get(run_key)
     instructors_data = course_run_data.pop("instructors", [])
     prices_data = course_run_data.pop("prices", [])
     topics_data = course_run_data.pop("topics", [])
@@ -118,7 +164,10 @@ def load_run(learning_resource, course_run_data):
     load_prices(learning_resource_run, prices_data)
     load_instructors(learning_resource_run, instructors_data)
     load_offered_bys(learning_resource_run, offered_bys_data)
-    load_content_files(learning_resource_run, content_files)
+    new_run_values = get_content_file_run_values([run_key]).get(run_key)
+    load_content_files(
+        learning_resource_run, content_files, run_changed=run_values != new_run_values
+    )
 
     return learning_resource_run
 
@@ -201,6 +250,35 @@ def load_courses(courses_data):
     else:
         duplicates = []
 
+    if features.is_enabled(features.BULK_ETL_LOADERS):
+        from course_catalog.etl import bulk_loaders
+
+        duplicate_course_ids = {
+            course_id
+            for record in duplicates
+            for course_id in record["duplicate_course_ids"]
+        }
+        # courses listed as duplicates are merged into another course, which load_course handles
+        bulk_indexes = [
+            index
+            for index, course in enumerate(courses_list)
+            if course.get("course_id") not in duplicate_course_ids
+        ]
+        courses = dict(
+            zip(
+                bulk_indexes,
+                bulk_loaders.load_courses(
+                    [courses_list[index] for index in bulk_indexes], blacklist
+                ),
+            )
+        )
+        return [
+            courses[index]
+            if index in courses
+            else load_course(course, blacklist, duplicates)
+            for index, course in enumerate(courses_list)
+        ]
+
     return [load_course(course, blacklist, duplicates) for course in courses_list]
 
 
@@ -567,25 +645,162 @@ def load_content_file(course_run, content_file_data):
         )
 
 
-def load_content_files(course_run, content_files_json):
+def _upsert_content_files(course_run, content_files_data):
+    """
+    Create, update and delete the content files of a course run in bulk
+
+    Args:
+        course_run (LearningResourceRun): a course run
+        content_files_data (dict): A map of key to the data of each content file
+
+    Returns:
+        (list of ContentFile, list of int, list of str):
+            the content files, the ids of the ones which were created or changed,
+            and the keys of the ones which were deleted
+    """
+    existing = {
+        content_file.key: content_file
+        for content_file in ContentFile.objects.filter(run=course_run)
+    }
+    content_files = []
+    to_create = []
+    to_update = []
+    update_fields = set()
+    for key, content_file_data in content_files_data.items():
+        content_file = existing.get(key)
+        if content_file is None:
+            content_file = ContentFile(run=course_run, **content_file_data)
+            to_create.append(content_file)
+        else:
+            changed_fields = {
+                field
+                for field, value in content_file_data.items()
+                if getattr(content_file, field) != value
+            }
+            if changed_fields:
+                for field in changed_fields:
+                    setattr(content_file, field, content_file_data[field])
+                update_fields.update(changed_fields)
+                to_update.append(content_file)
+        content_files.append(content_file)
+    deleted_keys = [key for key in existing if key not in content_files_data]
+
+    with transaction.atomic():
+        # postgres returns the primary keys of created objects
+        ContentFile.objects.bulk_create(to_create, batch_size=CONTENT_FILE_BATCH_SIZE)
+        if to_update:
+            # bulk_update doesn't set auto_now fields
+            now = now_in_utc()
+            for content_file in to_update:
+                content_file.updated_on = now
+            ContentFile.objects.bulk_update(
+                to_update,
+                sorted(update_fields | {"updated_on"}),
+                batch_size=CONTENT_FILE_BATCH_SIZE,
+            )
+        if deleted_keys:
+            ContentFile.objects.filter(
+                id__in=[existing[key].id for key in deleted_keys]
+            ).delete()
+
+    return (
+        content_files,
+        [content_file.id for content_file in to_create + to_update],
+        deleted_keys,
+    )
+
+
+def _delete_stale_content_files(course_run, content_files_data):
+    """
+    Delete the content files of a course run which aren't in the loaded data anymore
+
+    Args:
+        course_run (LearningResourceRun): a course run
+        content_files_data (dict): A map of key to the data of each content file
+
+    Returns:
+        list of str: the keys of the content files which were deleted
+    """
+    stale = [
+        (content_file_id, key)
+        for content_file_id, key in ContentFile.objects.filter(
+            run=course_run
+        ).values_list("id", "key")
+        if key not in content_files_data
+    ]
+    if stale:
+        ContentFile.objects.filter(
+            id__in=[content_file_id for content_file_id, _ in stale]
+        ).delete()
+    return [key for _, key in stale]
+
+
+def load_content_files(course_run, content_files_json, *, run_changed=False):
     """
     Sync all content files for a course run to database and S3 if not present in DB
 
+    The content files are created, updated and deleted in bulk, and only the content files which
+    changed are reindexed, unless the run changed. Runs are also loaded without any content files,
+    which are then synced separately, so in that case the existing content files are kept and only
+    their index is updated.
+
     Args:
         course_run (LearningResourceRun): a course run
         content_files_json (dict): Details about the course run's content files
+        run_changed (bool):
+            true if the run was created, or if it was published or the run values which are
+            copied into content file documents changed, so every content file is reindexed
 
     Returns:
         list of ContentFile: ContentFile objects that were created/updated
 
     """
     if course_run.content_type and course_run.content_type.name == COURSE_TYPE:
-        content_files = [
-            load_content_file(course_run, content_file)
-            for content_file in content_files_json
-        ]
+        if not content_files_json:
+            if course_run.published:
+                search_task_helpers.index_run_content_files(course_run.id)
+            else:
+                search_task_helpers.delete_run_content_files(course_run.id)
+            return []
+
+        # the last file with a key wins, as it did when each file was saved in turn
+        content_files_data = {
+            content_file_data.get("key"): content_file_data
+            for content_file_data in content_files_json
+        }
+        try:
+            content_files, changed_ids, deleted_keys = _upsert_content_files(
+                course_run, content_files_data
+            )
+        except:  # pylint: disable=bare-except
+            log.exception(
+                "ERROR syncing course files in bulk for run %d, syncing them one by one",
+                course_run.id,
+            )
+            content_files = [
+                load_content_file(course_run, content_file_data)
+                for content_file_data in content_files_data.values()
+            ]
+            changed_ids = [
+                content_file.id
+                for content_file in content_files
+                if content_file is not None
+            ]
+            deleted_keys = _delete_stale_content_files(course_run, content_files_data)
+
         if course_run.published:
-            search_task_helpers.index_run_content_files(course_run.id)
+            if run_changed:
+                search_task_helpers.index_run_content_files(course_run.id)
+            elif changed_ids:
+                search_task_helpers.index_run_content_files(
+                    course_run.id, content_file_ids=changed_ids
+                )
+            if deleted_keys:
+                search_task_helpers.delete_run_content_files(
+                    course_run.id, keys=deleted_keys
+                )
         else:
-            search_task_helpers.delete_run_content_files(course_run.id)
+            search_task_helpers.delete_run_content_files(
+                course_run.id, keys=deleted_keys + list(content_files_data)
+            )
         return content_files
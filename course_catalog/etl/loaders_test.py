@@ -1,5 +1,5 @@
 """Tests for ETL loaders"""
-# pylint: disable=redefined-outer-name,too-many-locals
+# pylint: disable=redefined-outer-name,too-many-locals,too-many-lines
 from types import SimpleNamespace
 
 from django.contrib.contenttypes.models import ContentType
@@ -362,6 +362,60 @@ def test_load_run(run_exists):
         assert getattr(result, key) == value, f"Property {key} should equal {value}"
 
 
+@pytest.mark.parametrize(
+    "changes, run_changed",
+    [
+        [{}, False],
+        [{"title": "New title"}, True],
+        [{"published": False}, True],
+        [{"topics": [{"name": "New topic"}]}, True],
+    ],
+)
+def test_load_run_content_files_run_changed(mocker, changes, run_changed):
+    """load_run should tell load_content_files whether the run values in content file documents changed"""
+    mock_load_content_files = mocker.patch(
+        "course_catalog.etl.loaders.load_content_files", autospec=True
+    )
+    course = CourseFactory.create(runs=None)
+    run = LearningResourceRunFactory.create(
+        content_object=course, published=True, topics=[]
+    )
+    props = model_to_dict(
+        run,
+        exclude=[
+            "id",
+            "content_type",
+            "object_id",
+            "topics",
+            "prices",
+            "instructors",
+            "offered_by",
+        ],
+    )
+
+    load_run(course, {**props, "content_files": [{"key": "a"}], **changes})
+
+    mock_load_content_files.assert_called_once_with(
+        run, [{"key": "a"}], run_changed=run_changed
+    )
+
+
+def test_load_run_content_files_new_run(mocker):
+    """load_run should tell load_content_files that a new run changed"""
+    mock_load_content_files = mocker.patch(
+        "course_catalog.etl.loaders.load_content_files", autospec=True
+    )
+    course = CourseFactory.create(runs=None)
+    props = model_to_dict(
+        LearningResourceRunFactory.build(),
+        exclude=["id", "content_type", "object_id", "topics"],
+    )
+
+    run = load_run(course, props)
+
+    mock_load_content_files.assert_called_once_with(run, [], run_changed=True)
+
+
 @pytest.mark.parametrize(
     "parent_factory", [CourseFactory, ProgramFactory, LearningResourceRunFactory]
 )
@@ -824,26 +878,168 @@ def test_load_programs(mocker, mock_blacklist, mock_duplicates):
     mock_duplicates.assert_called_once_with("mitx")
 
 
+def _content_file_data(run, **kwargs):
+    """Make the data for a content file like the OCW transform does"""
+    data = model_to_dict(ContentFileFactory.build(run=run, **kwargs))
+    data.pop("run")
+    data.pop("id")
+    return data
+
+
+@pytest.fixture
+def mock_content_file_tasks(mocker):
+    """Mock the search task helpers for content files"""
+    return SimpleNamespace(
+        index=mocker.patch(
+            "course_catalog.etl.loaders.search_task_helpers.index_run_content_files",
+            autospec=True,
+        ),
+        delete=mocker.patch(
+            "course_catalog.etl.loaders.search_task_helpers.delete_run_content_files",
+            autospec=True,
+        ),
+    )
+
+
 @pytest.mark.parametrize("is_published", [True, False])
-def test_load_content_files(mocker, is_published):
-    """Test that load_content_files calls the expected functions"""
+def test_load_content_files(mock_content_file_tasks, is_published):
+    """load_content_files should create, update and delete the content files of the run"""
     course_run = LearningResourceRunFactory.create(published=is_published)
-    content_data = [{"a": "b"}, {"a": "c"}]
-    mock_load_content_file = mocker.patch(
-        "course_catalog.etl.loaders.load_content_file", autospec=True
+    unchanged, changed, stale = ContentFileFactory.create_batch(3, run=course_run)
+    other_run_file = ContentFileFactory.create()
+    content_data = [
+        _content_file_data(course_run, key="new"),
+        {**model_to_dict(unchanged, exclude=["id", "run"])},
+        {**model_to_dict(changed, exclude=["id", "run"]), "title": "Changed"},
+    ]
+
+    content_files = load_content_files(course_run, content_data)
+
+    new = ContentFile.objects.get(run=course_run, key="new")
+    assert content_files == [new, unchanged, changed]
+    assert sorted(course_run.content_files.values_list("key", flat=True)) == sorted(
+        [new.key, unchanged.key, changed.key]
     )
-    mock_bulk_index = mocker.patch(
-        "course_catalog.etl.loaders.search_task_helpers.index_run_content_files",
+    changed.refresh_from_db()
+    assert changed.title == "Changed"
+    assert ContentFile.objects.filter(id=other_run_file.id).exists()
+    assert not ContentFile.objects.filter(id=stale.id).exists()
+    if is_published:
+        mock_content_file_tasks.index.assert_called_once_with(
+            course_run.id, content_file_ids=[new.id, changed.id]
+        )
+        mock_content_file_tasks.delete.assert_called_once_with(
+            course_run.id, keys=[stale.key]
+        )
+    else:
+        mock_content_file_tasks.index.assert_not_called()
+        mock_content_file_tasks.delete.assert_called_once_with(
+            course_run.id, keys=[stale.key, new.key, unchanged.key, changed.key]
+        )
+
+
+def test_load_content_files_run_changed(mock_content_file_tasks):
+    """load_content_files should reindex every content file of a run which changed"""
+    course_run = LearningResourceRunFactory.create(published=True)
+    content_files = ContentFileFactory.create_batch(2, run=course_run)
+    content_data = [
+        model_to_dict(content_file, exclude=["id", "run"])
+        for content_file in content_files
+    ]
+
+    load_content_files(course_run, content_data, run_changed=True)
+
+    mock_content_file_tasks.index.assert_called_once_with(course_run.id)
+    mock_content_file_tasks.delete.assert_not_called()
+
+
+def test_load_content_files_unchanged(mock_content_file_tasks):
+    """load_content_files should not write or reindex content files which didn't change"""
+    course_run = LearningResourceRunFactory.create(published=True)
+    content_files = ContentFileFactory.create_batch(3, run=course_run)
+    content_data = [
+        model_to_dict(content_file, exclude=["id", "run"])
+        for content_file in content_files
+    ]
+
+    assert load_content_files(course_run, content_data) == content_files
+
+    mock_content_file_tasks.index.assert_not_called()
+    mock_content_file_tasks.delete.assert_not_called()
+
+
+@pytest.mark.usefixtures("mock_content_file_tasks")
+def test_load_content_files_num_queries(django_assert_max_num_queries):
+    """The number of queries should not depend on the number of content files"""
+    course_run = LearningResourceRunFactory.create(published=True)
+    existing = ContentFileFactory.create_batch(10, run=course_run)
+    content_data = [
+        {**model_to_dict(content_file, exclude=["id", "run"]), "title": "Changed"}
+        for content_file in existing[:5]
+    ] + [_content_file_data(course_run, key=f"new-{index}") for index in range(10)]
+
+    with django_assert_max_num_queries(8):
+        load_content_files(course_run, content_data)
+
+    assert course_run.content_files.count() == 15
+    assert course_run.content_files.filter(title="Changed").count() == 5
+
+
+@pytest.mark.parametrize("is_published", [True, False])
+def test_load_content_files_empty(mock_content_file_tasks, is_published):
+    """load_content_files should keep the content files of a run loaded without any"""
+    course_run = LearningResourceRunFactory.create(published=is_published)
+    content_file = ContentFileFactory.create(run=course_run)
+
+    assert load_content_files(course_run, []) == []
+
+    assert list(course_run.content_files.all()) == [content_file]
+    if is_published:
+        mock_content_file_tasks.index.assert_called_once_with(course_run.id)
+        mock_content_file_tasks.delete.assert_not_called()
+    else:
+        mock_content_file_tasks.index.assert_not_called()
+        mock_content_file_tasks.delete.assert_called_once_with(course_run.id)
+
+
+@pytest.mark.parametrize("is_published", [True, False])
+def test_load_content_files_error(mocker, mock_content_file_tasks, is_published):
+    """If the bulk upsert fails, the content files should be synced one by one and stale ones deleted"""
+    course_run = LearningResourceRunFactory.create(published=is_published)
+    kept = ContentFileFactory.create(run=course_run, key="b")
+    stale = ContentFileFactory.create(run=course_run, key="stale")
+    other_run_file = ContentFileFactory.create(key="other")
+    content_data = [{"key": "a", "bad": "data"}, {"key": "b"}]
+    mock_log = mocker.patch("course_catalog.etl.loaders.log.exception")
+    mocker.patch(
+        "course_catalog.etl.loaders._upsert_content_files",
         autospec=True,
+        side_effect=ValueError,
     )
-    mock_bulk_delete = mocker.patch(
-        "course_catalog.etl.loaders.search_task_helpers.delete_run_content_files",
+    mock_load_content_file = mocker.patch(
+        "course_catalog.etl.loaders.load_content_file",
         autospec=True,
+        side_effect=[None, kept],
     )
+
     load_content_files(course_run, content_data)
+
+    mock_log.assert_called_once()
     assert mock_load_content_file.call_count == len(content_data)
-    assert mock_bulk_index.call_count == (1 if is_published else 0)
-    assert mock_bulk_delete.call_count == (0 if is_published else 1)
+    assert list(course_run.content_files.all()) == [kept]
+    assert ContentFile.objects.filter(id=other_run_file.id).exists()
+    if is_published:
+        mock_content_file_tasks.index.assert_called_once_with(
+            course_run.id, content_file_ids=[kept.id]
+        )
+        mock_content_file_tasks.delete.assert_called_once_with(
+            course_run.id, keys=[stale.key]
+        )
+    else:
+        mock_content_file_tasks.index.assert_not_called()
+        mock_content_file_tasks.delete.assert_called_once_with(
+            course_run.id, keys=[stale.key, "a", "b"]
+        )
 
 
 def test_load_content_file():
@@ -1,4 +1,5 @@
 """OCW course catalog ETL"""
+from concurrent.futures import ThreadPoolExecutor
 import copy
 import logging
 import mimetypes
@@ -6,6 +7,7 @@ from os.path import splitext
 from urllib.parse import urlparse, urljoin
 
 import boto3
+from botocore.config import Config
 import rapidjson
 from django.conf import settings
 
@@ -14,7 +16,7 @@ from course_catalog.constants import (
     CONTENT_TYPE_FILE,
     VALID_TEXT_FILE_TYPES,
 )
-from course_catalog.etl.utils import extract_text_metadata, sync_s3_text
+from course_catalog.etl.utils import extract_text_metadata_cached, sync_s3_text
 from course_catalog.models import ContentFile, get_max_length
 from open_discussions.utils import extract_values
 
@@ -32,6 +34,8 @@ def get_ocw_learning_course_bucket():
         "s3",
         aws_access_key_id=settings.OCW_LEARNING_COURSE_ACCESS_KEY,
         aws_secret_access_key=settings.OCW_LEARNING_COURSE_SECRET_ACCESS_KEY,
+        # one pooled connection per thread fetching master json files
+        config=Config(max_pool_connections=settings.OCW_S3_FETCH_WORKERS),
     )
     return s3.Bucket(name=settings.OCW_LEARNING_COURSE_BUCKET_NAME)
 
@@ -52,37 +56,67 @@ def transform_content_files(course_run_json):
     )
     json_course_pages = course_run_json.get("course_pages", [])
 
+    # ocw-data_parser only uploads pages with text
+    items = [(course_file, CONTENT_TYPE_FILE) for course_file in json_course_files] + [
+        (course_page, CONTENT_TYPE_PAGE)
+        for course_page in json_course_pages
+        if course_page.get("text", None) is not None
+    ]
+    # look up when the text of each file was last updated here, so the workers don't query it
+    updated_on_by_key = dict(
+        ContentFile.objects.filter(
+            key__in=[get_content_file_key(item) for item, _ in items]
+        ).values_list("key", "updated_on")
+    )
+    bucket = get_ocw_learning_course_bucket()
+
     content_files = []
-    for course_file in json_course_files:
-        try:
-            content_files.append(
-                transform_content_file(course_run_json, course_file, CONTENT_TYPE_FILE)
-            )
-        except:  # pylint: disable=bare-except
-            log.exception(
-                "ERROR syncing course file %s for run %s",
-                course_file.get("uid", ""),
-                course_run_json.get("uid", ""),
-            )
-    for course_page in json_course_pages:
-        # ocw-data_parser only uploads pages with text
-        if course_page.get("text", None) is None:
-            continue
-        try:
-            content_files.append(
-                transform_content_file(course_run_json, course_page, CONTENT_TYPE_PAGE)
-            )
-        except:  # pylint: disable=bare-except
-            log.exception(
-                "ERROR syncing course page %s for run %s",
-                course_page.get("uid", ""),
-                course_run_json.get("uid", ""),
+    with ThreadPoolExecutor(max_workers=settings.TIKA_EXTRACT_WORKERS) as executor:
+        futures = [
+            executor.submit(
+                transform_content_file,
+                course_run_json,
+                item,
+                content_type,
+                bucket=bucket,
+                updated_on_by_key=updated_on_by_key,
             )
+            for item, content_type in items
+        ]
+        for (item, content_type), future in zip(items, futures):
+            try:
+                content_files.append(future.result())
+            except:  # pylint: disable=bare-except
+                log.exception(
+                    "ERROR syncing course file %s for run %s"
+                    if content_type == CONTENT_TYPE_FILE
+                    else "ERROR syncing course page %s for run %s",
+                    item.get("uid", ""),
+                    course_run_json.get("uid", ""),
+                )
     return [content_file for content_file in content_files if content_file is not None]
 
 
+def get_content_file_key(content_file_data):
+    """
+    Get the S3 key of a course file or page
+
+    Args:
+        content_file_data (dict): the content_file json
+
+    Returns:
+        str: the S3 key
+    """
+    return urlparse(content_file_data.get("file_location", "")).path.lstrip("/")
+
+
 def transform_content_file(
-    course_run_json, content_file_data, content_type
+    course_run_json,
+    content_file_data,
+    content_type,
+    *,
+    bucket=None,
+    updated_on_by_key=None,
 ):  # pylint: disable=too-many-locals
     """
     Transforms content file json based on parent course run master_json
@@ -91,6 +125,9 @@ def transform_content_file(
         course_run_json (dict): course run master_json
         content_file_data (dict): the content_file json
         content_type (str): file or page
+        bucket (s3.Bucket): the OCW learning course bucket, if it was already created
+        updated_on_by_key (dict): a map of key to when the ContentFile was last updated, if it was
+            already looked up
 
     Returns:
         dict: transformed content_file json
@@ -106,28 +143,31 @@ def transform_content_file(
         content_file, course_run_json.get("course_pages", [])
     )
 
-    s3_url = content_file.get("file_location", "")
-    key = urlparse(s3_url).path.lstrip("/")
+    key = get_content_file_key(content_file)
     content_file["key"] = key
     ext_lower = splitext(key)[-1].lower()
     mime_type = mimetypes.types_map.get(ext_lower)
     if ext_lower in VALID_TEXT_FILE_TYPES:
         try:
-            bucket = get_ocw_learning_course_bucket()
+            if bucket is None:
+                bucket = get_ocw_learning_course_bucket()
             s3_obj = bucket.Object(key).get()
-            course_file_obj = ContentFile.objects.filter(key=key).first()
-
-            needs_text_update = course_file_obj is None or (
-                s3_obj is not None
-                and s3_obj["LastModified"] >= course_file_obj.updated_on
+            if updated_on_by_key is None:
+                course_file_obj = ContentFile.objects.filter(key=key).first()
+                updated_on = course_file_obj.updated_on if course_file_obj else None
+            else:
+                updated_on = updated_on_by_key.get(key)
+
+            needs_text_update = updated_on is None or (
+                s3_obj is not None and s3_obj["LastModified"] >= updated_on
             )
 
             if needs_text_update:
                 s3_body = s3_obj.get("Body") if s3_obj else None
                 if s3_body:
-                    content_json = extract_text_metadata(
-                        s3_body,
-                        other_headers={"Content-Type": mime_type} if mime_type else {},
+                    # text which was extracted before is read from the cache instead of tika
+                    content_json = extract_text_metadata_cached(
+                        s3_body.read(), mime_type=mime_type, bucket=bucket
                     )
                     sync_s3_text(bucket, key, content_json)
 
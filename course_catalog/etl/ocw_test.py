@@ -20,6 +20,7 @@ from course_catalog.etl.ocw import (
     transform_content_file,
     get_content_file_section,
 )
+from course_catalog.factories import ContentFileFactory
 
 OCW_COURSE_JSON = {
     "uid": "0007de9b4a0cd7c298d822b4123c2eaf",
@@ -158,7 +159,7 @@ FOREIGN_FILES = OCW_COURSE_JSON["course_foreign_files"]
 def mock_tika_functions(mocker):
     """ Mock tika-related functions"""
     mock_extract_text = mocker.patch(
-        "course_catalog.etl.ocw.extract_text_metadata",
+        "course_catalog.etl.ocw.extract_text_metadata_cached",
         return_value={
             "metadata": {
                 "Author": "Test Author",
@@ -208,12 +209,11 @@ def test_transform_content_files(mock_tika_functions, mocker):
     assert len(transformed_files) == len(all_inputs)
     assert mock_tika_functions.mock_extract_text.call_count == len(text_inputs)
     mock_tika_functions.mock_extract_text.assert_any_call(
-        mocker.ANY,
-        other_headers={
-            "Content-Type": mimetypes.types_map.get(
-                splitext(file_inputs[0]["file_location"])[-1]
-            )
-        },
+        b"fake text",
+        mime_type=mimetypes.types_map.get(
+            splitext(file_inputs[0]["file_location"])[-1]
+        ),
+        bucket=mocker.ANY,
     )
     assert mock_tika_functions.mock_sync_text.call_count == len(text_inputs)
 
@@ -224,6 +224,19 @@ def test_transform_content_files(mock_tika_functions, mocker):
     mock_exception_log.assert_not_called()
 
 
+@pytest.mark.django_db
+def test_transform_content_files_unchanged(mock_tika_functions):
+    """Text should not be extracted again for files which weren't modified since they were loaded"""
+    for course_file in COURSE_FILES + FOREIGN_FILES + COURSE_PAGES:
+        ContentFileFactory.create(
+            key=urlparse(course_file["file_location"]).path.lstrip("/")
+        )
+
+    transform_content_files(OCW_COURSE_JSON)
+
+    mock_tika_functions.mock_extract_text.assert_not_called()
+
+
 @pytest.mark.django_db
 def test_transform_content_files_error(mocker):
     """ Verify that errors are logged when transforming content files """
@@ -250,7 +263,9 @@ def test_transform_content_files_error(mocker):
 @pytest.mark.django_db
 def test_transform_content_files_generic_s3_error(mocker):
     """ Verify that ex eptions are logged when extracting text from content files  """
-    mocker.patch("course_catalog.etl.ocw.extract_text_metadata", side_effect=Exception)
+    mocker.patch(
+        "course_catalog.etl.ocw.extract_text_metadata_cached", side_effect=Exception
+    )
     mock_exception_log = mocker.patch("course_catalog.etl.ocw.log.exception")
     transform_content_files(OCW_COURSE_JSON)
 
@@ -1,11 +1,15 @@
 """Utility functions for ETL processes"""
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import json
 import re
 from datetime import datetime
 from functools import wraps
 import logging
+from urllib.parse import quote
 import uuid
 
+from botocore.exceptions import ClientError
 import rapidjson
 
 import pytz
@@ -15,6 +19,8 @@ from toolz import excepts
 
 log = logging.getLogger()
 
+EXTRACTS_CACHE_PREFIX = "extracts/sha256"
+
 
 def log_exceptions(msg, *, exc_return_value=None):
     """
@@ -95,6 +101,90 @@ def extract_text_metadata(data, *, other_headers=None):
     return tika_parser.from_buffer(data, requestOptions=request_options)
 
 
+def get_extract_cache_key(data, mime_type):
+    """
+    Get the S3 key of the cached tika output for file data, which is addressed by its contents
+
+    Args:
+        data (bytes or str): File contents
+        mime_type (str): The mime type the data is sent to tika with, or None
+
+    Returns:
+        str: The S3 key
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    return (
+        f"{EXTRACTS_CACHE_PREFIX}/{digest}/{quote(mime_type or 'none', safe='')}.json"
+    )
+
+
+def extract_text_metadata_cached(data, *, mime_type=None, bucket=None):
+    """
+    Use tika to extract text content from file data, unless the same data was extracted before
+
+    Tika output is saved to the bucket under a key made from the SHA-256 of the data and the mime
+    type, so documents which haven't changed are never sent to tika again. The cache is best
+    effort: errors reading or writing it are logged and the data is sent to tika as usual.
+
+    Args:
+        data (bytes or str): File contents
+        mime_type (str): The mime type to send to tika, or None
+        bucket (s3.Bucket): The bucket to cache tika output in, or None to not cache it
+
+    Returns:
+         dict: metadata returned by tika, including content
+    """
+    if not data:
+        return None
+    other_headers = {"Content-Type": mime_type} if mime_type else {}
+    if bucket is None:
+        return extract_text_metadata(data, other_headers=other_headers)
+
+    cache_key = get_extract_cache_key(data, mime_type)
+    try:
+        return rapidjson.load(bucket.Object(cache_key).get()["Body"])
+    except ClientError as exc:
+        if exc.response["Error"]["Code"] != "NoSuchKey":
+            log.exception("Error reading cached tika output %s", cache_key)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Error reading cached tika output %s", cache_key)
+
+    content_meta = extract_text_metadata(data, other_headers=other_headers)
+    if content_meta:
+        try:
+            bucket.put_object(Key=cache_key, Body=rapidjson.dumps(content_meta))
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Error caching tika output %s", cache_key)
+    return content_meta
+
+
+def extract_text_metadata_concurrently(documents, *, bucket=None):
+    """
+    Extract text content from documents with up to TIKA_EXTRACT_WORKERS concurrent tika requests,
+    using the cached tika output of documents which were extracted before
+
+    Args:
+        documents (list of (bytes or str, str)): The contents and mime type of each document
+        bucket (s3.Bucket): The bucket to cache tika output in, or None to not cache it
+
+    Returns:
+        list of dict: metadata returned by tika for each document, in the same order
+    """
+
+    def _extract(document):
+        """Extract one document"""
+        data, mime_type = document
+        return extract_text_metadata_cached(data, mime_type=mime_type, bucket=bucket)
+
+    workers = min(settings.TIKA_EXTRACT_WORKERS, len(documents))
+    if workers <= 1:
+        return [_extract(document) for document in documents]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_extract, documents))
+
+
 def generate_unique_id(text):
     """
     Generate a unique UUID based on a string
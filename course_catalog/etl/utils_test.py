@@ -2,6 +2,7 @@
 import datetime
 import json
 
+from botocore.exceptions import ClientError
 import pytest
 import pytz
 
@@ -9,7 +10,10 @@ from course_catalog.etl.utils import (
     log_exceptions,
     sync_s3_text,
     extract_text_metadata,
+    extract_text_metadata_cached,
+    extract_text_metadata_concurrently,
     generate_unique_id,
+    get_extract_cache_key,
     strip_extra_whitespace,
     parse_dates,
     map_topics,
@@ -87,6 +91,121 @@ def test_extract_text_metadata(mocker, data, token, settings, headers):
         mock_tika.assert_not_called()
 
 
+def test_get_extract_cache_key():
+    """The cache key should depend on the contents and the mime type"""
+    key = get_extract_cache_key(b"data", "application/pdf")
+    assert key == (
+        "extracts/sha256/"
+        "3a6eb0790f39ac87c94f3856b2dd2c5d110e6811602261a9a923d3bb23adc8b7/"
+        "application%2Fpdf.json"
+    )
+    assert get_extract_cache_key("data", "application/pdf") == key
+    assert get_extract_cache_key(b"data", None) != key
+    assert get_extract_cache_key(b"other data", "application/pdf") != key
+
+
+@pytest.mark.parametrize("mime_type", ["application/pdf", None])
+def test_extract_text_metadata_cached(mocker, mock_ocw_learning_bucket, mime_type):
+    """Tika should only be called for data which hasn't been extracted before"""
+    mock_response = {"metadata": {"Author": "MIT"}, "content": "Extracted text"}
+    mock_extract = mocker.patch(
+        "course_catalog.etl.utils.extract_text_metadata", return_value=mock_response
+    )
+    bucket = mock_ocw_learning_bucket.bucket
+
+    for _ in range(2):
+        assert (
+            extract_text_metadata_cached(b"data", mime_type=mime_type, bucket=bucket)
+            == mock_response
+        )
+    mock_extract.assert_called_once_with(
+        b"data", other_headers={"Content-Type": mime_type} if mime_type else {}
+    )
+    assert (
+        json.loads(
+            bucket.Object(get_extract_cache_key(b"data", mime_type))
+            .get()["Body"]
+            .read()
+        )
+        == mock_response
+    )
+
+    extract_text_metadata_cached(b"changed data", mime_type=mime_type, bucket=bucket)
+    assert mock_extract.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "read_error",
+    [
+        ClientError({"Error": {"Code": "403", "Message": "Forbidden"}}, "GetObject"),
+        ValueError("invalid json"),
+    ],
+)
+def test_extract_text_metadata_cached_errors(mocker, read_error):
+    """Errors reading or writing the cache should be logged and the tika output returned"""
+    mock_log = mocker.patch("course_catalog.etl.utils.log")
+    mock_extract = mocker.patch("course_catalog.etl.utils.extract_text_metadata")
+    bucket = mocker.Mock()
+    bucket.Object.return_value.get.side_effect = read_error
+    bucket.put_object.side_effect = ClientError(
+        {"Error": {"Code": "403", "Message": "Forbidden"}}, "PutObject"
+    )
+
+    assert (
+        extract_text_metadata_cached(b"data", mime_type="text/html", bucket=bucket)
+        == mock_extract.return_value
+    )
+    mock_extract.assert_called_once_with(
+        b"data", other_headers={"Content-Type": "text/html"}
+    )
+    assert bucket.put_object.call_count == 1
+    assert mock_log.exception.call_count == 2
+
+
+@pytest.mark.parametrize("data", [b"", None])
+def test_extract_text_metadata_cached_no_data(mocker, mock_ocw_learning_bucket, data):
+    """No data should be neither extracted nor cached"""
+    mock_extract = mocker.patch("course_catalog.etl.utils.extract_text_metadata")
+    assert (
+        extract_text_metadata_cached(data, bucket=mock_ocw_learning_bucket.bucket)
+        is None
+    )
+    mock_extract.assert_not_called()
+
+
+def test_extract_text_metadata_cached_no_bucket(mocker):
+    """Without a bucket, the data should always be sent to tika"""
+    mock_extract = mocker.patch("course_catalog.etl.utils.extract_text_metadata")
+    assert (
+        extract_text_metadata_cached(b"data", mime_type="text/html")
+        == mock_extract.return_value
+    )
+    mock_extract.assert_called_once_with(
+        b"data", other_headers={"Content-Type": "text/html"}
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_extract_text_metadata_concurrently(mocker, settings, workers):
+    """extract_text_metadata_concurrently should extract each document in order"""
+    settings.TIKA_EXTRACT_WORKERS = workers
+    bucket = mocker.Mock()
+    mock_extract = mocker.patch(
+        "course_catalog.etl.utils.extract_text_metadata_cached",
+        side_effect=lambda data, mime_type, bucket: {
+            "content": data,
+            "type": mime_type,
+        },
+    )
+    documents = [(f"doc {index}", "text/html") for index in range(5)]
+
+    assert extract_text_metadata_concurrently(documents, bucket=bucket) == [
+        {"content": data, "type": mime_type} for data, mime_type in documents
+    ]
+    for data, mime_type in documents:
+        mock_extract.assert_any_call(data, mime_type=mime_type, bucket=bucket)
+
+
 @pytest.mark.parametrize(
     "url,uuid",
     [
@@ -21,7 +21,7 @@ from course_catalog.constants import (
     PlatformType,
     VALID_TEXT_FILE_TYPES,
 )
-from course_catalog.etl.utils import extract_text_metadata, log_exceptions
+from course_catalog.etl.utils import extract_text_metadata_concurrently, log_exceptions
 from course_catalog.models import get_max_length
 
 
@@ -211,13 +211,15 @@ def transform_content_files(course_tarpath):
     with TemporaryDirectory() as inner_tempdir:
         check_call(["tar", "xf", course_tarpath], cwd=inner_tempdir)
         olx_path = glob.glob(inner_tempdir + "/*")[0]
-        for document, metadata in documents_from_olx(olx_path):
+        documents = documents_from_olx(olx_path)
+        # documents which were extracted in an earlier export are read from the cache
+        tika_outputs = extract_text_metadata_concurrently(
+            [(document, metadata.get("mime_type")) for document, metadata in documents],
+            bucket=get_xpro_learning_course_bucket(),
+        )
+        for (_, metadata), tika_output in zip(documents, tika_outputs):
             key = metadata["key"]
             content_type = metadata["content_type"]
-            mime_type = metadata.get("mime_type")
-            tika_output = extract_text_metadata(
-                document, other_headers={"Content-Type": mime_type} if mime_type else {}
-            )
 
             if tika_output is None:
                 log.info("No tika response for %s", key)
@@ -241,7 +241,8 @@ def test_transform_content_files(mocker, has_metadata):
         return_value=[(document, {"key": key, "content_type": content_type})],
     )
     extract_mock = mocker.patch(
-        "course_catalog.etl.xpro.extract_text_metadata", return_value=tika_output
+        "course_catalog.etl.xpro.extract_text_metadata_concurrently",
+        return_value=[tika_output],
     )
 
     script_dir = os.path.dirname(
@@ -260,7 +261,7 @@ def test_transform_content_files(mocker, has_metadata):
             "content_type": content_type,
         }
     ]
-    extract_mock.assert_called_once_with(document, other_headers={})
+    extract_mock.assert_called_once_with([(document, None)], bucket=mocker.ANY)
     assert documents_mock.called is True
 
 
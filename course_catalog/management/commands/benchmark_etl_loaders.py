@@ -0,0 +1,132 @@
+"""Management command to compare the per-course and bulk ETL course loaders"""
+import copy
+from datetime import timedelta
+import time
+from unittest.mock import patch
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from course_catalog.constants import PlatformType
+from course_catalog.etl import bulk_loaders, loaders
+from open_discussions.utils import now_in_utc
+from search import task_helpers as search_task_helpers
+
+BENCHMARK_PLATFORM = "benchmark"
+
+
+def _make_courses_data(num_courses, num_runs):
+    """
+    Make normalized course data shaped like the output of the MITx and xPRO transforms
+
+    Args:
+        num_courses (int): The number of courses
+        num_runs (int): The number of runs per course
+
+    Returns:
+        list of dict: The course data
+    """
+    start_date = now_in_utc()
+    return [
+        {
+            "course_id": f"benchmark-course-{course_index}",
+            "platform": BENCHMARK_PLATFORM,
+            "title": f"Benchmark course {course_index}",
+            "short_description": "A course loaded by the ETL loader benchmark",
+            "published": True,
+            "topics": [{"name": f"Benchmark topic {course_index % 25}"}],
+            "offered_by": [{"name": PlatformType.mitx.value}],
+            "runs": [
+                {
+                    "run_id": f"benchmark-course-{course_index}-run-{run_index}",
+                    "platform": BENCHMARK_PLATFORM,
+                    "title": f"Benchmark course {course_index}",
+                    "start_date": start_date + timedelta(days=run_index * 90),
+                    "published": True,
+                    "topics": [{"name": f"Benchmark topic {course_index % 25}"}],
+                    "offered_by": [{"name": PlatformType.mitx.value}],
+                    "prices": [
+                        {"price": "0.00", "mode": "audit"},
+                        {"price": f"{50 + run_index * 25}.00", "mode": "verified"},
+                    ],
+                    "instructors": [
+                        {"full_name": f"Benchmark instructor {course_index % 50}"},
+                        {"full_name": f"Benchmark instructor {run_index}"},
+                    ],
+                }
+                for run_index in range(num_runs)
+            ],
+        }
+        for course_index in range(num_courses)
+    ]
+
+
+def _per_course_load(courses_data):
+    """Load courses one at a time, as load_courses does without the bulk loader"""
+    return [loaders.load_course(course_data, [], []) for course_data in courses_data]
+
+
+def _bulk_load(courses_data):
+    """Load courses with the bulk loader"""
+    return bulk_loaders.load_courses(courses_data, [])
+
+
+def _measure(load, courses_data):
+    """
+    Measure the queries and wall time of a load
+
+    Args:
+        load (callable): The loader function
+        courses_data (list of dict): The course data, which is copied since loaders modify it
+
+    Returns:
+        (int, float): The number of queries and the number of seconds
+    """
+    courses_data = copy.deepcopy(courses_data)
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        load(courses_data)
+        elapsed = time.perf_counter() - start
+    return len(queries), elapsed
+
+
+class Command(BaseCommand):
+    """Compares the per-course and bulk ETL course loaders"""
+
+    help = "Compare query counts and wall time of the per-course and bulk ETL course loaders"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--courses",
+            dest="courses",
+            type=int,
+            default=200,
+            help="The number of courses to load",
+        )
+        parser.add_argument(
+            "--runs",
+            dest="runs",
+            type=int,
+            default=3,
+            help="The number of runs per course",
+        )
+
+    def handle(self, *args, **options):
+        courses_data = _make_courses_data(options["courses"], options["runs"])
+        # the benchmark data is never indexed, and every load is rolled back
+        with patch.object(search_task_helpers, "upsert_course"), patch.object(
+            search_task_helpers, "delete_course"
+        ), patch.object(search_task_helpers, "index_run_content_files"), patch.object(
+            search_task_helpers, "delete_run_content_files"
+        ):
+            for name, load in [("per-course", _per_course_load), ("bulk", _bulk_load)]:
+                with transaction.atomic():
+                    # the first load creates everything, the second one updates it
+                    for phase in ("create", "update"):
+                        num_queries, elapsed = _measure(load, courses_data)
+                        self.stdout.write(
+                            f"{name} loader, {phase}: {len(courses_data)} courses, "
+                            f"{num_queries} queries, {elapsed:.2f} seconds"
+                        )
+                    transaction.set_rollback(True)
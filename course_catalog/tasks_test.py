@@ -267,7 +267,9 @@ def test_get_ocw_data_error_reading_s3(settings, mocker, mock_logger, mocked_cel
     """
     Test that an error reading from S3 is correctly logged
     """
-    mocker.patch("course_catalog.api.get_s3_object_and_read", side_effect=Exception)
+    mocker.patch(
+        "course_catalog.api.get_s3_object_and_load_json", side_effect=Exception
+    )
     setup_s3(settings)
     get_ocw_courses.delay(
         course_prefixes=[TEST_PREFIX],
@@ -151,16 +151,42 @@ def get_list_items_by_resource(user, object_type, object_id):
     Returns:
         list of dicts: serialized UserListItem data
     """
+    resource = (object_type, object_id)
+    return get_list_items_by_resources(user, [resource])[resource]
+
+
+def get_list_items_by_resources(user, resources):
+    """
+    Get serialized list items for a particular user and several resources, in a single query
+
+    Args:
+        user (User): the User to filter list items by
+        resources (iterable of (str, int)): object types and ids of the resources
+
+    Returns:
+        dict: lists of serialized UserListItem data keyed by (object_type, object_id)
+    """
     from course_catalog.models import UserListItem
     from course_catalog.serializers import MicroUserListItemSerializer
 
-    return [
-        MicroUserListItemSerializer(item).data
-        for item in UserListItem.objects.filter(user_list__author=user)
+    resources = set(resources)
+    list_items = {resource: [] for resource in resources}
+    if not resources:
+        return list_items
+    items = (
+        UserListItem.objects.filter(user_list__author=user)
         .select_related("content_type")
-        .filter(content_type__model=object_type)
-        .filter(object_id=object_id)
-    ]
+        .filter(
+            content_type__model__in={object_type for object_type, _ in resources},
+            object_id__in={object_id for _, object_id in resources},
+        )
+        .order_by("id")
+    )
+    for item in items:
+        resource = (item.content_type.model, item.object_id)
+        if resource in list_items:
+            list_items[resource].append(MicroUserListItemSerializer(item).data)
+    return list_items
 
 
 def load_course_blacklist():
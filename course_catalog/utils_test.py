@@ -7,8 +7,16 @@ import pytest
 import pytz
 
 from course_catalog.constants import PlatformType
+from course_catalog.factories import (
+    BootcampFactory,
+    CourseFactory,
+    UserListFactory,
+    UserListItemFactory,
+)
 from course_catalog.utils import (
     get_course_url,
+    get_list_items_by_resource,
+    get_list_items_by_resources,
     semester_year_to_date,
     load_course_blacklist,
     load_course_duplicates,
@@ -146,3 +154,48 @@ mitx:
                 "course_id": "MITx+1",
             }
         ]
+
+
+@pytest.mark.django_db
+def test_get_list_items_by_resources(user, django_assert_num_queries):
+    """get_list_items_by_resources should return a user's list items for several resources"""
+    course, other_course = CourseFactory.create_batch(2)
+    bootcamp = BootcampFactory.create()
+    user_lists = UserListFactory.create_batch(2, author=user)
+    course_items = [
+        UserListItemFactory.create(user_list=user_list, content_object=course)
+        for user_list in user_lists
+    ]
+    bootcamp_item = UserListItemFactory.create(
+        user_list=user_lists[0], content_object=bootcamp
+    )
+    # items on other users' lists, or for resources which weren't asked for
+    UserListItemFactory.create(content_object=course)
+    UserListItemFactory.create(user_list=user_lists[0], content_object=other_course)
+    UserListItemFactory.create(
+        user_list=user_lists[0], content_object=BootcampFactory.create(id=course.id)
+    )
+
+    def serialize(item, content_type):
+        """Serialize a list item like MicroUserListItemSerializer"""
+        return {
+            "item_id": item.id,
+            "list_id": item.user_list_id,
+            "object_id": item.object_id,
+            "content_type": content_type,
+        }
+
+    with django_assert_num_queries(1):
+        list_items = get_list_items_by_resources(
+            user, [("course", course.id), ("bootcamp", bootcamp.id), ("course", 0)]
+        )
+    assert list_items == {
+        ("course", course.id): [serialize(item, "course") for item in course_items],
+        ("bootcamp", bootcamp.id): [serialize(bootcamp_item, "bootcamp")],
+        ("course", 0): [],
+    }
+    assert get_list_items_by_resource(user, "bootcamp", bootcamp.id) == [
+        serialize(bootcamp_item, "bootcamp")
+    ]
+    with django_assert_num_queries(0):
+        assert get_list_items_by_resources(user, []) == {}
@@ -6,6 +6,7 @@ from functools import wraps
 from types import SimpleNamespace
 from unittest.mock import Mock, patch
 
+from django.core.cache import caches
 from django.utils.deprecation import RemovedInDjango30Warning
 import factory
 import pytest
@@ -55,6 +56,20 @@ def warnings_as_errors():
         warnings.resetwarnings()
 
 
+@pytest.fixture(autouse=True)
+def redis_cache(settings):
+    """Replace the redis cache with a local memory cache"""
+    settings.CACHES = {
+        **settings.CACHES,
+        "redis": {
+            "BACKEND": "open_discussions.test_utils.LockingLocMemCache",
+            "LOCATION": "redis-test-cache",
+        },
+    }
+    yield caches["redis"]
+    caches["redis"].clear()
+
+
 @pytest.fixture(scope="function")
 def randomness():
     """Ensure a fixed seed for factoryboy"""
@@ -3,7 +3,7 @@ from types import SimpleNamespace
 
 import pytest
 
-from search.connection import configure_connections
+from search.connection import configure_connections, invalidate_alias_cache
 
 
 @pytest.fixture(autouse=True)
@@ -14,4 +14,5 @@ def elasticsearch(mocker, settings):
         "elasticsearch_dsl.connections.Connections.get_connection", autospec=True
     )
     configure_connections()
+    invalidate_alias_cache()
     yield SimpleNamespace(conn=mock_get_connection.return_value)
@@ -11,6 +11,17 @@ from channels.proxies import PostProxy
 from channels.utils import render_article_text
 
 
+@pytest.fixture(autouse=True)
+def reddit_client_cache():
+    """Make sure reddit clients and sessions aren't shared between tests"""
+    # pylint: disable=protected-access
+    api.invalidate_client_cache()
+    api._sessions.clear()
+    yield
+    api.invalidate_client_cache()
+    api._sessions.clear()
+
+
 @pytest.fixture
 def praw_settings(settings, cassette_exists):
     """Settings needed to use Api client"""
@@ -17,10 +17,21 @@ messages = messages_for_recipients([
 
 # send the emails
 send_messages(messages)
+
+# or, for a batch of emails, send them on worker threads while the next ones are rendered
+with MessageSender() as sender:
+    for user in users:
+        sender.send(messages_for_recipients([
+            (recipient, context_for_user(user=user, base_context=sender.base_context))
+            for recipient, user in safe_format_recipients([user])
+        ], 'sample'))
 """
+from concurrent.futures import ThreadPoolExecutor
 from email.utils import formataddr
 import logging
 import re
+import threading
+import time
 
 from anymail.message import AnymailMessage
 from bs4 import BeautifulSoup
@@ -72,22 +83,30 @@ def can_email_user(user):
     return bool(user.email)
 
 
-def context_for_user(*, user=None, extra_context=None):
+def get_base_context():
+    """
+    Returns the part of the email context which is the same for every user
+
+    Returns:
+        dict: the context for every user
+    """
+    return {"base_url": settings.SITE_BASE_URL, "site_name": get_default_site().title}
+
+
+def context_for_user(*, user=None, extra_context=None, base_context=None):
     """
     Returns an email context for the given user
 
     Args:
         user (User): user this email is being sent to
         extra_context (dict): additional per-user context
+        base_context (dict): the result of get_base_context, if it was already looked up for a batch
 
     Returns:
         dict: the context for this user
     """
 
-    context = {
-        "base_url": settings.SITE_BASE_URL,
-        "site_name": get_default_site().title,
-    }
+    context = dict(base_context) if base_context is not None else get_base_context()
 
     if user:
         context.update(
@@ -169,6 +188,24 @@ def messages_for_recipients(recipients_and_contexts, template_name):
             yield msg
 
 
+def _send_message(msg):
+    """
+    Sends a message and logs any exception
+
+    Args:
+        msg (EmailMultiAlternatives): the message to send
+
+    Returns:
+        bool: True if the message was sent
+    """
+    try:
+        msg.send()
+        return True
+    except:  # pylint: disable=bare-except
+        log.exception("Error sending email '%s' to %s", msg.subject, msg.to)
+        return False
+
+
 def send_messages(messages):
     """
     Sends the messages and logs any exceptions
@@ -176,8 +213,131 @@ def send_messages(messages):
     Args:
         messages (list of EmailMultiAlternatives): list of messages to send
     """
-    for msg in messages:
+    messages = list(messages)
+    # the messages of a messages_for_recipients call share a connection, which is closed by the
+    # time they're sent, so it's opened here once instead of once per message
+    connections = list(
+        {
+            id(msg.connection): msg.connection
+            for msg in messages
+            if msg.connection is not None
+        }.values()
+    )
+    for connection in connections:
         try:
-            msg.send()
+            connection.open()
         except:  # pylint: disable=bare-except
-            log.exception("Error sending email '%s' to %s", msg.subject, msg.to)
+            log.exception("Error opening email connection")
+    try:
+        for msg in messages:
+            _send_message(msg)
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+class MessageSender:  # pylint: disable=too-many-instance-attributes
+    """
+    Sends a batch of messages on worker threads while the caller renders the next ones
+
+    Rendering is CPU bound, so it stays on the calling thread, while the worker threads wait on the
+    email backend. Each worker thread sends its messages over its own connection, which stays open
+    for the whole batch. The sender also looks up the user independent part of the email context
+    once for the batch. The number of messages sent per second is logged when the batch is done.
+    """
+
+    def __init__(self, max_workers=None):
+        """
+        Args:
+            max_workers (int): the number of threads sending messages, NOTIFICATION_SEND_WORKERS by default
+        """
+        self.max_workers = max(
+            1,
+            max_workers
+            if max_workers is not None
+            else settings.NOTIFICATION_SEND_WORKERS,
+        )
+        self.num_sent = 0
+        self.num_failed = 0
+        self._base_context = None
+        self._executor = None
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._start = None
+
+    @property
+    def base_context(self):
+        """Returns the part of the email context which is the same for every user"""
+        if self._base_context is None:
+            self._base_context = get_base_context()
+        return self._base_context
+
+    def __enter__(self):
+        self._start = time.monotonic()
+        if self.max_workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for connection in self._connections:
+            connection.close()
+        self._connections = []
+        elapsed = max(time.monotonic() - self._start, 1e-6)
+        log.info(
+            "Sent %d emails (%d failed) in %.1f seconds: %.1f emails/sec",
+            self.num_sent,
+            self.num_failed,
+            elapsed,
+            self.num_sent / elapsed,
+        )
+
+    def _get_connection(self):
+        """
+        Get the connection of the current thread, opening it the first time
+
+        Returns:
+            django.core.mail.backends.base.BaseEmailBackend: the connection
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = mail.get_connection(settings.NOTIFICATION_EMAIL_BACKEND)
+            try:
+                connection.open()
+            except:  # pylint: disable=bare-except
+                log.exception("Error opening email connection")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _send(self, msg):
+        """
+        Send a message over the connection of the current thread
+
+        Args:
+            msg (EmailMultiAlternatives): the message to send
+        """
+        msg.connection = self._get_connection()
+        sent = _send_message(msg)
+        with self._lock:
+            if sent:
+                self.num_sent += 1
+            else:
+                self.num_failed += 1
+
+    def send(self, messages):
+        """
+        Queue messages to be sent
+
+        Args:
+            messages (list of EmailMultiAlternatives): list of messages to send
+        """
+        for msg in messages:
+            if self._executor is None:
+                self._send(msg)
+            else:
+                self._executor.submit(self._send, msg)
@@ -1,9 +1,14 @@
 """API tests"""
 from email.utils import formataddr
+
+from anymail.message import AnymailMessage
+from django.core import mail
 import pytest
 
 from mail.api import (
+    MessageSender,
     context_for_user,
+    get_base_context,
     safe_format_recipients,
     render_email_templates,
     send_messages,
@@ -59,6 +64,14 @@ def test_context_for_user(settings, test_user, extra_context):
     }
 
 
+def test_context_for_user_base_context(user):
+    """context_for_user should use the base context instead of looking it up again"""
+    base_context = get_base_context()
+    context = context_for_user(user=user, base_context=base_context)
+    assert context == {**base_context, "user": user, "anon_token": any_instance_of(str)}
+    assert "user" not in base_context
+
+
 def test_render_email_templates(user):
     """Test render_email_templates"""
     user.profile.name = "Jane Smith"
@@ -153,3 +166,74 @@ def test_send_message_failure(mocker):
 
     assert sendmail.call_count == len(users)
     assert patched_logger.exception.call_count == len(users)
+
+
+def _make_messages(count, connection=None):
+    """Make messages without rendering any templates"""
+    return [
+        AnymailMessage(
+            subject=f"Subject {index}",
+            body="body",
+            to=[f"user{index}@example.com"],
+            connection=connection,
+        )
+        for index in range(count)
+    ]
+
+
+def test_send_messages_opens_connection_once(mocker, settings):
+    """send_messages should keep the connection of the messages open until they're all sent"""
+    connection = mail.get_connection(settings.NOTIFICATION_EMAIL_BACKEND)
+    open_spy = mocker.spy(connection, "open")
+    close_spy = mocker.spy(connection, "close")
+
+    send_messages(_make_messages(3, connection=connection))
+
+    open_spy.assert_any_call()
+    # the backend doesn't close a connection which was already open after each message
+    close_spy.assert_called_once_with()
+    assert len(mail.outbox) == 3
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_message_sender(mocker, max_workers):
+    """MessageSender should send every message and log the throughput"""
+    patched_logger = mocker.patch("mail.api.log")
+    messages = _make_messages(6)
+
+    with MessageSender(max_workers=max_workers) as sender:
+        sender.send(messages[:2])
+        sender.send(messages[2:])
+
+    assert sorted(message.subject for message in mail.outbox) == sorted(
+        message.subject for message in messages
+    )
+    assert sender.num_sent == 6
+    assert sender.num_failed == 0
+    # each worker thread opens one connection
+    assert len({id(message.connection) for message in messages}) <= max_workers
+    patched_logger.info.assert_called_once()
+
+
+def test_message_sender_failure(mocker):
+    """MessageSender should log and count messages which fail to send"""
+    mocker.patch("mail.api.AnymailMessage.send", side_effect=ConnectionError)
+    patched_logger = mocker.patch("mail.api.log")
+
+    with MessageSender(max_workers=2) as sender:
+        sender.send(_make_messages(3))
+
+    assert sender.num_sent == 0
+    assert sender.num_failed == 3
+    assert patched_logger.exception.call_count == 3
+
+
+def test_message_sender_base_context(mocker):
+    """MessageSender should look up the base context once"""
+    mock_get_default_site = mocker.patch(
+        "mail.api.get_default_site", return_value=mocker.Mock(title="Site")
+    )
+    with MessageSender() as sender:
+        assert sender.base_context["site_name"] == "Site"
+        assert sender.base_context is sender.base_context
+    mock_get_default_site.assert_called_once_with()
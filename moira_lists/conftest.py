@@ -1,4 +1,6 @@
 """Test config for channels"""
+import threading
+
 import pytest
 
 
@@ -20,3 +22,9 @@ def mock_user_moira_lists(mocker):
     mocked = mocker.patch("moira_lists.moira_api.user_moira_lists")
     mocked.return_value = set()
     return mocked
+
+
+@pytest.fixture(autouse=True)
+def moira_client_cache(mocker):
+    """Start each test without any cached moira clients"""
+    return mocker.patch("moira_lists.moira_api._thread_local", threading.local())
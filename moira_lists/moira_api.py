@@ -1,36 +1,53 @@
 """Moira list utility functions"""
+import logging
 import os
 import re
+import threading
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import caches
 from django.db import transaction
 from mit_moira import Moira
 
 from moira_lists.exceptions import MoiraException
 from moira_lists.models import MoiraList
 
+log = logging.getLogger()
+
 MoiraUser = namedtuple("MoiraUser", "username type")
 
+USER_LISTS_CACHE_KEY = "moira_lists:user_lists:{type}:{username}"
+
+# moira clients are reused by each thread, since creating one loads the service's WSDL
+_thread_local = threading.local()
+
 
 def get_moira_client():
     """
-    Gets a moira client.
+    Gets a moira client. Each thread reuses the client it created for the same certificate files.
 
     Returns:
         Moira: A moira client
     """
-
-    _check_files_exist(
-        [settings.MIT_WS_CERTIFICATE_FILE, settings.MIT_WS_PRIVATE_KEY_FILE]
-    )
+    paths = (settings.MIT_WS_CERTIFICATE_FILE, settings.MIT_WS_PRIVATE_KEY_FILE)
+    clients = getattr(_thread_local, "clients", None)
+    if clients is None:
+        clients = _thread_local.clients = {}
+    if paths in clients:
+        return clients[paths]
+
+    _check_files_exist(paths)
     try:
-        return Moira(settings.MIT_WS_CERTIFICATE_FILE, settings.MIT_WS_PRIVATE_KEY_FILE)
+        client = Moira(*paths)
     except Exception as exc:  # pylint: disable=broad-except
         raise MoiraException(
             "Something went wrong with creating a moira client"
         ) from exc
+    clients[paths] = client
+    return client
 
 
 def _check_files_exist(paths):
@@ -60,26 +77,25 @@ def get_moira_user(user):
     return MoiraUser(user.email, "STRING")
 
 
-def query_moira_lists(user):
+def _query_moira_service(user, moira_user):
     """
-    Get a set of all moira lists (including nested lists) a user has access to, by querying the Moira service.
+    Get the names of the moira lists a user is a member of from the Moira service
 
     Args:
         user (django.contrib.auth.User): the Django user.
+        moira_user (MoiraUser): the user's moira username and type
 
     Returns:
-        list_names(list of str): A list of names of moira lists which contain the user as a member.
+        list of str: A list of names of moira lists which contain the user as a member.
     """
-    moira_user = get_moira_user(user)
     moira = get_moira_client()
     try:
         list_infos = moira.user_list_membership(
             moira_user.username, moira_user.type, max_return_count=100_000
         )
-        list_names = [
+        return [
             list_info["listName"] for list_info in list_infos if list_info["listName"]
         ]
-        return list_names
     except Exception as exc:  # pylint: disable=broad-except
         if "java.lang.NullPointerException" in str(exc):
             # User is not a member of any moira lists, so ignore exception and return empty list
@@ -89,6 +105,29 @@ def query_moira_lists(user):
         ) from exc
 
 
+def query_moira_lists(user):
+    """
+    Get a set of all moira lists (including nested lists) a user has access to, by querying the Moira service.
+    The result is cached for MOIRA_LISTS_CACHE_TTL seconds.
+
+    Args:
+        user (django.contrib.auth.User): the Django user.
+
+    Returns:
+        list_names(list of str): A list of names of moira lists which contain the user as a member.
+    """
+    moira_user = get_moira_user(user)
+    cache = caches["redis"]
+    cache_key = USER_LISTS_CACHE_KEY.format(
+        type=moira_user.type, username=moira_user.username
+    )
+    list_names = cache.get(cache_key)
+    if list_names is None:
+        list_names = _query_moira_service(user, moira_user)
+        cache.set(cache_key, list_names, timeout=settings.MOIRA_LISTS_CACHE_TTL)
+    return list_names
+
+
 def user_moira_lists(user):
     """
     Get a list of all the moira lists a user has access to
@@ -125,6 +164,18 @@ def moira_user_emails(member_list):
     )
 
 
+def create_moira_lists(names):
+    """
+    Create the moira lists which don't exist yet
+
+    Args:
+        names (iterable of str): Moira list names
+    """
+    MoiraList.objects.bulk_create(
+        [MoiraList(name=name) for name in set(names)], ignore_conflicts=True
+    )
+
+
 @transaction.atomic
 def update_user_moira_lists(user):
     """
@@ -133,13 +184,10 @@ def update_user_moira_lists(user):
     Args:
         user (User): user to update moira lists for
     """
-    moira_lists = query_moira_lists(user)
-
-    for list_name in moira_lists:
-        moira_list, _ = MoiraList.objects.get_or_create(name=list_name)
-        moira_list.users.add(user)
-
-    user.moira_lists.set(MoiraList.objects.filter(name__in=moira_lists))
+    list_names = query_moira_lists(user)
+    create_moira_lists(list_names)
+    # list names are the primary keys, and set() only adds and removes the changed memberships
+    user.moira_lists.set(list_names)
 
 
 def get_list_members(moira_name):
@@ -159,7 +207,75 @@ def get_list_members(moira_name):
     return members
 
 
-@transaction.atomic
+def _get_list_members_or_none(moira_name):
+    """
+    Get all the members of a moira list, logging any error
+
+    Args:
+        moira_name (str): Moira list name
+
+    Returns:
+        list of str: moira list members, or None if they couldn't be retrieved
+    """
+    try:
+        return get_list_members(moira_name)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Unable to get the members of moira list %s", moira_name)
+        return None
+
+
+def get_lists_members(moira_names):
+    """
+    Get the members of several moira lists, on a pool of MOIRA_LISTS_REFRESH_WORKERS threads
+
+    Args:
+        moira_names (list of str): Moira list names
+
+    Returns:
+        dict: a map of moira list name to its members, or None if they couldn't be retrieved
+    """
+    max_workers = settings.MOIRA_LISTS_REFRESH_WORKERS
+    if max_workers <= 1 or len(moira_names) <= 1:
+        members = map(_get_list_members_or_none, moira_names)
+        return dict(zip(moira_names, members))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        members = executor.map(_get_list_members_or_none, moira_names)
+        return dict(zip(moira_names, members))
+
+
+def update_moira_lists_users(moira_lists):
+    """
+    Update the users in several moira lists. Lists whose members couldn't be retrieved are skipped.
+
+    Args:
+        moira_lists (list of MoiraList): the moira lists
+    """
+    members_by_name = get_lists_members([moira_list.name for moira_list in moira_lists])
+    emails_by_name = {
+        name: moira_user_emails(members)
+        for name, members in members_by_name.items()
+        if members is not None
+    }
+    user_ids_by_email = {}
+    for email, user_id in User.objects.filter(
+        email__in={email for emails in emails_by_name.values() for email in emails}
+    ).values_list("email", "id"):
+        user_ids_by_email.setdefault(email, []).append(user_id)
+
+    for moira_list in moira_lists:
+        if moira_list.name not in emails_by_name:
+            continue
+        with transaction.atomic():
+            moira_list.users.set(
+                [
+                    user_id
+                    for email in emails_by_name[moira_list.name]
+                    for user_id in user_ids_by_email.get(email, [])
+                ]
+            )
+
+
 def update_moira_list_users(moira_list):
     """
     Update the users in a moira list
@@ -167,7 +283,4 @@ def update_moira_list_users(moira_list):
     Args:
         moira_list (MoiraList): the moira list
     """
-    users = User.objects.filter(
-        email__in=moira_user_emails(get_list_members(moira_list.name))
-    )
-    moira_list.users.set(users)
+    update_moira_lists_users([moira_list])
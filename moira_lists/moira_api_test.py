@@ -15,6 +15,7 @@ from moira_lists.moira_api import (
     update_user_moira_lists,
     moira_user_emails,
     update_moira_list_users,
+    update_moira_lists_users,
     get_list_members,
 )
 from open_discussions.factories import UserFactory
@@ -61,6 +62,24 @@ def test_get_moira_client_error(mock_moira):
         get_moira_client()
 
 
+def test_get_moira_client_reused(mock_moira, settings):
+    """get_moira_client should reuse the client it created for the same certificate files"""
+    tempfile1, tempfile2, tempfile3 = (
+        NamedTemporaryFile(),
+        NamedTemporaryFile(),
+        NamedTemporaryFile(),
+    )
+    settings.MIT_WS_PRIVATE_KEY_FILE = tempfile1.name
+    settings.MIT_WS_CERTIFICATE_FILE = tempfile2.name
+    client = get_moira_client()
+    assert get_moira_client() is client
+    mock_moira.assert_called_once_with(tempfile2.name, tempfile1.name)
+
+    settings.MIT_WS_CERTIFICATE_FILE = tempfile3.name
+    get_moira_client()
+    assert mock_moira.call_count == 2
+
+
 def test_query_moira_lists(mock_moira_client):
     """
     Test that expected lists are returned.
@@ -73,6 +92,40 @@ def test_query_moira_lists(mock_moira_client):
     assert query_moira_lists(other_user) == list_names
 
 
+def test_query_moira_lists_cached(mock_moira_client, settings, redis_cache):
+    """query_moira_lists should cache the lists of each user"""
+    settings.MOIRA_LISTS_CACHE_TTL = 60
+    mock_moira_client.return_value.user_list_membership.return_value = [
+        {"listName": "test_moira_list01"}
+    ]
+    user = UserFactory(email="someone@mit.edu")
+    other_user = UserFactory(email="someone@example.com")
+    assert query_moira_lists(user) == ["test_moira_list01"]
+    assert query_moira_lists(user) == ["test_moira_list01"]
+    mock_moira_client.return_value.user_list_membership.assert_called_once_with(
+        "someone", "USER", max_return_count=100_000
+    )
+    assert redis_cache.get("moira_lists:user_lists:USER:someone") == [
+        "test_moira_list01"
+    ]
+
+    mock_moira_client.return_value.user_list_membership.return_value = []
+    assert query_moira_lists(other_user) == []
+    assert query_moira_lists(other_user) == []
+    assert mock_moira_client.return_value.user_list_membership.call_count == 2
+
+
+def test_query_moira_lists_error_not_cached(mock_moira_client, redis_cache):
+    """query_moira_lists should not cache failed lookups"""
+    user = UserFactory(email="someone@mit.edu")
+    mock_moira_client.return_value.user_list_membership.side_effect = Fault(
+        "Not a java NPE"
+    )
+    with pytest.raises(MoiraException):
+        query_moira_lists(user)
+    assert redis_cache.get("moira_lists:user_lists:USER:someone") is None
+
+
 def test_query_moira_lists_no_lists(mock_moira_client):
     """
     Test that an empty list is returned if Moira throws a java NPE
@@ -172,6 +225,52 @@ def test_update_moira_list_users(mock_moira_client):
     )
 
 
+def test_update_user_moira_lists_existing(mock_moira_client):
+    """update_user_moira_lists should reuse existing moira lists and keep their other users"""
+    moira_user, other_user = UserFactory.create_batch(2)
+    moira_list = MoiraListFactory.create(name="test.list.1", users=[other_user])
+    mock_moira_client.return_value.user_list_membership.return_value = [
+        {"listName": "test.list.1"},
+        {"listName": "test.list.1"},
+    ]
+    update_user_moira_lists(moira_user)
+    assert MoiraList.objects.count() == 1
+    assert list(moira_list.users.order_by("id")) == [moira_user, other_user]
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_update_moira_lists_users(mock_moira_client, settings, max_workers):
+    """update_moira_lists_users should update the users of every list it could get the members of"""
+    settings.MOIRA_LISTS_REFRESH_WORKERS = max_workers
+    users = UserFactory.create_batch(3)
+    users[0].email = "kerberos1@mit.edu"
+    users[0].save()
+    lists = [
+        MoiraListFactory.create(name="list.1", users=[users[2]]),
+        MoiraListFactory.create(name="list.2"),
+        MoiraListFactory.create(name="list.broken", users=[users[2]]),
+    ]
+    members = {
+        ("list.1", "USER"): ["kerberos1"],
+        ("list.1", "STRING"): [users[1].email],
+        ("list.2", "USER"): [],
+        ("list.2", "STRING"): [users[1].email, "unknown@example.com"],
+    }
+
+    def list_members(name, type):  # pylint: disable=redefined-builtin
+        """Return the members of a list, or fail for the broken one"""
+        if name == "list.broken":
+            raise Fault("broken")
+        return list(members[(name, type)])
+
+    mock_moira_client.return_value.list_members.side_effect = list_members
+    update_moira_lists_users(lists)
+
+    assert list(lists[0].users.order_by("id")) == users[:2]
+    assert list(lists[1].users.all()) == [users[1]]
+    assert list(lists[2].users.all()) == [users[2]]
+
+
 def test_get_list_members(mock_moira_client):
     """Test that both kerberos and email members are retrieved"""
     mock_moira_client.return_value.list_members.side_effect = [
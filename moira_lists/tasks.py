@@ -3,8 +3,10 @@ import logging
 from django.contrib.auth import get_user_model
 
 from channels.membership_api import update_memberships_for_managed_channels
+from channels.models import ChannelMembershipConfig
 from moira_lists.models import MoiraList
 from moira_lists import moira_api
+from open_discussions import features
 from open_discussions.celery import app
 
 User = get_user_model()
@@ -34,8 +36,27 @@ def update_moira_list_users(names, channel_ids=None):
         names (list of str): Moira list name
         channel_ids (list of int): Channel id's
     """
-    for name in names:
-        moira_list, _ = MoiraList.objects.get_or_create(name=name)
-        moira_api.update_moira_list_users(moira_list)
+    moira_api.create_moira_lists(names)
+    moira_api.update_moira_lists_users(list(MoiraList.objects.filter(name__in=names)))
     if channel_ids is not None:
         update_memberships_for_managed_channels(channel_ids=channel_ids)
+
+
+@app.task
+def update_all_moira_list_users():
+    """
+    Update the users of the moira lists used by channel membership configs.
+    The managed channel memberships are updated afterwards by their own scheduled task.
+    """
+    if not features.is_enabled(features.MOIRA):
+        return
+    names = {
+        name
+        for query in ChannelMembershipConfig.objects.filter(
+            query__has_key="moira_lists"
+        ).values_list("query", flat=True)
+        for name in query["moira_lists"]
+    }
+    moira_api.update_moira_lists_users(
+        list(MoiraList.objects.filter(name__in=names).order_by("name"))
+    )
@@ -1,8 +1,15 @@
 """ Tests for moira tasks"""
 import pytest
 
-from moira_lists.tasks import update_moira_list_users, update_user_moira_lists
+from channels.factories.models import ChannelMembershipConfigFactory
+from moira_lists.models import MoiraList
+from moira_lists.tasks import (
+    update_all_moira_list_users,
+    update_moira_list_users,
+    update_user_moira_lists,
+)
 from moira_lists.factories import MoiraListFactory
+from open_discussions import features
 from open_discussions.factories import UserFactory
 
 pytestmark = pytest.mark.django_db
@@ -27,17 +34,49 @@ def test_update_user_moira_lists(mocker, update_memberships):
 @pytest.mark.parametrize("channel_ids", [None, [1, 2]])
 def test_update_moira_list_users(mocker, channel_ids):
     """Test that the update_moira_list_users task calls the api function of the same name"""
-    mock_api = mocker.patch("moira_lists.moira_api.update_moira_list_users")
+    mock_api = mocker.patch("moira_lists.moira_api.update_moira_lists_users")
     mock_member_api = mocker.patch(
         "moira_lists.tasks.update_memberships_for_managed_channels"
     )
     moira_lists = MoiraListFactory.create_batch(3)
-    update_moira_list_users(
-        [moira_list.name for moira_list in moira_lists], channel_ids=channel_ids
+    names = [moira_list.name for moira_list in moira_lists] + ["new.list"]
+    update_moira_list_users(names, channel_ids=channel_ids)
+    mock_api.assert_called_once()
+    assert sorted(moira_list.name for moira_list in mock_api.call_args[0][0]) == sorted(
+        names
     )
-    for moira_list in moira_lists:
-        mock_api.assert_any_call(moira_list)
+    assert MoiraList.objects.filter(name="new.list").exists()
     if channel_ids is not None:
         mock_member_api.assert_called_once_with(channel_ids=channel_ids)
     else:
         mock_member_api.assert_not_called()
+
+
+@pytest.mark.parametrize("is_enabled", [True, False])
+def test_update_all_moira_list_users(mocker, settings, is_enabled):
+    """update_all_moira_list_users should only update the moira lists used by membership configs"""
+    settings.FEATURES[features.MOIRA] = False
+    mock_api = mocker.patch("moira_lists.moira_api.update_moira_lists_users")
+    mock_member_api = mocker.patch(
+        "moira_lists.tasks.update_memberships_for_managed_channels"
+    )
+    moira_lists = MoiraListFactory.create_batch(4)
+    ChannelMembershipConfigFactory.create(
+        query={"moira_lists": [moira_lists[2].name, moira_lists[0].name]}
+    )
+    ChannelMembershipConfigFactory.create(
+        query={"moira_lists": [moira_lists[0].name], "email__endswith": "@mit.edu"}
+    )
+    ChannelMembershipConfigFactory.create(query={"email__endswith": "@mit.edu"})
+    settings.FEATURES[features.MOIRA] = is_enabled
+    update_all_moira_list_users.delay()
+    if is_enabled:
+        mock_api.assert_called_once_with(
+            sorted(
+                [moira_lists[0], moira_lists[2]], key=lambda moira_list: moira_list.name
+            )
+        )
+    else:
+        mock_api.assert_not_called()
+    # the managed channel memberships are updated by their own scheduled task
+    mock_member_api.assert_not_called()
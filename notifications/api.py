@@ -2,14 +2,17 @@
 import logging
 
 from django.conf import settings
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
 
 from channels.models import Subscription
+from mail import api as mail_api
 from notifications.notifiers.exceptions import (
     UnsupportedNotificationTypeError,
     CancelNotificationError,
 )
 from notifications.models import (
+    CommentEvent,
     EmailNotification,
     NotificationSettings,
     NOTIFICATION_TYPE_FRONTPAGE,
@@ -58,12 +61,20 @@ def attempt_send_notification_batch(notification_settings_ids):
     Args:
         notification_settings_ids (list of int): list of NotificationSettings.ids
     """
-    notification_settings = NotificationSettings.objects.filter(
-        id__in=notification_settings_ids
+    notification_settings = list(
+        NotificationSettings.objects.filter(
+            id__in=notification_settings_ids
+        ).select_related("user")
+    )
+    # users with the same channels share their frontpage listing
+    engine = frontpage.FrontpageDigestEngine(
+        [notification_setting.user for notification_setting in notification_settings]
     )
     for notification_setting in notification_settings:
         try:
-            notifier = frontpage.FrontpageDigestNotifier(notification_setting)
+            notifier = frontpage.FrontpageDigestNotifier(
+                notification_setting, engine=engine
+            )
             notifier.attempt_notify()
         except:  # pylint: disable=bare-except
             log.exception(
@@ -95,22 +106,29 @@ def get_weekly_frontpage_settings_ids():
     )
 
 
-def _get_notifier_for_notification(notification):
+def _get_notifier_for_notification(
+    notification, frontpage_engine=None, notification_settings=None
+):
     """
     Get the notifier for the notification's type
 
     Args:
         notification (NotificationBase): the notification to get a notifier for
+        frontpage_engine (FrontpageDigestEngine): the digest engine shared by a batch of frontpage notifiers
+        notification_settings (NotificationSettings): the settings for the notification, if already loaded
 
     Returns:
         Notifier: instance of the notifier to use
     """
-    notification_settings = NotificationSettings.objects.get(
-        user=notification.user, notification_type=notification.notification_type
-    )
+    if notification_settings is None:
+        notification_settings = NotificationSettings.objects.get(
+            user=notification.user, notification_type=notification.notification_type
+        )
 
     if notification.notification_type == NOTIFICATION_TYPE_FRONTPAGE:
-        return frontpage.FrontpageDigestNotifier(notification_settings)
+        return frontpage.FrontpageDigestNotifier(
+            notification_settings, engine=frontpage_engine
+        )
     elif notification.notification_type == NOTIFICATION_TYPE_COMMENTS:
         return comments.CommentNotifier(notification_settings)
     else:
@@ -144,43 +162,152 @@ def send_email_notification_batch(notification_ids):
     Args:
         notification_ids (list of int): notification ids to send
     """
-    for notification in EmailNotification.objects.filter(id__in=notification_ids):
-        try:
-            notifier = _get_notifier_for_notification(notification)
-            notifier.send_notification(notification)
-        except CancelNotificationError:
-            log.debug("EmailNotification canceled: %s", notification.id)
-            notification.state = EmailNotification.STATE_CANCELED
-            notification.save()
-        except:  # pylint: disable=bare-except
-            log.exception("Error sending notification %s", notification)
+    notifications = list(
+        EmailNotification.objects.filter(id__in=notification_ids).select_related("user")
+    )
+    frontpage_engine = frontpage.FrontpageDigestEngine(
+        [
+            notification.user
+            for notification in notifications
+            if notification.notification_type == NOTIFICATION_TYPE_FRONTPAGE
+        ]
+    )
+    settings_by_key = {
+        (notification_settings.user_id, notification_settings.notification_type): (
+            notification_settings
+        )
+        for notification_settings in NotificationSettings.objects.filter(
+            user_id__in={notification.user_id for notification in notifications}
+        ).select_related("user")
+    }
+    # emails are sent on worker threads while the next notifications are rendered
+    with mail_api.MessageSender() as sender:
+        for notification in notifications:
+            try:
+                notifier = _get_notifier_for_notification(
+                    notification,
+                    frontpage_engine=frontpage_engine,
+                    notification_settings=settings_by_key.get(
+                        (notification.user_id, notification.notification_type)
+                    ),
+                )
+                notifier.send_notification(notification, sender=sender)
+            except CancelNotificationError:
+                log.debug("EmailNotification canceled: %s", notification.id)
+                notification.state = EmailNotification.STATE_CANCELED
+                notification.save()
+            except:  # pylint: disable=bare-except
+                log.exception("Error sending notification %s", notification)
 
 
-def send_comment_notifications(post_id, comment_id, new_comment_id):
+def _get_comment_subscribers(post_id, comment_id):
     """
-    Sends notifications for a reply to a given post notification
+    Get the users subscribed to a post or comment, along with their comment notification frequency
 
     Args:
         post_id (str): base36 post id
         comment_id (str): base36 comment id
-        new_comment_id (str): base36 comment id of the new comment
+
+    Returns:
+        list of (int, str): the user id and trigger frequency of each subscriber with comment settings
     """
-    for subscription in (
+    subscribers = []
+    for subscription_id, user_id, trigger_frequency in (
         Subscription.objects.filter(post_id=post_id)
         .filter(Q(comment_id=comment_id) | Q(comment_id=None))
         .distinct("user")
-        .iterator()
-    ):
-        try:
-            notification_settings = NotificationSettings.objects.get(
-                user_id=subscription.user_id,
-                notification_type=NOTIFICATION_TYPE_COMMENTS,
+        .annotate(
+            trigger_frequency=Subquery(
+                NotificationSettings.objects.filter(
+                    user_id=OuterRef("user_id"),
+                    notification_type=NOTIFICATION_TYPE_COMMENTS,
+                ).values("trigger_frequency")[:1]
             )
-        except NotificationSettings.DoesNotExist:
-            log.exception(
-                "NotificationSettings didn't exist for subscription %s", subscription.id
+        )
+        .values_list("id", "user_id", "trigger_frequency")
+    ):
+        if trigger_frequency is None:
+            log.error(
+                "NotificationSettings didn't exist for subscription %s", subscription_id
             )
             continue
+        subscribers.append((user_id, trigger_frequency))
+    return subscribers
+
+
+def create_comment_events(post_id, new_comment_id, subscribers):
+    """
+    Creates the CommentEvents for a new comment, and the EmailNotifications of the subscribers who
+    are notified immediately
 
-        notifier = comments.CommentNotifier(notification_settings)
-        notifier.create_comment_event(subscription, new_comment_id)
+    Subscribers who already have an event for the comment are skipped, so this is safe to retry.
+
+    Args:
+        post_id (str): base36 post id
+        new_comment_id (str): base36 comment id of the new comment
+        subscribers (list of (int, str)): the user id and comment trigger frequency of each subscriber
+
+    Returns:
+        list of CommentEvent: the created events
+    """
+    with transaction.atomic():
+        existing_user_ids = set(
+            CommentEvent.objects.filter(
+                post_id=post_id,
+                comment_id=new_comment_id,
+                user_id__in=[user_id for user_id, _ in subscribers],
+            ).values_list("user_id", flat=True)
+        )
+        subscribers = [
+            (user_id, trigger_frequency)
+            for user_id, trigger_frequency in subscribers
+            if user_id not in existing_user_ids
+        ]
+        # postgres returns the primary keys of created objects
+        notifications = EmailNotification.objects.bulk_create(
+            [
+                EmailNotification(
+                    user_id=user_id, notification_type=NOTIFICATION_TYPE_COMMENTS
+                )
+                for user_id, trigger_frequency in subscribers
+                if trigger_frequency == FREQUENCY_IMMEDIATE
+            ],
+            batch_size=settings.NOTIFICATION_COMMENT_FANOUT_CHUNK_SIZE,
+        )
+        notifications_by_user_id = {
+            notification.user_id: notification for notification in notifications
+        }
+        return CommentEvent.objects.bulk_create(
+            [
+                CommentEvent(
+                    user_id=user_id,
+                    post_id=post_id,
+                    comment_id=new_comment_id,
+                    email_notification=notifications_by_user_id.get(user_id),
+                )
+                for user_id, _ in subscribers
+            ],
+            batch_size=settings.NOTIFICATION_COMMENT_FANOUT_CHUNK_SIZE,
+        )
+
+
+def send_comment_notifications(post_id, comment_id, new_comment_id):
+    """
+    Sends notifications for a reply to a given post notification
+
+    Args:
+        post_id (str): base36 post id
+        comment_id (str): base36 comment id
+        new_comment_id (str): base36 comment id of the new comment
+    """
+    subscribers = _get_comment_subscribers(post_id, comment_id)
+    chunk_size = settings.NOTIFICATION_COMMENT_FANOUT_CHUNK_SIZE
+    if len(subscribers) <= chunk_size:
+        create_comment_events(post_id, new_comment_id, subscribers)
+        return
+
+    # split large fan-outs so the chunks are created in parallel
+    for subscribers_chunk in chunks(subscribers, chunk_size=chunk_size):
+        tasks.create_comment_events_batch.delay(
+            post_id, new_comment_id, subscribers_chunk
+        )
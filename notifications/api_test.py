@@ -2,6 +2,7 @@
 import pytest
 
 from channels.factories.models import SubscriptionFactory
+from mail.api import MessageSender
 from notifications.factories import (
     EmailNotificationFactory,
     NotificationSettingsFactory,
@@ -18,8 +19,10 @@ from notifications.models import (
     FREQUENCY_WEEKLY,
 )
 from notifications.notifiers.exceptions import CancelNotificationError
+from notifications.notifiers.frontpage import FrontpageDigestEngine
 from notifications import api
 from open_discussions.factories import UserFactory
+from open_discussions.test_utils import any_instance_of
 
 pytestmark = pytest.mark.django_db
 
@@ -110,8 +113,10 @@ def test_attempt_send_notification_batch(mocker, side_effect):
 
     assert mock_notifier.call_count == len(notification_settings)
 
+    engine = mock_notifier.call_args[1]["engine"]
+    assert isinstance(engine, FrontpageDigestEngine)
     for notificiation_setting in notification_settings:
-        mock_notifier.assert_any_call(notificiation_setting)
+        mock_notifier.assert_any_call(notificiation_setting, engine=engine)
 
     assert mock_notifier_instance.attempt_notify.call_count == len(
         notification_settings
@@ -170,6 +175,8 @@ def test_send_email_notification_batch(
         )
 
     mock_notifier = mocker.patch(notifier_fqn).return_value
+    # the settings for the batch are loaded together
+    mock_get_settings = mocker.patch.object(NotificationSettings.objects, "get")
 
     if should_cancel:
         mock_notifier.send_notification.side_effect = CancelNotificationError
@@ -177,10 +184,13 @@ def test_send_email_notification_batch(
     api.send_email_notification_batch([note.id for note in notifications])
 
     assert mock_notifier.send_notification.call_count == len(notifications)
+    mock_get_settings.assert_not_called()
 
     for notification in notifications:
         notification.refresh_from_db()
-        mock_notifier.send_notification.assert_any_call(notification)
+        mock_notifier.send_notification.assert_any_call(
+            notification, sender=any_instance_of(MessageSender)
+        )
 
         if should_cancel:
             assert notification.state == EmailNotification.STATE_CANCELED
@@ -216,3 +226,73 @@ def test_send_comment_notifications(post_id, comment_id):
         assert event.post_id == post_id
         assert event.comment_id == "abc"
         assert event.user in users
+        assert (event.email_notification is not None) is (
+            event.user.notification_settings.get(
+                notification_type=NOTIFICATION_TYPE_COMMENTS
+            ).is_triggered_immediate
+        )
+
+
+def test_send_comment_notifications_num_queries(django_assert_num_queries):
+    """The number of queries shouldn't depend on the number of subscribers"""
+    for user in UserFactory.create_batch(20):
+        NotificationSettingsFactory.create(
+            user=user, comments_type=True, immediate=True
+        )
+        SubscriptionFactory.create(user=user, post_id="1", comment_id=None)
+
+    # the subscribers, the existing events, the notifications, the events and the savepoint
+    with django_assert_num_queries(6):
+        api.send_comment_notifications("1", None, "abc")
+
+    assert CommentEvent.objects.count() == 20
+
+
+def test_send_comment_notifications_fanout(mocker, settings):
+    """Large fan-outs should be split into tasks"""
+    settings.NOTIFICATION_COMMENT_FANOUT_CHUNK_SIZE = 2
+    mock_task = mocker.patch("notifications.tasks.create_comment_events_batch")
+    users = UserFactory.create_batch(5)
+    for user in users:
+        NotificationSettingsFactory.create(user=user, comments_type=True, daily=True)
+        SubscriptionFactory.create(user=user, post_id="1", comment_id=None)
+
+    api.send_comment_notifications("1", None, "abc")
+
+    assert CommentEvent.objects.count() == 0
+    assert [call[0][2] for call in mock_task.delay.call_args_list] == [
+        [(user.id, FREQUENCY_DAILY) for user in users[:2]],
+        [(user.id, FREQUENCY_DAILY) for user in users[2:4]],
+        [(users[4].id, FREQUENCY_DAILY)],
+    ]
+    for call in mock_task.delay.call_args_list:
+        assert call[0][:2] == ("1", "abc")
+
+
+def test_create_comment_events():
+    """create_comment_events should create notifications for immediate subscribers and skip existing events"""
+    immediate_user, daily_user, existing_user = UserFactory.create_batch(3)
+    existing_event = CommentEvent.objects.create(
+        user=existing_user, post_id="1", comment_id="abc"
+    )
+
+    events = api.create_comment_events(
+        "1",
+        "abc",
+        [
+            (immediate_user.id, FREQUENCY_IMMEDIATE),
+            (daily_user.id, FREQUENCY_DAILY),
+            (existing_user.id, FREQUENCY_IMMEDIATE),
+        ],
+    )
+
+    assert [event.user_id for event in events] == [immediate_user.id, daily_user.id]
+    assert CommentEvent.objects.count() == 3
+    notification = CommentEvent.objects.get(user=immediate_user).email_notification
+    assert notification.user == immediate_user
+    assert notification.notification_type == NOTIFICATION_TYPE_COMMENTS
+    assert notification.state == EmailNotification.STATE_PENDING
+    assert CommentEvent.objects.get(user=daily_user).email_notification is None
+    assert EmailNotification.objects.count() == 1
+    existing_event.refresh_from_db()
+    assert existing_event.email_notification is None
@@ -0,0 +1,241 @@
+"""Management command to compare computing frontpage digests per user and with a shared engine"""
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import base36
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from channels.constants import CHANNEL_TYPE_PUBLIC
+from channels.models import Channel, ChannelSubscription, Post
+from notifications.models import (
+    FREQUENCY_DAILY,
+    NOTIFICATION_TYPE_FRONTPAGE,
+    NotificationSettings,
+)
+from notifications.notifiers.frontpage import FrontpageDigestEngine
+from open_discussions.utils import now_in_utc
+
+User = get_user_model()
+
+BENCHMARK_PREFIX = "benchmark-digest"
+# far past the ids reddit assigns, so the benchmark posts don't collide with real ones
+POST_ID_OFFSET = 36 ** 10
+
+
+def _make_data(*, num_users, num_channels, num_memberships, num_posts):
+    """
+    Create users subscribed to a few distinct sets of channels, and posts in those channels
+
+    Args:
+        num_users (int): The number of users
+        num_channels (int): The number of channels
+        num_memberships (int): The number of distinct sets of channels users are subscribed to
+        num_posts (int): The number of posts in each channel
+
+    Returns:
+        (list of NotificationSettings, dict):
+            Unsaved notification settings for each user, and a map of user id to the
+            submissions on the user's frontpage
+    """
+    # pylint: disable=too-many-locals
+    # postgres returns the primary keys of created objects
+    channels = Channel.objects.bulk_create(
+        [
+            Channel(
+                name=f"{BENCHMARK_PREFIX}-{index}",
+                title=f"Benchmark {index}",
+                channel_type=CHANNEL_TYPE_PUBLIC,
+            )
+            for index in range(num_channels)
+        ]
+    )
+    users = User.objects.bulk_create(
+        [User(username=f"{BENCHMARK_PREFIX}-{index}") for index in range(num_users)]
+    )
+
+    created = now_in_utc().timestamp()
+    author = users[0]
+    submissions_by_channel = {}
+    posts = []
+    for channel in channels:
+        submissions_by_channel[channel.id] = []
+        for _ in range(num_posts):
+            post_id = base36.dumps(POST_ID_OFFSET + len(posts))
+            posts.append(
+                Post(
+                    channel=channel,
+                    author=author,
+                    post_id=post_id,
+                    post_type="self",
+                    title=f"Benchmark post {post_id}",
+                    text="Benchmark post text",
+                    score=1,
+                    num_comments=0,
+                    edited=False,
+                    removed=False,
+                    deleted=False,
+                    stickied=False,
+                )
+            )
+            submissions_by_channel[channel.id].append(
+                SimpleNamespace(
+                    id=post_id,
+                    title=f"Benchmark post {post_id}",
+                    url=None,
+                    is_self=True,
+                    selftext="Benchmark post text",
+                    permalink=f"/r/{channel.name}/comments/{post_id}/benchmark_post/",
+                    likes=None,
+                    ups=1,
+                    created=created,
+                    num_comments=0,
+                    edited=False,
+                    banned_by=None,
+                    num_reports=None,
+                    stickied=False,
+                    author=SimpleNamespace(name=author.username),
+                )
+            )
+    Post.objects.bulk_create(posts)
+
+    subscriptions = []
+    submissions_by_user = {}
+    for index, user in enumerate(users):
+        membership = index % num_memberships
+        # each membership is a different window of channels
+        user_channels = [
+            channels[(membership + offset) % num_channels]
+            for offset in range(min(3, num_channels))
+        ]
+        subscriptions.extend(
+            ChannelSubscription(channel=channel, user=user) for channel in user_channels
+        )
+        submissions_by_user[user.id] = [
+            submission
+            for channel in user_channels
+            for submission in submissions_by_channel[channel.id]
+        ]
+    ChannelSubscription.objects.bulk_create(subscriptions)
+
+    notification_settings = [
+        NotificationSettings(
+            user=user,
+            notification_type=NOTIFICATION_TYPE_FRONTPAGE,
+            trigger_frequency=FREQUENCY_DAILY,
+        )
+        for user in users
+    ]
+    return notification_settings, submissions_by_user
+
+
+def _make_fake_api(submissions_by_user, latency):
+    """
+    Make a replacement for channels.api.Api which returns frontpages without calling reddit
+
+    Args:
+        submissions_by_user (dict): A map of user id to the submissions on the user's frontpage
+        latency (float): The number of seconds each frontpage request takes
+
+    Returns:
+        type: The fake Api class
+    """
+
+    class FakeApi:
+        """Returns the benchmark frontpages after a simulated reddit request"""
+
+        def __init__(self, user):
+            self.user = user
+
+        def front_page(self, listing_params):  # pylint: disable=unused-argument
+            """Return the user's frontpage"""
+            time.sleep(latency)
+            return submissions_by_user[self.user.id]
+
+    return FakeApi
+
+
+def _per_user_digests(notification_settings):
+    """Compute each digest with its own engine, as each notifier did on its own"""
+    for setting in notification_settings:
+        engine = FrontpageDigestEngine([setting.user])
+        engine.serialize_posts(engine.get_posts(setting, None))
+
+
+def _shared_digests(notification_settings):
+    """Compute the digests with one engine shared by the batch"""
+    engine = FrontpageDigestEngine([setting.user for setting in notification_settings])
+    for setting in notification_settings:
+        engine.serialize_posts(engine.get_posts(setting, None))
+
+
+class Command(BaseCommand):
+    """Compares computing frontpage digests per user and with a shared engine"""
+
+    help = (
+        "Compare digests per second computed per user and with a shared digest engine"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            dest="users",
+            type=int,
+            default=100,
+            help="The number of users in the batch",
+        )
+        parser.add_argument(
+            "--channels",
+            dest="channels",
+            type=int,
+            default=20,
+            help="The number of channels",
+        )
+        parser.add_argument(
+            "--memberships",
+            dest="memberships",
+            type=int,
+            default=10,
+            help="The number of distinct sets of channels users are subscribed to",
+        )
+        parser.add_argument(
+            "--posts",
+            dest="posts",
+            type=int,
+            default=5,
+            help="The number of posts in each channel",
+        )
+        parser.add_argument(
+            "--latency",
+            dest="latency",
+            type=float,
+            default=0.2,
+            help="The number of seconds a reddit frontpage request takes",
+        )
+
+    def handle(self, *args, **options):
+        # the benchmark data is rolled back afterwards
+        with transaction.atomic():
+            notification_settings, submissions_by_user = _make_data(
+                num_users=options["users"],
+                num_channels=options["channels"],
+                num_memberships=options["memberships"],
+                num_posts=options["posts"],
+            )
+            fake_api = _make_fake_api(submissions_by_user, options["latency"])
+            with patch("channels.api.Api", fake_api):
+                for name, compute in [
+                    ("per-user", _per_user_digests),
+                    ("shared", _shared_digests),
+                ]:
+                    start = time.perf_counter()
+                    compute(notification_settings)
+                    elapsed = time.perf_counter() - start
+                    self.stdout.write(
+                        f"{name} digests: {len(notification_settings)} users, "
+                        f"{elapsed:.2f} seconds, "
+                        f"{len(notification_settings) / elapsed:.1f} digests per second"
+                    )
+            transaction.set_rollback(True)
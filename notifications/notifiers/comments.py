@@ -1,11 +1,11 @@
 """Subscription notifiers"""
-from django.db import transaction
 from praw.models import Comment
 
 from channels import api
 from channels.proxies import proxy_post
 from channels.serializers.comments import CommentSerializer
 from channels.serializers.posts import PostSerializer
+from channels.utils import UserLoader
 from notifications.models import CommentEvent
 from notifications.notifiers.email import EmailNotifier
 from notifications.utils import praw_error_to_cancelled
@@ -54,13 +54,13 @@ class CommentNotifier(EmailNotifier):
         comment = api_client.get_comment(event.comment_id)
         parent = comment.parent()
         is_comment_reply = isinstance(parent, Comment)
-        ctx = {"current_user": self.user}
-
         post = proxy_post(comment.submission)
 
         if not is_comment_reply:
             parent = proxy_post(parent)
 
+        ctx = {"current_user": self.user, "users": UserLoader([post, parent, comment])}
+
         return {
             "is_comment_reply": is_comment_reply,
             "post": PostSerializer(post, context=ctx).data,
@@ -71,28 +71,3 @@ class CommentNotifier(EmailNotifier):
             ).data,
             "comment": CommentSerializer(comment, context=ctx).data,
         }
-
-    def create_comment_event(self, subscription, comment_id):
-        """
-        Creates a new CommentEvent
-
-        Args:
-            subscription (channels.models.Subscription): the subscription this event is triggered from
-            comment_id (str): the base36 id of the new comment
-
-        Returns:
-            CommentEvent: the created event
-        """
-        kwargs = {}
-
-        with transaction.atomic():
-            # if this is an immediate trigger notification, create and assign the event to it right away
-            if self.notification_settings.is_triggered_immediate:
-                kwargs["email_notification"] = self._create_notification()
-
-            return CommentEvent.objects.create(
-                user=subscription.user,
-                post_id=subscription.post_id,
-                comment_id=comment_id,
-                **kwargs,
-            )
@@ -3,9 +3,9 @@ from django.core.mail import EmailMessage
 import pytest
 
 from channels.models import Subscription
-from channels.factories.models import SubscriptionFactory
+from notifications import api
 from notifications.factories import NotificationSettingsFactory
-from notifications.models import EmailNotification
+from notifications.models import EmailNotification, FREQUENCY_IMMEDIATE
 from notifications.notifiers import comments
 from open_discussions import features
 from open_discussions.test_utils import any_instance_of
@@ -32,26 +32,6 @@ def test_can_notify(mocker, settings, is_enabled, can_notify):
         mock_can_notify.assert_not_called()
 
 
-@pytest.mark.parametrize("is_immediate", [True, False])
-@pytest.mark.parametrize("is_comment", [True, False])
-def test_create_comment_event(is_immediate, is_comment):
-    """Tests that create_comment_event works correctly"""
-    ns = NotificationSettingsFactory.create(
-        immediate=is_immediate, never=not is_immediate
-    )
-    notifier = comments.CommentNotifier(ns)
-    subscription = SubscriptionFactory.create(user=ns.user, is_comment=is_comment)
-    event = notifier.create_comment_event(subscription, "h")
-
-    assert event.post_id == subscription.post_id
-    assert event.comment_id == "h"
-
-    if is_immediate:
-        assert event.email_notification is not None
-    else:
-        assert event.email_notification is None
-
-
 @pytest.mark.betamax
 @pytest.mark.parametrize("is_parent_comment", [True, False])
 def test_send_notification(
@@ -74,7 +54,9 @@ def test_send_notification(
     else:
         subscription = Subscription.objects.create(user=user, post_id=post.id)
 
-    event = notifier.create_comment_event(subscription, comment.id)
+    [event] = api.create_comment_events(
+        subscription.post_id, comment.id, [(user.id, FREQUENCY_IMMEDIATE)]
+    )
     note = event.email_notification
     note.state = EmailNotification.STATE_SENDING
     note.save()
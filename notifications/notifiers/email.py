@@ -54,12 +54,13 @@ class EmailNotifier(BaseNotifier):
         """
         return {}
 
-    def send_notification(self, email_notification):
+    def send_notification(self, email_notification, sender=None):
         """
         Sends the notification to the user
 
         Args:
             email_notification (EmailNotification): the notification to be sent
+            sender (mail.api.MessageSender): the sender for a batch of notifications, if any
         """
         messages = None
         user = email_notification.user
@@ -81,12 +82,18 @@ class EmailNotifier(BaseNotifier):
             )
 
             data = self._get_notification_data(email_notification, last_notification)
+            base_context = sender.base_context if sender is not None else None
 
             # generate the message (there's only 1)
             messages = list(
                 api.messages_for_recipients(
                     [
-                        (recipient, api.context_for_user(user=user, extra_context=data))
+                        (
+                            recipient,
+                            api.context_for_user(
+                                user=user, extra_context=data, base_context=base_context
+                            ),
+                        )
                         for recipient, user in api.safe_format_recipients([user])
                     ],
                     self._template_name,
@@ -99,4 +106,7 @@ class EmailNotifier(BaseNotifier):
         # we don't want an error sending to cause a resend, because it could cause us to actually send it twice
         if messages:
             # if we got this far and have messages, send them
-            api.send_messages(messages)
+            if sender is not None:
+                sender.send(messages)
+            else:
+                api.send_messages(messages)
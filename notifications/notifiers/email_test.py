@@ -66,6 +66,28 @@ def test_send_notification(notifier, mocker):
     send_messages_mock.assert_called_once_with([any_instance_of(EmailMessage)])
 
 
+def test_send_notification_sender(notifier, mocker):
+    """Tests send_notification with the sender for a batch"""
+    send_messages_mock = mocker.patch("mail.api.send_messages")
+    context_for_user_mock = mocker.patch("mail.api.context_for_user")
+    message = EmailMessage()
+    mocker.patch("mail.api.messages_for_recipients", return_value=[message])
+    sender = mocker.Mock()
+    note = EmailNotificationFactory.create(
+        user=notifier.user,
+        notification_type=notifier.notification_settings.notification_type,
+        sending=True,
+    )
+
+    notifier.send_notification(note, sender=sender)
+
+    context_for_user_mock.assert_called_once_with(
+        user=notifier.user, extra_context={}, base_context=sender.base_context
+    )
+    sender.send.assert_called_once_with([message])
+    send_messages_mock.assert_not_called()
+
+
 def test_send_notification_already_sent(notifier, mocker):
     """Tests send_notification that it doesn't send a notification that has already been sent"""
     send_messages_mock = mocker.patch("mail.api.send_messages")
@@ -5,9 +5,12 @@ from django.conf import settings
 import pytz
 
 from channels import api
+from channels.constants import ROLE_CONTRIBUTORS, ROLE_MODERATORS
+from channels.listing_cache import USER_FIELDS
+from channels.models import ChannelGroupRole, ChannelSubscription
 from channels.proxies import proxy_posts
 from channels.serializers import posts as post_serializers
-from channels.utils import ListingParams
+from channels.utils import ListingParams, UserLoader
 from notifications.models import FREQUENCY_DAILY, FREQUENCY_WEEKLY
 from notifications.notifiers.email import EmailNotifier
 from notifications.notifiers.exceptions import (
@@ -59,43 +62,165 @@ def _is_post_after_notification(post, notification):
     return datetime.fromtimestamp(post.created, tz=pytz.utc) > notification.created_on
 
 
-def _posts_since_notification(notification_settings, notification):
+def _posts_since_notification(posts, notification):
     """
     Returns posts that were created after the given notification
 
     Args:
-        notification_settings (NotificationSettings): settings for this user and notification_type
+        posts (list of praw.models.Submission): the frontpage posts, without stickied posts
         notification (NotificationBase): notification that was triggered for this NotificationSettings
 
-    Raises:
-        InvalidTriggerFrequencyError: if the frequency is invalid
-
     Returns:
         list of praw.models.Submission: list of posts
     """
-    user = notification_settings.user
-    params = _get_listing_params(notification_settings.trigger_frequency)
-    api_client = api.Api(user)
+    posts = [post for post in posts if _is_post_after_notification(post, notification)]
+    return posts[: settings.OPEN_DISCUSSIONS_FRONTPAGE_DIGEST_MAX_POSTS]
+
+
+class FrontpageDigestEngine:
+    """
+    Computes frontpage digests for a batch of users
+
+    A user's frontpage only depends on the channels they are subscribed to, contribute to and
+    moderate, so the frontpage is fetched once per distinct set of those channels and trigger
+    frequency, with the first user who has them. Contributor roles are part of the key because
+    removed contributors keep their subscriptions to private channels they can't see anymore. Each post is serialized once, and each user's
+    digest is assembled from the serialized posts.
+    """
+
+    def __init__(self, users):
+        """
+        Args:
+            users (iterable of User): the users digests will be computed for
+        """
+        self._membership_keys = {}
+        self._listings = {}
+        self._serialized_posts = {}
+        self._load_membership_keys({user.id for user in users})
+
+    def _load_membership_keys(self, user_ids):
+        """
+        Look up the channels which determine the frontpage of each user
+
+        Args:
+            user_ids (set of int): the user ids
+        """
+        subscribed = {user_id: set() for user_id in user_ids}
+        roles = {
+            role: {user_id: set() for user_id in user_ids}
+            for role in (ROLE_CONTRIBUTORS, ROLE_MODERATORS)
+        }
+        for user_id, channel_id in ChannelSubscription.objects.filter(
+            user_id__in=user_ids
+        ).values_list("user_id", "channel_id"):
+            subscribed[user_id].add(channel_id)
+        for user_id, role, channel_id in ChannelGroupRole.objects.filter(
+            role__in=roles.keys(), group__user__in=user_ids
+        ).values_list("group__user", "role", "channel_id"):
+            roles[role][user_id].add(channel_id)
+        for user_id in user_ids:
+            self._membership_keys[user_id] = (
+                frozenset(subscribed[user_id]),
+                frozenset(roles[ROLE_CONTRIBUTORS][user_id]),
+                frozenset(roles[ROLE_MODERATORS][user_id]),
+            )
+
+    def _get_listing(self, notification_settings):
+        """
+        Get the frontpage for a user's channel membership, fetching it if no other user had it
+
+        Args:
+            notification_settings (NotificationSettings): settings for this user and notification_type
+
+        Raises:
+            InvalidTriggerFrequencyError: if the frequency is invalid
 
-    posts = api_client.front_page(params)
+        Returns:
+            (list of praw.models.Submission, dict):
+                the frontpage posts without stickied posts, and a map of post id to proxied post
+        """
+        user = notification_settings.user
+        params = _get_listing_params(notification_settings.trigger_frequency)
+        if user.id not in self._membership_keys:
+            self._load_membership_keys({user.id})
+        key = (self._membership_keys[user.id], params)
+        if key not in self._listings:
+            posts = [
+                post for post in api.Api(user).front_page(params) if not post.stickied
+            ]
+            self._listings[key] = (
+                posts,
+                {proxy.id: proxy for proxy in proxy_posts(posts)},
+            )
+        return self._listings[key]
 
-    # filter posts
-    posts = [
-        post
-        for post in posts
-        if not post.stickied and _is_post_after_notification(post, notification)
-    ]
+    def get_posts(self, notification_settings, notification):
+        """
+        Returns frontpage posts that were created after the given notification
 
-    posts = proxy_posts(posts[: settings.OPEN_DISCUSSIONS_FRONTPAGE_DIGEST_MAX_POSTS])
+        Args:
+            notification_settings (NotificationSettings): settings for this user and notification_type
+            notification (NotificationBase): notification that was triggered for this NotificationSettings
 
-    return posts
+        Raises:
+            InvalidTriggerFrequencyError: if the frequency is invalid
+
+        Returns:
+            list of channels.proxies.PostProxy: list of posts
+        """
+        posts, proxies = self._get_listing(notification_settings)
+        return [
+            proxies[post.id]
+            for post in _posts_since_notification(posts, notification)
+            if post.id in proxies
+        ]
+
+    def serialize_posts(self, posts):
+        """
+        Serialize posts for a digest, serializing each post only once
+
+        The digest doesn't show if the user upvoted or subscribed to a post, so those fields are
+        left out.
+
+        Args:
+            posts (list of channels.proxies.PostProxy): posts from get_posts
+
+        Returns:
+            list of dict: the serialized posts
+        """
+        unserialized = [post for post in posts if post.id not in self._serialized_posts]
+        if unserialized:
+            context = {
+                "current_user": None,
+                "users": UserLoader(unserialized),
+                "post_subscriptions": [],
+            }
+            for post in unserialized:
+                data = post_serializers.PostSerializer(post, context=context).data
+                for field in USER_FIELDS:
+                    data.pop(field, None)
+                self._serialized_posts[post.id] = data
+        return [dict(self._serialized_posts[post.id]) for post in posts]
 
 
 class FrontpageDigestNotifier(EmailNotifier):
     """Notifier for frontpage digests"""
 
-    def __init__(self, notification_settings):
+    def __init__(self, notification_settings, engine=None):
+        """
+        Args:
+            notification_settings (NotificationSettings): settings for this user and notification_type
+            engine (FrontpageDigestEngine): an engine shared by the notifiers of a batch of users
+        """
         super().__init__("frontpage", notification_settings)
+        self._engine = engine
+
+    @property
+    def engine(self):
+        """Returns the digest engine for this notifier"""
+        if self._engine is None:
+            self._engine = FrontpageDigestEngine([self.user])
+        return self._engine
 
     def can_notify(self, last_notification):
         """
@@ -117,7 +242,7 @@ class FrontpageDigestNotifier(EmailNotifier):
             # do this last as it's expensive if the others are False anyway
             # check if we have posts since the last notification
             return bool(
-                _posts_since_notification(self.notification_settings, last_notification)
+                self.engine.get_posts(self.notification_settings, last_notification)
             )
         return False
 
@@ -134,17 +259,10 @@ class FrontpageDigestNotifier(EmailNotifier):
         Raises:
             InvalidTriggerFrequencyError: if the frequency is invalid for the frontpage digest
         """
-        posts = _posts_since_notification(self.notification_settings, last_notification)
+        posts = self.engine.get_posts(self.notification_settings, last_notification)
 
         if not posts:
             # edge case, nothing new to send even though we expected some
             raise CancelNotificationError()
 
-        return {
-            "posts": [
-                post_serializers.PostSerializer(
-                    post, context={"current_user": self.user}
-                ).data
-                for post in posts
-            ]
-        }
+        return {"posts": self.engine.serialize_posts(posts)}
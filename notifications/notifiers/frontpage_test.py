@@ -4,8 +4,12 @@ from datetime import timedelta
 from django.core.mail import EmailMessage
 import pytest
 
-from channels.factories.models import PostFactory
+from channels.api import add_user_role
+from channels.constants import CHANNEL_TYPE_PRIVATE, ROLE_CONTRIBUTORS, ROLE_MODERATORS
+from channels.factories.models import ChannelFactory, PostFactory
+from channels.models import ChannelSubscription
 from channels.proxies import PostProxy
+from channels.utils import UserLoader
 from notifications.factories import (
     NotificationSettingsFactory,
     EmailNotificationFactory,
@@ -142,7 +146,12 @@ def test_send_notification(mocker, user):
     notifier.send_notification(note)
 
     serializer_mock.assert_called_once_with(
-        PostProxy(submission, post), context={"current_user": note.user}
+        PostProxy(submission, post),
+        context={
+            "current_user": None,
+            "users": any_instance_of(UserLoader),
+            "post_subscriptions": [],
+        },
     )
 
     send_messages_mock.assert_called_once_with([any_instance_of(EmailMessage)])
@@ -167,3 +176,88 @@ def test_send_notification_no_posts(mocker):
 
     note.refresh_from_db()
     assert note.state == EmailNotification.STATE_CANCELED
+
+
+def test_engine_shares_listings(mocker):
+    """Users with the same channels and frequency should share one frontpage listing"""
+    channel, other_channel = ChannelFactory.create_batch(2)
+    same_settings = NotificationSettingsFactory.create_batch(
+        2, via_email=True, weekly=True
+    )
+    moderator_settings = NotificationSettingsFactory.create(via_email=True, weekly=True)
+    daily_settings = NotificationSettingsFactory.create(via_email=True, daily=True)
+    all_settings = [*same_settings, moderator_settings, daily_settings]
+    for ns in all_settings:
+        ChannelSubscription.objects.create(channel=channel, user=ns.user)
+    add_user_role(other_channel, ROLE_MODERATORS, moderator_settings.user)
+    post = PostFactory.create()
+    api_mock = mocker.patch("channels.api.Api")
+    api_mock.return_value.front_page.return_value = [
+        mocker.Mock(
+            id=post.post_id, created=int(now_in_utc().timestamp()), stickied=False
+        )
+    ]
+
+    engine = frontpage.FrontpageDigestEngine([ns.user for ns in all_settings])
+    posts = [engine.get_posts(ns, None) for ns in all_settings]
+
+    assert [[proxy.id for proxy in proxies] for proxies in posts] == [
+        [post.post_id]
+    ] * 4
+    assert posts[0][0] is posts[1][0]
+    assert [call[0][0] for call in api_mock.call_args_list] == [
+        same_settings[0].user,
+        moderator_settings.user,
+        daily_settings.user,
+    ]
+
+
+def test_engine_removed_contributor(mocker):
+    """A removed contributor who is still subscribed shouldn't share a current contributor's listing"""
+    channel = ChannelFactory.create(channel_type=CHANNEL_TYPE_PRIVATE)
+    contributor_settings, removed_settings = NotificationSettingsFactory.create_batch(
+        2, via_email=True, weekly=True
+    )
+    for ns in (contributor_settings, removed_settings):
+        ChannelSubscription.objects.create(channel=channel, user=ns.user)
+    add_user_role(channel, ROLE_CONTRIBUTORS, contributor_settings.user)
+    private_post = PostFactory.create(channel=channel)
+    created = int(now_in_utc().timestamp())
+    api_mock = mocker.patch("channels.api.Api")
+    api_mock.return_value.front_page.side_effect = [
+        [mocker.Mock(id=private_post.post_id, created=created, stickied=False)],
+        [],
+    ]
+
+    engine = frontpage.FrontpageDigestEngine(
+        [contributor_settings.user, removed_settings.user]
+    )
+
+    assert [proxy.id for proxy in engine.get_posts(contributor_settings, None)] == [
+        private_post.post_id
+    ]
+    assert engine.get_posts(removed_settings, None) == []
+    assert [call[0][0] for call in api_mock.call_args_list] == [
+        contributor_settings.user,
+        removed_settings.user,
+    ]
+
+
+def test_engine_serialize_posts(mocker):
+    """Each post should be serialized once, without the fields specific to a user"""
+    serializer_mock = mocker.patch("channels.serializers.posts.PostSerializer")
+    serializer_mock.return_value.data = {
+        "id": "abc",
+        "title": "post's title",
+        "upvoted": True,
+        "subscribed": False,
+    }
+    engine = frontpage.FrontpageDigestEngine([])
+    proxy = mocker.Mock(id="abc", author=None)
+
+    first = engine.serialize_posts([proxy])
+    second = engine.serialize_posts([proxy])
+
+    assert first == second == [{"id": "abc", "title": "post's title"}]
+    assert first[0] is not second[0]
+    serializer_mock.assert_called_once()
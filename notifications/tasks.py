@@ -95,3 +95,16 @@ def notify_subscribed_users(post_id, comment_id, new_comment_id):
         new_comment_id (str): base36 id of the new comment
     """
     api.send_comment_notifications(post_id, comment_id, new_comment_id)
+
+
+@app.task
+def create_comment_events_batch(post_id, new_comment_id, subscribers):
+    """
+    Creates the CommentEvents for a chunk of the subscribers to a new comment
+
+    Args:
+        post_id (str): base36 id of the post replied to
+        new_comment_id (str): base36 id of the new comment
+        subscribers (list of (int, str)): the user id and comment trigger frequency of each subscriber
+    """
+    api.create_comment_events(post_id, new_comment_id, subscribers)
@@ -99,3 +99,11 @@ def test_notify_subscribed_users(mocker):
 
     tasks.notify_subscribed_users.delay(1, 2, 3)
     api_mock.assert_called_once_with(1, 2, 3)
+
+
+def test_create_comment_events_batch(mocker):
+    """Tests that create_comment_events_batch calls the API method"""
+    api_mock = mocker.patch("notifications.api.create_comment_events")
+
+    tasks.create_comment_events_batch.delay("1", "abc", [[1, "immediate"]])
+    api_mock.assert_called_once_with("1", "abc", [[1, "immediate"]])
@@ -6,6 +6,8 @@ EMAIL_NOTIFICATIONS = "EMAIL_NOTIFICATIONS"
 FRONTPAGE_EMAIL_DIGESTS = "FRONTPAGE_EMAIL_DIGESTS"
 COMMENT_NOTIFICATIONS = "COMMENT_NOTIFICATIONS"
 INDEX_UPDATES = "INDEX_UPDATES"
+INDEX_UPDATE_BUFFER = "INDEX_UPDATE_BUFFER"
+INDEX_DELTA_SYNC = "INDEX_DELTA_SYNC"
 SAML_AUTH = "SAML_AUTH"
 PROFILE_UI = "PROFILE_UI"
 ARTICLE_UI = "ARTICLE_UI"
@@ -18,6 +20,8 @@ MOIRA = "MOIRA"
 WEBHOOK_OCW = "WEBHOOK_OCW"
 PODCAST_FRONTPAGE = "PODCAST_FRONTPAGE"
 PODCAST_APIS = "PODCAST_APIS"
+LOCAL_READS = "LOCAL_READS"
+BULK_ETL_LOADERS = "BULK_ETL_LOADERS"
 
 
 def is_enabled(name, default=None):
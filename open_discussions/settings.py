@@ -367,6 +367,12 @@ NOTIFICATION_ATTEMPT_CHUNK_SIZE = get_int(
 NOTIFICATION_SEND_CHUNK_SIZE = get_int(
     "OPEN_DISCUSSIONS_NOTIFICATION_SEND_CHUNK_SIZE", 100
 )
+# comment notifications with more subscribers than this are created by parallel tasks
+NOTIFICATION_COMMENT_FANOUT_CHUNK_SIZE = get_int(
+    "OPEN_DISCUSSIONS_NOTIFICATION_COMMENT_FANOUT_CHUNK_SIZE", 1000
+)
+# the number of threads sending the emails of a batch while the next emails are rendered
+NOTIFICATION_SEND_WORKERS = get_int("OPEN_DISCUSSIONS_NOTIFICATION_SEND_WORKERS", 4)
 
 # SAML settings
 SOCIAL_AUTH_SAML_SP_ENTITY_ID = get_string(
@@ -608,10 +614,27 @@ CELERY_BEAT_SCHEDULE = {
             "YOUTUBE_FETCH_TRANSCRIPT_SCHEDULE_SECONDS", 60 * 60 * 12
         ),  # default is 12 hours
     },
+    "delta-sync-search-index": {
+        "task": "search.tasks.delta_sync_index",
+        "schedule": get_int(
+            "ELASTICSEARCH_DELTA_SYNC_SCHEDULE_SECONDS", 60 * 10
+        ),  # default is every 10 minutes
+    },
+    "update-moira-list-users": {
+        "task": "moira_lists.tasks.update_all_moira_list_users",
+        "schedule": crontab(minute=0, hour=10),  # 6:00am EST
+    },
     "update-managed-channel-memberships": {
         "task": "channels.tasks.update_memberships_for_managed_channels",
         "schedule": crontab(minute=30, hour=10),  # 6:30am EST
     },
+    "reconcile-managed-channel-memberships": {
+        # the daily update only adds users missing from the local tables,
+        # this re-adds everyone to repair drift between reddit and those tables
+        "task": "channels.tasks.update_memberships_for_managed_channels",
+        "schedule": crontab(minute=30, hour=11, day_of_week=0),  # 7:30am EST sundays
+        "kwargs": {"full": True},
+    },
 }
 
 CELERY_TASK_SERIALIZER = "json"
@@ -650,7 +673,20 @@ else:
 if not ELASTICSEARCH_INDEX:
     raise ImproperlyConfigured("Missing ELASTICSEARCH_INDEX")
 ELASTICSEARCH_HTTP_AUTH = get_string("ELASTICSEARCH_HTTP_AUTH", None)
+ELASTICSEARCH_ALIAS_CACHE_TTL = get_int("ELASTICSEARCH_ALIAS_CACHE_TTL", 30)
+ELASTICSEARCH_CHANNEL_PERMISSIONS_CACHE_TTL = get_int(
+    "ELASTICSEARCH_CHANNEL_PERMISSIONS_CACHE_TTL", 60 * 60
+)
 ELASTICSEARCH_INDEXING_CHUNK_SIZE = get_int("ELASTICSEARCH_INDEXING_CHUNK_SIZE", 100)
+ELASTICSEARCH_INDEXING_CHUNK_BYTES = get_int(
+    "ELASTICSEARCH_INDEXING_CHUNK_BYTES", 10 * 1024 * 1024
+)
+ELASTICSEARCH_INDEXING_THREADS = get_int("ELASTICSEARCH_INDEXING_THREADS", 4)
+ELASTICSEARCH_UPDATE_BUFFER_SECONDS = get_int("ELASTICSEARCH_UPDATE_BUFFER_SECONDS", 2)
+ELASTICSEARCH_RESPONSE_CACHE_TTL = get_int("ELASTICSEARCH_RESPONSE_CACHE_TTL", 0)
+ELASTICSEARCH_RESPONSE_CACHE_STALE_SECONDS = get_int(
+    "ELASTICSEARCH_RESPONSE_CACHE_STALE_SECONDS", 0
+)
 ELASTICSEARCH_MIN_QUERY_SIZE = get_int("ELASTICSEARCH_MIN_QUERY_SIZE", 2)
 ELASTICSEARCH_MAX_SUGGEST_HITS = get_int("ELASTICSEARCH_MAX_SUGGEST_HITS", 1)
 ELASTICSEARCH_MAX_SUGGEST_RESULTS = get_int("ELASTICSEARCH_MAX_SUGGEST_RESULTS", 1)
@@ -663,6 +699,12 @@ INDEXING_ERROR_RETRIES = get_int("INDEXING_ERROR_RETRIES", 1)
 OPEN_DISCUSSIONS_REDDIT_CLIENT_ID = get_string(
     "OPEN_DISCUSSIONS_REDDIT_CLIENT_ID", None
 )
+OPEN_DISCUSSIONS_REDDIT_CLIENT_CACHE_SIZE = get_int(
+    "OPEN_DISCUSSIONS_REDDIT_CLIENT_CACHE_SIZE", 32
+)
+OPEN_DISCUSSIONS_REDDIT_POOL_MAXSIZE = get_int(
+    "OPEN_DISCUSSIONS_REDDIT_POOL_MAXSIZE", 10
+)
 OPEN_DISCUSSIONS_REDDIT_SECRET = get_string("OPEN_DISCUSSIONS_REDDIT_SECRET", None)
 OPEN_DISCUSSIONS_REDDIT_URL = get_string("OPEN_DISCUSSIONS_REDDIT_URL", "")
 OPEN_DISCUSSIONS_REDDIT_VALIDATE_SSL = get_bool(
@@ -674,6 +716,9 @@ OPEN_DISCUSSIONS_REDDIT_ACCESS_TOKEN = get_string(
 OPEN_DISCUSSIONS_REDDIT_COMMENTS_LIMIT = get_int(
     "OPEN_DISCUSSIONS_REDDIT_COMMENTS_LIMIT", 50
 )
+OPEN_DISCUSSIONS_REDDIT_MORE_COMMENTS_BATCH_SIZE = get_int(
+    "OPEN_DISCUSSIONS_REDDIT_MORE_COMMENTS_BATCH_SIZE", 100
+)
 
 # JWT authentication settings
 OPEN_DISCUSSIONS_JWT_SECRET = get_string(
@@ -681,6 +726,7 @@ OPEN_DISCUSSIONS_JWT_SECRET = get_string(
 )
 
 OPEN_DISCUSSIONS_CHANNEL_POST_LIMIT = get_int("OPEN_DISCUSSIONS_CHANNEL_POST_LIMIT", 25)
+OPEN_DISCUSSIONS_LISTING_CACHE_TTL = get_int("OPEN_DISCUSSIONS_LISTING_CACHE_TTL", 60)
 OPEN_DISCUSSIONS_MAX_COMMENT_DEPTH = get_int("OPEN_DISCUSSIONS_MAX_COMMENT_DEPTH", 6)
 
 OPEN_DISCUSSIONS_COOKIE_NAME = get_string("OPEN_DISCUSSIONS_COOKIE_NAME", None)
@@ -844,6 +890,7 @@ OCW_ITERATOR_CHUNK_SIZE = get_int("OCW_ITERATOR_CHUNK_SIZE", 1000)
 OCW_WEBHOOK_DELAY = get_int("OCW_WEBHOOK_DELAY", 120)
 OCW_WEBHOOK_KEY = get_string("OCW_WEBHOOK_KEY", None)
 MAX_S3_GET_ITERATIONS = get_int("MAX_S3_GET_ITERATIONS", 3)
+OCW_S3_FETCH_WORKERS = get_int("OCW_S3_FETCH_WORKERS", 8)
 
 # S3 Bucket info for exporting xPRO OLX
 XPRO_LEARNING_COURSE_BUCKET_NAME = get_string("XPRO_LEARNING_COURSE_BUCKET_NAME", None)
@@ -905,6 +952,7 @@ YOUTUBE_FETCH_TRANSCRIPT_SLEEP_SECONDS = get_int(
 
 # Tika security
 TIKA_ACCESS_TOKEN = get_string("TIKA_ACCESS_TOKEN", None)
+TIKA_EXTRACT_WORKERS = get_int("TIKA_EXTRACT_WORKERS", 4)
 
 
 # x509 certificate for moira
@@ -915,6 +963,10 @@ MIT_WS_PRIVATE_KEY = get_key("MIT_WS_PRIVATE_KEY", "")
 MIT_WS_CERTIFICATE_FILE = os.path.join(STATIC_ROOT, "mit_x509.cert")
 MIT_WS_PRIVATE_KEY_FILE = os.path.join(STATIC_ROOT, "mit_x509.key")
 
+# moira list lookups
+MOIRA_LISTS_CACHE_TTL = get_int("MOIRA_LISTS_CACHE_TTL", 60 * 15)
+MOIRA_LISTS_REFRESH_WORKERS = get_int("MOIRA_LISTS_REFRESH_WORKERS", 4)
+
 
 def setup_x509():
     """ write the moira x509 certification & key to files"""
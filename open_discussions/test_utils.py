@@ -2,9 +2,11 @@
 import abc
 import json
 from contextlib import contextmanager
+import time
 import traceback
 from unittest.mock import Mock
 
+from django.core.cache.backends.locmem import LocMemCache
 import pytest
 
 
@@ -101,3 +103,48 @@ class PickleableMock(Mock):
     def __reduce__(self):
         """Required method for being pickleable"""
         return (Mock, ())
+
+
+class LocMemLock:
+    """A lock stored in a LocMemCache, with the interface of redis.lock.Lock used by the app"""
+
+    def __init__(
+        self, cache, name, timeout=None, sleep=0.1, blocking_timeout=None
+    ):  # pylint: disable=too-many-arguments
+        self.cache = cache
+        self.name = name
+        self.timeout = timeout
+        self.sleep = sleep
+        self.blocking_timeout = blocking_timeout
+
+    def acquire(self):
+        """Wait up to blocking_timeout seconds for the lock, returning True if it was acquired"""
+        deadline = (
+            None
+            if self.blocking_timeout is None
+            else time.monotonic() + self.blocking_timeout
+        )
+        while not self.cache.add(self.name, 1, self.timeout):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.sleep)
+        return True
+
+    def release(self):
+        """Release the lock"""
+        self.cache.delete(self.name)
+
+
+class LockingLocMemCache(LocMemCache):
+    """A local memory cache which supports the lock() method of django_redis caches"""
+
+    def lock(self, key, timeout=None, sleep=0.1, blocking_timeout=None):
+        """
+        Get a lock stored in the cache
+
+        Returns:
+            LocMemLock: The lock
+        """
+        return LocMemLock(
+            self, key, timeout=timeout, sleep=sleep, blocking_timeout=blocking_timeout
+        )
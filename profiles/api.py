@@ -3,7 +3,7 @@ import tldextract
 
 from django.db import transaction
 
-from channels.models import ChannelGroupRole
+from channels.models import ChannelGroupRole, ChannelSubscription
 from profiles.models import (
     Profile,
     filter_profile_props,
@@ -83,19 +83,39 @@ def get_channel_join_dates(user):
     Returns:
         set of (str: Channel names, datetime: when they joined)
     """
+    return get_channel_join_dates_for_users([user.id])[user.id]
+
+
+def get_channel_join_dates_for_users(user_ids):
+    """
+    Get the list of channels and the dates that each of a group of users joined them
+
+    Args:
+        user_ids(iterable of int): the ids of the users to retrieve channel names for
+
+    Returns:
+        dict: lists of (str: Channel names, datetime: when they joined) keyed by user id
+    """
+    user_ids = list(user_ids)
     names_and_dates = list(
-        user.channelsubscription_set.values_list("channel__name", "created_on")
+        ChannelSubscription.objects.filter(user_id__in=user_ids).values_list(
+            "user_id", "channel__name", "created_on"
+        )
     ) + list(
-        ChannelGroupRole.objects.filter(group__in=user.groups.all()).values_list(
-            "channel__name", "created_on"
+        ChannelGroupRole.objects.filter(group__user__id__in=user_ids).values_list(
+            "group__user__id", "channel__name", "created_on"
         )
     )
 
-    output = {}
-    for name, joined in names_and_dates:
-        if name not in output or joined < output[name]:
-            output[name] = joined
-    return [(k, v) for k, v in output.items()]
+    output = {user_id: {} for user_id in user_ids}
+    for user_id, name, joined in names_and_dates:
+        user_output = output[user_id]
+        if name not in user_output or joined < user_output[name]:
+            user_output[name] = joined
+    return {
+        user_id: [(k, v) for k, v in user_output.items()]
+        for user_id, user_output in output.items()
+    }
 
 
 def get_site_type_from_url(url):
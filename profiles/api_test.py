@@ -10,6 +10,7 @@ from profiles import api
 from profiles.api import (
     get_channels,
     get_channel_join_dates,
+    get_channel_join_dates_for_users,
     get_site_type_from_url,
     after_profile_created_or_updated,
 )
@@ -100,6 +101,44 @@ def test_get_channel_join_dates(user):
     )
 
 
+def test_get_channel_join_dates_for_users(django_assert_num_queries):
+    """
+    get_channel_join_dates_for_users should return the earliest join date of each channel for each user
+    """
+    users = UserFactory.create_batch(3)
+    channels = ChannelFactory.create_batch(2)
+    sync_channel_subscription_model(channels[0], users[0])
+    add_user_role(channels[0], ROLE_CONTRIBUTORS, users[0])
+    add_user_role(channels[1], ROLE_MODERATORS, users[1])
+
+    with django_assert_num_queries(2):
+        join_dates = get_channel_join_dates_for_users(user.id for user in users)
+    assert join_dates == {
+        users[0].id: [
+            (
+                channels[0].name,
+                min(
+                    users[0]
+                    .channelsubscription_set.get(channel=channels[0])
+                    .created_on,
+                    ChannelGroupRole.objects.get(
+                        channel=channels[0], role=ROLE_CONTRIBUTORS
+                    ).created_on,
+                ),
+            )
+        ],
+        users[1].id: [
+            (
+                channels[1].name,
+                ChannelGroupRole.objects.get(
+                    channel=channels[1], role=ROLE_MODERATORS
+                ).created_on,
+            )
+        ],
+        users[2].id: [],
+    }
+
+
 @pytest.mark.parametrize(
     "url,exp_site_type",
     [
@@ -6,6 +6,8 @@ from elasticsearch_dsl import Q, Search
 from elasticsearch_dsl.query import MoreLikeThis
 
 from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
 from channels.constants import (
     CHANNEL_TYPE_PUBLIC,
     CHANNEL_TYPE_RESTRICTED,
@@ -17,8 +19,9 @@ from channels.constants import (
 from channels.models import ChannelGroupRole
 from course_catalog.constants import PrivacyLevel
 from course_catalog.models import FavoriteItem
-from course_catalog.utils import get_list_items_by_resource
+from course_catalog.utils import get_list_items_by_resources
 from open_discussions.utils import extract_values
+from search import response_cache
 from search.connection import get_default_alias_name
 from search.constants import (
     ALIAS_ALL_INDICES,
@@ -29,6 +32,8 @@ from search.constants import (
     LEARNING_RESOURCE_TYPES,
 )
 
+CHANNEL_PERMISSIONS_CACHE_KEY = "search:channel_permissions:{user_id}"
+CHANNEL_PERMISSIONS_VERSION_KEY = "search:channel_permissions_version:{user_id}"
 RELATED_POST_RELEVANT_FIELDS = ["plain_text", "post_title", "author_id", "channel_name"]
 SIMILAR_RESOURCE_RELEVANT_FIELDS = ["title", "short_description"]
 
@@ -169,6 +174,61 @@ def is_reddit_object_removed(reddit_obj):
     return bool(reddit_obj.banned_by) and not reddit_obj.approved_by
 
 
+def get_searchable_channel_names(user):
+    """
+    Get the names of the channels a user is a contributor or moderator of, which they can search
+    posts and comments of even if the channels are private. The names are cached per user, under
+    a version which is incremented whenever the user's roles change.
+
+    Args:
+        user (User): The user executing the search
+
+    Returns:
+        list of str: Sorted channel names
+    """
+    if user.is_anonymous:
+        return []
+
+    cache = caches["redis"]
+    version = cache.get(CHANNEL_PERMISSIONS_VERSION_KEY.format(user_id=user.id), 1)
+    cache_key = CHANNEL_PERMISSIONS_CACHE_KEY.format(user_id=user.id)
+    channel_names = cache.get(cache_key, version=version)
+    if channel_names is None:
+        channel_names = sorted(
+            ChannelGroupRole.objects.filter(
+                group__user=user, role__in=(ROLE_CONTRIBUTORS, ROLE_MODERATORS)
+            )
+            .values_list("channel__name", flat=True)
+            .distinct()
+        )
+        cache.set(
+            cache_key,
+            channel_names,
+            settings.ELASTICSEARCH_CHANNEL_PERMISSIONS_CACHE_TTL,
+            version=version,
+        )
+    return channel_names
+
+
+def invalidate_searchable_channel_names(user):
+    """
+    Invalidate the cached searchable channel names for a user once the current transaction commits
+
+    Args:
+        user (User): The user whose channel roles changed
+    """
+
+    def _increment_version():
+        """Move to a new version, so values cached for the old one are never read again"""
+        cache = caches["redis"]
+        version_key = CHANNEL_PERMISSIONS_VERSION_KEY.format(user_id=user.id)
+        # the version doesn't expire, otherwise it could go back to a version which is still cached
+        if not cache.add(version_key, 2, timeout=None):
+            cache.incr(version_key)
+
+    transaction.on_commit(_increment_version)
+
+
 # pylint: disable=invalid-unary-operand-type
 def _apply_general_query_filters(search, user):
     """
@@ -181,20 +241,10 @@ def _apply_general_query_filters(search, user):
     Returns:
         elasticsearch_dsl.Search: Search object with filters applied
     """
-    # Get the list of channels a logged in user is a contributor/moderator of
-    channel_names = (
-        sorted(
-            list(
-                ChannelGroupRole.objects.filter(
-                    group__user=user, role__in=(ROLE_CONTRIBUTORS, ROLE_MODERATORS)
-                )
-                .values_list("channel__name", flat=True)
-                .distinct()
-            )
-        )
-        if not user.is_anonymous
-        else []
-    )
+    # Get the list of channels a logged in user is a contributor/moderator of. The names are
+    # sorted so the terms filter is identical across requests and can be reused from the
+    # Elasticsearch query cache.
+    channel_names = get_searchable_channel_names(user)
 
     # Search for comments and posts from channels
     channels_filter = Q(
@@ -265,7 +315,9 @@ def execute_search(*, user, query):
     search = Search(index=index)
     search.update_from_dict(query)
     search = _apply_general_query_filters(search, user)
-    return _transform_search_results_suggest(search.execute().to_dict())
+    return _transform_search_results_suggest(
+        response_cache.execute_cached(search, index)
+    )
 
 
 def execute_learn_search(*, user, query):
@@ -283,7 +335,7 @@ def execute_learn_search(*, user, query):
     search = Search(index=index)
     search.update_from_dict(query)
     search = _apply_learning_query_filters(search, user)
-    return transform_results(search.execute().to_dict(), user)
+    return transform_results(response_cache.execute_cached(search, index), user)
 
 
 def _transform_search_results_suggest(search_result):
@@ -325,6 +377,39 @@ def _transform_search_results_suggest(search_result):
     return search_result
 
 
+def _annotate_learning_resource_hits(hits, user):
+    """
+    Add 'is_favorite' and 'lists' fields to the '_source' attributes of learning resource hits,
+    using one query for favorites and one for list items regardless of the number of hits
+
+    Args:
+        hits (list of dict): The hits from ElasticSearch
+        user (User): the user who performed the search
+    """
+    resource_hits = []
+    for hit in hits:
+        object_type = hit["_source"]["object_type"]
+        if object_type in LEARNING_RESOURCE_TYPES:
+            if object_type == LEARNING_PATH_TYPE:
+                object_type = USER_LIST_TYPE
+            resource_hits.append(((object_type, hit["_source"]["id"]), hit))
+    if not resource_hits:
+        return
+
+    resources = {resource for resource, _ in resource_hits}
+    favorites = set(
+        FavoriteItem.objects.filter(
+            user=user,
+            content_type__model__in={object_type for object_type, _ in resources},
+            object_id__in={object_id for _, object_id in resources},
+        ).values_list("content_type__model", "object_id")
+    )
+    list_items = get_list_items_by_resources(user, resources)
+    for resource, hit in resource_hits:
+        hit["_source"]["is_favorite"] = resource in favorites
+        hit["_source"]["lists"] = list_items[resource]
+
+
 def transform_results(search_result, user):
     """
     Transform the reverse nested availability aggregate counts into a format matching the other facets.
@@ -354,21 +439,9 @@ def transform_results(search_result, user):
             if bucket["courses"]["doc_count"] > 0
         ]
     if not user.is_anonymous:
-        favorites = (
-            FavoriteItem.objects.select_related("content_type")
-            .filter(user=user)
-            .values_list("content_type__model", "object_id")
+        _annotate_learning_resource_hits(
+            search_result.get("hits", {}).get("hits", []), user
         )
-        for hit in search_result.get("hits", {}).get("hits", []):
-            object_type = hit["_source"]["object_type"]
-            if object_type in LEARNING_RESOURCE_TYPES:
-                if object_type == LEARNING_PATH_TYPE:
-                    object_type = USER_LIST_TYPE
-                object_id = hit["_source"]["id"]
-                hit["_source"]["is_favorite"] = (object_type, object_id) in favorites
-                hit["_source"]["lists"] = get_list_items_by_resource(
-                    user, object_type, object_id
-                )
 
     search_result = _transform_search_results_suggest(search_result)
     return search_result
@@ -5,8 +5,13 @@ import pytest
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.contenttypes.models import ContentType
 
-from channels.constants import CHANNEL_TYPE_PUBLIC, CHANNEL_TYPE_RESTRICTED
-from channels.api import add_user_role
+from channels.constants import (
+    CHANNEL_TYPE_PUBLIC,
+    CHANNEL_TYPE_RESTRICTED,
+    ROLE_CONTRIBUTORS,
+    ROLE_MODERATORS,
+)
+from channels.api import add_user_role, remove_user_role
 from channels.factories.models import ChannelFactory
 from course_catalog.constants import PrivacyLevel
 from course_catalog.factories import (
@@ -32,6 +37,7 @@ from search.api import (
     find_similar_resources,
     SIMILAR_RESOURCE_RELEVANT_FIELDS,
     execute_learn_search,
+    get_searchable_channel_names,
 )
 from search.connection import get_default_alias_name
 from search.constants import (
@@ -682,6 +688,31 @@ def test_transform_results(
     )
 
 
+@pytest.mark.django_db
+def test_transform_results_num_queries(user, django_assert_num_queries):
+    """transform_results should annotate all learning resource hits with a fixed number of queries"""
+    courses = CourseFactory.create_batch(10)
+    user_list = UserListFactory.create(author=user)
+    for course in courses[::2]:
+        FavoriteItem.objects.create(
+            user=user,
+            content_type=ContentType.objects.get(model=COURSE_TYPE),
+            object_id=course.id,
+        )
+        UserListItemFactory.create(user_list=user_list, content_object=course)
+    hits = [
+        {"_source": {"object_type": COURSE_TYPE, "id": course.id}} for course in courses
+    ]
+    hits.append({"_source": {"object_type": "post"}})
+
+    with django_assert_num_queries(2):
+        results = transform_results({"hits": {"hits": hits}}, user)
+    for index, hit in enumerate(results["hits"]["hits"][:-1]):
+        assert hit["_source"]["is_favorite"] is (index % 2 == 0)
+        assert len(hit["_source"]["lists"]) == (1 if index % 2 == 0 else 0)
+    assert results["hits"]["hits"][-1] == {"_source": {"object_type": "post"}}
+
+
 def test_get_similar_topics(settings, elasticsearch):
     """Test get_similar_topics makes a query for similar document topics"""
     input_doc = {"title": "title text", "description": "description text"}
@@ -734,3 +765,42 @@ def test_get_similar_topics(settings, elasticsearch):
         doc_type=[],
         index=[f"{settings.ELASTICSEARCH_INDEX}_all_default"],
     )
+
+
+@pytest.fixture()
+def on_commit_mock(mocker):
+    """Run transaction.on_commit callbacks immediately"""
+    return mocker.patch(
+        "search.api.transaction.on_commit", side_effect=lambda func: func()
+    )
+
+
+@pytest.mark.django_db
+def test_get_searchable_channel_names(
+    django_assert_num_queries, on_commit_mock
+):  # pylint: disable=unused-argument
+    """get_searchable_channel_names should cache names until the user's roles change"""
+    user = UserFactory.create()
+    channels = sorted(ChannelFactory.create_batch(3), key=lambda channel: channel.name)
+    add_user_role(channels[2], ROLE_CONTRIBUTORS, user)
+    add_user_role(channels[0], ROLE_MODERATORS, user)
+    add_user_role(channels[0], ROLE_CONTRIBUTORS, user)
+    add_user_role(channels[1], ROLE_CONTRIBUTORS, UserFactory.create())
+
+    expected = [channels[0].name, channels[2].name]
+    with django_assert_num_queries(1):
+        assert get_searchable_channel_names(user) == expected
+    with django_assert_num_queries(0):
+        assert get_searchable_channel_names(user) == expected
+
+    add_user_role(channels[1], ROLE_CONTRIBUTORS, user)
+    assert get_searchable_channel_names(user) == [channel.name for channel in channels]
+    remove_user_role(channels[2], ROLE_CONTRIBUTORS, user)
+    assert get_searchable_channel_names(user) == [channels[0].name, channels[1].name]
+
+
+@pytest.mark.django_db
+def test_get_searchable_channel_names_anonymous(django_assert_num_queries):
+    """get_searchable_channel_names should return an empty list for anonymous users"""
+    with django_assert_num_queries(0):
+        assert get_searchable_channel_names(AnonymousUser()) == []
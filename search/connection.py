@@ -2,6 +2,8 @@
 Elasticsearch connection functionality
 """
 from functools import partial
+import threading
+import time
 import uuid
 
 from django.conf import settings
@@ -80,10 +82,94 @@ get_default_alias_name = partial(make_alias_name, False)
 get_reindexing_alias_name = partial(make_alias_name, True)
 
 
+# Process-local registry of alias name -> expiration timestamp. Default aliases are only cached
+# when they exist: they are moved between backing indexes but never deleted. Reindexing aliases are
+# only cached when they don't exist, since switch_indices deletes them and other processes would
+# keep writing to them.
+_alias_cache = {}
+_alias_cache_stats = {"hits": 0, "misses": 0}
+_alias_cache_lock = threading.Lock()
+
+
+def _alias_exists(conn, alias, cached_exists):
+    """
+    Check whether an alias exists, using the process-local alias cache if the entry
+    hasn't expired
+
+    Args:
+        conn(elasticsearch.client.Elasticsearch): An Elasticsearch client
+        alias(str): The alias name
+        cached_exists(bool): Whether the existence or the absence of the alias is cached
+
+    Returns:
+        bool: True if the alias exists
+    """
+    now = time.monotonic()
+    with _alias_cache_lock:
+        expires_at = _alias_cache.get(alias)
+        if expires_at is not None and expires_at > now:
+            _alias_cache_stats["hits"] += 1
+            return cached_exists
+        _alias_cache_stats["misses"] += 1
+
+    exists = bool(conn.indices.exists(alias))
+    with _alias_cache_lock:
+        if exists == cached_exists:
+            _alias_cache[alias] = now + settings.ELASTICSEARCH_ALIAS_CACHE_TTL
+        else:
+            _alias_cache.pop(alias, None)
+    return exists
+
+
+def invalidate_alias_cache(object_type=None):
+    """
+    Clear cached alias existence for an object type, or for all object types if none
+    is given.
+
+    Only the cache for the current process is cleared, other processes pick up the change
+    after ELASTICSEARCH_ALIAS_CACHE_TTL seconds.
+
+    Args:
+        object_type(str): The object type (post, comment, etc)
+    """
+    with _alias_cache_lock:
+        if object_type is None:
+            _alias_cache.clear()
+        else:
+            _alias_cache.pop(get_default_alias_name(object_type), None)
+            _alias_cache.pop(get_reindexing_alias_name(object_type), None)
+
+
+def get_alias_cache_stats():
+    """
+    Get hit and miss counts for the process-local alias cache
+
+    Returns:
+        dict: The number of hits and misses, and the number of cached aliases
+    """
+    with _alias_cache_lock:
+        return {**_alias_cache_stats, "size": len(_alias_cache)}
+
+
+def reset_alias_cache_stats():
+    """
+    Reset hit and miss counts for the process-local alias cache
+    """
+    with _alias_cache_lock:
+        _alias_cache_stats["hits"] = 0
+        _alias_cache_stats["misses"] = 0
+
+
 def get_active_aliases(conn, object_types):
     """
     Returns aliases which exist for specified object types
 
+    Default aliases which exist and reindexing aliases which don't exist are cached per process
+    for ELASTICSEARCH_ALIAS_CACHE_TTL seconds, so that steady-state writes don't need extra
+    requests. Reindexing aliases which exist are always checked, since switch_indices deletes them
+    while other processes are still writing. Other processes may not write to a reindexing alias
+    for up to ELASTICSEARCH_ALIAS_CACHE_TTL seconds after create_backing_index creates it.
+
     Args:
         conn(elasticsearch.client.Elasticsearch): An Elasticsearch client
         object_types(list of str): list of object types (post, comment, etc)
@@ -93,15 +179,15 @@ def get_active_aliases(conn, object_types):
     """
     if not object_types:
         object_types = VALID_OBJECT_TYPES
-    return [
-        alias
-        for alias_tuple in [
-            (get_default_alias_name(obj), get_reindexing_alias_name(obj))
-            for obj in object_types
-        ]
-        for alias in alias_tuple
-        if conn.indices.exists(alias)
-    ]
+    aliases = []
+    for object_type in object_types:
+        default_alias = get_default_alias_name(object_type)
+        if _alias_exists(conn, default_alias, True):
+            aliases.append(default_alias)
+        reindexing_alias = get_reindexing_alias_name(object_type)
+        if _alias_exists(conn, reindexing_alias, False):
+            aliases.append(reindexing_alias)
+    return aliases
 
 
 def refresh_index(index):
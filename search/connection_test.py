@@ -0,0 +1,133 @@
+"""Tests for Elasticsearch connection functionality"""
+import pytest
+
+from search.connection import (
+    get_active_aliases,
+    get_alias_cache_stats,
+    get_default_alias_name,
+    get_reindexing_alias_name,
+    invalidate_alias_cache,
+    reset_alias_cache_stats,
+)
+from search.constants import COMMENT_TYPE, POST_TYPE
+
+
+@pytest.fixture(autouse=True)
+def alias_cache_stats():
+    """Reset alias cache counters between tests"""
+    reset_alias_cache_stats()
+
+
+@pytest.mark.parametrize("default_exists", [True, False])
+@pytest.mark.parametrize("reindexing_exists", [True, False])
+def test_get_active_aliases(mocker, default_exists, reindexing_exists):
+    """get_active_aliases should return only the aliases which exist"""
+    exists = {
+        get_default_alias_name(POST_TYPE): default_exists,
+        get_reindexing_alias_name(POST_TYPE): reindexing_exists,
+    }
+    conn = mocker.Mock()
+    conn.indices.exists.side_effect = lambda alias: exists[alias]
+
+    assert get_active_aliases(conn, [POST_TYPE]) == [
+        alias for alias, alias_exists in exists.items() if alias_exists
+    ]
+
+
+def test_get_active_aliases_cached(mocker, settings):
+    """get_active_aliases should only check default alias existence once within the TTL"""
+    settings.ELASTICSEARCH_ALIAS_CACHE_TTL = 60
+    conn = mocker.Mock()
+    conn.indices.exists.return_value = True
+    expected = [get_default_alias_name(POST_TYPE), get_reindexing_alias_name(POST_TYPE)]
+
+    assert get_active_aliases(conn, [POST_TYPE]) == expected
+    assert get_active_aliases(conn, [POST_TYPE]) == expected
+    assert conn.indices.exists.call_args_list == [
+        mocker.call(get_default_alias_name(POST_TYPE)),
+        mocker.call(get_reindexing_alias_name(POST_TYPE)),
+        mocker.call(get_reindexing_alias_name(POST_TYPE)),
+    ]
+    assert get_alias_cache_stats() == {"hits": 1, "misses": 3, "size": 1}
+
+
+def test_get_active_aliases_reindexing_missing_cached(mocker, settings):
+    """get_active_aliases should only check that a reindexing alias is missing once within the TTL"""
+    settings.ELASTICSEARCH_ALIAS_CACHE_TTL = 60
+    exists = {
+        get_default_alias_name(POST_TYPE): True,
+        get_reindexing_alias_name(POST_TYPE): False,
+    }
+    conn = mocker.Mock()
+    conn.indices.exists.side_effect = lambda alias: exists[alias]
+    expected = [get_default_alias_name(POST_TYPE)]
+
+    assert get_active_aliases(conn, [POST_TYPE]) == expected
+    assert get_active_aliases(conn, [POST_TYPE]) == expected
+    assert conn.indices.exists.call_count == 2
+    assert get_alias_cache_stats() == {"hits": 2, "misses": 2, "size": 2}
+
+    # create_backing_index invalidates the cache after creating the reindexing alias
+    exists[get_reindexing_alias_name(POST_TYPE)] = True
+    invalidate_alias_cache(POST_TYPE)
+    assert get_active_aliases(conn, [POST_TYPE]) == list(exists)
+
+
+def test_get_active_aliases_reindexing_deleted(mocker, settings):
+    """get_active_aliases should stop returning the reindexing alias as soon as it's deleted"""
+    settings.ELASTICSEARCH_ALIAS_CACHE_TTL = 60
+    exists = {
+        get_default_alias_name(POST_TYPE): True,
+        get_reindexing_alias_name(POST_TYPE): True,
+    }
+    conn = mocker.Mock()
+    conn.indices.exists.side_effect = lambda alias: exists[alias]
+
+    assert get_active_aliases(conn, [POST_TYPE]) == list(exists)
+    # another process switched the indices
+    exists[get_reindexing_alias_name(POST_TYPE)] = False
+    assert get_active_aliases(conn, [POST_TYPE]) == [get_default_alias_name(POST_TYPE)]
+
+
+def test_get_active_aliases_missing_not_cached(mocker, settings):
+    """get_active_aliases should not cache a default alias which doesn't exist yet"""
+    settings.ELASTICSEARCH_ALIAS_CACHE_TTL = 60
+    conn = mocker.Mock()
+    conn.indices.exists.return_value = False
+
+    assert get_active_aliases(conn, [POST_TYPE]) == []
+    conn.indices.exists.return_value = True
+    assert get_active_aliases(conn, [POST_TYPE]) == [get_default_alias_name(POST_TYPE)]
+    assert get_alias_cache_stats() == {"hits": 1, "misses": 3, "size": 2}
+
+
+def test_get_active_aliases_expired(mocker, settings):
+    """get_active_aliases should check default alias existence again after the TTL expires"""
+    settings.ELASTICSEARCH_ALIAS_CACHE_TTL = 60
+    monotonic_mock = mocker.patch("search.connection.time.monotonic", return_value=0)
+    conn = mocker.Mock()
+    conn.indices.exists.return_value = True
+
+    get_active_aliases(conn, [POST_TYPE])
+    monotonic_mock.return_value = 61
+    get_active_aliases(conn, [POST_TYPE])
+    assert conn.indices.exists.call_count == 4
+    assert get_alias_cache_stats()["hits"] == 0
+
+
+def test_invalidate_alias_cache(mocker, settings):
+    """invalidate_alias_cache should only clear aliases for the given object type"""
+    settings.ELASTICSEARCH_ALIAS_CACHE_TTL = 60
+    conn = mocker.Mock()
+    conn.indices.exists.return_value = True
+    get_active_aliases(conn, [POST_TYPE, COMMENT_TYPE])
+    assert get_alias_cache_stats()["size"] == 2
+
+    invalidate_alias_cache(POST_TYPE)
+    assert get_alias_cache_stats()["size"] == 1
+    get_active_aliases(conn, [POST_TYPE, COMMENT_TYPE])
+    # both reindexing aliases and the invalidated default alias
+    assert conn.indices.exists.call_count == 4 + 3
+
+    invalidate_alias_cache()
+    assert get_alias_cache_stats()["size"] == 0
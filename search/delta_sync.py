@@ -0,0 +1,238 @@
+"""
+Incremental reindexing based on a per object type high-water mark
+
+Rows whose updated_on is after the watermark of their object type are reindexed, and the ids in
+the index are compared against the ids in the database so that documents for deleted rows are
+removed and rows missing from the index are added.
+"""
+from collections import namedtuple
+from datetime import timedelta
+import logging
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from channels.models import Comment, Post
+from course_catalog.models import Bootcamp, Course, Program, UserList, Video
+from course_catalog.utils import load_course_blacklist
+from open_discussions.utils import chunks, now_in_utc
+from search import indexing_api as api
+from search.api import (
+    gen_bootcamp_id,
+    gen_comment_id,
+    gen_course_id,
+    gen_post_id,
+    gen_program_id,
+    gen_user_list_id,
+    gen_video_id,
+)
+from search.constants import (
+    BOOTCAMP_TYPE,
+    COMMENT_TYPE,
+    COURSE_TYPE,
+    POST_TYPE,
+    PROGRAM_TYPE,
+    USER_LIST_TYPE,
+    VIDEO_TYPE,
+)
+from search.models import IndexWatermark
+
+
+log = logging.getLogger(__name__)
+
+DELTA_SYNC_LOCK_KEY = "search:delta_sync:lock"
+# Expiration of the lock, in case a worker dies while holding it
+DELTA_SYNC_LOCK_SECONDS = 60 * 60
+# Rows are selected with some overlap before the watermark, so that rows saved in a transaction
+# which committed after the previous sync started are not missed
+WATERMARK_OVERLAP = timedelta(minutes=1)
+
+DeltaSyncSource = namedtuple(
+    "DeltaSyncSource",
+    ["object_type", "index_func", "get_queryset", "gen_doc_id", "doc_id_fields"],
+)
+
+
+def get_delta_sync_sources():
+    """
+    Get the object types which can be synced incrementally. Profiles have no updated_on
+    timestamp and are kept up to date by the upsert_profile task instead.
+
+    Returns:
+        list of DeltaSyncSource: The object types with their indexing function, a function
+            returning the queryset of indexable objects, a function generating the ES document
+            id for an object and the fields that function needs
+    """
+    return [
+        DeltaSyncSource(
+            POST_TYPE,
+            api.index_posts,
+            Post.objects.all,
+            lambda post: gen_post_id(post.post_id),
+            ["post_id"],
+        ),
+        DeltaSyncSource(
+            COMMENT_TYPE,
+            api.index_comments,
+            Comment.objects.all,
+            lambda comment: gen_comment_id(comment.comment_id),
+            ["comment_id"],
+        ),
+        DeltaSyncSource(
+            COURSE_TYPE,
+            api.index_courses,
+            lambda: Course.objects.filter(published=True).exclude(
+                course_id__in=load_course_blacklist()
+            ),
+            lambda course: gen_course_id(course.platform, course.course_id),
+            ["platform", "course_id"],
+        ),
+        DeltaSyncSource(
+            BOOTCAMP_TYPE,
+            api.index_bootcamps,
+            lambda: Bootcamp.objects.filter(published=True),
+            lambda bootcamp: gen_bootcamp_id(bootcamp.course_id),
+            ["course_id"],
+        ),
+        DeltaSyncSource(
+            PROGRAM_TYPE,
+            api.index_programs,
+            lambda: Program.objects.filter(published=True),
+            gen_program_id,
+            [],
+        ),
+        DeltaSyncSource(
+            USER_LIST_TYPE,
+            api.index_user_lists,
+            lambda: UserList.objects.exclude(items=None),
+            gen_user_list_id,
+            [],
+        ),
+        DeltaSyncSource(
+            VIDEO_TYPE,
+            api.index_videos,
+            lambda: Video.objects.filter(published=True),
+            gen_video_id,
+            ["platform", "video_id"],
+        ),
+    ]
+
+
+def get_watermark(object_type):
+    """
+    Get the watermark for an object type
+
+    Args:
+        object_type (str): The object type
+
+    Returns:
+        datetime.datetime or None: The watermark, or None if the object type was never synced
+    """
+    watermark = IndexWatermark.objects.filter(object_type=object_type).first()
+    return watermark.watermark if watermark else None
+
+
+def set_watermark(object_type, watermark):
+    """
+    Set the watermark for an object type
+
+    Args:
+        object_type (str): The object type
+        watermark (datetime.datetime): Changes before this time have been indexed
+    """
+    IndexWatermark.objects.update_or_create(
+        object_type=object_type, defaults={"watermark": watermark}
+    )
+
+
+def _index_ids(source, ids):
+    """
+    Index objects in chunks
+
+    Args:
+        source (DeltaSyncSource): The object type to index
+        ids (iterable of int): Database ids of objects to index
+    """
+    for chunk in chunks(ids, chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE):
+        source.index_func(chunk)
+
+
+def sync_object_type(source, *, detect_deletions=True):
+    """
+    Index the objects of a type which changed since its watermark, and optionally reconcile the
+    ids in the index with the ids in the database.
+
+    If there is no watermark yet only the reconciliation is done, since the index is assumed to
+    be complete as of the last recreate_index.
+
+    Args:
+        source (DeltaSyncSource): The object type to sync
+        detect_deletions (bool):
+            If true, delete documents for objects which no longer exist or are no longer
+            indexable, and index objects which are missing from the index
+
+    Returns:
+        dict: The number of documents indexed and deleted
+    """
+    started_on = now_in_utc()
+    watermark = get_watermark(source.object_type)
+    queryset = source.get_queryset()
+
+    changed_ids = set()
+    if watermark is not None:
+        changed_ids.update(
+            queryset.filter(updated_on__gt=watermark - WATERMARK_OVERLAP).values_list(
+                "id", flat=True
+            )
+        )
+
+    deleted_doc_ids = set()
+    if detect_deletions:
+        # the index is scanned before the database is read, so that objects created and indexed
+        # in the meantime are in the database snapshot and aren't deleted from the index
+        indexed_doc_ids = api.get_indexed_document_ids(source.object_type)
+        ids_by_doc_id = {
+            source.gen_doc_id(obj): obj.id
+            for obj in queryset.only("id", *source.doc_id_fields).iterator()
+        }
+        changed_ids.update(
+            ids_by_doc_id[doc_id] for doc_id in ids_by_doc_id.keys() - indexed_doc_ids
+        )
+        deleted_doc_ids = indexed_doc_ids - ids_by_doc_id.keys()
+        api.delete_documents(deleted_doc_ids, source.object_type)
+
+    _index_ids(source, sorted(changed_ids))
+    set_watermark(source.object_type, started_on)
+    log.info(
+        "Delta sync for %s indexed %d and deleted %d documents",
+        source.object_type,
+        len(changed_ids),
+        len(deleted_doc_ids),
+    )
+    return {"indexed": len(changed_ids), "deleted": len(deleted_doc_ids)}
+
+
+def sync_all(*, detect_deletions=True):
+    """
+    Incrementally sync every object type, unless another sync is already in progress
+
+    Args:
+        detect_deletions (bool): If true, reconcile the ids in the index with the database
+
+    Returns:
+        dict or None:
+            Results of sync_object_type keyed by object type, or None if another sync is running
+    """
+    conn = get_redis_connection("redis")
+    if not conn.set(DELTA_SYNC_LOCK_KEY, 1, nx=True, ex=DELTA_SYNC_LOCK_SECONDS):
+        log.info("Skipping delta sync since another one is in progress")
+        return None
+    try:
+        return {
+            source.object_type: sync_object_type(
+                source, detect_deletions=detect_deletions
+            )
+            for source in get_delta_sync_sources()
+        }
+    finally:
+        conn.delete(DELTA_SYNC_LOCK_KEY)
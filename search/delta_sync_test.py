@@ -0,0 +1,153 @@
+"""Tests for incremental reindexing"""
+# pylint: disable=redefined-outer-name
+from datetime import timedelta
+
+import pytest
+
+from channels.factories.models import PostFactory
+from channels.models import Post
+from course_catalog.factories import CourseFactory
+from open_discussions.utils import now_in_utc
+from search.api import gen_course_id, gen_post_id
+from search.constants import COURSE_TYPE, POST_TYPE
+from search.delta_sync import (
+    DELTA_SYNC_LOCK_KEY,
+    WATERMARK_OVERLAP,
+    get_delta_sync_sources,
+    get_watermark,
+    set_watermark,
+    sync_all,
+    sync_object_type,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def post_source(mocker):
+    """The delta sync source for posts, with a mocked indexing function"""
+    source = next(
+        source for source in get_delta_sync_sources() if source.object_type == POST_TYPE
+    )
+    return source._replace(index_func=mocker.Mock())
+
+
+def test_watermark():
+    """get_watermark should return the watermark last set for an object type"""
+    assert get_watermark(POST_TYPE) is None
+    first, second = now_in_utc() - timedelta(days=1), now_in_utc()
+    set_watermark(POST_TYPE, first)
+    set_watermark(POST_TYPE, second)
+    assert get_watermark(POST_TYPE) == second
+    assert get_watermark(COURSE_TYPE) is None
+
+
+def test_sync_object_type_changed(mocker, settings, post_source):
+    """sync_object_type should index objects updated after the watermark, in chunks"""
+    settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE = 2
+    get_indexed_mock = mocker.patch(
+        "search.delta_sync.api.get_indexed_document_ids", autospec=True
+    )
+    watermark = now_in_utc() - timedelta(hours=1)
+    old_post = PostFactory.create()
+    Post.objects.filter(id=old_post.id).update(
+        updated_on=watermark - WATERMARK_OVERLAP - timedelta(minutes=1)
+    )
+    new_posts = sorted(PostFactory.create_batch(3), key=lambda post: post.id)
+    set_watermark(POST_TYPE, watermark)
+
+    assert sync_object_type(post_source, detect_deletions=False) == {
+        "indexed": 3,
+        "deleted": 0,
+    }
+    post_source.index_func.assert_has_calls(
+        [
+            mocker.call([new_posts[0].id, new_posts[1].id]),
+            mocker.call([new_posts[2].id]),
+        ]
+    )
+    assert get_indexed_mock.called is False
+    assert get_watermark(POST_TYPE) > watermark
+
+
+def test_sync_object_type_detect_deletions(mocker, post_source):
+    """sync_object_type should delete stale documents and index missing objects"""
+    indexed_post, missing_post = PostFactory.create_batch(2)
+    mocker.patch(
+        "search.delta_sync.api.get_indexed_document_ids",
+        autospec=True,
+        return_value={gen_post_id(indexed_post.post_id), "p_deleted"},
+    )
+    delete_mock = mocker.patch("search.delta_sync.api.delete_documents", autospec=True)
+
+    assert sync_object_type(post_source) == {"indexed": 1, "deleted": 1}
+    delete_mock.assert_called_once_with({"p_deleted"}, POST_TYPE)
+    post_source.index_func.assert_called_once_with([missing_post.id])
+    assert get_watermark(POST_TYPE) is not None
+
+
+def test_sync_object_type_unpublished_course(mocker):
+    """Documents for courses which are no longer published should be deleted"""
+    source = next(
+        source
+        for source in get_delta_sync_sources()
+        if source.object_type == COURSE_TYPE
+    )._replace(index_func=mocker.Mock())
+    mocker.patch("search.delta_sync.load_course_blacklist", return_value=[])
+    course = CourseFactory.create(published=False)
+    doc_id = gen_course_id(course.platform, course.course_id)
+    mocker.patch(
+        "search.delta_sync.api.get_indexed_document_ids",
+        autospec=True,
+        return_value={doc_id},
+    )
+    delete_mock = mocker.patch("search.delta_sync.api.delete_documents", autospec=True)
+
+    assert sync_object_type(source) == {"indexed": 0, "deleted": 1}
+    delete_mock.assert_called_once_with({doc_id}, COURSE_TYPE)
+    assert source.index_func.called is False
+
+
+def test_sync_object_type_created_during_scan(mocker, post_source):
+    """Objects created and indexed while the index is scanned should not be deleted"""
+    delete_mock = mocker.patch("search.delta_sync.api.delete_documents", autospec=True)
+
+    def create_post_while_scanning(object_type):  # pylint: disable=unused-argument
+        """Create and index a post during the scan"""
+        post = PostFactory.create()
+        return {gen_post_id(post.post_id)}
+
+    mocker.patch(
+        "search.delta_sync.api.get_indexed_document_ids",
+        autospec=True,
+        side_effect=create_post_while_scanning,
+    )
+
+    assert sync_object_type(post_source) == {"indexed": 0, "deleted": 0}
+    delete_mock.assert_called_once_with(set(), POST_TYPE)
+    assert post_source.index_func.called is False
+
+
+@pytest.mark.parametrize("locked", [True, False])
+def test_sync_all(mocker, locked):
+    """sync_all should sync every object type unless another sync holds the lock"""
+    conn = mocker.patch("search.delta_sync.get_redis_connection").return_value
+    conn.set.return_value = not locked
+    sync_mock = mocker.patch(
+        "search.delta_sync.sync_object_type",
+        autospec=True,
+        return_value={"indexed": 0, "deleted": 0},
+    )
+
+    result = sync_all(detect_deletions=False)
+    if locked:
+        assert result is None
+        assert sync_mock.called is False
+        assert conn.delete.called is False
+    else:
+        sources = get_delta_sync_sources()
+        assert result == {
+            source.object_type: {"indexed": 0, "deleted": 0} for source in sources
+        }
+        assert sync_mock.call_count == len(sources)
+        conn.delete.assert_called_once_with(DELTA_SYNC_LOCK_KEY)
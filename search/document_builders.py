@@ -0,0 +1,225 @@
+"""
+Functions which build Elasticsearch documents directly from model instances
+
+These produce the same output as the DRF serializers in search.serializers, without the per-object
+overhead of instantiating a serializer, binding its fields and copying the results. They are used
+for bulk indexing, where related objects should already be loaded with select_related or
+prefetch_related.
+"""
+from django.core.exceptions import ObjectDoesNotExist
+from rest_framework import serializers
+
+from channels.constants import COMMENT_TYPE, POST_TYPE
+from profiles.utils import image_uri
+from search.constants import COURSE_TYPE
+
+_datetime_field = serializers.DateTimeField()
+_price_field = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+def _str(value):
+    """Represent a value like a DRF CharField"""
+    return None if value is None else str(value)
+
+
+def _datetime(value):
+    """Represent a value like a DRF DateTimeField"""
+    return None if value is None else _datetime_field.to_representation(value)
+
+
+def _get_profile(user):
+    """
+    Get the profile of a user
+
+    Args:
+        user (User): A user, or None
+
+    Returns:
+        Profile: The user's profile, or None if there is no user or profile
+    """
+    if user is None:
+        return None
+    try:
+        return user.profile
+    except ObjectDoesNotExist:
+        return None
+
+
+def _author_fields(author):
+    """
+    Build the author fields shared by posts and comments
+
+    Args:
+        author (User): The author, or None
+
+    Returns:
+        dict: The author fields
+    """
+    profile = _get_profile(author)
+    return {
+        "author_avatar_small": image_uri(profile),
+        "author_id": _str(author.username) if author is not None else None,
+        "author_name": _str(profile.name) if profile is not None else None,
+        "author_headline": _str(profile.headline) if profile is not None else None,
+    }
+
+
+def build_post_document(post):
+    """
+    Build the ES document for a post. Equivalent to ESPostSerializer(post).data
+
+    Args:
+        post (channels.models.Post): A post, with channel, article, link_meta and author
+            profile already loaded
+
+    Returns:
+        dict: The ES document
+    """
+    channel = post.channel
+    article = getattr(post, "article", None)
+    return {
+        "post_type": post.post_type,
+        "post_slug": _str(post.slug),
+        "post_id": _str(post.post_id),
+        "post_title": _str(post.title),
+        "post_link_url": _str(post.url),
+        "post_link_thumbnail": _str(post.thumbnail_url),
+        **_author_fields(post.author),
+        "channel_name": _str(channel.name),
+        "channel_title": _str(channel.title),
+        "channel_type": _str(channel.channel_type),
+        "article_content": article.content if article is not None else None,
+        "plain_text": _str(post.plain_text),
+        "text": post.text,
+        "score": post.score,
+        "num_comments": post.num_comments,
+        "removed": post.removed,
+        "deleted": post.deleted,
+        "created": _datetime(post.created_on),
+        "object_type": POST_TYPE,
+    }
+
+
+def build_comment_document(comment):
+    """
+    Build the ES document for a comment. Equivalent to ESCommentSerializer(comment).data
+
+    Args:
+        comment (channels.models.Comment): A comment, with post, channel and author profile
+            already loaded
+
+    Returns:
+        dict: The ES document
+    """
+    post = comment.post
+    channel = post.channel
+    return {
+        "post_title": _str(post.title),
+        "post_id": _str(post.post_id),
+        "post_slug": _str(post.slug),
+        "comment_id": _str(comment.comment_id),
+        "parent_comment_id": _str(comment.parent_id),
+        **_author_fields(comment.author),
+        "channel_name": _str(channel.name),
+        "channel_title": _str(channel.title),
+        "channel_type": _str(channel.channel_type),
+        "text": comment.text,
+        "score": comment.score,
+        "removed": comment.removed,
+        "deleted": comment.deleted,
+        "created": _datetime(comment.created_on),
+        "object_type": COMMENT_TYPE,
+    }
+
+
+def _minimum_price(runs):
+    """
+    Get the minimum price of a list of runs, represented like LearningResourceSerializer does
+
+    Args:
+        runs (list of LearningResourceRun): Runs with prices already loaded
+
+    Returns:
+        str or int: The minimum price, or 0 if there are no runs
+    """
+    if not runs:
+        return 0
+    minimum = min(
+        (price.price for run in runs for price in run.prices.all()), default=0
+    )
+    return f"{minimum:.2f}"
+
+
+def build_run_document(run):
+    """
+    Build the ES representation of a run. Equivalent to ESRunSerializer(run).data
+
+    Args:
+        run (LearningResourceRun): A run, with prices, instructors and offered_by already loaded
+
+    Returns:
+        dict: The serialized run
+    """
+    return {
+        "id": run.id,
+        "run_id": _str(run.run_id),
+        "short_description": _str(run.short_description),
+        "full_description": _str(run.full_description),
+        "language": _str(run.language),
+        "semester": _str(run.semester),
+        "year": run.year,
+        "level": _str(run.level),
+        "start_date": _datetime(run.start_date),
+        "end_date": _datetime(run.end_date),
+        "enrollment_start": _datetime(run.enrollment_start),
+        "enrollment_end": _datetime(run.enrollment_end),
+        "best_start_date": _datetime(run.best_start_date),
+        "best_end_date": _datetime(run.best_end_date),
+        "title": _str(run.title),
+        "image_src": _str(run.image_src),
+        "prices": [
+            {"price": _price_field.to_representation(price.price), "mode": price.mode}
+            for price in run.prices.all()
+        ],
+        "instructors": [
+            instructor.full_name
+            or " ".join([instructor.first_name, instructor.last_name])
+            for instructor in run.instructors.all()
+        ],
+        "published": run.published,
+        "availability": run.availability.title() if run.availability else None,
+        "offered_by": [offeror.name for offeror in run.offered_by.all()],
+    }
+
+
+def build_course_document(course):
+    """
+    Build the ES document for a course. Equivalent to ESCourseSerializer(course).data
+
+    Args:
+        course (Course): A course, with topics, offered_by and runs (including their prices,
+            instructors and offered_by) already loaded
+
+    Returns:
+        dict: The ES document
+    """
+    runs = list(course.runs.all())
+    return {
+        "id": course.id,
+        "course_id": _str(course.course_id),
+        "coursenum": course.course_id.split("+")[-1],
+        "short_description": _str(course.short_description),
+        "full_description": _str(course.full_description),
+        "platform": _str(course.platform),
+        "title": _str(course.title),
+        "image_src": _str(course.image_src),
+        "topics": [topic.name for topic in course.topics.all()],
+        "published": course.published,
+        "offered_by": [offeror.name for offeror in course.offered_by.all()],
+        "runs": [build_run_document(run) for run in runs],
+        "created": _datetime(course.created_on),
+        "default_search_priority": 1,
+        "minimum_price": _minimum_price(runs),
+        "object_type": COURSE_TYPE,
+        "resource_relations": {"name": "resource"},
+    }
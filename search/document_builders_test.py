@@ -0,0 +1,87 @@
+"""Golden tests comparing the ES document builders with the DRF serializers"""
+from django.db.models import Prefetch
+import pytest
+
+from channels.factories.models import CommentFactory, PostFactory
+from channels.models import Comment, Post
+from course_catalog.factories import CourseFactory, LearningResourceRunFactory
+from course_catalog.models import Course, LearningResourceRun
+from search.document_builders import (
+    build_comment_document,
+    build_course_document,
+    build_post_document,
+)
+from search.serializers import ESCommentSerializer, ESCourseSerializer, ESPostSerializer
+
+pytestmark = pytest.mark.django_db
+
+
+def _sort_names(document):
+    """Sort the topic and offered_by names, whose order the serializers don't define"""
+    for field_name in ["topics", "offered_by"]:
+        if field_name in document:
+            document[field_name] = sorted(document[field_name])
+    for run in document.get("runs", []):
+        _sort_names(run)
+    return document
+
+
+@pytest.mark.parametrize(
+    "factory_kwargs",
+    [
+        {"is_text": True},
+        {"is_link": True},
+        {"is_article": True},
+        {"is_text": True, "removed": True, "score": 5},
+        {"unpopulated": True, "is_link": True},
+    ],
+)
+def test_build_post_document(factory_kwargs):
+    """build_post_document should match ESPostSerializer"""
+    post_id = PostFactory.create(**factory_kwargs).id
+    post = Post.objects.select_related(
+        "article", "link_meta", "channel", "author__profile"
+    ).get(id=post_id)
+    assert build_post_document(post) == ESPostSerializer(post).data
+
+
+@pytest.mark.parametrize(
+    "factory_kwargs", [{}, {"parent_id": None}, {"unpopulated": True}]
+)
+def test_build_comment_document(factory_kwargs):
+    """build_comment_document should match ESCommentSerializer"""
+    comment_id = CommentFactory.create(**factory_kwargs).id
+    comment = Comment.objects.select_related("post__channel", "author__profile").get(
+        id=comment_id
+    )
+    assert build_comment_document(comment) == ESCommentSerializer(comment).data
+
+
+@pytest.mark.parametrize("num_runs", [0, 1, 3])
+@pytest.mark.parametrize("with_prices", [True, False])
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_build_course_document(num_runs, with_prices, prefetch):
+    """build_course_document should match ESCourseSerializer"""
+    course = CourseFactory.create(runs=None)
+    LearningResourceRunFactory.create_batch(
+        num_runs, content_object=course, **({} if with_prices else {"prices": []})
+    )
+    LearningResourceRunFactory.create(content_object=course, published=False)
+
+    queryset = Course.objects.all()
+    if prefetch:
+        # the same prefetching as serialize_bulk_courses, which only loads published runs
+        queryset = queryset.prefetch_related(
+            "topics",
+            "offered_by",
+            Prefetch(
+                "runs",
+                queryset=LearningResourceRun.objects.filter(published=True)
+                .order_by("-best_start_date")
+                .prefetch_related("prices", "instructors", "offered_by"),
+            ),
+        )
+    course = queryset.get(id=course.id)
+    document = build_course_document(course)
+    assert len(document["runs"]) == num_runs + (0 if prefetch else 1)
+    assert _sort_names(document) == _sort_names(dict(ESCourseSerializer(course).data))
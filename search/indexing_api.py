@@ -1,22 +1,26 @@
 """
 Functions and constants for Elasticsearch indexing
 """
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import logging
+import time
 
-from elasticsearch.helpers import bulk
+from elasticsearch.helpers import bulk, expand_action, scan
+from elasticsearch.serializer import JSONSerializer
 from elasticsearch.exceptions import ConflictError, NotFoundError
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 
 from course_catalog.models import Course, ContentFile, LearningResourceRun
-from open_discussions.utils import chunks
+from search import response_cache
 from search.api import gen_course_id
 from search.connection import (
     get_active_aliases,
     get_conn,
     get_default_alias_name,
     get_reindexing_alias_name,
+    invalidate_alias_cache,
     make_backing_index_name,
     refresh_index,
 )
@@ -55,6 +59,10 @@ User = get_user_model()
 
 SCRIPTING_LANG = "painless"
 UPDATE_CONFLICT_SETTING = "proceed"
+DOCUMENT_SERIALIZER = JSONSerializer()
+BYTES_PER_MB = 1024 * 1024
+# Search results are filtered on these fields, so updates to them invalidate cached responses
+VISIBILITY_FIELDS = {"deleted", "removed"}
 
 ENGLISH_TEXT_FIELD = {
     "type": "text",
@@ -311,6 +319,7 @@ def create_document(doc_id, data):
     conn = get_conn()
     for alias in get_active_aliases(conn, [data["object_type"]]):
         conn.create(index=alias, doc_type=GLOBAL_DOC_TYPE, body=data, id=doc_id)
+    response_cache.bump_generation()
 
 
 def delete_document(doc_id, object_type, **kwargs):
@@ -330,6 +339,76 @@ def delete_document(doc_id, object_type, **kwargs):
             log.debug(
                 "Tried to delete an ES document that didn't exist, doc_id: '%s'", doc_id
             )
+    response_cache.bump_generation()
+
+
+def delete_documents(doc_ids, object_type):
+    """
+    Makes one bulk request per active alias to delete documents
+
+    Args:
+        doc_ids (iterable of str): The ES document ids
+        object_type (str): The object type
+    """
+    conn = get_conn()
+    actions = [{"_op_type": "delete", "_id": doc_id} for doc_id in doc_ids]
+    if not actions:
+        return
+    for alias in get_active_aliases(conn, [object_type]):
+        _, errors = bulk(
+            conn,
+            actions,
+            index=alias,
+            doc_type=GLOBAL_DOC_TYPE,
+            chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
+            raise_on_error=False,
+        )
+        for error in errors:
+            result = error["delete"]
+            if result["status"] != 404:
+                log.error(
+                    "Bulk delete request resulted in an error (alias: %s, doc id: %s, error: %s)",
+                    alias,
+                    result["_id"],
+                    result.get("error"),
+                )
+    response_cache.bump_generation()
+
+
+def bump_generation_for_visibility(field_names):
+    """
+    Invalidate cached search responses if a document update changes what search results include
+
+    Args:
+        field_names (iterable of str): The names of the updated fields
+    """
+    if VISIBILITY_FIELDS.intersection(field_names):
+        response_cache.bump_generation()
+
+
+def get_indexed_document_ids(object_type):
+    """
+    Get the ids of all documents in the default index of an object type
+
+    The documents aren't filtered on their object_type field, since an index can hold documents
+    of several object types (learning paths are indexed with user lists).
+
+    Args:
+        object_type (str): The object type of the index
+
+    Returns:
+        set of str: The ES document ids
+    """
+    conn = get_conn()
+    return {
+        hit["_id"]
+        for hit in scan(
+            conn,
+            index=get_default_alias_name(object_type),
+            query={"_source": False},
+            size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
+        )
+    }
 
 
 def update_field_values_by_query(query, field_dict, object_types=None):
@@ -375,6 +454,7 @@ def update_field_values_by_query(query, field_dict, object_types=None):
                 alias,
                 query,
             )
+    bump_generation_for_visibility(field_dict)
 
 
 def _update_document_by_id(doc_id, body, object_type, *, retry_on_conflict=0, **kwargs):
@@ -421,6 +501,7 @@ def update_document_with_partial(doc_id, doc, object_type, *, retry_on_conflict=
     _update_document_by_id(
         doc_id, {"doc": doc}, object_type, retry_on_conflict=retry_on_conflict
     )
+    bump_generation_for_visibility(doc)
 
 
 def upsert_document(doc_id, doc, object_type, *, retry_on_conflict=0, **kwargs):
@@ -466,6 +547,53 @@ def increment_document_integer_field(doc_id, field_name, incr_amount, object_typ
     )
 
 
+def bulk_update_documents(actions, object_type, *, aliases=None):
+    """
+    Makes one bulk request per alias to apply update actions
+
+    Args:
+        actions (list of dict): Bulk API update actions
+        object_type (str): The object type to update (post, comment, etc)
+        aliases (list of str): If set, only update these aliases instead of every active alias
+
+    Returns:
+        set of str: Ids of documents which were missing from every alias
+    """
+    conn = get_conn()
+    if aliases is None:
+        aliases = get_active_aliases(conn, [object_type])
+    missing_ids = None
+    for alias in aliases:
+        _, errors = bulk(
+            conn,
+            actions,
+            index=alias,
+            doc_type=GLOBAL_DOC_TYPE,
+            chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
+            raise_on_error=False,
+        )
+        alias_missing_ids = set()
+        for error in errors:
+            result = error["update"]
+            if result["status"] == 404:
+                alias_missing_ids.add(result["_id"])
+            else:
+                # Our policy for document update-related version conflicts right now is to log them
+                # and allow the app to continue as normal.
+                log.error(
+                    "Bulk update request resulted in an error (alias: %s, doc id: %s, error: %s)",
+                    alias,
+                    result["_id"],
+                    result.get("error"),
+                )
+        missing_ids = (
+            alias_missing_ids
+            if missing_ids is None
+            else missing_ids & alias_missing_ids
+        )
+    return missing_ids or set()
+
+
 def update_post(doc_id, post):
     """
     Serializes a Post object and updates it in the index
@@ -479,33 +607,143 @@ def update_post(doc_id, post):
     )
 
 
-def index_items(documents, object_type, **kwargs):
+def _serialize_bulk_action(document):
+    """
+    Serialize a document into the action and source lines of a bulk request
+
+    Args:
+        document (dict): An ElasticSearch document
+
+    Returns:
+        tuple of (str, str): The serialized action line and source line (None for deletions)
+    """
+    action, data = expand_action(document)
+    return (
+        DOCUMENT_SERIALIZER.dumps(action),
+        None if data is None else DOCUMENT_SERIALIZER.dumps(data),
+    )
+
+
+def _expand_serialized_action(serialized_action):
+    """
+    expand_action_callback for bulk which passes through actions from _serialize_bulk_action.
+    The elasticsearch serializer doesn't serialize strings again.
+
+    Args:
+        serialized_action (tuple of (str, str)): The serialized action and source lines
+
+    Returns:
+        tuple of (str, str): The serialized action and source lines
+    """
+    return serialized_action
+
+
+def _chunk_documents(documents):
+    """
+    Yields chunks of serialized documents which are limited both by document count and by size
+
+    Each document is serialized once here, and the same serialized chunk is sent to every alias.
+
+    Args:
+        documents (iterable of dict): ElasticSearch documents
+
+    Yields:
+        tuple of (list of tuple of (str, str), int):
+            A chunk of serialized bulk actions and its size in bytes
+    """
+    max_docs = max(1, settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE)
+    max_bytes = settings.ELASTICSEARCH_INDEXING_CHUNK_BYTES
+    chunk, chunk_bytes = [], 0
+    for document in documents:
+        serialized_action = _serialize_bulk_action(document)
+        doc_bytes = sum(
+            len(line.encode("utf-8")) + 1
+            for line in serialized_action
+            if line is not None
+        )
+        if chunk and (len(chunk) >= max_docs or chunk_bytes + doc_bytes > max_bytes):
+            yield chunk, chunk_bytes
+            chunk, chunk_bytes = [], 0
+        chunk.append(serialized_action)
+        chunk_bytes += doc_bytes
+    if chunk:
+        yield chunk, chunk_bytes
+
+
+def _raise_for_bulk_errors(futures, object_type):
+    """
+    Wait for bulk requests and raise an exception if any of them had errors
+
+    Args:
+        futures (iterable of concurrent.futures.Future): Futures for bulk requests
+        object_type (str): the ES object type
+    """
+    for future in futures:
+        _, errors = future.result()
+        if len(errors) > 0:
+            raise ReindexException(f"Error during bulk {object_type} insert: {errors}")
+
+
+def index_items(documents, object_type, **kwargs):  # pylint: disable=too-many-locals
     """
     Index items based on list of item ids
 
+    Documents are serialized and chunked on the calling thread (Django database connections are
+    per-thread) while the bulk requests for every active alias are sent from a bounded pool of
+    worker threads, so serialization and network I/O overlap.
+
     Args:
         documents (iterable of dict): An iterable with ElasticSearch documents to index
         object_type (str): the ES object type
     """
     conn = get_conn()
-    # bulk will also break an iterable into chunks. However we should do this here so that
-    # we can use the same documents when indexing to multiple aliases.
-    for chunk in chunks(
-        documents, chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE
-    ):
-        for alias in get_active_aliases(conn, [object_type]):
-            _, errors = bulk(
-                conn,
-                chunk,
-                index=alias,
-                doc_type=GLOBAL_DOC_TYPE,
-                chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
-                **kwargs,
-            )
-            if len(errors) > 0:
-                raise ReindexException(
-                    f"Error during bulk {object_type} insert: {errors}"
-                )
+    max_workers = max(1, settings.ELASTICSEARCH_INDEXING_THREADS)
+    max_pending = max_workers * 2
+    start = time.monotonic()
+    total_docs, total_bytes = 0, 0
+    pending = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            # bulk will also break an iterable into chunks. However we should do this here so that
+            # we can use the same documents when indexing to multiple aliases.
+            for chunk, chunk_bytes in _chunk_documents(documents):
+                for alias in get_active_aliases(conn, [object_type]):
+                    pending.add(
+                        executor.submit(
+                            bulk,
+                            conn,
+                            chunk,
+                            index=alias,
+                            doc_type=GLOBAL_DOC_TYPE,
+                            chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
+                            max_chunk_bytes=settings.ELASTICSEARCH_INDEXING_CHUNK_BYTES,
+                            expand_action_callback=_expand_serialized_action,
+                            **kwargs,
+                        )
+                    )
+                total_docs += len(chunk)
+                total_bytes += chunk_bytes
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    _raise_for_bulk_errors(done, object_type)
+            done, pending = wait(pending)
+            _raise_for_bulk_errors(done, object_type)
+        finally:
+            # If a bulk request failed, don't send any requests which haven't started yet
+            for future in pending:
+                future.cancel()
+    response_cache.bump_generation()
+
+    elapsed = max(time.monotonic() - start, 1e-6)
+    log.info(
+        "Indexed %d %s documents (%.2f MB) in %.1f seconds: %.1f docs/sec, %.2f MB/sec",
+        total_docs,
+        object_type,
+        total_bytes / BYTES_PER_MB,
+        elapsed,
+        total_docs / elapsed,
+        total_bytes / BYTES_PER_MB / elapsed,
+    )
 
 
 def index_posts(ids):
@@ -562,17 +800,21 @@ def index_course_content_files(course_ids):
         index_run_content_files(run_id)
 
 
-def index_run_content_files(run_id):
+def index_run_content_files(run_id, content_file_ids=None):
     """
     Index a list of content files by run id
 
     Args:
         run_id(int): Course run id
+        content_file_ids(list of int): If set, only index these content files of the run
     """
     run = LearningResourceRun.objects.get(id=run_id)
+    content_files = run.content_files.all()
+    if content_file_ids is not None:
+        content_files = content_files.filter(id__in=content_file_ids)
     documents = (
         serialize_content_file_for_bulk(content_file)
-        for content_file in run.content_files.select_related("run")
+        for content_file in content_files.select_related("run")
         .prefetch_related("run__content_object")
         .defer("run__raw_json")
     )
@@ -585,17 +827,23 @@ def index_run_content_files(run_id):
     )
 
 
-def delete_run_content_files(run_id):
+def delete_run_content_files(run_id, keys=None):
     """
     Delete a list of content files by run from the index
 
     Args:
         run_id(int): Course run id
+        keys(list of str): If set, delete the content files with these keys, which don't need to
+            be in the database anymore, instead of the content files of the run
     """
     run = LearningResourceRun.objects.get(id=run_id)
+    if keys is None:
+        content_files = ContentFile.objects.filter(run=run)
+    else:
+        content_files = [ContentFile(run=run, key=key) for key in keys]
     documents = (
         serialize_content_file_for_bulk_deletion(content_file)
-        for content_file in ContentFile.objects.filter(run=run)
+        for content_file in content_files
     )
     course = run.content_object
     index_items(
@@ -669,6 +917,7 @@ def create_backing_index(object_type):
 
     # Point temp_alias toward new backing index
     conn.indices.put_alias(index=new_backing_index, name=temp_alias)
+    invalidate_alias_cache(object_type)
 
     return new_backing_index
 
@@ -711,3 +960,5 @@ def switch_indices(backing_index, object_type):
     conn.indices.delete_alias(
         name=get_reindexing_alias_name(object_type), index=backing_index
     )
+    invalidate_alias_cache(object_type)
+    response_cache.bump_generation()
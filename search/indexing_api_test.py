@@ -14,9 +14,15 @@ from course_catalog.factories import (
     ContentFileFactory,
 )
 from open_discussions.utils import chunks
-from search.api import gen_course_id
+from search.api import gen_content_file_id, gen_course_id
 from search.connection import get_default_alias_name
-from search.constants import POST_TYPE, COMMENT_TYPE, ALIAS_ALL_INDICES, GLOBAL_DOC_TYPE
+from search.constants import (
+    POST_TYPE,
+    COMMENT_TYPE,
+    ALIAS_ALL_INDICES,
+    GLOBAL_DOC_TYPE,
+    USER_LIST_TYPE,
+)
 from search.exceptions import ReindexException
 from search import indexing_api
 from search.indexing_api import (
@@ -34,10 +40,18 @@ from search.indexing_api import (
     delete_document,
     index_course_content_files,
 )
+from search.response_cache import get_generation
 
 pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("mocked_es")]
 
 
+def _serialize(document):
+    """Serialize a document into its bulk action and source lines"""
+    return indexing_api._serialize_bulk_action(  # pylint: disable=protected-access
+        document
+    )
+
+
 @pytest.fixture()
 def mocked_es(mocker, settings):
     """Mocked ES client objects/functions"""
@@ -75,6 +89,7 @@ def test_create_document(mocked_es, mocker, object_type):
     mocked_es.conn.create.assert_any_call(
         index=object_type, doc_type=GLOBAL_DOC_TYPE, body=data, id=doc_id
     )
+    assert get_generation() == 1
 
 
 @pytest.mark.parametrize(
@@ -134,6 +149,22 @@ def test_update_document_with_partial(mocked_es, mocker, object_type):
         id=doc_id,
         params={"retry_on_conflict": 0},
     )
+    # partial updates don't invalidate cached search responses
+    assert get_generation() == 0
+
+
+@pytest.mark.parametrize("field_name", ["removed", "deleted"])
+def test_update_visibility_fields(mocked_es, mocker, field_name):
+    """
+    Partial updates which change whether a document is included in search results should
+    invalidate cached search responses
+    """
+    mocker.patch("search.indexing_api.get_active_aliases", return_value=[POST_TYPE])
+    mocked_es.conn.update_by_query.return_value = {}
+    update_document_with_partial("doc_id", {field_name: True}, POST_TYPE)
+    assert get_generation() == 1
+    update_field_values_by_query({"query": None}, {field_name: True}, [COMMENT_TYPE])
+    assert get_generation() == 2
 
 
 def test_update_partial_conflict_logging(mocker, mocked_es):
@@ -190,6 +221,7 @@ def test_increment_document_integer_field(mocked_es):
             id=doc_id,
             params={"retry_on_conflict": 0},
         )
+    assert get_generation() == 0
 
 
 @pytest.mark.parametrize("object_type", [POST_TYPE, COMMENT_TYPE])
@@ -240,6 +272,9 @@ def test_switch_indices(mocked_es, mocker, default_exists, object_type):
     for the default alias and replace it with the new one
     """
     refresh_mock = mocker.patch("search.indexing_api.refresh_index", autospec=True)
+    invalidate_mock = mocker.patch(
+        "search.indexing_api.invalidate_alias_cache", autospec=True
+    )
     conn_mock = mocked_es.conn
     conn_mock.indices.exists_alias.return_value = default_exists
     old_backing_index = "old_backing"
@@ -247,6 +282,7 @@ def test_switch_indices(mocked_es, mocker, default_exists, object_type):
 
     backing_index = "backing"
     switch_indices(backing_index, object_type)
+    assert get_generation() == 1
 
     conn_mock.indices.delete_alias.assert_any_call(
         name=get_reindexing_alias_name(object_type), index=backing_index
@@ -279,6 +315,7 @@ def test_switch_indices(mocked_es, mocker, default_exists, object_type):
     conn_mock.indices.delete_alias.assert_called_once_with(
         name=get_reindexing_alias_name(object_type), index=backing_index
     )
+    invalidate_mock.assert_called_once_with(object_type)
 
 
 @pytest.mark.parametrize("temp_alias_exists", [True, False])
@@ -298,6 +335,9 @@ def test_create_backing_index(mocked_es, mocker, temp_alias_exists):
     make_backing_index_mock = mocker.patch(
         "search.indexing_api.make_backing_index_name", return_value=backing_index
     )
+    invalidate_mock = mocker.patch(
+        "search.indexing_api.invalidate_alias_cache", autospec=True
+    )
 
     assert create_backing_index(POST_TYPE) == backing_index
 
@@ -318,6 +358,7 @@ def test_create_backing_index(mocked_es, mocker, temp_alias_exists):
     conn_mock.indices.put_alias.assert_called_once_with(
         index=backing_index, name=reindexing_alias
     )
+    invalidate_mock.assert_called_once_with(POST_TYPE)
 
 
 @pytest.mark.usefixtures("indexing_user")
@@ -367,13 +408,70 @@ def test_index_functions(
             ):
                 bulk_mock.assert_any_call(
                     mocked_es.conn,
-                    chunk,
+                    [_serialize(doc) for doc in chunk],
                     index=alias,
                     doc_type=GLOBAL_DOC_TYPE,
                     chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
+                    max_chunk_bytes=settings.ELASTICSEARCH_INDEXING_CHUNK_BYTES,
+                    expand_action_callback=indexing_api._expand_serialized_action,  # pylint: disable=protected-access
                 )
 
 
+@pytest.mark.parametrize("threads", [1, 3])
+def test_index_items_chunk_bytes(mocked_es, mocker, settings, threads):
+    """
+    index_items should limit chunks by serialized size as well as count, and log throughput
+    """
+    settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE = 10
+    settings.ELASTICSEARCH_INDEXING_CHUNK_BYTES = 80
+    settings.ELASTICSEARCH_INDEXING_THREADS = threads
+    patched_logger = mocker.patch("search.indexing_api.log")
+    mocker.patch(
+        "search.indexing_api.get_active_aliases", autospec=True, return_value=["a", "b"]
+    )
+    bulk_mock = mocker.patch(
+        "search.indexing_api.bulk", autospec=True, return_value=(0, [])
+    )
+    # each document serializes to 39 bytes of action and source lines
+    documents = [{"_id": str(idx), "text": "abcde"} for idx in range(5)]
+
+    indexing_api.index_items(documents, POST_TYPE)
+
+    assert bulk_mock.call_count == 6
+    for alias in ["a", "b"]:
+        for chunk in chunks(documents, chunk_size=2):
+            bulk_mock.assert_any_call(
+                mocked_es.conn,
+                [
+                    ('{"index":{"_id":"%s"}}' % doc["_id"], '{"text":"abcde"}')
+                    for doc in chunk
+                ],
+                index=alias,
+                doc_type=GLOBAL_DOC_TYPE,
+                chunk_size=10,
+                max_chunk_bytes=80,
+                expand_action_callback=indexing_api._expand_serialized_action,  # pylint: disable=protected-access
+            )
+    assert patched_logger.info.call_args[0][1:4] == (
+        5,
+        POST_TYPE,
+        5 * 39 / (1024 * 1024),
+    )
+
+
+@pytest.mark.parametrize(
+    "document, expected",
+    [
+        [{"_id": "1", "text": "é"}, ('{"index":{"_id":"1"}}', '{"text":"é"}')],
+        [{"_id": "1", "_op_type": "delete"}, ('{"delete":{"_id":"1"}}', None)],
+        ["raw", ('{"index":{}}', "raw")],
+    ],
+)
+def test_serialize_bulk_action(document, expected):
+    """_serialize_bulk_action should serialize the action and source lines of a bulk request"""
+    assert _serialize(document) == expected
+
+
 def test_delete_document(mocked_es, mocker):
     """
     ES should try deleting the specified document from the correct index
@@ -385,6 +483,7 @@ def test_delete_document(mocked_es, mocker):
     mocked_es.conn.delete.assert_called_with(
         index="a", doc_type=GLOBAL_DOC_TYPE, id=1, params={}
     )
+    assert get_generation() == 1
 
 
 def test_delete_document_not_found(mocked_es, mocker):
@@ -463,9 +562,162 @@ def test_bulk_index_content_files(
             ):
                 bulk_mock.assert_any_call(
                     mocked_es.conn,
-                    chunk,
+                    [_serialize(doc) for doc in chunk],
                     index=alias,
                     doc_type=GLOBAL_DOC_TYPE,
                     chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
+                    max_chunk_bytes=settings.ELASTICSEARCH_INDEXING_CHUNK_BYTES,
+                    expand_action_callback=indexing_api._expand_serialized_action,  # pylint: disable=protected-access
                     routing=gen_course_id(course.platform, course.course_id),
                 )
+
+
+def test_index_run_content_files_subset(mocker):
+    """index_run_content_files and delete_run_content_files should handle a subset of content files"""
+    course = CourseFactory.create()
+    run = LearningResourceRunFactory.create(content_object=course)
+    content_files = ContentFileFactory.create_batch(3, run=run)
+    mock_index_items = mocker.patch("search.indexing_api.index_items", autospec=True)
+    mock_serialize = mocker.patch(
+        "search.indexing_api.serialize_content_file_for_bulk",
+        autospec=True,
+        side_effect=lambda content_file: content_file.id,
+    )
+
+    indexing_api.index_run_content_files(
+        run.id, content_file_ids=[content_files[0].id, content_files[2].id]
+    )
+    assert list(mock_index_items.call_args[0][0]) == [
+        content_files[0].id,
+        content_files[2].id,
+    ]
+    assert mock_serialize.call_count == 2
+
+    indexing_api.delete_run_content_files(run.id, keys=["deleted/key"])
+    assert list(mock_index_items.call_args[0][0]) == [
+        {"_id": gen_content_file_id("deleted/key"), "_op_type": "delete"}
+    ]
+    assert mock_index_items.call_args[1] == {
+        "routing": gen_course_id(course.platform, course.course_id)
+    }
+
+
+def test_bulk_update_documents(mocked_es, mocker, settings):
+    """
+    bulk_update_documents should send the actions to each alias and return ids missing from all of them
+    """
+    settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE = 3
+    patched_logger = mocker.patch("search.indexing_api.log")
+    mocker.patch(
+        "search.indexing_api.get_active_aliases", autospec=True, return_value=["a", "b"]
+    )
+    bulk_mock = mocker.patch(
+        "search.indexing_api.bulk",
+        autospec=True,
+        side_effect=[
+            (
+                1,
+                [
+                    {"update": {"_id": "doc_1", "status": 404}},
+                    {"update": {"_id": "doc_2", "status": 404}},
+                ],
+            ),
+            (
+                2,
+                [
+                    {"update": {"_id": "doc_1", "status": 404}},
+                    {"update": {"_id": "doc_3", "status": 409, "error": "conflict"}},
+                ],
+            ),
+        ],
+    )
+    actions = [{"_op_type": "update", "_id": "doc_1", "doc": {"text": "new"}}]
+
+    assert indexing_api.bulk_update_documents(actions, POST_TYPE) == {"doc_1"}
+    for alias in ["a", "b"]:
+        bulk_mock.assert_any_call(
+            mocked_es.conn,
+            actions,
+            index=alias,
+            doc_type=GLOBAL_DOC_TYPE,
+            chunk_size=3,
+            raise_on_error=False,
+        )
+    assert patched_logger.error.call_count == 1
+    assert get_generation() == 0
+
+
+@pytest.mark.usefixtures("mocked_es")
+def test_bulk_update_documents_aliases(mocker):
+    """bulk_update_documents should only update the given aliases if any are passed"""
+    mock_get_aliases = mocker.patch(
+        "search.indexing_api.get_active_aliases", autospec=True
+    )
+    bulk_mock = mocker.patch(
+        "search.indexing_api.bulk", autospec=True, return_value=(1, [])
+    )
+    actions = [{"_op_type": "update", "_id": "doc_1", "doc": {"text": "new"}}]
+
+    assert (
+        indexing_api.bulk_update_documents(actions, POST_TYPE, aliases=["b"]) == set()
+    )
+    assert bulk_mock.call_count == 1
+    assert bulk_mock.call_args[1]["index"] == "b"
+    mock_get_aliases.assert_not_called()
+
+
+def test_delete_documents(mocked_es, mocker, settings):
+    """delete_documents should send delete actions to each alias and ignore missing documents"""
+    settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE = 3
+    patched_logger = mocker.patch("search.indexing_api.log")
+    mocker.patch(
+        "search.indexing_api.get_active_aliases", autospec=True, return_value=["a", "b"]
+    )
+    bulk_mock = mocker.patch(
+        "search.indexing_api.bulk",
+        autospec=True,
+        side_effect=[
+            (1, [{"delete": {"_id": "doc_2", "status": 404}}]),
+            (1, [{"delete": {"_id": "doc_2", "status": 500, "error": "error"}}]),
+        ],
+    )
+
+    indexing_api.delete_documents(["doc_1", "doc_2"], POST_TYPE)
+    for alias in ["a", "b"]:
+        bulk_mock.assert_any_call(
+            mocked_es.conn,
+            [
+                {"_op_type": "delete", "_id": "doc_1"},
+                {"_op_type": "delete", "_id": "doc_2"},
+            ],
+            index=alias,
+            doc_type=GLOBAL_DOC_TYPE,
+            chunk_size=3,
+            raise_on_error=False,
+        )
+    assert patched_logger.error.call_count == 1
+
+
+def test_delete_documents_empty(mocker):
+    """delete_documents should not make any requests if there are no documents to delete"""
+    bulk_mock = mocker.patch("search.indexing_api.bulk", autospec=True)
+    indexing_api.delete_documents([], POST_TYPE)
+    assert bulk_mock.called is False
+
+
+def test_get_indexed_document_ids(mocked_es, mocker, settings):
+    """get_indexed_document_ids should scan the default alias for document ids"""
+    settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE = 3
+    scan_mock = mocker.patch(
+        "search.indexing_api.scan",
+        autospec=True,
+        return_value=iter([{"_id": "p_1"}, {"_id": "p_2"}]),
+    )
+    assert indexing_api.get_indexed_document_ids(USER_LIST_TYPE) == {"p_1", "p_2"}
+    # learning paths are in the user list index with a different object_type
+    scan_mock.assert_called_once_with(
+        mocked_es.conn,
+        index=get_default_alias_name(USER_LIST_TYPE),
+        query={"_source": False},
+        size=3,
+    )
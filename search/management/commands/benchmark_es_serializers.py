@@ -0,0 +1,101 @@
+"""Management command to compare the speed of the DRF serializers and the ES document builders"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from channels.models import Comment, Post
+from course_catalog.models import Course, LearningResourceRun
+from search.constants import COMMENT_TYPE, COURSE_TYPE, POST_TYPE
+from search.document_builders import (
+    build_comment_document,
+    build_course_document,
+    build_post_document,
+)
+from search.serializers import ESCommentSerializer, ESCourseSerializer, ESPostSerializer
+
+
+def _get_objects(object_type, limit):
+    """
+    Load objects with the same related objects as bulk indexing does
+
+    Args:
+        object_type (str): The object type
+        limit (int): The maximum number of objects to load
+
+    Returns:
+        list: Model objects
+    """
+    if object_type == POST_TYPE:
+        queryset = Post.objects.select_related(
+            "article", "link_meta", "channel", "author__profile"
+        )
+    elif object_type == COMMENT_TYPE:
+        queryset = Comment.objects.select_related("post__channel", "author__profile")
+    else:
+        queryset = Course.objects.filter(published=True).prefetch_related(
+            "topics",
+            "offered_by",
+            Prefetch(
+                "runs",
+                queryset=LearningResourceRun.objects.filter(published=True)
+                .order_by("-best_start_date")
+                .defer("raw_json")
+                .prefetch_related("prices", "instructors", "offered_by"),
+            ),
+        )
+    return list(queryset.order_by("id")[:limit])
+
+
+def _docs_per_second(serialize, objects):
+    """
+    Time how long it takes to serialize objects
+
+    Args:
+        serialize (callable): A function which serializes one object
+        objects (list): Model objects
+
+    Returns:
+        float: The number of documents serialized per second
+    """
+    start = time.perf_counter()
+    for obj in objects:
+        serialize(obj)
+    return len(objects) / max(time.perf_counter() - start, 1e-9)
+
+
+class Command(BaseCommand):
+    """Compares the speed of the DRF serializers and the ES document builders"""
+
+    help = "Compare documents per second for the DRF serializers and the ES document builders"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            dest="limit",
+            type=int,
+            default=1000,
+            help="The maximum number of objects to serialize per object type",
+        )
+
+    def handle(self, *args, **options):
+        serializers = [
+            (POST_TYPE, ESPostSerializer, build_post_document),
+            (COMMENT_TYPE, ESCommentSerializer, build_comment_document),
+            (COURSE_TYPE, ESCourseSerializer, build_course_document),
+        ]
+        for object_type, serializer_cls, build_document in serializers:
+            objects = _get_objects(object_type, options["limit"])
+            if not objects:
+                self.stdout.write(f"{object_type}: no objects to serialize")
+                continue
+            drf_rate = _docs_per_second(
+                lambda obj, cls=serializer_cls: cls(obj).data, objects
+            )
+            builder_rate = _docs_per_second(build_document, objects)
+            self.stdout.write(
+                f"{object_type}: {len(objects)} documents, "
+                f"DRF serializer {drf_rate:.0f} docs/sec, "
+                f"document builder {builder_rate:.0f} docs/sec "
+                f"({builder_rate / drf_rate:.1f}x)"
+            )
@@ -2,7 +2,8 @@
 from django.core.management.base import BaseCommand, CommandError
 
 from open_discussions.utils import now_in_utc
-from search.tasks import start_recreate_index
+from search.models import ReindexRun
+from search.tasks import resume_recreate_index, start_recreate_index
 
 
 class Command(BaseCommand):
@@ -10,9 +11,56 @@ class Command(BaseCommand):
 
     help = "Add content to elasticsearch index"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--resume",
+            dest="resume",
+            action="store_true",
+            help="Resume the most recent failed or interrupted run, only indexing chunks which haven't succeeded",
+        )
+        parser.add_argument(
+            "--run",
+            dest="run_id",
+            type=int,
+            help="The id of the run to resume, instead of the most recent one",
+        )
+        parser.add_argument(
+            "--per-object-type",
+            dest="per_object_type",
+            action="store_true",
+            help="Switch the alias for each object type as soon as it is done indexing",
+        )
+        parser.add_argument(
+            "--progress",
+            dest="progress",
+            action="store_true",
+            help="Show progress per object type for the most recent run and exit",
+        )
+
     def handle(self, *args, **options):
         """Index the comments and posts for the channels the user is subscribed to"""
-        task = start_recreate_index.delay()
+        if options["progress"]:
+            runs = ReindexRun.objects.order_by("-created_on")
+            run = (
+                runs.filter(id=options["run_id"]).first()
+                if options["run_id"]
+                else runs.first()
+            )
+            if run is None:
+                raise CommandError("No recreate_index run found")
+            self.stdout.write(f"Run {run.id} ({run.status}):")
+            for object_type, progress in run.get_progress().items():
+                self.stdout.write(f"  {object_type}: {progress}")
+            return
+
+        if options["resume"] or options["run_id"]:
+            task = resume_recreate_index.delay(
+                run_id=options["run_id"], per_object_type=options["per_object_type"]
+            )
+        else:
+            task = start_recreate_index.delay(
+                per_object_type=options["per_object_type"]
+            )
         self.stdout.write(
             "Started celery task {task} to index content".format(task=task)
         )
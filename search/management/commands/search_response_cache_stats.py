@@ -0,0 +1,27 @@
+"""Management command to show hit counts for the search response cache"""
+from django.core.management.base import BaseCommand
+
+from search.response_cache import get_response_cache_stats, reset_response_cache_stats
+
+
+class Command(BaseCommand):
+    """Shows hit counts for the search response cache"""
+
+    help = "Show hit counts and the hit rate for the search response cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            dest="reset",
+            action="store_true",
+            help="Reset the hit counts after showing them",
+        )
+
+    def handle(self, *args, **options):
+        stats = get_response_cache_stats()
+        self.stdout.write(
+            f"hits: {stats['hits']}, stale hits: {stats['stale_hits']}, "
+            f"misses: {stats['misses']}, hit rate: {stats['hit_rate']:.1%}"
+        )
+        if options["reset"]:
+            reset_response_cache_stats()
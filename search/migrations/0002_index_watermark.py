@@ -0,0 +1,30 @@
+# Generated by Django 2.2.10 on 2026-10-18 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("search", "0001_reindex_run")]
+
+    operations = [
+        migrations.CreateModel(
+            name="IndexWatermark",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_on", models.DateTimeField(auto_now_add=True)),
+                ("updated_on", models.DateTimeField(auto_now=True)),
+                ("object_type", models.CharField(max_length=20, unique=True)),
+                ("watermark", models.DateTimeField()),
+            ],
+            options={"abstract": False},
+        )
+    ]
@@ -0,0 +1,86 @@
+"""Search models"""
+from django.contrib.postgres.fields import ArrayField, JSONField
+from django.db import models
+from django.db.models import Count, Q
+
+from open_discussions.models import TimestampedModel
+
+STATUS_PENDING = "pending"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+STATUS_CHOICES = (
+    (STATUS_PENDING, "Pending"),
+    (STATUS_SUCCEEDED, "Succeeded"),
+    (STATUS_FAILED, "Failed"),
+)
+
+
+class ReindexRun(TimestampedModel):
+    """A run of recreate_index, which can be resumed if any of its chunks fail"""
+
+    backing_indices = JSONField(default=dict)
+    # object types whose default alias already points to the new backing index
+    switched_object_types = ArrayField(
+        models.CharField(max_length=20), default=list, blank=True
+    )
+    status = models.CharField(
+        choices=STATUS_CHOICES, max_length=10, default=STATUS_PENDING
+    )
+
+    def get_progress(self):
+        """
+        Get the number of pending, succeeded and failed chunks for each object type
+
+        Returns:
+            dict: Chunk counts keyed by object type
+        """
+        return {
+            row["object_type"]: {
+                "total": row["total"],
+                STATUS_PENDING: row[STATUS_PENDING],
+                STATUS_SUCCEEDED: row[STATUS_SUCCEEDED],
+                STATUS_FAILED: row[STATUS_FAILED],
+                "switched": row["object_type"] in self.switched_object_types,
+            }
+            for row in self.chunks.order_by("object_type")
+            .values("object_type")
+            .annotate(
+                total=Count("id"),
+                **{
+                    status: Count("id", filter=Q(status=status))
+                    for status, _ in STATUS_CHOICES
+                },
+            )
+        }
+
+    def __str__(self):
+        return f"ReindexRun {self.id} ({self.status})"
+
+
+class ReindexChunk(TimestampedModel):
+    """A chunk of objects to be indexed as part of a ReindexRun"""
+
+    run = models.ForeignKey(ReindexRun, on_delete=models.CASCADE, related_name="chunks")
+    object_type = models.CharField(max_length=20)
+    task_name = models.CharField(max_length=50)
+    ids = ArrayField(models.IntegerField())
+    status = models.CharField(
+        choices=STATUS_CHOICES, max_length=10, default=STATUS_PENDING
+    )
+    error = models.TextField(blank=True, default="")
+
+    class Meta:
+        index_together = ("run", "object_type", "status")
+
+    def __str__(self):
+        return f"ReindexChunk {self.id} for {self.object_type} ({self.status})"
+
+
+class IndexWatermark(TimestampedModel):
+    """The point in time up to which changes for an object type have been indexed"""
+
+    object_type = models.CharField(max_length=20, unique=True)
+    watermark = models.DateTimeField()
+
+    def __str__(self):
+        return f"IndexWatermark for {self.object_type} ({self.watermark})"
@@ -0,0 +1,47 @@
+"""Tests for search models"""
+import pytest
+
+from search.constants import COMMENT_TYPE, POST_TYPE
+from search.models import (
+    ReindexChunk,
+    ReindexRun,
+    STATUS_FAILED,
+    STATUS_PENDING,
+    STATUS_SUCCEEDED,
+)
+
+
+@pytest.mark.django_db
+def test_reindex_run_get_progress():
+    """get_progress should count the chunks in each status for each object type"""
+    run = ReindexRun.objects.create(switched_object_types=[COMMENT_TYPE])
+    for object_type, status in [
+        (POST_TYPE, STATUS_SUCCEEDED),
+        (POST_TYPE, STATUS_FAILED),
+        (POST_TYPE, STATUS_PENDING),
+        (POST_TYPE, STATUS_PENDING),
+        (COMMENT_TYPE, STATUS_SUCCEEDED),
+    ]:
+        ReindexChunk.objects.create(
+            run=run, object_type=object_type, task_name="", ids=[1], status=status
+        )
+    ReindexChunk.objects.create(
+        run=ReindexRun.objects.create(), object_type=POST_TYPE, task_name="", ids=[1]
+    )
+
+    assert run.get_progress() == {
+        POST_TYPE: {
+            "total": 4,
+            STATUS_PENDING: 2,
+            STATUS_SUCCEEDED: 1,
+            STATUS_FAILED: 1,
+            "switched": False,
+        },
+        COMMENT_TYPE: {
+            "total": 1,
+            STATUS_PENDING: 0,
+            STATUS_SUCCEEDED: 1,
+            STATUS_FAILED: 0,
+            "switched": True,
+        },
+    }
@@ -0,0 +1,205 @@
+"""
+Shared cache for Elasticsearch search responses
+
+Responses are cached in redis, keyed on the index and the normalized search body. The body
+includes the permission filters added for the user, so users with the same permissions (for
+instance every anonymous user) share cache entries while other users never see them.
+
+The cache is disabled unless ELASTICSEARCH_RESPONSE_CACHE_TTL is set. Entries are invalidated by an
+index generation counter which is incremented whenever documents are indexed or deleted, their
+removed or deleted flags are updated, or aliases are switched. Other partial updates such as votes,
+comment counts and edits don't increment it, since they're frequent, so they show up in cached
+responses after at most the TTL. If ELASTICSEARCH_RESPONSE_CACHE_STALE_SECONDS is set, entries are
+kept for that many seconds past their TTL, and an entry which expired or belongs to an older
+generation is still served during that window while a celery task refreshes it.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from elasticsearch_dsl import Search
+
+GENERATION_KEY = "search:response_cache:generation"
+RESPONSE_KEY = "search:response_cache:{digest}"
+REFRESH_LOCK_KEY = "search:response_cache:refreshing:{digest}"
+STATS_KEY = "search:response_cache:stats:{stat}"
+STAT_NAMES = ("hits", "stale_hits", "misses")
+
+
+def _get_cache():
+    """
+    Get the cache used for search responses
+
+    Returns:
+        django.core.cache.backends.base.BaseCache: The cache
+    """
+    return caches["redis"]
+
+
+def _increment(cache, key):
+    """
+    Increment a counter which never expires
+
+    Args:
+        cache (django.core.cache.backends.base.BaseCache): The cache
+        key (str): The counter key
+    """
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_generation():
+    """
+    Get the current index generation
+
+    Returns:
+        int: The index generation
+    """
+    return _get_cache().get(GENERATION_KEY, 0)
+
+
+def bump_generation():
+    """
+    Increment the index generation, so cached responses are no longer fresh.
+    This should be called when documents are indexed or deleted, not for partial updates.
+    """
+    _increment(_get_cache(), GENERATION_KEY)
+
+
+def make_cache_digest(index, body):
+    """
+    Make the part of the cache key which identifies a search
+
+    Args:
+        index (str or list of str): The index or indexes to search
+        body (dict): The search body, including permission filters
+
+    Returns:
+        str: A digest of the normalized index and body
+    """
+    normalized = json.dumps(
+        {"index": index, "body": body}, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _store_response(cache, digest, generation, response):
+    """
+    Store a search response in the cache
+
+    Args:
+        cache (django.core.cache.backends.base.BaseCache): The cache
+        digest (str): The cache digest of the search
+        generation (int): The index generation read before the search was executed
+        response (dict): The Elasticsearch response dict
+    """
+    ttl = settings.ELASTICSEARCH_RESPONSE_CACHE_TTL
+    stale_seconds = max(settings.ELASTICSEARCH_RESPONSE_CACHE_STALE_SECONDS, 0)
+    cache.set(
+        RESPONSE_KEY.format(digest=digest),
+        {"generation": generation, "expires": time.time() + ttl, "response": response},
+        ttl + stale_seconds,
+    )
+
+
+def _schedule_refresh(cache, digest, index, body):
+    """
+    Schedule a task to refresh a stale response, unless one is already scheduled
+
+    Args:
+        cache (django.core.cache.backends.base.BaseCache): The cache
+        digest (str): The cache digest of the search
+        index (str or list of str): The index or indexes to search
+        body (dict): The search body
+    """
+    from search import tasks
+
+    lock_timeout = max(settings.ELASTICSEARCH_RESPONSE_CACHE_STALE_SECONDS, 1)
+    if cache.add(REFRESH_LOCK_KEY.format(digest=digest), 1, lock_timeout):
+        tasks.refresh_search_response.delay(index, body)
+
+
+def refresh_response(index, body):
+    """
+    Execute a search and store its response in the cache
+
+    Args:
+        index (str or list of str): The index or indexes to search
+        body (dict): The search body
+
+    Returns:
+        dict: The Elasticsearch response dict
+    """
+    cache = _get_cache()
+    digest = make_cache_digest(index, body)
+    generation = get_generation()
+    try:
+        response = Search(index=index).update_from_dict(body).execute().to_dict()
+        _store_response(cache, digest, generation, response)
+        return response
+    finally:
+        cache.delete(REFRESH_LOCK_KEY.format(digest=digest))
+
+
+def execute_cached(search, index):
+    """
+    Execute a search, using a cached response if there is a usable one
+
+    Args:
+        search (elasticsearch_dsl.Search): The search, with permission filters applied
+        index (str or list of str): The index or indexes the search is executed against
+
+    Returns:
+        dict: The Elasticsearch response dict
+    """
+    if settings.ELASTICSEARCH_RESPONSE_CACHE_TTL <= 0:
+        return search.execute().to_dict()
+
+    cache = _get_cache()
+    body = search.to_dict()
+    digest = make_cache_digest(index, body)
+    keys = [GENERATION_KEY, RESPONSE_KEY.format(digest=digest)]
+    values = cache.get_many(keys)
+    generation = values.get(GENERATION_KEY, 0)
+    entry = values.get(RESPONSE_KEY.format(digest=digest))
+
+    if entry is not None:
+        if entry["generation"] == generation and entry["expires"] > time.time():
+            _increment(cache, STATS_KEY.format(stat="hits"))
+            return entry["response"]
+        if settings.ELASTICSEARCH_RESPONSE_CACHE_STALE_SECONDS > 0:
+            # the entry is only kept in the cache during the stale window
+            _increment(cache, STATS_KEY.format(stat="stale_hits"))
+            _schedule_refresh(cache, digest, index, body)
+            return entry["response"]
+
+    _increment(cache, STATS_KEY.format(stat="misses"))
+    response = search.execute().to_dict()
+    _store_response(cache, digest, generation, response)
+    return response
+
+
+def get_response_cache_stats():
+    """
+    Get the hit counts for the search response cache, across all processes
+
+    Returns:
+        dict: The number of fresh hits, stale hits and misses, and the hit rate
+    """
+    values = _get_cache().get_many([STATS_KEY.format(stat=stat) for stat in STAT_NAMES])
+    stats = {stat: values.get(STATS_KEY.format(stat=stat), 0) for stat in STAT_NAMES}
+    total = sum(stats.values())
+    stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / total if total else 0.0
+    return stats
+
+
+def reset_response_cache_stats():
+    """
+    Reset the hit counts for the search response cache
+    """
+    _get_cache().delete_many([STATS_KEY.format(stat=stat) for stat in STAT_NAMES])
@@ -0,0 +1,127 @@
+"""Tests for the search response cache"""
+# pylint: disable=redefined-outer-name
+from elasticsearch_dsl import Search
+import pytest
+
+from search.response_cache import (
+    REFRESH_LOCK_KEY,
+    bump_generation,
+    execute_cached,
+    get_generation,
+    get_response_cache_stats,
+    make_cache_digest,
+    refresh_response,
+    reset_response_cache_stats,
+)
+
+INDEX = "testindex"
+
+
+@pytest.fixture()
+def es_search(mocker, settings):
+    """Mock Elasticsearch searches, returning a different response each time"""
+    settings.ELASTICSEARCH_RESPONSE_CACHE_TTL = 60
+    settings.ELASTICSEARCH_RESPONSE_CACHE_STALE_SECONDS = 0
+    responses = iter({"hits": {"total": number}} for number in range(100))
+    return mocker.patch(
+        "elasticsearch_dsl.Search.execute",
+        autospec=True,
+        side_effect=lambda *args: mocker.Mock(
+            to_dict=mocker.Mock(return_value=next(responses))
+        ),
+    )
+
+
+def make_search(text="text"):
+    """Make a search"""
+    return Search(index=INDEX).query("match", title=text)
+
+
+def test_make_cache_digest():
+    """make_cache_digest should not depend on the order of keys in the body"""
+    assert make_cache_digest(
+        INDEX, {"a": 1, "b": {"c": 2, "d": 3}}
+    ) == make_cache_digest(INDEX, {"b": {"d": 3, "c": 2}, "a": 1})
+    assert make_cache_digest(INDEX, {"a": 1}) != make_cache_digest("other", {"a": 1})
+    assert make_cache_digest(INDEX, {"a": 1}) != make_cache_digest(INDEX, {"a": 2})
+
+
+def test_execute_cached(es_search):
+    """execute_cached should cache responses by search body until the generation changes"""
+    first = execute_cached(make_search(), INDEX)
+    assert execute_cached(make_search(), INDEX) == first
+    other = execute_cached(make_search("other"), INDEX)
+    assert other != first
+    assert es_search.call_count == 2
+
+    bump_generation()
+    assert execute_cached(make_search(), INDEX) not in (first, other)
+    assert es_search.call_count == 3
+    assert get_response_cache_stats() == {
+        "hits": 1,
+        "stale_hits": 0,
+        "misses": 3,
+        "hit_rate": 0.25,
+    }
+    reset_response_cache_stats()
+    assert get_response_cache_stats() == {
+        "hits": 0,
+        "stale_hits": 0,
+        "misses": 0,
+        "hit_rate": 0.0,
+    }
+
+
+def test_execute_cached_disabled(settings, es_search):
+    """execute_cached should always execute the search if the TTL is zero"""
+    settings.ELASTICSEARCH_RESPONSE_CACHE_TTL = 0
+    assert execute_cached(make_search(), INDEX) != execute_cached(make_search(), INDEX)
+    assert es_search.call_count == 2
+    assert get_response_cache_stats()["misses"] == 0
+
+
+def test_execute_cached_expired(mocker, es_search):
+    """execute_cached should execute the search again once the TTL is over"""
+    time_mock = mocker.patch("search.response_cache.time.time", return_value=1000)
+    first = execute_cached(make_search(), INDEX)
+    time_mock.return_value = 1061
+    assert execute_cached(make_search(), INDEX) != first
+    assert es_search.call_count == 2
+
+
+def test_execute_cached_stale(mocker, settings, es_search):
+    """execute_cached should serve a stale response while a task refreshes it"""
+    settings.ELASTICSEARCH_RESPONSE_CACHE_STALE_SECONDS = 30
+    refresh_mock = mocker.patch("search.tasks.refresh_search_response.delay")
+    search = make_search()
+    first = execute_cached(search, INDEX)
+    bump_generation()
+
+    assert execute_cached(make_search(), INDEX) == first
+    assert execute_cached(make_search(), INDEX) == first
+    # only one refresh should be scheduled at a time
+    refresh_mock.assert_called_once_with(INDEX, search.to_dict())
+    assert es_search.call_count == 1
+
+    refreshed = refresh_response(INDEX, search.to_dict())
+    assert refreshed != first
+    assert execute_cached(make_search(), INDEX) == refreshed
+    assert get_response_cache_stats()["stale_hits"] == 2
+
+
+def test_refresh_response_error(redis_cache, es_search):
+    """refresh_response should release the refresh lock even if the search fails"""
+    es_search.side_effect = ConnectionError
+    digest = make_cache_digest(INDEX, {})
+    redis_cache.set(REFRESH_LOCK_KEY.format(digest=digest), 1)
+    with pytest.raises(ConnectionError):
+        refresh_response(INDEX, {})
+    assert redis_cache.get(REFRESH_LOCK_KEY.format(digest=digest)) is None
+
+
+def test_bump_generation():
+    """bump_generation should increment the generation"""
+    assert get_generation() == 0
+    bump_generation()
+    bump_generation()
+    assert get_generation() == 2
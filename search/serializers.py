@@ -19,7 +19,7 @@ from course_catalog.models import (
     Video,
     ContentFile,
 )
-from profiles.api import get_channels, get_channel_join_dates
+from profiles.api import get_channel_join_dates, get_channel_join_dates_for_users
 from profiles.models import Profile
 from profiles.utils import image_uri
 from search.api import (
@@ -33,6 +33,11 @@ from search.api import (
     gen_video_id,
     gen_content_file_id,
 )
+from search.document_builders import (
+    build_comment_document,
+    build_course_document,
+    build_post_document,
+)
 from search.constants import (
     PROFILE_TYPE,
     COURSE_TYPE,
@@ -105,6 +110,10 @@ class ESProxySerializer:
 class ESProfileSerializer(ESProxySerializer):
     """
     Elasticsearch serializer class for profiles
+
+    Args:
+        channel_join_dates (list of tuple):
+            Channel names and join dates for the profile's user, if they were already loaded
     """
 
     object_type = PROFILE_TYPE
@@ -118,6 +127,9 @@ class ESProfileSerializer(ESProxySerializer):
         "profile_image_small": "author_avatar_small",
     }
 
+    def __init__(self, channel_join_dates=None):
+        self.channel_join_dates = channel_join_dates
+
     @property
     def base_serializer(self):
         from profiles.serializers import ProfileSerializer
@@ -125,9 +137,13 @@ class ESProfileSerializer(ESProxySerializer):
         return ProfileSerializer
 
     def postprocess_fields(self, discussions_obj, serialized_data):
-        join_data = get_channel_join_dates(discussions_obj.user)
+        join_data = (
+            self.channel_join_dates
+            if self.channel_join_dates is not None
+            else get_channel_join_dates(discussions_obj.user)
+        )
         return {
-            "author_channel_membership": sorted(get_channels(discussions_obj.user)),
+            "author_channel_membership": sorted({name for name, _ in join_data}),
             "author_channel_join_data": [
                 {"name": name, "joined": created_on} for name, created_on in join_data
             ],
@@ -664,8 +680,8 @@ def serialize_bulk_posts(post_ids):
     Yields:
         iter of dict: yields an iterable of serialized posts
     """
-    for post in Post.objects.filter(id__in=post_ids).prefetch_related(
-        "article", "link_meta", "author", "author__profile"
+    for post in Post.objects.filter(id__in=post_ids).select_related(
+        "article", "link_meta", "channel", "author__profile"
     ):
         yield serialize_post_for_bulk(post)
 
@@ -680,8 +696,8 @@ def serialize_bulk_comments(comment_ids):
     Yields:
         iter of dict: yields an iterable of serialized comments
     """
-    for comment in Comment.objects.filter(id__in=comment_ids).prefetch_related(
-        "post", "author", "author__profile"
+    for comment in Comment.objects.filter(id__in=comment_ids).select_related(
+        "post__channel", "author__profile"
     ):
         yield serialize_comment_for_bulk(comment)
 
@@ -696,23 +712,33 @@ def serialize_bulk_profiles(ids):
     Yields:
         iter of dict: yields an iterable of serialized profiles
     """
-    for profile in Profile.objects.filter(id__in=ids).prefetch_related("user"):
-        yield serialize_profile_for_bulk(profile)
+    profiles = list(Profile.objects.filter(id__in=ids).select_related("user"))
+    join_dates = get_channel_join_dates_for_users(
+        profile.user_id for profile in profiles
+    )
+    for profile in profiles:
+        yield serialize_profile_for_bulk(
+            profile, channel_join_dates=join_dates[profile.user_id]
+        )
 
 
-def serialize_profile_for_bulk(profile_obj):
+def serialize_profile_for_bulk(profile_obj, channel_join_dates=None):
     """
     Serialize a profile for bulk API request
 
     Args:
         profile_obj (Profile): A user profile
+        channel_join_dates (list of tuple):
+            Channel names and join dates for the profile's user, if they were already loaded
 
     Returns:
         dict: the serialized profile
     """
     return {
         "_id": gen_profile_id(profile_obj.user.username),
-        **ESProfileSerializer().serialize(profile_obj),
+        **ESProfileSerializer(channel_join_dates=channel_join_dates).serialize(
+            profile_obj
+        ),
     }
 
 
@@ -727,10 +753,7 @@ def serialize_post_for_bulk(post_obj):
         dict: the serialized post
     """
     try:
-        return {
-            "_id": gen_post_id(post_obj.post_id),
-            **ESPostSerializer(instance=post_obj).data,
-        }
+        return {"_id": gen_post_id(post_obj.post_id), **build_post_document(post_obj)}
     except NotFound:
         log.exception("Reddit post not found: %s", post_obj.id)
         raise
@@ -749,7 +772,7 @@ def serialize_comment_for_bulk(comment_obj):
     try:
         return {
             "_id": gen_comment_id(comment_obj.comment_id),
-            **ESCommentSerializer(instance=comment_obj).data,
+            **build_comment_document(comment_obj),
         }
     except NotFound:
         log.exception("Reddit comment not found: %s", comment_obj.id)
@@ -770,7 +793,8 @@ def serialize_bulk_courses(ids):
             "runs",
             queryset=LearningResourceRun.objects.filter(published=True)
             .order_by("-best_start_date")
-            .defer("raw_json"),
+            .defer("raw_json")
+            .prefetch_related("prices", "instructors", "offered_by"),
         ),
     ):
         yield serialize_course_for_bulk(course)
@@ -785,7 +809,7 @@ def serialize_course_for_bulk(course_obj):
     """
     return {
         "_id": gen_course_id(course_obj.platform, course_obj.course_id),
-        **ESCourseSerializer(course_obj).data,
+        **build_course_document(course_obj),
     }
 
 
@@ -5,7 +5,9 @@ from datetime import datetime
 import pytest
 
 from channels.constants import POST_TYPE, COMMENT_TYPE, LINK_TYPE_SELF
-from channels.factories.models import PostFactory, CommentFactory
+from channels.api import add_user_role, sync_channel_subscription_model
+from channels.constants import ROLE_CONTRIBUTORS
+from channels.factories.models import ChannelFactory, CommentFactory, PostFactory
 from channels.utils import render_article_text
 from course_catalog.constants import OfferedBy, ListType, PrivacyLevel
 from course_catalog.factories import (
@@ -38,6 +40,7 @@ from search.serializers import (
     serialize_post_for_bulk,
     serialize_comment_for_bulk,
     serialize_bulk_comments,
+    serialize_bulk_posts,
     serialize_bulk_profiles,
     serialize_profile_for_bulk,
     serialize_bulk_courses,
@@ -201,10 +204,7 @@ def test_es_profile_serializer(mocker, user):
     """
     Test that ESProfileSerializer correctly serializes a profile object
     """
-    mocker.patch(
-        "search.serializers.get_channels", return_value={"channel01", "channel02"}
-    )
-    return_value = [("channel01", datetime.now()), ("channel02", datetime.now())]
+    return_value = [("channel02", datetime.now()), ("channel01", datetime.now())]
     mocker.patch("search.serializers.get_channel_join_dates", return_value=return_value)
     serialized = ESProfileSerializer().serialize(user.profile)
     assert serialized == {
@@ -232,6 +232,30 @@ def test_serialize_bulk_comments():
     ) == len(comments)
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_posts", [1, 5])
+def test_serialize_bulk_posts_num_queries(django_assert_num_queries, num_posts):
+    """serialize_bulk_posts should load posts and their related objects in one query"""
+    posts = PostFactory.create_batch(num_posts, is_article=True) + (
+        PostFactory.create_batch(num_posts, is_link=True)
+    )
+    with django_assert_num_queries(1):
+        assert len(list(serialize_bulk_posts([post.id for post in posts]))) == len(
+            posts
+        )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_comments", [1, 5])
+def test_serialize_bulk_comments_num_queries(django_assert_num_queries, num_comments):
+    """serialize_bulk_comments should load comments and their related objects in one query"""
+    comments = CommentFactory.create_batch(num_comments)
+    with django_assert_num_queries(1):
+        assert len(
+            list(serialize_bulk_comments([comment.id for comment in comments]))
+        ) == len(comments)
+
+
 @pytest.mark.django_db
 def test_es_course_price_serializer():
     """Test that the course price serializer serializes a price"""
@@ -472,8 +496,7 @@ def test_serialize_post_for_bulk(mocker):
     post_id = "post1"
     base_serialized_post = {"serialized": "post"}
     mocker.patch(
-        "search.serializers.ESPostSerializer.to_representation",
-        return_value=base_serialized_post,
+        "search.serializers.build_post_document", return_value=base_serialized_post
     )
     serialized = serialize_post_for_bulk(mocker.Mock(post_id=post_id))
     assert serialized == {"_id": f"p_{post_id}", **base_serialized_post}
@@ -486,7 +509,7 @@ def test_serialize_comment_for_bulk(mocker):
     comment_id = "456"
     base_serialized_comment = {"serialized": "comment"}
     mocker.patch(
-        "search.serializers.ESCommentSerializer.to_representation",
+        "search.serializers.build_comment_document",
         return_value=base_serialized_comment,
     )
     serialized = serialize_comment_for_bulk(mocker.Mock(comment_id=comment_id))
@@ -504,7 +527,27 @@ def test_serialize_bulk_profiles(mocker):
     users = UserFactory.create_batch(5)
     list(serialize_bulk_profiles([profile.id for profile in Profile.objects.all()]))
     for user in users:
-        mock_serialize_profile.assert_any_call(user.profile)
+        mock_serialize_profile.assert_any_call(user.profile, channel_join_dates=[])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_profiles", [1, 5])
+def test_serialize_bulk_profiles_num_queries(django_assert_num_queries, num_profiles):
+    """
+    serialize_bulk_profiles should load channel memberships for all profiles at once
+    """
+    channels = ChannelFactory.create_batch(2)
+    users = UserFactory.create_batch(num_profiles)
+    for user in users:
+        sync_channel_subscription_model(channels[0], user)
+        add_user_role(channels[1], ROLE_CONTRIBUTORS, user)
+
+    with django_assert_num_queries(3):
+        serialized = list(serialize_bulk_profiles([user.profile.id for user in users]))
+    for profile in serialized:
+        assert profile["author_channel_membership"] == sorted(
+            channel.name for channel in channels
+        )
 
 
 def test_serialize_profile_for_bulk(user):
@@ -8,7 +8,12 @@ from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 
 from course_catalog.models import ContentFile
-from open_discussions.features import INDEX_UPDATES, if_feature_enabled
+from open_discussions.features import (
+    INDEX_UPDATES,
+    INDEX_UPDATE_BUFFER,
+    if_feature_enabled,
+    is_enabled,
+)
 from channels.constants import POST_TYPE, COMMENT_TYPE, VoteActions
 from channels.models import Comment
 from channels.utils import render_article_text
@@ -34,7 +39,7 @@ from search.constants import (
     VIDEO_TYPE,
 )
 from search.serializers import ESPostSerializer, ESCommentSerializer
-from search import tasks
+from search import tasks, update_buffer
 from search.tasks import (
     create_document,
     create_post_document,
@@ -47,6 +52,42 @@ from search.tasks import (
 log = logging.getLogger()
 
 
+def _update_document_with_partial(doc_id, partial_data, object_type):
+    """
+    Updates a document with a partial document, either through the update buffer or a separate task
+
+    Args:
+        doc_id (str): The ES document id
+        partial_data (dict): Partial ES document
+        object_type (str): The object type to update (post, comment, etc)
+    """
+    if is_enabled(INDEX_UPDATE_BUFFER):
+        update_buffer.queue_partial_update(doc_id, partial_data, object_type)
+    else:
+        update_document_with_partial.delay(doc_id, partial_data, object_type)
+
+
+def _increment_document_integer_field(doc_id, field_name, incr_amount, object_type):
+    """
+    Increments an integer field in a document, either through the update buffer or a separate task
+
+    Args:
+        doc_id (str): The ES document id
+        field_name (str): The name of the field to increment
+        incr_amount (int): The amount to increment by
+        object_type (str): The object type to update (post, comment, etc)
+    """
+    if is_enabled(INDEX_UPDATE_BUFFER):
+        update_buffer.queue_increment(doc_id, field_name, incr_amount, object_type)
+    else:
+        increment_document_integer_field.delay(
+            doc_id,
+            field_name=field_name,
+            incr_amount=incr_amount,
+            object_type=object_type,
+        )
+
+
 def reddit_object_persist(*persistence_funcs):
     """
     Decorator that passes a PRAW object to any number of functions that persist the object to a new data store.
@@ -107,7 +148,7 @@ def update_post_text(post_obj):
     Args:
         post_obj (praw.models.reddit.submission.Submission): A PRAW post ('submission') object
     """
-    update_document_with_partial.delay(
+    _update_document_with_partial(
         gen_post_id(post_obj.id),
         {
             "plain_text": render_article_text(post_obj.article_content),
@@ -125,7 +166,7 @@ def update_comment_text(comment_obj):
     Args:
         comment_obj (praw.models.reddit.comment.Comment): A PRAW comment object
     """
-    update_document_with_partial.delay(
+    _update_document_with_partial(
         gen_comment_id(comment_obj.id), {"text": comment_obj.body}, COMMENT_TYPE
     )
 
@@ -220,7 +261,7 @@ def update_post_removal_status(post_obj):
     Args:
         post_obj (praw.models.reddit.submission.Submission): A PRAW post ('submission') object
     """
-    update_document_with_partial.delay(
+    _update_document_with_partial(
         gen_post_id(post_obj.id),
         {"removed": is_reddit_object_removed(post_obj)},
         POST_TYPE,
@@ -241,7 +282,7 @@ def update_comment_removal_status(comment_obj):
     Args:
         comment_obj (praw.models.reddit.comment.Comment): A PRAW comment object
     """
-    update_document_with_partial.delay(
+    _update_document_with_partial(
         gen_comment_id(comment_obj.id),
         {"removed": is_reddit_object_removed(comment_obj)},
         COMMENT_TYPE,
@@ -259,7 +300,7 @@ def _update_parent_post_comment_count(comment_obj, incr_amount=1):
         incr_amount (int): The amount to increment to count
     """
     post_obj = comment_obj.submission
-    increment_document_integer_field.delay(
+    _increment_document_integer_field(
         gen_post_id(post_obj.id),
         field_name="num_comments",
         incr_amount=incr_amount,
@@ -283,7 +324,7 @@ def set_post_to_deleted(post_obj):
     Args:
         post_obj (praw.models.reddit.submission.Submission): A PRAW post ('submission') object
     """
-    update_document_with_partial.delay(
+    _update_document_with_partial(
         gen_post_id(post_obj.id), {"deleted": True}, POST_TYPE
     )
     update_field_for_all_post_comments(post_obj, field_name="deleted", field_value=True)
@@ -297,7 +338,7 @@ def set_comment_to_deleted(comment_obj):
     Args:
         comment_obj (praw.models.reddit.comment.Comment): A PRAW comment object
     """
-    update_document_with_partial.delay(
+    _update_document_with_partial(
         gen_comment_id(comment_obj.id), {"deleted": True}, COMMENT_TYPE
     )
     decrement_parent_post_comment_count(comment_obj)
@@ -328,7 +369,7 @@ def update_indexed_score(instance, instance_type, vote_action=None):
         else gen_comment_id(instance.id)
     )
 
-    increment_document_integer_field.delay(
+    _increment_document_integer_field(
         content_id,
         field_name="score",
         incr_amount=vote_increment,
@@ -389,26 +430,28 @@ def delete_content_file(content_file_obj):
     )
 
 
-def index_run_content_files(run_id):
+def index_run_content_files(run_id, content_file_ids=None):
     """
     Runs a task to index content files for a LearningResourceRun
 
     Args:
         run_id(int): LearningResourceRun id
+        content_file_ids(list of int): If set, only index these content files of the run
 
     """
-    tasks.index_run_content_files.delay(run_id)
+    tasks.index_run_content_files.delay(run_id, content_file_ids=content_file_ids)
 
 
-def delete_run_content_files(run_id):
+def delete_run_content_files(run_id, keys=None):
     """
     Runs a task to delete content files for a LearningResourceRun from the index
 
     Args:
         run_id(int): LearningResourceRun id
+        keys(list of str): If set, only delete the content files with these keys
 
     """
-    tasks.delete_run_content_files.delay(run_id)
+    tasks.delete_run_content_files.delay(run_id, keys=keys)
 
 
 @if_feature_enabled(INDEX_UPDATES)
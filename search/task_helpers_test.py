@@ -9,7 +9,7 @@ from course_catalog.factories import (
     UserListFactory,
     ContentFileFactory,
 )
-from open_discussions.features import INDEX_UPDATES
+from open_discussions.features import INDEX_UPDATES, INDEX_UPDATE_BUFFER
 from channels.constants import POST_TYPE, COMMENT_TYPE, VoteActions
 from channels.factories.models import CommentFactory
 from channels.utils import render_article_text
@@ -550,7 +550,10 @@ def test_index_run_content_files(mocker):
     patched_task = mocker.patch("search.tasks.index_run_content_files")
     content_file = ContentFileFactory.create()
     index_run_content_files(content_file.id)
-    patched_task.delay.assert_called_once_with(content_file.id)
+    patched_task.delay.assert_called_once_with(content_file.id, content_file_ids=None)
+    patched_task.reset_mock()
+    index_run_content_files(content_file.id, content_file_ids=[1, 2])
+    patched_task.delay.assert_called_once_with(content_file.id, content_file_ids=[1, 2])
 
 
 @pytest.mark.django_db
@@ -559,7 +562,10 @@ def test_delete_run_content_files(mocker):
     patched_task = mocker.patch("search.tasks.delete_run_content_files")
     content_file = ContentFileFactory.create()
     delete_run_content_files(content_file.id)
-    patched_task.delay.assert_called_once_with(content_file.id)
+    patched_task.delay.assert_called_once_with(content_file.id, keys=None)
+    patched_task.reset_mock()
+    delete_run_content_files(content_file.id, keys=["a"])
+    patched_task.delay.assert_called_once_with(content_file.id, keys=["a"])
 
 
 def test_index_new_bootcamp(mocker):
@@ -576,3 +582,35 @@ def test_update_bootcamp(mocker):
     bootcamp_id = 345
     update_bootcamp(bootcamp_id)
     patched.delay.assert_called_once_with(bootcamp_id)
+
+
+def test_update_indexed_score_buffered(mocker, settings, reddit_submission_obj):
+    """update_indexed_score should queue an increment in the update buffer if that feature is enabled"""
+    settings.FEATURES[INDEX_UPDATE_BUFFER] = True
+    patched_task = mocker.patch("search.task_helpers.increment_document_integer_field")
+    patched_queue = mocker.patch(
+        "search.task_helpers.update_buffer.queue_increment", autospec=True
+    )
+    update_indexed_score(
+        reddit_submission_obj, POST_TYPE, vote_action=VoteActions.UPVOTE
+    )
+    patched_queue.assert_called_once_with(
+        gen_post_id(reddit_submission_obj.id), "score", 1, POST_TYPE
+    )
+    assert patched_task.delay.called is False
+
+
+def test_update_comment_text_buffered(mocker, settings, reddit_comment_obj):
+    """update_comment_text should queue a partial update in the update buffer if that feature is enabled"""
+    settings.FEATURES[INDEX_UPDATE_BUFFER] = True
+    patched_task = mocker.patch("search.task_helpers.update_document_with_partial")
+    patched_queue = mocker.patch(
+        "search.task_helpers.update_buffer.queue_partial_update", autospec=True
+    )
+    update_comment_text(reddit_comment_obj)
+    patched_queue.assert_called_once_with(
+        gen_comment_id(reddit_comment_obj.id),
+        {"text": reddit_comment_obj.body},
+        COMMENT_TYPE,
+    )
+    assert patched_task.delay.called is False
@@ -6,7 +6,7 @@ import celery
 from celery.exceptions import Ignore
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from elasticsearch.exceptions import NotFoundError
+from elasticsearch.exceptions import ElasticsearchException, NotFoundError
 from praw.exceptions import PRAWException
 from prawcore.exceptions import PrawcoreException, NotFound
 
@@ -24,9 +24,10 @@ from course_catalog.models import (
 from course_catalog.utils import load_course_blacklist
 from embedly.api import get_embedly_content
 from open_discussions.celery import app
+from open_discussions.features import INDEX_DELTA_SYNC, is_enabled
 from open_discussions.utils import merge_strings, chunks, html_to_plain_text
 from profiles.models import Profile
-from search import indexing_api as api
+from search import delta_sync, indexing_api as api, response_cache, update_buffer
 from search.api import gen_content_file_id, gen_course_id
 from search.constants import (
     BOOTCAMP_TYPE,
@@ -38,6 +39,13 @@ from search.constants import (
     USER_LIST_TYPE,
 )
 from search.exceptions import RetryException, ReindexException
+from search.models import (
+    ReindexChunk,
+    ReindexRun,
+    STATUS_FAILED,
+    STATUS_PENDING,
+    STATUS_SUCCEEDED,
+)
 from search.serializers import (
     ESBootcampSerializer,
     ESCourseSerializer,
@@ -189,6 +197,41 @@ def create_post_document(doc_id, data):
     return celery.chain(tasks)()
 
 
+@app.task(autoretry_for=(RetryException,), retry_backoff=True)
+def flush_pending_updates():
+    """
+    Task that sends all buffered incremental updates to Elasticsearch. Updates which couldn't
+    be sent are put back into the buffer, so the task retries on Elasticsearch errors.
+    """
+    with wrap_retry_exception(ElasticsearchException):
+        return update_buffer.flush_pending_updates()
+
+
+@app.task
+def refresh_search_response(index, body):
+    """
+    Task that refreshes a stale cached search response
+
+    Args:
+        index (str or list of str): The index or indexes to search
+        body (dict): The search body
+    """
+    response_cache.refresh_response(index, body)
+
+
+@app.task
+def delta_sync_index(detect_deletions=True):
+    """
+    Task that indexes objects which changed since the last sync and removes deleted objects
+
+    Args:
+        detect_deletions (bool): If true, reconcile the ids in the index with the database
+    """
+    if not is_enabled(INDEX_DELTA_SYNC):
+        return None
+    return delta_sync.sync_all(detect_deletions=detect_deletions)
+
+
 @app.task(**PARTIAL_UPDATE_TASK_SETTINGS)
 def update_document_with_partial(
     doc_id, partial_data, object_type, retry_on_conflict=0
@@ -406,16 +449,17 @@ def index_course_content_files(course_ids):
 
 
 @app.task(autoretry_for=(RetryException,), retry_backoff=True, rate_limit="600/m")
-def index_run_content_files(run_id):
+def index_run_content_files(run_id, content_file_ids=None):
     """
     Index content files for a LearningResourceRun
 
     Args:
         run_id(int): LearningResourceRun id
+        content_file_ids(list of int): If set, only index these content files of the run
 
     """
     try:
-        api.index_run_content_files(run_id)
+        api.index_run_content_files(run_id, content_file_ids=content_file_ids)
     except (RetryException, Ignore):
         raise
     except:  # pylint: disable=bare-except
@@ -425,16 +469,17 @@ def index_run_content_files(run_id):
 
 
 @app.task(autoretry_for=(RetryException,), retry_backoff=True, rate_limit="600/m")
-def delete_run_content_files(run_id):
+def delete_run_content_files(run_id, keys=None):
     """
     Deleted content files for a LearningResourceRun from the index
 
     Args:
         run_id(int): LearningResourceRun id
+        keys(list of str): If set, only delete the content files with these keys
 
     """
     try:
-        api.delete_run_content_files(run_id)
+        api.delete_run_content_files(run_id, keys=keys)
     except (RetryException, Ignore):
         raise
     except:  # pylint: disable=bare-except
@@ -519,16 +564,179 @@ def index_videos(ids):
         return error
 
 
+def _get_reindex_chunks(blacklisted_ids):
+    """
+    Yields the chunks of object ids which need to be indexed by recreate_index
+
+    Args:
+        blacklisted_ids (list of str): Course ids which should not be indexed
+
+    Yields:
+        tuple of (str, str, list of int):
+            The object type, the name of the indexing_api function and a chunk of ids to pass to it
+    """
+    querysets = [
+        (
+            POST_TYPE,
+            "index_posts",
+            Post.objects.order_by("id").values_list("id", flat=True),
+        ),
+        (
+            COMMENT_TYPE,
+            "index_comments",
+            Comment.objects.order_by("id").values_list("id", flat=True),
+        ),
+        (
+            PROFILE_TYPE,
+            "index_profiles",
+            User.objects.exclude(username=settings.INDEXING_API_USERNAME)
+            .exclude(profile__isnull=True)
+            .filter(is_active=True)
+            .order_by("id")
+            .values_list("profile__id", flat=True),
+        ),
+        (
+            COURSE_TYPE,
+            "index_courses",
+            Course.objects.filter(published=True)
+            .exclude(course_id__in=blacklisted_ids)
+            .order_by("id")
+            .values_list("id", flat=True),
+        ),
+        (
+            COURSE_TYPE,
+            "index_course_content_files",
+            Course.objects.filter(published=True)
+            .filter(platform__in=(PlatformType.ocw.value, PlatformType.xpro.value))
+            .exclude(course_id__in=blacklisted_ids)
+            .order_by("id")
+            .values_list("id", flat=True),
+        ),
+        (
+            BOOTCAMP_TYPE,
+            "index_bootcamps",
+            Bootcamp.objects.filter(published=True)
+            .order_by("id")
+            .values_list("id", flat=True),
+        ),
+        (
+            PROGRAM_TYPE,
+            "index_programs",
+            Program.objects.filter(published=True)
+            .order_by("id")
+            .values_list("id", flat=True),
+        ),
+        (
+            USER_LIST_TYPE,
+            "index_user_lists",
+            UserList.objects.order_by("id")
+            .exclude(items=None)
+            .values_list("id", flat=True),
+        ),
+        (
+            VIDEO_TYPE,
+            "index_videos",
+            Video.objects.filter(published=True)
+            .order_by("id")
+            .values_list("id", flat=True),
+        ),
+    ]
+    for object_type, task_name, queryset in querysets:
+        for ids in chunks(
+            queryset, chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE
+        ):
+            yield object_type, task_name, ids
+
+
+def _make_reindex_workflow(run, per_object_type):
+    """
+    Make the celery workflow which indexes all unfinished chunks for a ReindexRun and then
+    switches the default aliases to the new backing indices
+
+    Args:
+        run (ReindexRun): The reindex run
+        per_object_type (bool):
+            If true, switch the alias for each object type as soon as its chunks are done
+            instead of switching all of them at the end
+
+    Returns:
+        celery.canvas.Signature: The celery workflow
+    """
+    chunk_ids_by_type = {obj_type: [] for obj_type in run.backing_indices}
+    for chunk_id, object_type in (
+        run.chunks.exclude(status=STATUS_SUCCEEDED)
+        .exclude(object_type__in=run.switched_object_types)
+        .order_by("id")
+        .values_list("id", "object_type")
+    ):
+        chunk_ids_by_type[object_type].append(chunk_id)
+
+    if not per_object_type:
+        index_tasks = [
+            index_chunk.si(chunk_id)
+            for chunk_ids in chunk_ids_by_type.values()
+            for chunk_id in chunk_ids
+        ]
+    else:
+        index_tasks = [
+            celery.chain(
+                celery.group([index_chunk.si(chunk_id) for chunk_id in chunk_ids]),
+                finish_recreate_object_type.s(run.id, object_type),
+            )
+            if chunk_ids
+            else finish_recreate_object_type.si([], run.id, object_type)
+            for object_type, chunk_ids in chunk_ids_by_type.items()
+            if object_type not in run.switched_object_types
+        ]
+    if not index_tasks:
+        return finish_recreate_index.si([], run.id)
+    return celery.chain(celery.group(index_tasks), finish_recreate_index.s(run.id))
+
+
+@app.task(autoretry_for=(RetryException,), retry_backoff=True, rate_limit="600/m")
+def index_chunk(chunk_id):
+    """
+    Index a chunk of a recreate_index run and record whether it succeeded
+
+    Args:
+        chunk_id (int): The ReindexChunk id
+    """
+    chunk = ReindexChunk.objects.get(id=chunk_id)
+    try:
+        with wrap_retry_exception(PrawcoreException, PRAWException):
+            getattr(api, chunk.task_name)(chunk.ids)
+    except (RetryException, Ignore):  # pylint: disable=try-except-raise
+        raise
+    except Exception as ex:  # pylint: disable=broad-except
+        error = f"{chunk.task_name} threw an error"
+        log.exception(error)
+        chunk.status = STATUS_FAILED
+        chunk.error = f"{error}: {ex}"
+        chunk.save()
+        return error
+
+    chunk.status = STATUS_SUCCEEDED
+    chunk.error = ""
+    chunk.save()
+    return None
+
+
 @app.task(bind=True)
-def start_recreate_index(self):
+def start_recreate_index(self, per_object_type=False):
     """
     Wipe and recreate index and mapping, and index all items.
+
+    Args:
+        per_object_type (bool):
+            If true, switch the alias for each object type as soon as it is done indexing
     """
     try:
-        new_backing_indices = {
-            obj_type: api.create_backing_index(obj_type)
-            for obj_type in VALID_OBJECT_TYPES
-        }
+        run = ReindexRun.objects.create(
+            backing_indices={
+                obj_type: api.create_backing_index(obj_type)
+                for obj_type in VALID_OBJECT_TYPES
+            }
+        )
 
         # Do the indexing on the temp index
         log.info(
@@ -536,121 +744,113 @@ def start_recreate_index(self):
         )
 
         blacklisted_ids = load_course_blacklist()
-
-        index_tasks = celery.group(
-            [
-                index_posts.si(post_ids)
-                for post_ids in chunks(
-                    Post.objects.order_by("id").values_list("id", flat=True),
-                    chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
+        for reindex_chunks in chunks(
+            (
+                ReindexChunk(
+                    run=run, object_type=object_type, task_name=task_name, ids=ids
                 )
-            ]
-            + [
-                index_comments.si(comment_ids)
-                for comment_ids in chunks(
-                    Comment.objects.order_by("id").values_list("id", flat=True),
-                    chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
-                )
-            ]
-            + [
-                index_profiles.si(ids)
-                for ids in chunks(
-                    User.objects.exclude(username=settings.INDEXING_API_USERNAME)
-                    .exclude(profile__isnull=True)
-                    .filter(is_active=True)
-                    .order_by("id")
-                    .values_list("profile__id", flat=True),
-                    chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
-                )
-            ]
-            + [
-                index_courses.si(ids)
-                for ids in chunks(
-                    Course.objects.filter(published=True)
-                    .exclude(course_id__in=blacklisted_ids)
-                    .order_by("id")
-                    .values_list("id", flat=True),
-                    chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
-                )
-            ]
-            + [
-                index_course_content_files.si(ids)
-                for ids in chunks(
-                    Course.objects.filter(published=True)
-                    .filter(
-                        platform__in=(PlatformType.ocw.value, PlatformType.xpro.value)
-                    )
-                    .exclude(course_id__in=blacklisted_ids)
-                    .order_by("id")
-                    .values_list("id", flat=True),
-                    chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
-                )
-            ]
-            + [
-                index_bootcamps.si(ids)
-                for ids in chunks(
-                    Bootcamp.objects.filter(published=True)
-                    .order_by("id")
-                    .values_list("id", flat=True),
-                    chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
-                )
-            ]
-            + [
-                index_programs.si(ids)
-                for ids in chunks(
-                    Program.objects.filter(published=True)
-                    .order_by("id")
-                    .values_list("id", flat=True),
-                    chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
-                )
-            ]
-            + [
-                index_user_lists.si(ids)
-                for ids in chunks(
-                    UserList.objects.order_by("id")
-                    .exclude(items=None)
-                    .values_list("id", flat=True),
-                    chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
-                )
-            ]
-            + [
-                index_videos.si(ids)
-                for ids in chunks(
-                    Video.objects.filter(published=True)
-                    .order_by("id")
-                    .values_list("id", flat=True),
-                    chunk_size=settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE,
-                )
-            ]
-        )
+                for object_type, task_name, ids in _get_reindex_chunks(blacklisted_ids)
+            ),
+            chunk_size=1000,
+        ):
+            ReindexChunk.objects.bulk_create(reindex_chunks)
 
+        workflow = _make_reindex_workflow(run, per_object_type)
     except:  # pylint: disable=bare-except
         error = "start_recreate_index threw an error"
         log.exception(error)
         return error
 
     # Use self.replace so that code waiting on this task will also wait on the indexing and finish tasks
-    raise self.replace(
-        celery.chain(index_tasks, finish_recreate_index.s(new_backing_indices))
-    )
+    raise self.replace(workflow)
+
+
+@app.task(bind=True)
+def resume_recreate_index(self, run_id=None, per_object_type=False):
+    """
+    Index the chunks of a failed or interrupted recreate_index run which haven't succeeded yet,
+    then switch the default aliases to its backing indices.
+
+    Args:
+        run_id (int): The ReindexRun id, or None to resume the most recent unfinished run
+        per_object_type (bool):
+            If true, switch the alias for each object type as soon as it is done indexing
+    """
+    try:
+        runs = ReindexRun.objects.exclude(status=STATUS_SUCCEEDED)
+        run = (
+            runs.get(id=run_id)
+            if run_id is not None
+            else runs.order_by("-created_on").first()
+        )
+        if run is None:
+            return "There is no unfinished recreate_index run to resume"
+        run.status = STATUS_PENDING
+        run.save()
+        log.info("Resuming recreate_index run %d: %s", run.id, run.get_progress())
+        workflow = _make_reindex_workflow(run, per_object_type)
+    except:  # pylint: disable=bare-except
+        error = "resume_recreate_index threw an error"
+        log.exception(error)
+        return error
+
+    raise self.replace(workflow)
+
+
+@app.task
+def finish_recreate_object_type(results, run_id, object_type):
+    """
+    Swap the reindex backing index with the default backing index for one object type
+
+    Args:
+        results (list or bool): Results saying whether the error exists
+        run_id (int): The ReindexRun id
+        object_type (str): The object type whose indexing finished
+
+    Returns:
+        list of str: Errors which occurred while indexing this object type
+    """
+    errors = merge_strings(results)
+    if errors:
+        log.error("Errors occurred while indexing %s: %s", object_type, errors)
+        return errors
+
+    run = ReindexRun.objects.get(id=run_id)
+    api.switch_indices(run.backing_indices[object_type], object_type)
+    delta_sync.set_watermark(object_type, run.created_on)
+    run.switched_object_types = [*run.switched_object_types, object_type]
+    run.save()
+    log.info("Pointed the %s default alias to its new backing index", object_type)
+    return []
 
 
 @app.task
-def finish_recreate_index(results, backing_indices):
+def finish_recreate_index(results, run_id):
     """
     Swap reindex backing index with default backing index
 
     Args:
         results (list or bool): Results saying whether the error exists
-        backing_indices (dict): The backing elasticsearch indices keyed by object type
+        run_id (int): The ReindexRun id
     """
+    run = ReindexRun.objects.get(id=run_id)
     errors = merge_strings(results)
     if errors:
-        raise ReindexException(f"Errors occurred during recreate_index: {errors}")
+        run.status = STATUS_FAILED
+        run.save()
+        raise ReindexException(
+            f"Errors occurred during recreate_index: {errors}. "
+            f"Run resume_recreate_index for run {run.id} to retry the failed chunks."
+        )
 
     log.info(
         "Done with temporary index. Pointing default aliases to newly created backing indexes..."
     )
-    for obj_type, backing_index in backing_indices.items():
-        api.switch_indices(backing_index, obj_type)
+    for obj_type, backing_index in run.backing_indices.items():
+        if obj_type not in run.switched_object_types:
+            api.switch_indices(backing_index, obj_type)
+            delta_sync.set_watermark(obj_type, run.created_on)
+    run.switched_object_types = list(run.backing_indices)
+    run.status = STATUS_SUCCEEDED
+    run.save()
     log.info("recreate_index has finished successfully!")
@@ -1,7 +1,10 @@
 """Search task tests"""
 # pylint: disable=redefined-outer-name,unused-argument
 
+from types import SimpleNamespace
+
 from django.conf import settings
+from elasticsearch.exceptions import ConnectionError as ESConnectionError
 from praw.exceptions import PRAWException
 from prawcore.exceptions import PrawcoreException, NotFound
 import pytest
@@ -20,6 +23,7 @@ from course_catalog.factories import (
     LearningResourceRunFactory,
 )
 from open_discussions.factories import UserFactory
+from open_discussions.features import INDEX_DELTA_SYNC
 from open_discussions.test_utils import assert_not_raises
 from search.api import (
     gen_bootcamp_id,
@@ -41,7 +45,15 @@ from search.constants import (
     USER_LIST_TYPE,
     PROFILE_TYPE,
 )
+from search.delta_sync import get_watermark
 from search.exceptions import ReindexException, RetryException
+from search.models import (
+    ReindexChunk,
+    ReindexRun,
+    STATUS_FAILED,
+    STATUS_PENDING,
+    STATUS_SUCCEEDED,
+)
 from search.serializers import (
     ESBootcampSerializer,
     ESCourseSerializer,
@@ -57,6 +69,11 @@ from search.tasks import (
     update_link_post_with_preview,
     update_document_with_partial,
     finish_recreate_index,
+    finish_recreate_object_type,
+    flush_pending_updates,
+    refresh_search_response,
+    index_chunk,
+    resume_recreate_index,
     increment_document_integer_field,
     update_field_values_by_query,
     index_new_bootcamp,
@@ -67,6 +84,7 @@ from search.tasks import (
     index_courses,
     index_videos,
     delete_document,
+    delta_sync_index,
     upsert_bootcamp,
     upsert_course,
     upsert_program,
@@ -202,6 +220,50 @@ def test_increment_document_integer_field_task(mocked_api):
     assert mocked_api.increment_document_integer_field.call_args[0] == indexing_api_args
 
 
+def test_flush_pending_updates(mocker):
+    """flush_pending_updates should send buffered updates to Elasticsearch"""
+    mocked_flush = mocker.patch(
+        "search.tasks.update_buffer.flush_pending_updates", autospec=True
+    )
+    assert flush_pending_updates() == mocked_flush.return_value
+    mocked_flush.assert_called_once_with()
+
+
+def test_flush_pending_updates_retry(mocker):
+    """flush_pending_updates should retry when Elasticsearch raises an error"""
+    mocker.patch(
+        "search.tasks.update_buffer.flush_pending_updates",
+        autospec=True,
+        side_effect=ESConnectionError("N/A", "unreachable", None),
+    )
+    with pytest.raises(RetryException):
+        flush_pending_updates.delay()
+
+
+def test_refresh_search_response(mocker):
+    """refresh_search_response should refresh a cached search response"""
+    mocked_refresh = mocker.patch(
+        "search.tasks.response_cache.refresh_response", autospec=True
+    )
+    refresh_search_response("index", {"query": {}})
+    mocked_refresh.assert_called_once_with("index", {"query": {}})
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+@pytest.mark.parametrize("detect_deletions", [True, False])
+def test_delta_sync_index(mocker, settings, enabled, detect_deletions):
+    """delta_sync_index should sync the index with the database if the feature is enabled"""
+    settings.FEATURES[INDEX_DELTA_SYNC] = enabled
+    mocked_sync = mocker.patch("search.tasks.delta_sync.sync_all", autospec=True)
+    result = delta_sync_index.delay(detect_deletions=detect_deletions).get()
+    if enabled:
+        assert result == mocked_sync.return_value
+        mocked_sync.assert_called_once_with(detect_deletions=detect_deletions)
+    else:
+        assert result is None
+        assert mocked_sync.called is False
+
+
 def test_update_field_values_by_query(mocked_api):
     """
     Test that the update_field_values_by_query task calls the indexing
@@ -339,7 +401,7 @@ def test_start_recreate_index(
     mocker, mocked_celery, user
 ):  # pylint:disable=too-many-locals
     """
-    recreate_index should recreate the elasticsearch index and reindex all data with it
+    recreate_index should recreate the elasticsearch index and record chunks of all data to index with it
     """
     settings.INDEXING_API_USERNAME = user.username
     settings.ELASTICSEARCH_INDEXING_CHUNK_SIZE = 2
@@ -364,14 +426,7 @@ def test_start_recreate_index(
         key=lambda course: course.id,
     )
     videos = sorted(VideoFactory.create_batch(4), key=lambda video: video.id)
-    index_posts_mock = mocker.patch("search.tasks.index_posts", autospec=True)
-    index_comments_mock = mocker.patch("search.tasks.index_comments", autospec=True)
-    index_profiles_mock = mocker.patch("search.tasks.index_profiles", autospec=True)
-    index_courses_mock = mocker.patch("search.tasks.index_courses", autospec=True)
-    index_videos_mock = mocker.patch("search.tasks.index_videos", autospec=True)
-    index_course_content_mock = mocker.patch(
-        "search.tasks.index_course_content_files", autospec=True
-    )
+    index_chunk_mock = mocker.patch("search.tasks.index_chunk", autospec=True)
     backing_index = "backing"
     create_backing_index_mock = mocker.patch(
         "search.indexing_api.create_backing_index",
@@ -386,48 +441,48 @@ def test_start_recreate_index(
         start_recreate_index.delay()
     for doctype in VALID_OBJECT_TYPES:
         create_backing_index_mock.assert_any_call(doctype)
-    finish_recreate_index_mock.s.assert_called_once_with(
-        {
-            "post": backing_index,
-            "comment": backing_index,
-            "profile": backing_index,
-            "course": backing_index,
-            "bootcamp": backing_index,
-            "program": backing_index,
-            "userlist": backing_index,
-            "video": backing_index,
-        }
-    )
+    run = ReindexRun.objects.get()
+    assert run.backing_indices == {
+        "post": backing_index,
+        "comment": backing_index,
+        "profile": backing_index,
+        "course": backing_index,
+        "bootcamp": backing_index,
+        "program": backing_index,
+        "userlist": backing_index,
+        "video": backing_index,
+    }
+    assert run.status == STATUS_PENDING
+    finish_recreate_index_mock.s.assert_called_once_with(run.id)
     assert mocked_celery.group.call_count == 1
     mock_blacklist.assert_called_once()
 
-    # Celery's 'group' function takes a generator as an argument. In order to make assertions about the items
-    # in that generator, 'list' is being called to force iteration through all of those items.
-    list(mocked_celery.group.call_args[0][0])
-
-    assert index_posts_mock.si.call_count == 2
-    index_posts_mock.si.assert_any_call([posts[0].id, posts[1].id])
-    index_posts_mock.si.assert_any_call([posts[2].id, posts[3].id])
-
-    assert index_comments_mock.si.call_count == 2
-    index_comments_mock.si.assert_any_call([comments[0].id, comments[1].id])
-    index_comments_mock.si.assert_any_call([comments[2].id, comments[3].id])
-
-    assert index_profiles_mock.si.call_count == 4
-    for offset in range(4):
-        index_profiles_mock.si.assert_any_call(
-            [users[offset * 2].profile.id, users[offset * 2 + 1].profile.id]
-        )
-
-    assert index_courses_mock.si.call_count == 4
-    index_courses_mock.si.assert_any_call([courses[0].id, courses[1].id])
-    index_courses_mock.si.assert_any_call([courses[2].id, courses[3].id])
-    index_courses_mock.si.assert_any_call([courses[4].id, courses[5].id])
-    index_courses_mock.si.assert_any_call([courses[6].id])
+    def chunk_ids(task_name):
+        """Get the ids of all chunks recorded for an indexing function"""
+        return [
+            chunk.ids for chunk in run.chunks.filter(task_name=task_name).order_by("id")
+        ]
 
+    assert chunk_ids("index_posts") == [
+        [posts[0].id, posts[1].id],
+        [posts[2].id, posts[3].id],
+    ]
+    assert chunk_ids("index_comments") == [
+        [comments[0].id, comments[1].id],
+        [comments[2].id, comments[3].id],
+    ]
+    assert chunk_ids("index_profiles") == [
+        [users[offset * 2].profile.id, users[offset * 2 + 1].profile.id]
+        for offset in range(4)
+    ]
+    assert chunk_ids("index_courses") == [
+        [courses[0].id, courses[1].id],
+        [courses[2].id, courses[3].id],
+        [courses[4].id, courses[5].id],
+        [courses[6].id],
+    ]
     # chunk size is 2 and there is only one course each for ocw and xpro
-    assert index_course_content_mock.si.call_count == 1
-    index_course_content_mock.si.assert_any_call(
+    assert chunk_ids("index_course_content_files") == [
         [
             *[
                 course.id
@@ -440,35 +495,165 @@ def test_start_recreate_index(
                 if course.platform == PlatformType.xpro.value
             ],
         ]
-    )
+    ]
+    assert chunk_ids("index_videos") == [
+        [videos[0].id, videos[1].id],
+        [videos[2].id, videos[3].id],
+    ]
+    assert set(run.chunks.values_list("status", flat=True)) == {STATUS_PENDING}
 
-    assert index_videos_mock.si.call_count == 2
-    index_videos_mock.si.assert_any_call([videos[0].id, videos[1].id])
-    index_videos_mock.si.assert_any_call([videos[2].id, videos[3].id])
+    assert index_chunk_mock.si.call_count == run.chunks.count()
+    for chunk in run.chunks.all():
+        index_chunk_mock.si.assert_any_call(chunk.id)
 
     assert mocked_celery.replace.call_count == 1
     assert mocked_celery.replace.call_args[0][1] == mocked_celery.chain.return_value
 
 
+@pytest.fixture
+def reindex_run():
+    """A ReindexRun with one succeeded, one failed and one pending chunk"""
+    run = ReindexRun.objects.create(
+        backing_indices={POST_TYPE: "post_backing", COMMENT_TYPE: "comment_backing"},
+        status=STATUS_FAILED,
+    )
+    chunks = [
+        ReindexChunk.objects.create(
+            run=run,
+            object_type=POST_TYPE,
+            task_name="index_posts",
+            ids=[1, 2],
+            status=STATUS_SUCCEEDED,
+        ),
+        ReindexChunk.objects.create(
+            run=run,
+            object_type=POST_TYPE,
+            task_name="index_posts",
+            ids=[3, 4],
+            status=STATUS_FAILED,
+        ),
+        ReindexChunk.objects.create(
+            run=run, object_type=COMMENT_TYPE, task_name="index_comments", ids=[5]
+        ),
+    ]
+    return SimpleNamespace(run=run, chunks=chunks)
+
+
+@pytest.mark.parametrize("with_run_id", [True, False])
+def test_resume_recreate_index(mocker, mocked_celery, reindex_run, with_run_id):
+    """resume_recreate_index should only index the chunks which haven't succeeded"""
+    ReindexRun.objects.create(status=STATUS_SUCCEEDED)
+    index_chunk_mock = mocker.patch("search.tasks.index_chunk", autospec=True)
+    finish_recreate_index_mock = mocker.patch(
+        "search.tasks.finish_recreate_index", autospec=True
+    )
+
+    with pytest.raises(mocked_celery.replace_exception_class):
+        resume_recreate_index.delay(run_id=reindex_run.run.id if with_run_id else None)
+
+    assert index_chunk_mock.si.call_count == 2
+    index_chunk_mock.si.assert_any_call(reindex_run.chunks[1].id)
+    index_chunk_mock.si.assert_any_call(reindex_run.chunks[2].id)
+    finish_recreate_index_mock.s.assert_called_once_with(reindex_run.run.id)
+    reindex_run.run.refresh_from_db()
+    assert reindex_run.run.status == STATUS_PENDING
+
+
+def test_resume_recreate_index_per_object_type(mocker, mocked_celery, reindex_run):
+    """resume_recreate_index should switch the alias for each object type once it's done"""
+    index_chunk_mock = mocker.patch("search.tasks.index_chunk", autospec=True)
+    finish_object_type_mock = mocker.patch(
+        "search.tasks.finish_recreate_object_type", autospec=True
+    )
+    reindex_run.run.switched_object_types = [COMMENT_TYPE]
+    reindex_run.run.save()
+
+    with pytest.raises(mocked_celery.replace_exception_class):
+        resume_recreate_index.delay(per_object_type=True)
+
+    index_chunk_mock.si.assert_called_once_with(reindex_run.chunks[1].id)
+    finish_object_type_mock.s.assert_called_once_with(reindex_run.run.id, POST_TYPE)
+
+
+def test_resume_recreate_index_no_run():
+    """resume_recreate_index should return an error if there is nothing to resume"""
+    ReindexRun.objects.create(status=STATUS_SUCCEEDED)
+    assert resume_recreate_index.delay().get() == (
+        "There is no unfinished recreate_index run to resume"
+    )
+
+
+@pytest.mark.parametrize("with_error", [True, False])
+def test_index_chunk(mocker, reindex_run, with_error):
+    """index_chunk should call the indexing function for the chunk and record the result"""
+    index_posts_mock = mocker.patch("search.indexing_api.index_posts", autospec=True)
+    if with_error:
+        index_posts_mock.side_effect = TabError
+    chunk = reindex_run.chunks[1]
+
+    result = index_chunk.delay(chunk.id).get()
+
+    index_posts_mock.assert_called_once_with([3, 4])
+    chunk.refresh_from_db()
+    if with_error:
+        assert result == "index_posts threw an error"
+        assert chunk.status == STATUS_FAILED
+        assert chunk.error.startswith("index_posts threw an error")
+    else:
+        assert result is None
+        assert chunk.status == STATUS_SUCCEEDED
+        assert chunk.error == ""
+
+
 @pytest.mark.parametrize("with_error", [True, False])
-def test_finish_recreate_index(mocker, with_error):
+def test_finish_recreate_object_type(mocker, reindex_run, with_error):
+    """finish_recreate_object_type should switch the alias for one object type if there were no errors"""
+    switch_indices_mock = mocker.patch(
+        "search.indexing_api.switch_indices", autospec=True
+    )
+    result = finish_recreate_object_type.delay(
+        ["error"] if with_error else [None], reindex_run.run.id, POST_TYPE
+    ).get()
+
+    reindex_run.run.refresh_from_db()
+    if with_error:
+        assert result == ["error"]
+        assert switch_indices_mock.called is False
+        assert reindex_run.run.switched_object_types == []
+    else:
+        assert result == []
+        switch_indices_mock.assert_called_once_with("post_backing", POST_TYPE)
+        assert reindex_run.run.switched_object_types == [POST_TYPE]
+        assert get_watermark(POST_TYPE) == reindex_run.run.created_on
+
+
+@pytest.mark.parametrize("with_error", [True, False])
+def test_finish_recreate_index(mocker, reindex_run, with_error):
     """
     finish_recreate_index should attach the backing index to the default alias
     """
-    backing_indices = {"post": "backing", "comment": "backing", "profile": "backing"}
     results = ["error"] if with_error else []
     switch_indices_mock = mocker.patch(
         "search.indexing_api.switch_indices", autospec=True
     )
+    reindex_run.run.switched_object_types = [COMMENT_TYPE]
+    reindex_run.run.save()
 
     if with_error:
         with pytest.raises(ReindexException):
-            finish_recreate_index.delay(results, backing_indices)
+            finish_recreate_index.delay(results, reindex_run.run.id)
         assert switch_indices_mock.call_count == 0
+        reindex_run.run.refresh_from_db()
+        assert reindex_run.run.status == STATUS_FAILED
     else:
-        finish_recreate_index.delay(results, backing_indices)
-        switch_indices_mock.assert_any_call("backing", POST_TYPE)
-        switch_indices_mock.assert_any_call("backing", COMMENT_TYPE)
+        finish_recreate_index.delay(results, reindex_run.run.id)
+        switch_indices_mock.assert_called_once_with("post_backing", POST_TYPE)
+        reindex_run.run.refresh_from_db()
+        assert reindex_run.run.status == STATUS_SUCCEEDED
+        assert sorted(reindex_run.run.switched_object_types) == sorted(
+            [POST_TYPE, COMMENT_TYPE]
+        )
+        assert get_watermark(POST_TYPE) == reindex_run.run.created_on
 
 
 @pytest.mark.parametrize("with_error", [True, False])
@@ -552,10 +737,10 @@ def test_index_run_content_files(mocker, with_error):
     )
     if with_error:
         index_run_content_files_mock.side_effect = TabError
-    result = index_run_content_files.delay(1).get()
+    result = index_run_content_files.delay(1, content_file_ids=[2]).get()
     assert result == ("index_run_content_files threw an error" if with_error else None)
 
-    index_run_content_files_mock.assert_called_once_with(1)
+    index_run_content_files_mock.assert_called_once_with(1, content_file_ids=[2])
 
 
 @pytest.mark.parametrize("with_error", [True, False])
@@ -566,7 +751,7 @@ def test_delete_run_content_files(mocker, with_error):
     )
     if with_error:
         delete_run_content_files_mock.side_effect = TabError
-    result = delete_run_content_files.delay(1).get()
+    result = delete_run_content_files.delay(1, keys=["a"]).get()
     assert result == ("delete_run_content_files threw an error" if with_error else None)
 
-    delete_run_content_files_mock.assert_called_once_with(1)
+    delete_run_content_files_mock.assert_called_once_with(1, keys=["a"])
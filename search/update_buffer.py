@@ -0,0 +1,331 @@
+"""
+Coalescing buffer for incremental Elasticsearch document updates
+
+Partial updates and increments are pushed onto a shared redis list instead of each
+getting their own celery task. A single flush task is scheduled per buffering window, which
+merges all pending updates per document and sends them to Elasticsearch in one bulk request
+per alias. If sending fails, the popped updates are put back at the front of the buffer and the
+flush task retries. Each requeued update records the aliases it still has to be sent to, so
+increments which were already applied to some aliases aren't applied to them again.
+"""
+from collections import OrderedDict
+import json
+import logging
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from search.connection import get_active_aliases, get_conn
+
+
+log = logging.getLogger(__name__)
+
+PENDING_UPDATES_KEY = "search:pending_updates"
+FLUSH_SCHEDULED_KEY = "search:pending_updates:flush_scheduled"
+# Extra time before the flush lock expires, in case the scheduled flush task is lost
+FLUSH_LOCK_MARGIN_SECONDS = 60
+# Number of times an update for a document that doesn't exist yet is put back into the buffer
+MAX_UPDATE_ATTEMPTS = 5
+
+
+def _get_redis():
+    """
+    Get the redis client used for the buffer
+
+    Returns:
+        redis.Redis: A redis client
+    """
+    return get_redis_connection("redis")
+
+
+def make_update(
+    doc_id, object_type, *, doc=None, increments=None, attempts=0, aliases=None
+):
+    """
+    Make a buffered update for a document
+
+    Args:
+        doc_id (str): The ES document id
+        object_type (str): The object type to update (post, comment, etc)
+        doc (dict): Field values to set
+        increments (dict): Integer field names mapped to the amount to increment them by
+        attempts (int): The number of times this update has already been sent
+        aliases (list of str):
+            The aliases this update still has to be sent to, or None for every active alias
+
+    Returns:
+        dict: The buffered update
+    """
+    return {
+        "doc_id": doc_id,
+        "object_type": object_type,
+        "doc": doc or {},
+        "increments": increments or {},
+        "attempts": attempts,
+        "aliases": aliases,
+    }
+
+
+def _get_aliases_key(update):
+    """
+    Get a hashable value for the aliases an update has to be sent to
+
+    Args:
+        update (dict): An update created by make_update
+
+    Returns:
+        tuple of str: The aliases, or None for every active alias
+    """
+    aliases = update.get("aliases")
+    return tuple(aliases) if aliases is not None else None
+
+
+def _schedule_flush(conn):
+    """
+    Schedule a flush task unless one is already scheduled for the current window
+
+    Args:
+        conn (redis.Redis): A redis client
+    """
+    from search import tasks
+
+    window = settings.ELASTICSEARCH_UPDATE_BUFFER_SECONDS
+    if conn.set(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=window + FLUSH_LOCK_MARGIN_SECONDS):
+        tasks.flush_pending_updates.apply_async(countdown=window)
+
+
+def queue_updates(updates):
+    """
+    Add updates to the buffer and make sure a flush is scheduled
+
+    Args:
+        updates (list of dict): Updates created by make_update
+    """
+    if not updates:
+        return
+    conn = _get_redis()
+    conn.rpush(PENDING_UPDATES_KEY, *[json.dumps(update) for update in updates])
+    _schedule_flush(conn)
+
+
+def queue_partial_update(doc_id, doc, object_type):
+    """
+    Buffer a partial update for a document
+
+    Args:
+        doc_id (str): The ES document id
+        doc (dict): Partial ES document
+        object_type (str): The object type to update (post, comment, etc)
+    """
+    queue_updates([make_update(doc_id, object_type, doc=doc)])
+
+
+def queue_increment(doc_id, field_name, incr_amount, object_type):
+    """
+    Buffer an increment of an integer field for a document
+
+    Args:
+        doc_id (str): The ES document id
+        field_name (str): The name of the field to increment
+        incr_amount (int): The amount to increment by
+        object_type (str): The object type to update (post, comment, etc)
+    """
+    queue_updates(
+        [make_update(doc_id, object_type, increments={field_name: incr_amount})]
+    )
+
+
+def pop_pending_updates():
+    """
+    Atomically remove and return all updates in the buffer
+
+    Returns:
+        list of dict: The buffered updates in the order they were queued
+    """
+    conn = _get_redis()
+    # Clear the flush lock first so that updates arriving from now on schedule another flush
+    conn.delete(FLUSH_SCHEDULED_KEY)
+    pipe = conn.pipeline()
+    pipe.lrange(PENDING_UPDATES_KEY, 0, -1)
+    pipe.delete(PENDING_UPDATES_KEY)
+    raw_updates, _ = pipe.execute()
+    return [json.loads(raw_update) for raw_update in raw_updates]
+
+
+def requeue_updates(updates):
+    """
+    Put updates which couldn't be sent back at the front of the buffer, ahead of any updates
+    queued since they were popped. No flush is scheduled, since the failed flush task retries.
+
+    Args:
+        updates (list of dict): Updates created by make_update, in the order they were queued
+    """
+    if not updates:
+        return
+    conn = _get_redis()
+    # lpush prepends the values one at a time, so they are pushed in reverse
+    conn.lpush(
+        PENDING_UPDATES_KEY, *[json.dumps(update) for update in reversed(updates)]
+    )
+
+
+def merge_updates(updates):
+    """
+    Merge updates so there is at most one update per document and set of target aliases.
+
+    Later field values replace earlier ones, and increments are summed. An increment to a
+    field which already has a pending value is applied to that value.
+
+    Args:
+        updates (iterable of dict): Updates created by make_update, in the order they were queued
+
+    Returns:
+        list of dict: Merged updates, in order of each document's first update
+    """
+    merged = OrderedDict()
+    for update in updates:
+        key = (update["object_type"], update["doc_id"], _get_aliases_key(update))
+        if key not in merged:
+            merged[key] = make_update(
+                update["doc_id"],
+                update["object_type"],
+                attempts=update["attempts"],
+                aliases=update.get("aliases"),
+            )
+        current = merged[key]
+        current["attempts"] = max(current["attempts"], update["attempts"])
+        for field_name, value in update["doc"].items():
+            current["doc"][field_name] = value
+            current["increments"].pop(field_name, None)
+        for field_name, incr_amount in update["increments"].items():
+            if field_name in current["doc"]:
+                current["doc"][field_name] += incr_amount
+            else:
+                current["increments"][field_name] = (
+                    current["increments"].get(field_name, 0) + incr_amount
+                )
+    return list(merged.values())
+
+
+def make_bulk_update_action(update):
+    """
+    Make an action for the bulk API from a merged update
+
+    Args:
+        update (dict): A merged update
+
+    Returns:
+        dict: A bulk API update action
+    """
+    from search.indexing_api import SCRIPTING_LANG
+
+    action = {
+        "_op_type": "update",
+        "_id": update["doc_id"],
+        "retry_on_conflict": settings.INDEXING_ERROR_RETRIES,
+    }
+    if update["increments"]:
+        sources = [
+            "ctx._source['{field}'] = params.doc['{field}']".format(field=field_name)
+            for field_name in update["doc"]
+        ] + [
+            "ctx._source['{field}'] += params.increments['{field}']".format(
+                field=field_name
+            )
+            for field_name in update["increments"]
+        ]
+        action["script"] = {
+            "source": ";".join(sources),
+            "lang": SCRIPTING_LANG,
+            "params": {"doc": update["doc"], "increments": update["increments"]},
+        }
+    else:
+        action["doc"] = update["doc"]
+    return action
+
+
+def _get_target_aliases(object_type, aliases_key):
+    """
+    Get the active aliases which updates have to be sent to
+
+    Args:
+        object_type (str): The object type to update (post, comment, etc)
+        aliases_key (tuple of str): The aliases the updates still have to be sent to, or None
+
+    Returns:
+        list of str: The aliases to send the updates to
+    """
+    return [
+        alias
+        for alias in get_active_aliases(get_conn(), [object_type])
+        if aliases_key is None or alias in aliases_key
+    ]
+
+
+def flush_pending_updates():
+    """
+    Send all buffered updates to Elasticsearch, one bulk request per alias.
+
+    Updates for documents which don't exist yet are put back into the buffer a limited number of
+    times, since the task creating the document may not have run yet. If a bulk request raises an
+    error, the updates which weren't sent yet are put back at the front of the buffer and the
+    error is raised again. Updates which were already sent to some of their aliases are only
+    put back for the remaining aliases.
+
+    Returns:
+        int: The number of merged updates sent
+    """
+    from search import indexing_api
+
+    merged = merge_updates(pop_pending_updates())
+    updates_by_target = OrderedDict()
+    for update in merged:
+        updates_by_target.setdefault(
+            (update["object_type"], _get_aliases_key(update)), []
+        ).append(update)
+
+    retries = []
+    unsent = list(merged)
+    for (object_type, aliases_key), updates in updates_by_target.items():
+        unsent = [
+            update
+            for update in unsent
+            if (update["object_type"], _get_aliases_key(update))
+            != (object_type, aliases_key)
+        ]
+        aliases = _get_target_aliases(object_type, aliases_key)
+        actions = [make_bulk_update_action(update) for update in updates]
+        missing_ids = None
+        for index, alias in enumerate(aliases):
+            try:
+                alias_missing_ids = indexing_api.bulk_update_documents(
+                    actions, object_type, aliases=[alias]
+                )
+            except Exception:
+                requeue_updates(
+                    [{**update, "aliases": aliases[index:]} for update in updates]
+                    + unsent
+                    + retries
+                )
+                raise
+            missing_ids = (
+                alias_missing_ids
+                if missing_ids is None
+                else missing_ids & alias_missing_ids
+            )
+        if aliases:
+            indexing_api.bump_generation_for_visibility(
+                {field_name for update in updates for field_name in update["doc"]}
+            )
+        for update in updates:
+            if update["doc_id"] not in (missing_ids or set()):
+                continue
+            if update["attempts"] + 1 >= MAX_UPDATE_ATTEMPTS:
+                log.error(
+                    "Giving up on buffered update for missing ES document (doc id: %s)",
+                    update["doc_id"],
+                )
+                continue
+            retries.append({**update, "attempts": update["attempts"] + 1})
+    queue_updates(retries)
+    return len(merged)
@@ -0,0 +1,313 @@
+"""Tests for the incremental update buffer"""
+# pylint: disable=redefined-outer-name
+import json
+
+import pytest
+
+from search.constants import COMMENT_TYPE, POST_TYPE, PROFILE_TYPE
+from search.indexing_api import SCRIPTING_LANG
+from search.update_buffer import (
+    FLUSH_SCHEDULED_KEY,
+    MAX_UPDATE_ATTEMPTS,
+    PENDING_UPDATES_KEY,
+    flush_pending_updates,
+    make_bulk_update_action,
+    make_update,
+    merge_updates,
+    pop_pending_updates,
+    queue_increment,
+    queue_partial_update,
+    requeue_updates,
+)
+
+
+@pytest.fixture()
+def mock_redis(mocker):
+    """Mock the redis client used by the update buffer"""
+    conn = mocker.Mock()
+    mocker.patch("search.update_buffer.get_redis_connection", return_value=conn)
+    return conn
+
+
+@pytest.mark.parametrize("flush_scheduled", [True, False])
+def test_queue_updates(mocker, settings, mock_redis, flush_scheduled):
+    """Queued updates should be pushed onto the buffer, and a flush scheduled only once per window"""
+    settings.ELASTICSEARCH_UPDATE_BUFFER_SECONDS = 3
+    mock_redis.set.return_value = not flush_scheduled
+    mock_flush_task = mocker.patch("search.tasks.flush_pending_updates")
+
+    queue_partial_update("doc_1", {"text": "new"}, POST_TYPE)
+    queue_increment("doc_2", "score", 1, COMMENT_TYPE)
+
+    pushed = [json.loads(call[0][1]) for call in mock_redis.rpush.call_args_list]
+    assert pushed == [
+        make_update("doc_1", POST_TYPE, doc={"text": "new"}),
+        make_update("doc_2", COMMENT_TYPE, increments={"score": 1}),
+    ]
+    for call in mock_redis.rpush.call_args_list:
+        assert call[0][0] == PENDING_UPDATES_KEY
+    mock_redis.set.assert_called_with(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=63)
+    if flush_scheduled:
+        assert mock_flush_task.apply_async.called is False
+    else:
+        mock_flush_task.apply_async.assert_called_with(countdown=3)
+
+
+def test_pop_pending_updates(mock_redis):
+    """pop_pending_updates should clear the flush lock and return all buffered updates"""
+    updates = [
+        make_update("doc_1", POST_TYPE, doc={"text": "new"}),
+        make_update("doc_1", POST_TYPE, increments={"score": 1}),
+    ]
+    mock_redis.pipeline.return_value.execute.return_value = [
+        [json.dumps(update) for update in updates],
+        1,
+    ]
+    assert pop_pending_updates() == updates
+    mock_redis.delete.assert_called_once_with(FLUSH_SCHEDULED_KEY)
+
+
+def test_requeue_updates(mock_redis):
+    """requeue_updates should put updates back at the front of the buffer, in order"""
+    updates = [
+        make_update("doc_1", POST_TYPE, doc={"text": "new"}),
+        make_update("doc_2", POST_TYPE, increments={"score": 1}),
+    ]
+    requeue_updates(updates)
+    mock_redis.lpush.assert_called_once_with(
+        PENDING_UPDATES_KEY, json.dumps(updates[1]), json.dumps(updates[0])
+    )
+    mock_redis.set.assert_not_called()
+
+
+def test_merge_updates():
+    """merge_updates should combine updates per document"""
+    assert merge_updates(
+        [
+            make_update("doc_1", POST_TYPE, increments={"score": 1}),
+            make_update("doc_2", POST_TYPE, doc={"text": "first"}),
+            make_update("doc_1", POST_TYPE, increments={"score": 1}),
+            make_update("doc_2", POST_TYPE, doc={"text": "second"}),
+            make_update("doc_1", COMMENT_TYPE, increments={"score": -1}),
+            make_update("doc_1", POST_TYPE, doc={"removed": True}, attempts=2),
+            make_update("doc_2", POST_TYPE, increments={"num_comments": 1}),
+        ]
+    ) == [
+        make_update(
+            "doc_1",
+            POST_TYPE,
+            doc={"removed": True},
+            increments={"score": 2},
+            attempts=2,
+        ),
+        make_update(
+            "doc_2", POST_TYPE, doc={"text": "second"}, increments={"num_comments": 1}
+        ),
+        make_update("doc_1", COMMENT_TYPE, increments={"score": -1}),
+    ]
+
+
+def test_merge_updates_aliases():
+    """Updates which still have to be sent to different aliases should not be merged"""
+    assert merge_updates(
+        [
+            make_update("doc_1", POST_TYPE, increments={"score": 1}, aliases=["a"]),
+            make_update("doc_1", POST_TYPE, increments={"score": 1}),
+            make_update("doc_1", POST_TYPE, increments={"score": 1}, aliases=["a"]),
+        ]
+    ) == [
+        make_update("doc_1", POST_TYPE, increments={"score": 2}, aliases=["a"]),
+        make_update("doc_1", POST_TYPE, increments={"score": 1}),
+    ]
+
+
+def test_merge_updates_value_then_increment():
+    """An increment after a value for the same field should be applied to that value"""
+    assert merge_updates(
+        [
+            make_update("doc_1", POST_TYPE, increments={"score": 5}),
+            make_update("doc_1", POST_TYPE, doc={"score": 1, "text": "a"}),
+            make_update("doc_1", POST_TYPE, increments={"score": 1}),
+        ]
+    ) == [make_update("doc_1", POST_TYPE, doc={"score": 2, "text": "a"})]
+
+
+def test_make_bulk_update_action_partial(settings):
+    """make_bulk_update_action should make a partial document update"""
+    settings.INDEXING_ERROR_RETRIES = 2
+    assert make_bulk_update_action(
+        make_update("doc_1", POST_TYPE, doc={"text": "new"})
+    ) == {
+        "_op_type": "update",
+        "_id": "doc_1",
+        "retry_on_conflict": 2,
+        "doc": {"text": "new"},
+    }
+
+
+def test_make_bulk_update_action_script(settings):
+    """make_bulk_update_action should use a script when there are increments"""
+    settings.INDEXING_ERROR_RETRIES = 2
+    action = make_bulk_update_action(
+        make_update("doc_1", POST_TYPE, doc={"removed": True}, increments={"score": 3})
+    )
+    assert action == {
+        "_op_type": "update",
+        "_id": "doc_1",
+        "retry_on_conflict": 2,
+        "script": {
+            "source": "ctx._source['removed'] = params.doc['removed'];"
+            "ctx._source['score'] += params.increments['score']",
+            "lang": SCRIPTING_LANG,
+            "params": {"doc": {"removed": True}, "increments": {"score": 3}},
+        },
+    }
+
+
+@pytest.fixture()
+def mock_aliases(mocker):
+    """Mock the active aliases for each object type"""
+    mocker.patch("search.update_buffer.get_conn", autospec=True)
+    return mocker.patch(
+        "search.update_buffer.get_active_aliases",
+        autospec=True,
+        side_effect=lambda conn, object_types: [
+            "{}_default".format(object_types[0]),
+            "{}_reindexing".format(object_types[0]),
+        ],
+    )
+
+
+@pytest.mark.parametrize("attempts", [0, MAX_UPDATE_ATTEMPTS - 1])
+@pytest.mark.usefixtures("mock_aliases")
+def test_flush_pending_updates(mocker, attempts):
+    """flush_pending_updates should send one bulk update per alias and retry missing documents"""
+    updates = [
+        make_update("doc_1", POST_TYPE, increments={"score": 1}),
+        make_update("doc_2", POST_TYPE, doc={"text": "new"}, attempts=attempts),
+        make_update("doc_1", POST_TYPE, increments={"score": 1}),
+        make_update("doc_3", COMMENT_TYPE, doc={"text": "comment"}),
+    ]
+    mocker.patch(
+        "search.update_buffer.pop_pending_updates", autospec=True, return_value=updates
+    )
+    mock_bulk_update = mocker.patch(
+        "search.indexing_api.bulk_update_documents",
+        autospec=True,
+        side_effect=[{"doc_1", "doc_2"}, {"doc_2"}, set(), {"doc_3"}],
+    )
+    mock_queue_updates = mocker.patch(
+        "search.update_buffer.queue_updates", autospec=True
+    )
+
+    assert flush_pending_updates() == 3
+
+    merged = merge_updates(updates)
+    post_actions = [make_bulk_update_action(update) for update in merged[:2]]
+    comment_actions = [make_bulk_update_action(merged[2])]
+    assert mock_bulk_update.call_args_list == [
+        mocker.call(post_actions, POST_TYPE, aliases=["post_default"]),
+        mocker.call(post_actions, POST_TYPE, aliases=["post_reindexing"]),
+        mocker.call(comment_actions, COMMENT_TYPE, aliases=["comment_default"]),
+        mocker.call(comment_actions, COMMENT_TYPE, aliases=["comment_reindexing"]),
+    ]
+    mock_queue_updates.assert_called_once_with(
+        [{**merged[1], "attempts": attempts + 1}]
+        if attempts + 1 < MAX_UPDATE_ATTEMPTS
+        else []
+    )
+
+
+@pytest.mark.usefixtures("mock_aliases")
+def test_flush_pending_updates_error(mocker):
+    """If a bulk request fails, the updates which weren't sent should be put back into the buffer"""
+    updates = [
+        make_update("doc_1", POST_TYPE, increments={"score": 1}),
+        make_update("doc_2", COMMENT_TYPE, increments={"score": 1}),
+        make_update("doc_3", PROFILE_TYPE, doc={"author_name": "name"}),
+    ]
+    mocker.patch(
+        "search.update_buffer.pop_pending_updates", autospec=True, return_value=updates
+    )
+    mocker.patch(
+        "search.indexing_api.bulk_update_documents",
+        autospec=True,
+        side_effect=[{"doc_1"}, {"doc_1"}, set(), ConnectionError("unreachable")],
+    )
+    mock_requeue_updates = mocker.patch(
+        "search.update_buffer.requeue_updates", autospec=True
+    )
+    mock_queue_updates = mocker.patch(
+        "search.update_buffer.queue_updates", autospec=True
+    )
+
+    with pytest.raises(ConnectionError):
+        flush_pending_updates()
+
+    mock_requeue_updates.assert_called_once_with(
+        [
+            {**updates[1], "aliases": ["comment_reindexing"]},
+            updates[2],
+            {**updates[0], "attempts": 1},
+        ]
+    )
+    mock_queue_updates.assert_not_called()
+
+
+@pytest.mark.usefixtures("mock_aliases")
+def test_flush_pending_updates_requeued_aliases(mocker):
+    """Updates which were requeued for some aliases should only be sent to those aliases"""
+    updates = [
+        make_update("doc_1", POST_TYPE, increments={"score": 1}),
+        make_update(
+            "doc_1", POST_TYPE, increments={"score": 2}, aliases=["post_reindexing"]
+        ),
+    ]
+    mocker.patch(
+        "search.update_buffer.pop_pending_updates", autospec=True, return_value=updates
+    )
+    mock_bulk_update = mocker.patch(
+        "search.indexing_api.bulk_update_documents", autospec=True, return_value=set()
+    )
+    mocker.patch("search.update_buffer.queue_updates", autospec=True)
+
+    assert flush_pending_updates() == 2
+
+    assert mock_bulk_update.call_args_list == [
+        mocker.call(
+            [make_bulk_update_action(updates[0])], POST_TYPE, aliases=["post_default"]
+        ),
+        mocker.call(
+            [make_bulk_update_action(updates[0])],
+            POST_TYPE,
+            aliases=["post_reindexing"],
+        ),
+        mocker.call(
+            [make_bulk_update_action(updates[1])],
+            POST_TYPE,
+            aliases=["post_reindexing"],
+        ),
+    ]
+
+
+@pytest.mark.usefixtures("mock_aliases")
+def test_flush_pending_updates_visibility(mocker):
+    """flush_pending_updates should pass the updated fields on to invalidate cached responses"""
+    updates = [
+        make_update("doc_1", POST_TYPE, doc={"removed": True}),
+        make_update("doc_2", POST_TYPE, increments={"score": 1}),
+    ]
+    mocker.patch(
+        "search.update_buffer.pop_pending_updates", autospec=True, return_value=updates
+    )
+    mocker.patch(
+        "search.indexing_api.bulk_update_documents", autospec=True, return_value=set()
+    )
+    mock_bump = mocker.patch(
+        "search.indexing_api.bump_generation_for_visibility", autospec=True
+    )
+    mocker.patch("search.update_buffer.queue_updates", autospec=True)
+
+    flush_pending_updates()
+
+    mock_bump.assert_called_once_with({"removed"})